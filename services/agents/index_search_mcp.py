@@ -21,7 +21,8 @@ if project_root not in sys.path:
     sys.path.insert(0, project_root)
 
 from mcp.server.fastmcp import FastMCP
-from services.utils.graph_service import GraphService
+from services.utils.graph_pool import get_graph_pool
+from services.utils.usage_accumulator import UsageAccumulator, spool_usage
 # NY IMPORT: Använd VectorService (Single Source of Truth)
 from services.utils.vector_service import get_vector_service
 
@@ -44,6 +45,7 @@ LAKE_PATH = os.path.expanduser(PATHS.get('lake_dir', '~/MyMemory/Lake'))
 
 # Search limits och tröskelvärden från config
 GRAPH_SEARCH_LIMIT = SEARCH_CONFIG.get('graph_limit', 15)
+SUBGRAPH_NODE_LIMIT = SEARCH_CONFIG.get('subgraph_limit', 60)
 VECTOR_DISTANCE_STRONG = SEARCH_CONFIG.get('distance_strong', 0.8)
 VECTOR_DISTANCE_WEAK = SEARCH_CONFIG.get('distance_weak', 1.2)
 
@@ -51,6 +53,17 @@ mcp = FastMCP("MyMemoryTrinityConsole")
 
 # --- HELPERS ---
 
+def _graph():
+    """Låna processens delade read-only GraphService (se GraphPool)."""
+    return get_graph_pool(GRAPH_PATH).acquire()
+
+# Användning (Relevans) buffras och spoolas i bakgrunden - servern skriver aldrig i grafen,
+# dreamer_daemon applicerar spoolen (drain_usage_spool)
+USAGE = UsageAccumulator(
+    lambda batch: spool_usage(GRAPH_PATH, batch),
+    flush_interval=SEARCH_CONFIG.get('usage_flush_interval', 30.0)
+)
+
 def _parse_frontmatter(file_path: str) -> Dict:
     """Läser YAML-frontmatter från en markdown-fil."""
     try:
@@ -76,7 +89,8 @@ def search_graph_nodes(query: str, node_type: str = None) -> str:
     - Kolla om en organisation finns: query="Acme AB", node_type="Organization"
     - Söka på e-post eller andra properties: query="johan@example.com"
 
-    Söker i: id, aliases, och hela properties (name, email, node_context, etc.)
+    Söker i: name, aliases, e-post, id och node_context (rankat, bästa träff först).
+    Ord om minst tre tecken matchar även som prefix ("Joh" hittar "Johan").
 
     SKILLNAD MOT query_vector_memory:
     - search_graph_nodes = "Finns noden X?" (exakt matchning)
@@ -86,32 +100,35 @@ def search_graph_nodes(query: str, node_type: str = None) -> str:
     använd sedan get_entity_summary eller get_neighbor_network för detaljer.
     """
     try:
-        # GraphService använder DuckDB internt och är robust
-        graph = GraphService(GRAPH_PATH, read_only=True)
         limit = GRAPH_SEARCH_LIMIT
 
-        # Sök i id, aliases OCH hela properties-JSON
-        sql = "SELECT id, type, aliases, properties FROM nodes WHERE (id ILIKE ? OR aliases ILIKE ? OR properties ILIKE ?)"
-        params = [f"%{query}%", f"%{query}%", f"%{query}%"]
+        with _graph() as graph:
+            if graph.search_index_is_fresh():
+                # Rankat sökindex (BM25 över name, aliases, email, id, node_context)
+                nodes = graph.search_nodes(query, node_type=node_type, limit=limit, with_context=True)
+            else:
+                # Fallback när indexet saknas/är inaktuellt: ILIKE i id, aliases OCH hela properties-JSON
+                sql = ("SELECT id, type, aliases, properties FROM nodes WHERE "
+                       "(id ILIKE ? OR array_to_string(aliases, ' ') ILIKE ? OR CAST(properties AS VARCHAR) ILIKE ?)")
+                params = [f"%{query}%", f"%{query}%", f"%{query}%"]
 
-        if node_type:
-            sql += " AND type = ?"
-            params.append(node_type)
+                if node_type:
+                    sql += " AND type = ?"
+                    params.append(node_type)
 
-        sql += " LIMIT ?"
-        params.append(limit)
+                sql += " LIMIT ?"
+                params.append(limit)
 
-        rows = graph.conn.execute(sql, params).fetchall()
-        graph.close()
-        
-        if not rows:
+                nodes = graph.attach_node_context(graph._fetch_nodes(sql, params))
+
+        if not nodes:
             return f"GRAF: Inga träffar för '{query}'" + (f" (Typ: {node_type})" if node_type else "")
 
-        output = [f"=== GRAF RESULTAT ({len(rows)}) ==="]
-        for r in rows:
-            node_id, n_type, aliases_raw, props_raw = r
-            props = json.loads(props_raw) if props_raw else {}
-            aliases = json.loads(aliases_raw) if aliases_raw else []
+        output = [f"=== GRAF RESULTAT ({len(nodes)}) ==="]
+        for n in nodes:
+            node_id, n_type = n['id'], n['type']
+            props = n.get('properties', {})
+            aliases = n.get('aliases', [])
             
             # Formatera output för läsbarhet
             name = props.get('name', node_id)
@@ -156,14 +173,16 @@ def query_vector_memory(query_text: str, n_results: int = 5) -> str:
     ❌ "Johan" (använd search_graph_nodes för exakta namn)
 
     Returnerar: Entiteter rankade efter semantisk likhet med din fråga.
+    Långa dokument indexeras i stycken; varje dokument visas en gång med
+    sitt bästa stycke och dess offset (läs vidare med read_document_content).
     """
     try:
         # 1. Hämta Singleton för Knowledge Base (samma som indexeraren använder)
         # Vi ber explicit om "knowledge_base" enligt din instruktion
         vs = get_vector_service("knowledge_base")
         
-        # 2. Sök (VectorService returnerar en ren lista med dicts)
-        results = vs.search(query_text=query_text, limit=n_results)
+        # 2. Sök (VectorService returnerar en ren lista med dicts, bästa chunk per dokument)
+        results = vs.search_documents(query_text=query_text, limit=n_results)
         
         if not results:
             return f"VEKTOR: Inga semantiska matchningar för '{query_text}'."
@@ -179,7 +198,8 @@ def query_vector_memory(query_text: str, n_results: int = 5) -> str:
             content = item['document']
             uid = item['id']
             
-            content_preview = content.replace('\n', ' ')[:150] + "..."
+            # Visa den matchade texten, inte FILENAME/SUMMARY-prefixet
+            content_preview = content.split("CONTENT:\n", 1)[-1].replace('\n', ' ')[:150] + "..."
             
             # Bedöm kvalitet (lägre distans = bättre)
             quality = "🔥 Stark" if dist < VECTOR_DISTANCE_STRONG else "❄️ Svag" if dist > VECTOR_DISTANCE_WEAK else "☁️ Medel"
@@ -188,6 +208,10 @@ def query_vector_memory(query_text: str, n_results: int = 5) -> str:
             output.append(f"   Fil: {meta.get('filename', 'Unknown')}")
             output.append(f"   Content: \"{content_preview}\"")
             output.append(f"   ID: {uid}")
+            if meta.get('chunk_count', 1) > 1:
+                offset = meta.get('chunk_offset', 0)
+                output.append(f"   Stycke: {meta.get('chunk_index', 0) + 1}/{meta['chunk_count']} "
+                              f"(offset {offset}) → read_document_content(doc_id=\"{uid}\", offset={offset})")
             output.append("---")
             
         return "\n".join(output)
@@ -412,36 +436,19 @@ def get_neighbor_network(node_id: str) -> str:
     - "Hur hänger dessa entiteter ihop?"
     """
     try:
-        graph = GraphService(GRAPH_PATH, read_only=True)
+        with _graph() as graph:
+            # Hämta huvudnoden
+            center_node = graph.get_node(node_id)
+            if not center_node:
+                return f"Noden '{node_id}' hittades inte."
 
-        # Hämta huvudnoden
-        center_node = graph.get_node(node_id)
-        if not center_node:
-            graph.close()
-            return f"Noden '{node_id}' hittades inte."
+            # Kanter + grannarnas namn i en fråga
+            neighbor_edges = graph.get_neighbor_edges(node_id)
 
-        # Hämta kanter
-        out_edges = graph.get_edges_from(node_id)
-        in_edges = graph.get_edges_to(node_id)
-
-        # Samla grann-IDn för namnuppslag
-        neighbor_ids = set()
-        for e in out_edges:
-            neighbor_ids.add(e['target'])
-        for e in in_edges:
-            neighbor_ids.add(e['source'])
-
-        # Hämta namn på grannar
-        neighbor_map = {}
-        for nid in neighbor_ids:
-            n = graph.get_node(nid)
-            if n:
-                props = n.get('properties', {})
-                neighbor_map[nid] = props.get('name', nid)
-            else:
-                neighbor_map[nid] = nid
+        USAGE.record([node_id])
 
-        graph.close()
+        out_edges = [e for e in neighbor_edges if e['direction'] == 'out']
+        in_edges = [e for e in neighbor_edges if e['direction'] == 'in']
 
         # Formatera output
         c_props = center_node.get('properties', {})
@@ -452,14 +459,12 @@ def get_neighbor_network(node_id: str) -> str:
         if out_edges:
             output.append("\n--> UTGÅENDE:")
             for e in out_edges:
-                target_name = neighbor_map.get(e['target'], e['target'])
-                output.append(f"   [{e['type']}] -> {target_name}")
+                output.append(f"   [{e['type']}] -> {e['neighbor_name']}")
 
         if in_edges:
             output.append("\n<-- INKOMMANDE:")
             for e in in_edges:
-                source_name = neighbor_map.get(e['source'], e['source'])
-                output.append(f"   {source_name} -> [{e['type']}]")
+                output.append(f"   {e['neighbor_name']} -> [{e['type']}]")
 
         if not out_edges and not in_edges:
             output.append("   (Inga kopplingar - Isolerad nod)")
@@ -470,6 +475,61 @@ def get_neighbor_network(node_id: str) -> str:
         return f"Nätverksutforskning misslyckades: {e}"
 
 
+# --- TOOL 5B: SUBGRAPH (Multi-hop) ---
+
+@mcp.tool()
+def get_subgraph(node_ids: List[str], depth: int = 2, edge_types: List[str] = None) -> str:
+    """
+    Hämta nätverket FLERA steg ut från en eller flera entiteter – i ett anrop.
+
+    RETURNERAR:
+    - Noder med avstånd (antal hopp) från startnoderna
+    - Alla relationer mellan de hittade noderna
+
+    ANVÄND FÖR:
+    - "Vem är två steg från projekt X?" → get_subgraph(["<projekt-id>"], depth=2)
+    - "Hur hänger A och B ihop?" → get_subgraph(["<A-id>", "<B-id>"], depth=2)
+
+    Ersätter en kedja av get_neighbor_network-anrop. Max djup är 4; hubbar
+    (noder med väldigt många kanter) begränsas automatiskt.
+
+    Args:
+        node_ids: Start-noder (från search_graph_nodes)
+        depth: Antal hopp (1-4)
+        edge_types: Följ bara dessa relationstyper, t.ex. ["WORKS_AT"] (valfritt)
+    """
+    try:
+        with _graph() as graph:
+            subgraph = graph.get_subgraph(node_ids, depth=depth, edge_types=edge_types,
+                                          limit=SUBGRAPH_NODE_LIMIT)
+
+        nodes = subgraph["nodes"]
+        if not nodes:
+            return f"Inga noder hittades för {node_ids}."
+
+        USAGE.record([n['id'] for n in nodes if n['depth'] == 0])
+
+        names = {n['id']: n.get('properties', {}).get('name', n['id']) for n in nodes}
+
+        output = [f"=== SUBGRAF: {len(nodes)} noder, {len(subgraph['edges'])} relationer (djup {depth}) ==="]
+        output.append("\nNODER (hopp):")
+        for n in nodes:
+            output.append(f"   [{n['depth']}] {names[n['id']]} ({n['type']}) ID: {n['id']}")
+
+        if subgraph["edges"]:
+            output.append("\nRELATIONER:")
+            for e in subgraph["edges"]:
+                output.append(f"   {names[e['source']]} -> [{e['type']}] -> {names[e['target']]}")
+
+        if len(nodes) >= SUBGRAPH_NODE_LIMIT:
+            output.append(f"\n(Begränsat till {SUBGRAPH_NODE_LIMIT} noder - minska depth eller filtrera edge_types)")
+
+        return "\n".join(output)
+
+    except Exception as e:
+        return f"Subgraf-hämtning misslyckades: {e}"
+
+
 # --- TOOL 6: ENTITY SUMMARY ---
 
 @mcp.tool()
@@ -491,13 +551,14 @@ def get_entity_summary(node_id: str) -> str:
     Perfekt för att svara på "Berätta allt du vet om X".
     """
     try:
-        graph = GraphService(GRAPH_PATH, read_only=True)
-        node = graph.get_node(node_id)
+        with _graph() as graph:
+            node = graph.get_node(node_id, with_context=True)
 
         if not node:
-            graph.close()
             return f"Noden '{node_id}' hittades inte."
 
+        USAGE.record([node_id])
+
         props = node.get('properties', {})
         name = props.get('name', node_id)
 
@@ -536,7 +597,6 @@ def get_entity_summary(node_id: str) -> str:
         else:
             output.append("(Ingen kontext lagrad)")
 
-        graph.close()
         return "\n".join(output)
 
     except Exception as e:
@@ -552,9 +612,8 @@ def get_graph_statistics() -> str:
     Visar antal noder och kanter per typ.
     """
     try:
-        graph = GraphService(GRAPH_PATH, read_only=True)
-        stats = graph.get_stats()
-        graph.close()
+        with _graph() as graph:
+            stats = graph.get_stats()
 
         output = ["=== GRAF STATISTIK ==="]
         output.append(f"Totalt antal noder: {stats['total_nodes']}")
@@ -681,6 +740,18 @@ def parse_relative_date(expression: str) -> str:
 
 # --- TOOL 9: READ DOCUMENT CONTENT (Smart Truncation) ---
 
+def _split_frontmatter(content: str) -> tuple:
+    """
+    (frontmatter, body) för en Lake-fil. body är samma text som indexeras
+    i vektorminnet, så chunk_offset från query_vector_memory pekar in i den.
+    """
+    if content.startswith('---'):
+        end_idx = content.find('\n---', 3)
+        if end_idx != -1:
+            return content[:end_idx + 4], content[end_idx + 4:].lstrip('\n')
+    return "", content
+
+
 def _smart_truncate(content: str, max_length: int, tail_ratio: float = 0.2) -> tuple:
     """
     Intelligent trunkering som bevarar frontmatter + head + tail.
@@ -688,14 +759,7 @@ def _smart_truncate(content: str, max_length: int, tail_ratio: float = 0.2) -> t
     if len(content) <= max_length:
         return content, False
 
-    frontmatter = ""
-    body = content
-
-    if content.startswith('---'):
-        end_idx = content.find('\n---', 3)
-        if end_idx != -1:
-            frontmatter = content[:end_idx + 4]
-            body = content[end_idx + 4:].lstrip('\n')
+    frontmatter, body = _split_frontmatter(content)
 
     available = max_length - len(frontmatter) - 100
 
@@ -726,7 +790,8 @@ def _smart_truncate(content: str, max_length: int, tail_ratio: float = 0.2) -> t
 
 
 @mcp.tool()
-def read_document_content(doc_id: str, max_length: int = 8000, section: str = "smart") -> str:
+def read_document_content(doc_id: str, max_length: int = 8000, section: str = "smart",
+                          offset: int = None) -> str:
     """
     Läs källdokument – hämta originaltext från Lake.
 
@@ -744,6 +809,8 @@ def read_document_content(doc_id: str, max_length: int = 8000, section: str = "s
     ANVÄNDNING:
     1. Hitta dokument via search_by_date_range eller search_lake_metadata
     2. read_document_content(doc_id="uuid-eller-filnamn")
+    3. Från query_vector_memory: read_document_content(doc_id, offset=N)
+       hoppar direkt till det matchade stycket
 
     BRA FÖR: Verifiera information, hitta exakta citat, förstå kontext.
 
@@ -751,6 +818,8 @@ def read_document_content(doc_id: str, max_length: int = 8000, section: str = "s
         doc_id: Dokumentets UUID eller filnamn
         max_length: Max antal tecken (default 8000)
         section: "smart" (default), "head", "tail", eller "full"
+        offset: Teckenposition i dokumentkroppen (från query_vector_memory).
+                Visar max_length tecken därifrån; section ignoreras.
     """
     try:
         # Hitta filen
@@ -788,6 +857,20 @@ def read_document_content(doc_id: str, max_length: int = 8000, section: str = "s
         full_length = len(content)
         header = f"=== DOKUMENT: {filename} ({full_length:,} tecken) ==="
 
+        if offset is not None:
+            _, body = _split_frontmatter(content)
+            start = min(max(0, offset), len(body))
+            # Börja på radens början om den ligger nära
+            line_start = body.rfind('\n', max(0, start - 200), start) + 1
+            if line_start > 0:
+                start = line_start
+            excerpt = body[start:start + max_length]
+            before = f"[... {start:,} tecken före ...]\n\n" if start > 0 else ""
+            remaining = len(body) - start - len(excerpt)
+            after = f"\n\n... [TRUNKERAD - {remaining:,} tecken kvar]" if remaining > 0 else ""
+            return (f"{header}\n[LÄGE: offset - visar {len(excerpt):,} tecken från position {start:,} "
+                    f"av {len(body):,} i dokumentkroppen]\n\n{before}{excerpt}{after}")
+
         if section == "full" or full_length <= max_length:
             return f"{header}\n\n{content}"
 
@@ -9,6 +9,7 @@ Responsibilities:
 - Scan candidates for refinement (80/20 strategy)
 - Structural analysis (SPLIT, RENAME, DELETE, RE-CATEGORIZE)
 - Entity resolution (MERGE duplicates)
+- Garbage collection (dangling edges, orphans per healing_policy)
 - Propagate changes back to Lake/Vector
 """
 
@@ -58,6 +59,35 @@ def _load_dreamer_config() -> dict:
 
 DREAMER_CONFIG = _load_dreamer_config()
 
+# Lake files are named <name>_<unit uuid>.md (the uuid is the Document node id)
+LAKE_UNIT_ID_PATTERN = re.compile(
+    r'_([0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12})\.md$'
+)
+
+
+def healing_policies() -> Dict[str, Dict]:
+    """healing_policy per node type from the graph schema (input to GraphService.collect_garbage)."""
+    nodes = get_schema_validator().schema.get("nodes", {})
+    return {node_type: node_def["healing_policy"] for node_type, node_def in nodes.items()
+            if node_def.get("healing_policy")}
+
+
+def lake_document_ids(lake_path: str) -> set | None:
+    """
+    Unit ids of all files in the Lake, or None if the Lake cannot be read.
+
+    An empty or missing Lake also returns None: a missing mount must not
+    make every Document node look orphaned.
+    """
+    if not lake_path or not os.path.isdir(lake_path):
+        return None
+    ids = set()
+    for filename in os.listdir(lake_path):
+        match = LAKE_UNIT_ID_PATTERN.search(filename)
+        if match:
+            ids.add(match.group(1))
+    return ids or None
+
 
 class Dreamer:
     """
@@ -100,22 +130,24 @@ class Dreamer:
         Returns:
             (all_valid: bool, invalid_edges: list of edge descriptions)
         """
-        edges_out = self.graph_service.get_edges_from(node_id)
-        edges_in = self.graph_service.get_edges_to(node_id)
-        all_edges = edges_out + edges_in
+        # Edges and neighbor types in one query (no get_node per neighbor)
+        neighbor_edges = self.graph_service.get_neighbor_edges(node_id)
 
-        if not all_edges:
+        if not neighbor_edges:
             return (True, [])
 
         validator = get_schema_validator()
         invalid_edges = []
 
-        for edge in all_edges:
-            # Build nodes_map with the NEW type for this node
-            source_type = new_type if edge["source"] == node_id else self._get_node_type_for_id(edge["source"])
-            target_type = new_type if edge["target"] == node_id else self._get_node_type_for_id(edge["target"])
+        for neighbor_edge in neighbor_edges:
+            neighbor = neighbor_edge["neighbor"]
+            if neighbor_edge["direction"] == "out":
+                edge = {"source": node_id, "target": neighbor, "type": neighbor_edge["type"]}
+            else:
+                edge = {"source": neighbor, "target": node_id, "type": neighbor_edge["type"]}
 
-            nodes_map = {edge["source"]: source_type, edge["target"]: target_type}
+            # Build nodes_map with the NEW type for this node
+            nodes_map = {neighbor: neighbor_edge["neighbor_type"] or "Unknown", node_id: new_type}
             ok, msg = validator.validate_edge(edge, nodes_map)
 
             if not ok:
@@ -124,12 +156,41 @@ class Dreamer:
 
         return (len(invalid_edges) == 0, invalid_edges)
 
-    def _get_node_type_for_id(self, node_id: str) -> str:
-        """Get type for a node from the graph."""
-        node = self.graph_service.get_node(node_id)
-        if node:
-            return node.get("type", "Unknown")
-        return "Unknown"
+    def _refresh_adjacency(self):
+        """Rebuild the graph's adjacency cache if enabled and stale (see GraphService.adjacency)."""
+        if self.graph_service.adjacency_cache:
+            self.graph_service.adjacency()
+
+    def _refresh_metrics(self, dry_run: bool):
+        """Recompute node_metrics (degree, PageRank, components) before candidate selection."""
+        if dry_run or self.graph_service.read_only:
+            return
+        try:
+            self.graph_service.compute_node_metrics()
+        except Exception as e:
+            # Stale metrics only affect ordering; the DELETE guard re-checks live degree
+            LOGGER.warning(f"Node metrics refresh failed, using previous values: {e}")
+
+    def collect_garbage(self, dry_run: bool) -> Dict[str, Any]:
+        """
+        Remove dangling edges, Document nodes without a Lake file and orphans
+        per the schema's healing_policy (see GraphService.collect_garbage).
+        Removed nodes are also dropped from the vector index.
+        """
+        if self.graph_service.read_only or not DREAMER_CONFIG.get('gc', {}).get('enabled', True):
+            return {}
+        report = self.graph_service.collect_garbage(
+            policies=healing_policies(),
+            document_ids=lake_document_ids(self._get_lake_path()),
+            dry_run=dry_run,
+        )
+        if not dry_run:
+            removed = [o["id"] for o in report["orphans"] if o["action"] == "remove"]
+            try:
+                self.vector_service.delete_many(removed + report["documents_without_source"])
+            except Exception as e:
+                LOGGER.warning(f"Could not delete vectors for collected nodes: {e}")
+        return report
 
     def scan_candidates(self) -> List[Dict]:
         """
@@ -148,41 +209,59 @@ class Dreamer:
         """Ensure node exists in vector index before searching."""
         self.vector_service.upsert_node(node)
 
-    def find_potential_matches(self, node: Dict) -> List[Dict]:
-        """Find potential duplicates for a given node using SEMANTIC SEARCH."""
-        self.ensure_node_indexed(node)
-
+    def _match_query(self, node: Dict) -> str:
+        """Search string for duplicate lookup (Name + Type + Context), empty if the node has no name."""
         name = node.get("properties", {}).get("name", "")
         if not name:
-            return []
+            return ""
 
-        # Build search string (Name + Type + Context)
         search_text = f"{name} {node.get('type')}"
         node_context = node.get("properties", {}).get("node_context", [])
         if node_context and isinstance(node_context, list):
             ctx_texts = [c.get('text', '') for c in node_context if isinstance(c, dict)]
             search_text += " " + " ".join(ctx_texts)
+        return search_text
+
+    def find_potential_matches(self, node: Dict) -> List[Dict]:
+        """Find potential duplicates for a given node using SEMANTIC SEARCH."""
+        return self.find_potential_matches_many([node])[0]
+
+    def find_potential_matches_many(self, nodes: List[Dict]) -> List[List[Dict]]:
+        """
+        Batched find_potential_matches: all nodes are indexed with one
+        upsert_nodes, searched with one search_many and the hits are read
+        with one get_nodes. Returns one match list per node, in order.
+        """
+        self.vector_service.upsert_nodes(nodes)
 
-        # Semantic search
         vector_limit = DREAMER_CONFIG.get('vector_search_limit', 10)
-        results = self.vector_service.search(search_text, limit=vector_limit)
+        # Only graph nodes: document chunks would otherwise fill the top-k
+        results = self.vector_service.search_many(
+            [self._match_query(node) for node in nodes], limit=vector_limit, where={"source": "graph_node"}
+        )
+        hits = self.graph_service.get_nodes(
+            [res['id'] for node_results in results for res in node_results], with_context=True
+        )
 
-        valid_matches = []
-        for res in results:
-            match_id = res['id']
-            if match_id == node["id"]:
-                continue
+        all_matches = []
+        for node, node_results in zip(nodes, results):
+            valid_matches = []
+            for res in node_results:
+                match_id = res['id']
+                if match_id == node["id"]:
+                    continue
 
-            match_node = self.graph_service.get_node(match_id)
-            if not match_node:
-                continue
+                match_node = hits.get(match_id)
+                if not match_node:
+                    continue
 
-            if match_node["type"] != node["type"]:
-                continue
+                if match_node["type"] != node["type"]:
+                    continue
 
-            valid_matches.append(match_node)
+                valid_matches.append(match_node)
+            all_matches.append(valid_matches)
 
-        return valid_matches
+        return all_matches
 
     def _prepare_node_for_llm(self, node: Dict) -> Dict:
         """Clean node from technical metadata before sending to LLM."""
@@ -298,7 +377,7 @@ class Dreamer:
 
     def prune_context(self, node_id: str):
         """Condense node_context for a node if list is too long."""
-        node = self.graph_service.get_node(node_id)
+        node = self.graph_service.get_node(node_id, with_context=True)
         if not node:
             return
 
@@ -338,9 +417,7 @@ class Dreamer:
                 pruned_texts = set(result["pruned_keywords"])
                 new_context = [c for c in node_context if c.get('text') in pruned_texts]
 
-                props = node.get('properties', {})
-                props['node_context'] = new_context
-                self.graph_service.upsert_node(node['id'], node['type'], node.get('aliases'), props)
+                self.graph_service.set_node_context(node['id'], new_context)
                 LOGGER.info(f"Pruned to {len(new_context)} context entries.")
 
         except Exception as e:
@@ -365,8 +442,12 @@ class Dreamer:
         - Phase 1: Batch structural analysis for all candidates
         - Phase 2: Batch merge evaluation for all candidate-match pairs
         """
+        # Garbage first, so metrics and candidates only see live nodes
+        gc_report = self.collect_garbage(dry_run)
+        self._refresh_metrics(dry_run)
         candidates = self.scan_candidates()
-        stats = {"merged": 0, "split": 0, "renamed": 0, "recat": 0, "deleted": 0}
+        stats = {"merged": 0, "split": 0, "renamed": 0, "recat": 0, "deleted": 0,
+                 "collected": gc_report.get("removed_nodes", 0)}
         affected_units = set()
 
         if not candidates:
@@ -385,6 +466,11 @@ class Dreamer:
         LOGGER.info(f"Phase 1: Structural analysis for {len(candidates)} candidates...")
         structural_results = self.batch_structural_analysis(candidates)
 
+        # Degree/unit lookups below read the adjacency cache until the first write
+        self._refresh_adjacency()
+        # Stored degrees from the metrics batch; missing or zero is confirmed live below
+        stored_metrics = self.graph_service.get_node_metrics([c.get("id") for c in candidates])
+
         # Track which nodes to skip in merge phase (deleted/split)
         skip_merge_ids = set()
         LOGGER.info(f"Phase 1: Applying structural actions to {len(candidates)} candidates...")
@@ -398,7 +484,10 @@ class Dreamer:
 
             # --- HEURISTIC GUARDS ---
             if action == "DELETE":
-                if self.graph_service.get_node_degree(node_id) > 0:
+                # A stored degree > 0 blocks (a stale block only keeps a node too long).
+                # Zero/missing may be stale (edges moved here by a rename) - check the graph.
+                stored_degree = stored_metrics.get(node_id, {}).get("degree", 0)
+                if stored_degree > 0 or self.graph_service.get_node_degree(node_id) > 0:
                     action = "KEEP"
                 elif conf < THRESHOLD_DELETE:
                     action = "KEEP"
@@ -424,7 +513,7 @@ class Dreamer:
                 stats["renamed"] += 1
                 # Update node reference for merge phase
                 node["id"] = new_name
-                node.update(self.graph_service.get_node(new_name) or {})
+                node.update(self.graph_service.get_node(new_name, with_context=True) or {})
 
             elif action == "RE-CATEGORIZE" and not dry_run:
                 if conf >= THRESHOLD_RECATEGORIZE:
@@ -450,21 +539,13 @@ class Dreamer:
                     skip_merge_ids.add(node_id)
 
         # === PHASE 2: Batch Merge Evaluation ===
-        # Collect all (candidate, match) pairs first
-        candidates_for_merge = len(candidates) - len(skip_merge_ids)
-        LOGGER.info(f"Phase 2: Collecting merge candidates from {candidates_for_merge} nodes...")
+        # Collect all (candidate, match) pairs first (one batched vector search)
+        merge_candidates = [node for node in candidates if node.get("id") not in skip_merge_ids]
+        LOGGER.info(f"Phase 2: Collecting merge candidates from {len(merge_candidates)} nodes...")
         merge_pairs = []
         pair_metadata = []  # Track (node, match) for each pair
 
-        for i, node in enumerate(candidates):
-            node_id = node.get("id")
-            if node_id in skip_merge_ids:
-                continue
-
-            if (i + 1) % 10 == 0:
-                LOGGER.info(f"  Finding matches for node {i + 1}/{len(candidates)}...")
-
-            matches = self.find_potential_matches(node)
+        for node, matches in zip(merge_candidates, self.find_potential_matches_many(merge_candidates)):
             for match in matches:
                 merge_pairs.append((match, node))
                 pair_metadata.append({"node": node, "match": match})
@@ -476,6 +557,7 @@ class Dreamer:
 
             # Track already-merged nodes to avoid double merges
             merged_nodes = set()
+            accepted_pairs = []  # (target, source)
 
             for meta, merge_eval in zip(pair_metadata, merge_results):
                 node = meta["node"]
@@ -486,14 +568,28 @@ class Dreamer:
                     continue
 
                 if merge_eval.get("decision") == "MERGE" and merge_eval.get("confidence", 0) >= THRESHOLD_MERGE:
-                    if not dry_run:
-                        units = self.graph_service.get_related_unit_ids(node_id)
-                        self.graph_service.merge_nodes(match["id"], node_id)
-                        affected_units.update(units)
-                        self.prune_context(match["id"])
-                    stats["merged"] += 1
+                    accepted_pairs.append((match["id"], node_id))
                     merged_nodes.add(node_id)
 
+            if dry_run:
+                stats["merged"] += len(accepted_pairs)
+            elif accepted_pairs:
+                # Units must be collected before the sources disappear
+                self._refresh_adjacency()
+                for _, source_id in accepted_pairs:
+                    affected_units.update(self.graph_service.get_related_unit_ids(source_id))
+
+                # One transaction for all merges (chains like A->B, B->C resolved up front)
+                results = self.graph_service.merge_many(accepted_pairs)
+                merged_targets = []
+                for result in results:
+                    if result["status"] == "merged":
+                        stats["merged"] += 1
+                        merged_targets.append(result["merged_into"])
+
+                for target_id in dict.fromkeys(merged_targets):
+                    self.prune_context(target_id)
+
         # === PHASE 3: Causal Semantic Update ===
         if affected_units and not dry_run:
             LOGGER.info(f"Phase 3: Semantic update for {len(affected_units)} files...")
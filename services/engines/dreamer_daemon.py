@@ -25,8 +25,10 @@ PROJECT_ROOT = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(PROJECT_ROOT))
 
 from services.utils.graph_service import GraphService
+from services.utils.graph_snapshot import publish_snapshot
 from services.utils.vector_service import VectorService
 from services.utils.shared_lock import resource_lock
+from services.utils.usage_accumulator import drain_usage_spool, list_usage_spool
 from services.engines.dreamer import Dreamer
 
 LOGGER = logging.getLogger("DreamerDaemon")
@@ -138,6 +140,35 @@ def _should_run(state: dict, daemon_config: dict) -> tuple[bool, str]:
     return False, f"No trigger: {nodes_count}/{threshold} nodes, waiting"
 
 
+def _graph_path(config: dict) -> str:
+    return os.path.expanduser(
+        config.get('paths', {}).get('graph_db', '~/MyMemory/Index/my_mem_graph.duckdb')
+    )
+
+
+def _drain_usage(config: dict, lock_timeout: float = 5.0) -> int:
+    """
+    Apply node usage spooled by read-only servers (MCP) to the graph.
+
+    Readers never open the graph writable; the daemon is the writer that
+    applies their buffered counts. Skipped (retried next poll) if another
+    writer holds the graph lock.
+
+    Returns:
+        Number of nodes updated
+    """
+    graph_path = _graph_path(config)
+    if not list_usage_spool(graph_path):
+        return 0
+    try:
+        with resource_lock("graph", exclusive=True, timeout=lock_timeout):
+            with GraphService(graph_path) as graph_service:
+                return drain_usage_spool(graph_service)
+    except TimeoutError:
+        LOGGER.debug("Graph busy, usage spool left for next poll")
+        return 0
+
+
 def _run_dreamer(config: dict) -> dict:
     """
     Execute Dreamer resolution cycle with resource locking.
@@ -156,16 +187,30 @@ def _run_dreamer(config: dict) -> dict:
             with resource_lock("vector", exclusive=True):
                 LOGGER.info("Locks acquired, initializing Dreamer...")
 
-                graph_path = os.path.expanduser(
-                    config.get('paths', {}).get('graph_db', '~/MyMemory/Index/my_mem_graph.duckdb')
-                )
-                graph_service = GraphService(graph_path)
+                graph_service = GraphService(_graph_path(config), adjacency_cache=True)
+
+                # Apply spooled usage first so refinement candidates see it
+                try:
+                    drain_usage_spool(graph_service)
+                except Exception as e:
+                    LOGGER.warning(f"Usage spool drain failed: {e}")
                 vector_service = VectorService()
                 dreamer = Dreamer(graph_service, vector_service)
 
                 LOGGER.info("Running resolution cycle...")
                 result = dreamer.run_resolution_cycle(dry_run=False)
 
+                # Reclaim file space left by GC/merges (rewrites only when enough blocks are free)
+                try:
+                    graph_service.compact()
+                except Exception as e:
+                    LOGGER.warning(f"Graph compaction failed: {e}")
+
+                # Publish a read snapshot so MCP readers see the cleaned graph
+                try:
+                    publish_snapshot(graph_service)
+                except Exception as e:
+                    LOGGER.warning(f"Snapshot publish failed: {e}")
                 graph_service.close()
                 LOGGER.info(f"Dreamer completed: {result}")
                 return result
@@ -214,6 +259,7 @@ def run_daemon():
                 LOGGER.info("State reset after Dreamer run")
             else:
                 LOGGER.debug(reason)
+                _drain_usage(config)
 
         except Exception as e:
             LOGGER.error(f"Daemon error: {e}", exc_info=True)
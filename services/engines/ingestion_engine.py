@@ -34,6 +34,7 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspa
 from services.utils.json_parser import parse_llm_json
 from services.utils.llm_service import LLMService, TaskType
 from services.utils.graph_service import GraphService
+from services.utils.graph_snapshot import SnapshotScheduler, publish_snapshot, snapshot_config
 from services.utils.schema_validator import SchemaValidator, normalize_value
 from services.processors.text_extractor import extract_text
 from services.utils.shared_lock import resource_lock
@@ -90,6 +91,9 @@ LAKE_STORE = os.path.expanduser(CONFIG['paths']['lake_store'])
 FAILED_FOLDER = os.path.expanduser(CONFIG['paths']['asset_failed'])
 GRAPH_DB_PATH = os.path.expanduser(CONFIG['paths']['graph_db'])
 
+# Read snapshots for MCP readers (see graph_snapshot)
+SNAPSHOT_CONFIG = snapshot_config(CONFIG)
+
 # Dreamer daemon state file (OBJEKT-76)
 DREAMER_STATE_FILE = os.path.expanduser(
     CONFIG.get('dreamer', {}).get('daemon', {}).get(
@@ -126,10 +130,27 @@ TRANSCRIBER_START_PATTERN = re.compile(r'^START:\s+(\d{2}:\d{2})$', re.MULTILINE
 PROCESSED_FILES = set()
 PROCESS_LOCK = threading.Lock()
 
+# Vector writes deferred by batch callers (rebuild), embedded together by flush_vectors()
+PENDING_VECTORS = []
+
 # Dreamer state lock (OBJEKT-76)
 DREAMER_STATE_LOCK = threading.Lock()
 
 
+def _publish_graph_snapshot():
+    """Publish a read snapshot of the live graph (runs on the snapshot scheduler thread)."""
+    with resource_lock("graph", exclusive=True):
+        graph = GraphService(GRAPH_DB_PATH)
+        try:
+            publish_snapshot(graph)
+        finally:
+            graph.close()
+
+
+# Realtime writes publish at most one snapshot per min_interval_s (a publish copies the whole graph file)
+SNAPSHOT_SCHEDULER = SnapshotScheduler(_publish_graph_snapshot, min_interval=SNAPSHOT_CONFIG["min_interval_s"])
+
+
 def _increment_dreamer_node_counter(nodes_added: int):
     """
     Increment the Dreamer daemon node counter (OBJEKT-76).
@@ -618,20 +639,29 @@ def write_lake(unit_id: str, filename: str, raw_text: str, source_type: str,
     return lake_file
 
 
-def write_graph(unit_id: str, filename: str, ingestion_payload: List) -> tuple:
-    """Write entities and edges to graph."""
+def write_graph(unit_id: str, filename: str, ingestion_payload: List, publish: bool = True) -> tuple:
+    """
+    Write entities and edges to graph.
+
+    Args:
+        publish: Make the commit visible to MCP readers via a read snapshot:
+                 scheduled on SNAPSHOT_SCHEDULER, or published right away when
+                 graph_snapshot.publish_per_document is set. Batch callers
+                 (rebuild) pass False and publish once per batch instead.
+    """
     graph = GraphService(GRAPH_DB_PATH)
 
     # Skapa Document-nod för källdokumentet (krävs för MENTIONS-kanter)
-    graph.upsert_node(
-        id=unit_id,
-        type="Document",
-        properties={
+    nodes = [{
+        "id": unit_id,
+        "type": "Document",
+        "properties": {
             "name": filename,
             "status": "ACTIVE",
             "source_system": "IngestionEngine"
         }
-    )
+    }]
+    edges = []
 
     nodes_written = 0
     edges_written = 0
@@ -662,19 +692,19 @@ def write_graph(unit_id: str, filename: str, ingestion_payload: List) -> tuple:
                 "source_system": "IngestionEngine"
             }
 
-            graph.upsert_node(
-                id=target_uuid,
-                type=node_type,
-                properties=props
-            )
+            nodes.append({
+                "id": target_uuid,
+                "type": node_type,
+                "properties": props
+            })
             nodes_written += 1
 
-            graph.upsert_edge(
-                source=unit_id,
-                target=target_uuid,
-                edge_type="MENTIONS",
-                properties={"confidence": confidence}
-            )
+            edges.append({
+                "source": unit_id,
+                "target": target_uuid,
+                "edge_type": "MENTIONS",
+                "properties": {"confidence": confidence}
+            })
             edges_written += 1
 
         elif action == "CREATE_EDGE":
@@ -684,41 +714,88 @@ def write_graph(unit_id: str, filename: str, ingestion_payload: List) -> tuple:
             edge_conf = entity.get("confidence", 0.5)
 
             if source_uuid and target_uuid and edge_type:
-                graph.upsert_edge(
-                    source=source_uuid,
-                    target=target_uuid,
-                    edge_type=edge_type,
-                    properties={"confidence": edge_conf}
-                )
+                edges.append({
+                    "source": source_uuid,
+                    "target": target_uuid,
+                    "edge_type": edge_type,
+                    "properties": {"confidence": edge_conf}
+                })
                 edges_written += 1
 
+    # Skriv allt i EN bulk-transaktion (i stället för en rundresa per rad)
+    try:
+        graph.upsert_graph_bulk(nodes, edges)
+        if publish and SNAPSHOT_CONFIG["publish_per_document"]:
+            # The data is committed - a failed publish must not fail the document
+            try:
+                publish_snapshot(graph)
+            except Exception as e:
+                LOGGER.warning(f"Snapshot publish failed after {filename}: {e}")
+    finally:
+        graph.close()
+    if publish and not SNAPSHOT_CONFIG["publish_per_document"]:
+        SNAPSHOT_SCHEDULER.mark_dirty()
+
     LOGGER.info(f"Graph: {filename} -> {nodes_written} nodes, {edges_written} edges")
     return nodes_written, edges_written
 
 
 def write_vector(unit_id: str, filename: str, raw_text: str, source_type: str,
-                 semantic_metadata: Dict, timestamp_ingestion: str):
-    """Write document to vector index."""
-    from services.utils.vector_service import get_vector_service
-    vector_service = get_vector_service("knowledge_base")
+                 semantic_metadata: Dict, timestamp_ingestion: str, defer: bool = False):
+    """
+    Write document to vector index (chunked per vector_chunking, see
+    VectorService.upsert_documents).
+
+    The indexed body is the Lake file body as written by write_lake, so
+    chunk offsets point straight into it (read_document_content offset).
 
+    With defer=True the document is queued in PENDING_VECTORS and embedded
+    in batches by flush_vectors() (the caller must flush while holding the
+    vector lock). A crash before the flush leaves Lake files without vectors;
+    start_services.auto_repair indexes those on next start.
+    """
     ctx_summary = semantic_metadata.get("context_summary", "")
     rel_summary = semantic_metadata.get("relations_summary", "")
 
-    vector_text = f"FILENAME: {filename}\nSUMMARY: {ctx_summary}\nRELATIONS: {rel_summary}\n\nCONTENT:\n{raw_text[:8000]}"
+    header = f"FILENAME: {filename}\nSUMMARY: {ctx_summary}\nRELATIONS: {rel_summary}"
+    body = f"# {filename}\n\n{raw_text}"
+    metadata = {
+        "timestamp": timestamp_ingestion,
+        "filename": filename,
+        "source_type": source_type
+    }
+
+    if defer:
+        with PROCESS_LOCK:
+            PENDING_VECTORS.append((unit_id, header, body, metadata))
+        LOGGER.info(f"Vector: {filename} -> queued")
+        return
 
-    vector_service.upsert(
-        id=unit_id,
-        text=vector_text,
-        metadata={
-            "timestamp": timestamp_ingestion,
-            "filename": filename,
-            "source_type": source_type
-        }
-    )
+    from services.utils.vector_service import get_vector_service
+    get_vector_service("knowledge_base").upsert_documents([unit_id], [header], [body], [metadata])
     LOGGER.info(f"Vector: {filename} -> ChromaDB")
 
 
+def flush_vectors() -> int:
+    """
+    Embed and write all deferred vector documents with batched
+    VectorService.upsert_documents. Returns the number of vectors written.
+    """
+    with PROCESS_LOCK:
+        pending = PENDING_VECTORS[:]
+        PENDING_VECTORS.clear()
+    if not pending:
+        return 0
+
+    from services.utils.vector_service import get_vector_service
+    ids, headers, bodies, metadatas = zip(*pending)
+    written = get_vector_service("knowledge_base").upsert_documents(
+        list(ids), list(headers), list(bodies), list(metadatas)
+    )
+    LOGGER.info(f"Vector: {len(pending)} queued documents -> {written} vectors in ChromaDB")
+    return written
+
+
 def process_document(filepath: str, filename: str, _lock_held: bool = False):
     """
     Main document processing function.
@@ -727,7 +804,8 @@ def process_document(filepath: str, filename: str, _lock_held: bool = False):
     Args:
         filepath: Full path to source file
         filename: Filename (used for UUID extraction)
-        _lock_held: If True, caller already holds resource locks (e.g., rebuild).
+        _lock_held: If True, caller already holds resource locks (e.g., rebuild)
+                    and must call flush_vectors() before releasing them.
                     If False, this function acquires locks per document.
     """
     with PROCESS_LOCK:
@@ -786,14 +864,17 @@ def process_document(filepath: str, filename: str, _lock_held: bool = False):
         write_lake(unit_id, filename, raw_text, source_type, semantic_metadata, ingestion_payload)
 
         # 8. Write to Graph
-        nodes_written, edges_written = write_graph(unit_id, filename, ingestion_payload)
+        nodes_written, edges_written = write_graph(unit_id, filename, ingestion_payload,
+                                                   publish=not _lock_held)
 
         # 8b. Update Dreamer daemon counter (OBJEKT-76)
         _increment_dreamer_node_counter(nodes_written)
 
         # 9. Write to Vector
         timestamp_ingestion = datetime.datetime.now().isoformat()
-        write_vector(unit_id, filename, raw_text, source_type, semantic_metadata, timestamp_ingestion)
+        # Batch callers (_lock_held) queue the vector and call flush_vectors() per batch
+        write_vector(unit_id, filename, raw_text, source_type, semantic_metadata, timestamp_ingestion,
+                     defer=_lock_held)
 
     try:
         if _lock_held:
@@ -860,3 +941,4 @@ if __name__ == "__main__":
     except KeyboardInterrupt:
         observer.stop()
     observer.join()
+    SNAPSHOT_SCHEDULER.flush()
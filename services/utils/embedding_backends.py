@@ -0,0 +1,273 @@
+"""
+EmbeddingBackends - Utbytbara körmotorer för embedding-modellen.
+
+Väljs med ai_engine.models.embedding_backend:
+- "torch" (default): SentenceTransformer via PyTorch (Chromas
+  SentenceTransformerEmbeddingFunction)
+- "onnx_int8": samma modell exporterad till ONNX med dynamisk
+  int8-kvantisering, körd med onnxruntime på CPU. Tokenisering med
+  `tokenizers` och pooling i NumPy, så varken torch eller transformers
+  laddas i körande processer.
+
+Princip:
+1. ONNX-modellen skapas i förväg med tools/tool_export_onnx.py (kräver
+   torch + sentence-transformers + onnx). Exporten mäter cosinus-
+   överensstämmelse mot torch-vägen på AGREEMENT_SENTENCES och sparar
+   resultatet i onnx_config.json.
+2. Vid laddning vägras en export för fel modell eller med lägsta
+   cosinus under ai_engine.models.embedding_onnx_min_cosine (default 0.99).
+   Tröskeln är ett krav, inte ett mätvärde: tools/test_embedding_backends.py
+   mäter min/medel mot sentence-transformers, även på meningar som
+   exporten inte sett.
+3. Vektorer från olika backends blandas inte i cache eller server:
+   embedding_id() ger nyckeln ("<modell>" för torch, "<modell>@<backend>"
+   annars).
+
+Layout (ai_engine.models.embedding_onnx_dir, default nedan):
+    ~/MyMemory/Index/onnx/<modell>/model_int8.onnx
+                                   tokenizer.json
+                                   onnx_config.json
+"""
+
+import json
+import logging
+import os
+
+import numpy as np
+
+LOGGER = logging.getLogger('EmbeddingBackends')
+
+BACKENDS = ("torch", "onnx_int8")
+DEFAULT_BACKEND = "torch"
+DEFAULT_ONNX_ROOT = "~/MyMemory/Index/onnx"
+DEFAULT_MIN_COSINE = 0.99
+ONNX_MODEL_FILE = "model_int8.onnx"
+ONNX_CONFIG_FILE = "onnx_config.json"
+# Texter per sessionskörning (sorterade på längd för mindre padding)
+ONNX_BATCH_SIZE = 32
+
+# Referensmeningar för överensstämmelse torch <-> ONNX (svenska + engelska, korta + långa)
+AGREEMENT_SENTENCES = [
+    "Mötet med kunden flyttades till nästa vecka.",
+    "Projektet levererades i tid men över budget.",
+    "Anna är ansvarig för upphandlingen av den nya plattformen.",
+    "Vi diskuterade AI-connectorn och hur den ska integreras med CRM-systemet.",
+    "Fakturan för oktober innehöll många ofakturerbara timmar.",
+    "Styrelsen beslutade att avsluta samarbetet med leverantören.",
+    "Name: Johan Svensson. Type: Person. Role: Customer Manager",
+    "Name: Acme AB. Type: Organization. Context: Kund sedan 2021 | Avtal om drift",
+    "The quarterly review covered hiring, budget and the delivery plan.",
+    "Customer Manager, responsible for the dialogue with the client.",
+    "Hej!",
+    "Budget",
+    "FILENAME: protokoll_2024-03-12.md\nSUMMARY: Veckomöte om leveransplanen\n\nCONTENT:\n"
+    "Närvarande: Anna, Johan, Maria. Punkt 1: Status för integrationen. Punkt 2: Risker i tidplanen. "
+    "Punkt 3: Nästa steg för upphandlingen och vem som kontaktar leverantören.",
+    "Transkribering: ... och då sa jag att vi måste prata med juridik innan vi skriver på avtalet, "
+    "annars riskerar vi att binda oss till villkor som vi inte kan uppfylla under nästa år.",
+]
+
+
+def embedding_id(model_name: str, backend: str) -> str:
+    """Nyckel för vektorer från (modell, backend) i cache, content_hash och server."""
+    return model_name if backend == DEFAULT_BACKEND else f"{model_name}@{backend}"
+
+
+def onnx_dir_for(model_name: str, configured_dir: str = None) -> str:
+    """Katalog för modellens ONNX-export."""
+    if configured_dir:
+        return os.path.expanduser(configured_dir)
+    return os.path.join(os.path.expanduser(DEFAULT_ONNX_ROOT), model_name.replace("/", "__"))
+
+
+def backend_settings(config: dict) -> dict:
+    """{model_name, backend, onnx_dir, min_cosine} från ai_engine.models."""
+    models = config.get('ai_engine', {}).get('models', {})
+    model_name = models.get('embedding_model', "paraphrase-multilingual-MiniLM-L12-v2")
+    backend = models.get('embedding_backend', DEFAULT_BACKEND)
+    if backend not in BACKENDS:
+        raise RuntimeError(f"HARDFAIL: Okänd embedding_backend '{backend}' (giltiga: {', '.join(BACKENDS)})")
+    return {
+        "model_name": model_name,
+        "backend": backend,
+        "onnx_dir": onnx_dir_for(model_name, models.get('embedding_onnx_dir')),
+        "min_cosine": float(models.get('embedding_onnx_min_cosine', DEFAULT_MIN_COSINE)),
+    }
+
+
+def create_embedding_function(settings: dict):
+    """
+    Ladda embedding-funktionen för vald backend.
+
+    Returns:
+        Anropbar list[str] -> lista av vektorer
+    """
+    if settings["backend"] == "onnx_int8":
+        return OnnxEmbeddingFunction(settings["onnx_dir"], settings["model_name"], settings["min_cosine"])
+    from chromadb.utils import embedding_functions
+    return embedding_functions.SentenceTransformerEmbeddingFunction(model_name=settings["model_name"])
+
+
+def cosine_agreement(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Cosinuslikhet rad för rad mellan två vektormatriser."""
+    a = np.asarray(a, dtype=np.float64)
+    b = np.asarray(b, dtype=np.float64)
+    norms = np.linalg.norm(a, axis=1) * np.linalg.norm(b, axis=1)
+    return np.einsum("ij,ij->i", a, b) / np.maximum(norms, 1e-12)
+
+
+class OnnxEmbeddingFunction:
+    """SentenceTransformer-kompatibla embeddings från en int8-kvantiserad ONNX-export."""
+
+    def __init__(self, onnx_dir: str, model_name: str, min_cosine: float = DEFAULT_MIN_COSINE):
+        try:
+            import onnxruntime as ort
+            from tokenizers import Tokenizer
+        except ImportError as e:
+            raise RuntimeError(f"HARDFAIL: embedding_backend onnx_int8 kräver onnxruntime och tokenizers: {e}") from e
+
+        config_path = os.path.join(onnx_dir, ONNX_CONFIG_FILE)
+        if not os.path.exists(config_path):
+            raise RuntimeError(
+                f"HARDFAIL: Ingen ONNX-export i {onnx_dir}. Kör tools/tool_export_onnx.py först."
+            )
+        with open(config_path, 'r') as f:
+            self.config = json.load(f)
+        if self.config.get("model_name") != model_name:
+            raise RuntimeError(
+                f"HARDFAIL: ONNX-exporten i {onnx_dir} är för {self.config.get('model_name')}, inte {model_name}"
+            )
+        if self.config.get("cosine_min", 0.0) < min_cosine:
+            raise RuntimeError(
+                f"HARDFAIL: ONNX-exportens cosinus mot torch ({self.config.get('cosine_min', 0.0):.4f}) "
+                f"är under embedding_onnx_min_cosine ({min_cosine})"
+            )
+
+        self.pooling = self.config["pooling"]
+        self.normalize = self.config["normalize"]
+        self.tokenizer = Tokenizer.from_file(os.path.join(onnx_dir, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=self.config["max_seq_length"])
+        self.tokenizer.enable_padding(pad_id=self.config["pad_token_id"], pad_token=self.config["pad_token"])
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(
+            os.path.join(onnx_dir, ONNX_MODEL_FILE), options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        LOGGER.info(f"ONNX int8 embedding laddad: {model_name} (cosinus mot torch >= {self.config['cosine_min']:.4f})")
+
+    def __call__(self, input: list) -> list:
+        texts = list(input)
+        if not texts:
+            return []
+        vectors = [None] * len(texts)
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        for start in range(0, len(order), ONNX_BATCH_SIZE):
+            batch = order[start:start + ONNX_BATCH_SIZE]
+            for i, vec in zip(batch, self._encode([texts[i] for i in batch])):
+                vectors[i] = vec
+        return vectors
+
+    def _encode(self, texts: list) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(texts)
+        input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self.input_names:
+            feeds["token_type_ids"] = np.zeros_like(input_ids)
+        hidden = self.session.run(None, {k: v for k, v in feeds.items() if k in self.input_names})[0]
+
+        if self.pooling == "cls":
+            pooled = hidden[:, 0]
+        else:
+            mask = attention_mask[..., None].astype(np.float32)
+            pooled = (hidden * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+        if self.normalize:
+            pooled = pooled / np.maximum(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12)
+        return pooled.astype(np.float32)
+
+
+def export_onnx(model_name: str, onnx_dir: str, sentences: list = None) -> dict:
+    """
+    Exportera SentenceTransformer-modellen till ONNX, kvantisera dynamiskt
+    till int8 och mät cosinus mot torch-vägen.
+
+    Kräver torch, sentence-transformers, onnx och onnxruntime (bara här,
+    inte i körande processer).
+
+    Returns:
+        onnx_config (sparas även som onnx_config.json), inkl. cosine_min/cosine_mean
+    """
+    try:
+        import torch
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        from sentence_transformers import SentenceTransformer
+    except ImportError as e:
+        raise RuntimeError(f"HARDFAIL: ONNX-export kräver torch, sentence-transformers, onnx och onnxruntime: {e}") from e
+
+    model = SentenceTransformer(model_name, device="cpu")
+    transformer = model[0]
+    pooling_modes = [m for m in model if type(m).__name__ == "Pooling"]
+    pooling = pooling_modes[0].get_pooling_mode_str() if pooling_modes else "mean"
+    if pooling not in ("mean", "cls"):
+        raise RuntimeError(f"HARDFAIL: Pooling '{pooling}' stöds inte av ONNX-backenden (bara mean/cls)")
+    tokenizer = transformer.tokenizer
+    if not getattr(tokenizer, "is_fast", False):
+        raise RuntimeError(f"HARDFAIL: {model_name} saknar snabb tokenizer (tokenizer.json)")
+
+    os.makedirs(onnx_dir, exist_ok=True)
+    fp32_path = os.path.join(onnx_dir, "model_fp32.onnx")
+    dummy = tokenizer(["Exempeltext för export"], return_tensors="pt")
+    auto_model = transformer.auto_model.eval()
+
+    class _Hidden(torch.nn.Module):
+        """Bara last_hidden_state, så exporten får en utgång."""
+        def __init__(self, inner):
+            super().__init__()
+            self.inner = inner
+
+        def forward(self, input_ids, attention_mask):
+            return self.inner(input_ids=input_ids, attention_mask=attention_mask).last_hidden_state
+
+    with torch.no_grad():
+        torch.onnx.export(
+            _Hidden(auto_model),
+            (dummy["input_ids"], dummy["attention_mask"]),
+            fp32_path,
+            input_names=["input_ids", "attention_mask"],
+            output_names=["last_hidden_state"],
+            dynamic_axes={
+                "input_ids": {0: "batch", 1: "sequence"},
+                "attention_mask": {0: "batch", 1: "sequence"},
+                "last_hidden_state": {0: "batch", 1: "sequence"},
+            },
+            opset_version=17,
+        )
+    quantize_dynamic(fp32_path, os.path.join(onnx_dir, ONNX_MODEL_FILE), weight_type=QuantType.QInt8)
+    os.remove(fp32_path)
+    tokenizer.backend_tokenizer.save(os.path.join(onnx_dir, "tokenizer.json"))
+
+    config = {
+        "model_name": model_name,
+        "pooling": pooling,
+        "normalize": any(type(m).__name__ == "Normalize" for m in model),
+        "max_seq_length": int(model.max_seq_length),
+        "pad_token": tokenizer.pad_token,
+        "pad_token_id": int(tokenizer.pad_token_id),
+        "cosine_min": 0.0,
+    }
+    with open(os.path.join(onnx_dir, ONNX_CONFIG_FILE), 'w') as f:
+        json.dump(config, f, indent=2)
+
+    # Överensstämmelse: samma meningar genom torch och den kvantiserade modellen
+    sentences = sentences or AGREEMENT_SENTENCES
+    reference = model.encode(sentences, convert_to_numpy=True)
+    onnx_vectors = np.asarray(OnnxEmbeddingFunction(onnx_dir, model_name, min_cosine=0.0)(sentences))
+    cosines = cosine_agreement(reference, onnx_vectors)
+    config["cosine_min"] = float(cosines.min())
+    config["cosine_mean"] = float(cosines.mean())
+    config["agreement_sentences"] = len(sentences)
+    with open(os.path.join(onnx_dir, ONNX_CONFIG_FILE), 'w') as f:
+        json.dump(config, f, indent=2)
+    return config
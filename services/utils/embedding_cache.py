@@ -0,0 +1,153 @@
+"""
+EmbeddingCache - Persistent cache av embeddings per (modell, sha256(text)).
+
+Dreamer indexerar samma kandidatnoder varje cykel och Lake-reparationer
+indexerar samma dokument igen; texten är oftast oförändrad. Cachen gör att
+modellen bara anropas för texter den inte sett förut.
+
+Princip:
+1. Nyckel är (model_name, sha256(text)), så ett modellbyte ger nya nycklar
+   i stället för felaktiga vektorer.
+2. Vektorer lagras som float32-bytes i SQLite (WAL). SQLite i stället för
+   DuckDB eftersom flera processer (ingestion, Dreamer, MCP) öppnar cachen
+   samtidigt; DuckDB tillåter bara en skrivande process per fil.
+3. Storleken är begränsad (max_entries). Träffar uppdaterar last_used och
+   när cachen växer över gränsen tas de äldst använda bort (LRU) ned till
+   EVICT_TARGET av gränsen, så att evictionen inte körs vid varje skrivning.
+4. Cachen är en optimering: fel loggas och behandlas som missar.
+
+Användning:
+    from services.utils.embedding_cache import EmbeddingCache, text_hash
+
+    cache = EmbeddingCache(path, model_name)
+    found = cache.get_many([text_hash(t) for t in texts])   # hash -> vektor
+    cache.put_many({text_hash(t): vec for t, vec in zip(texts, vectors)})
+"""
+
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+LOGGER = logging.getLogger('EmbeddingCache')
+
+# Andel av max_entries som behålls efter eviction
+EVICT_TARGET = 0.9
+# Max parametrar per SQL-sats (SQLite-gränsen är 999 i äldre versioner)
+SQL_CHUNK_SIZE = 500
+
+
+def text_hash(text: str) -> str:
+    """sha256 av texten (hex)."""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+class EmbeddingCache:
+    """Trådsäker, storleksbegränsad embedding-cache i SQLite."""
+
+    def __init__(self, path: str, model_name: str, max_entries: int = 100000):
+        """
+        Args:
+            path: SQLite-fil (skapas vid behov)
+            model_name: Embedding-modell (del av nyckeln)
+            max_entries: Max antal vektorer (alla modeller) innan LRU-eviction
+        """
+        self.path = path
+        self.model_name = model_name
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(path, timeout=30.0, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS embeddings (
+                model TEXT NOT NULL,
+                text_hash TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (model, text_hash)
+            )
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings(last_used)")
+        self.conn.commit()
+
+    def get_many(self, hashes: list) -> dict:
+        """
+        Slå upp många texthashar. Träffar får ny last_used.
+
+        Returns:
+            dict hash -> np.ndarray (float32). Missar utelämnas.
+        """
+        keys = list(dict.fromkeys(hashes))
+        if not keys:
+            return {}
+        found = {}
+        try:
+            with self._lock:
+                for start in range(0, len(keys), SQL_CHUNK_SIZE):
+                    chunk = keys[start:start + SQL_CHUNK_SIZE]
+                    placeholders = ",".join("?" * len(chunk))
+                    rows = self.conn.execute(
+                        f"SELECT text_hash, vector FROM embeddings "
+                        f"WHERE model = ? AND text_hash IN ({placeholders})",
+                        [self.model_name, *chunk]
+                    ).fetchall()
+                    found.update((h, np.frombuffer(blob, dtype=np.float32)) for h, blob in rows)
+                if found:
+                    now = time.time()
+                    self.conn.executemany(
+                        "UPDATE embeddings SET last_used = ? WHERE model = ? AND text_hash = ?",
+                        [(now, self.model_name, h) for h in found]
+                    )
+                    self.conn.commit()
+        except sqlite3.Error as e:
+            LOGGER.warning(f"Embedding-cache läsfel (räknas som miss): {e}")
+            return {}
+        return found
+
+    def put_many(self, vectors: dict):
+        """Spara hash -> vektor och kör LRU-eviction om cachen blivit för stor."""
+        if not vectors:
+            return
+        now = time.time()
+        rows = [
+            (self.model_name, h, np.asarray(vec, dtype=np.float32).tobytes(), now)
+            for h, vec in vectors.items()
+        ]
+        try:
+            with self._lock:
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO embeddings (model, text_hash, vector, last_used) VALUES (?, ?, ?, ?)",
+                    rows
+                )
+                self._evict()
+                self.conn.commit()
+        except sqlite3.Error as e:
+            LOGGER.warning(f"Embedding-cache skrivfel (ignoreras): {e}")
+
+    def _evict(self):
+        """Ta bort de äldst använda vektorerna ned till EVICT_TARGET * max_entries."""
+        total = self.conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        if total <= self.max_entries:
+            return
+        remove = total - int(self.max_entries * EVICT_TARGET)
+        self.conn.execute("""
+            DELETE FROM embeddings WHERE rowid IN (
+                SELECT rowid FROM embeddings ORDER BY last_used LIMIT ?
+            )
+        """, [remove])
+        LOGGER.info(f"Embedding-cache: {remove} vektorer borttagna (LRU, max {self.max_entries})")
+
+    def count(self) -> int:
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
@@ -0,0 +1,314 @@
+"""
+EmbeddingServer - Delad embedding-modell över en Unix-socket.
+
+Varje process som embeddar (ingestion, Dreamer, MCP-servern, auto_repair,
+rebuild) laddade tidigare sin egen SentenceTransformer: flera hundra MB RAM
+och några sekunders uppstart per process. Servern laddar modellen EN gång;
+VectorService använder den via EmbeddingClient när den körs och laddar
+modellen lokalt (lat) när den inte gör det.
+
+Princip:
+1. Mikrobatchning: förfrågningar från alla klienter samlas i högst
+   batch_window_ms (eller tills max_batch texter väntar) och embeddas med
+   ETT modellanrop. Samtidiga klienter delar alltså batchen.
+2. Servern använder samma embedding-funktion som VectorService lokalt
+   (create_embedding_function med ai_engine.models.embedding_backend), så
+   vektorerna är identiska oavsett väg. En förfrågan för en annan
+   modell/backend (embedding_id) avvisas och klienten faller tillbaka
+   till lokal modell.
+3. Socketen skapas först när modellen är laddad: går den att ansluta till
+   är servern redo.
+4. Klienten är fail-open: fel (server nere, timeout, protokollfel) ger None
+   och anroparen embeddar lokalt. Efter ett fel väntar klienten
+   retry_interval sekunder innan den försöker igen.
+
+Protokoll (en förfrågan per anslutning):
+    klient -> server: ram(JSON {"model": str, "texts": [str]})
+    server -> klient: ram(JSON {"count": n, "dim": d} | {"error": str}) + n*d float32
+    ram = 4 byte längd (big-endian) + innehåll
+
+Config (my_mem_config.yaml):
+    embedding_server:
+      enabled: true
+      socket: ~/MyMemory/Index/.embedding_server.sock
+      batch_window_ms: 5
+      max_batch: 256
+
+Kör: python -m services.utils.embedding_server
+"""
+
+import asyncio
+import json
+import logging
+import os
+import signal
+import socket
+import struct
+import sys
+import time
+
+import numpy as np
+import yaml
+
+LOGGER = logging.getLogger('EmbeddingServer')
+
+DEFAULT_SERVER_CONFIG = {
+    "enabled": True,
+    "socket": "~/MyMemory/Index/.embedding_server.sock",
+    "batch_window_ms": 5,
+    "max_batch": 256,
+}
+# Max storlek på en JSON-ram (skydd mot trasiga längdfält)
+MAX_FRAME_BYTES = 64 * 1024 * 1024
+_LENGTH = struct.Struct(">I")
+
+
+def server_config(config: dict) -> dict:
+    """embedding_server-sektionen med defaults och expanderad socket-sökväg."""
+    merged = {**DEFAULT_SERVER_CONFIG, **(config.get('embedding_server') or {})}
+    merged["socket"] = os.path.expanduser(merged["socket"])
+    return merged
+
+
+# --- KLIENT ---
+
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+    buf = bytearray()
+    while len(buf) < size:
+        part = sock.recv(min(size - len(buf), 1 << 20))
+        if not part:
+            raise ConnectionError("Embedding-servern stängde anslutningen")
+        buf += part
+    return bytes(buf)
+
+
+def _send_frame(sock: socket.socket, payload: bytes):
+    sock.sendall(_LENGTH.pack(len(payload)) + payload)
+
+
+def _recv_frame(sock: socket.socket) -> bytes:
+    (size,) = _LENGTH.unpack(_recv_exact(sock, _LENGTH.size))
+    if size > MAX_FRAME_BYTES:
+        raise ValueError(f"För stor ram från embedding-servern: {size} byte")
+    return _recv_exact(sock, size)
+
+
+class EmbeddingClient:
+    """Synkron, trådsäker klient (en anslutning per anrop)."""
+
+    def __init__(self, socket_path: str, model_name: str, timeout: float = 60.0,
+                 retry_interval: float = 30.0):
+        """
+        Args:
+            socket_path: Serverns Unix-socket
+            model_name: Modellen klienten förväntar sig (måste matcha serverns)
+            timeout: Sekunder per förfrågan (inkl. serverns batchning)
+            retry_interval: Sekunder utan försök efter ett fel
+        """
+        self.socket_path = socket_path
+        self.model_name = model_name
+        self.timeout = timeout
+        self.retry_interval = retry_interval
+        self._retry_at = 0.0
+
+    def embed(self, texts: list):
+        """
+        Embedda texter via servern.
+
+        Returns:
+            np.ndarray (len(texts) x dim, float32), eller None om servern inte
+            kan användas (anroparen faller då tillbaka till lokal modell)
+        """
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        if time.monotonic() < self._retry_at or not os.path.exists(self.socket_path):
+            return None
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                sock.settimeout(self.timeout)
+                sock.connect(self.socket_path)
+                _send_frame(sock, json.dumps({"model": self.model_name, "texts": list(texts)}).encode('utf-8'))
+                header = json.loads(_recv_frame(sock))
+                if "error" in header:
+                    raise ValueError(header["error"])
+                count, dim = header["count"], header["dim"]
+                payload = _recv_exact(sock, count * dim * 4)
+            return np.frombuffer(payload, dtype=np.float32).reshape(count, dim)
+        except (OSError, ValueError, KeyError) as e:
+            LOGGER.warning(f"Embedding-server ej tillgänglig ({e}), embeddar lokalt")
+            self._retry_at = time.monotonic() + self.retry_interval
+            return None
+
+
+def wait_until_ready(socket_path: str, timeout: float) -> bool:
+    """Vänta tills servern tar emot anslutningar (modellen laddad)."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                sock.connect(socket_path)
+            return True
+        except OSError:
+            time.sleep(0.2)
+    return False
+
+
+# --- SERVER ---
+
+class EmbeddingServer:
+    """asyncio-server som mikrobatchar förfrågningar mot en embedding-funktion."""
+
+    def __init__(self, embed_fn, model_name: str, socket_path: str,
+                 batch_window_ms: float = 5, max_batch: int = 256):
+        """
+        Args:
+            embed_fn: list[str] -> sekvens av vektorer (körs i en arbetstråd)
+            model_name: Modellen embed_fn använder
+            socket_path: Unix-socket att lyssna på
+            batch_window_ms: Max väntan på fler förfrågningar innan en batch körs
+            max_batch: Antal texter som kör batchen direkt
+        """
+        self.embed_fn = embed_fn
+        self.model_name = model_name
+        self.socket_path = socket_path
+        self.batch_window = batch_window_ms / 1000.0
+        self.max_batch = max_batch
+        self.stats = {"requests": 0, "batches": 0, "texts": 0}
+        self._queue = None
+        self._server = None
+
+    async def start(self):
+        """Lyssna på socketen och starta batchningen."""
+        self._queue = asyncio.Queue()
+        if os.path.exists(self.socket_path):
+            if wait_until_ready(self.socket_path, timeout=0.1):
+                raise RuntimeError(f"HARDFAIL: Embedding-servern kör redan på {self.socket_path}")
+            os.unlink(self.socket_path)  # Kvar efter en krasch
+        os.makedirs(os.path.dirname(self.socket_path) or ".", exist_ok=True)
+        self._server = await asyncio.start_unix_server(self._handle, path=self.socket_path)
+        os.chmod(self.socket_path, 0o600)
+        self._batcher = asyncio.create_task(self._run_batches())
+        LOGGER.info(f"Embedding-server redo på {self.socket_path} (modell {self.model_name})")
+
+    async def stop(self):
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+        self._batcher.cancel()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            (size,) = _LENGTH.unpack(await reader.readexactly(_LENGTH.size))
+            if size > MAX_FRAME_BYTES:
+                raise ValueError(f"För stor förfrågan: {size} byte")
+            request = json.loads(await reader.readexactly(size))
+            if request.get("model") != self.model_name:
+                raise ValueError(f"Servern kör {self.model_name}, inte {request.get('model')}")
+            texts = [str(t) for t in request["texts"]]
+
+            future = asyncio.get_running_loop().create_future()
+            await self._queue.put((texts, future))
+            vectors = await future
+            header = json.dumps({"count": vectors.shape[0], "dim": vectors.shape[1]}).encode('utf-8')
+            writer.write(_LENGTH.pack(len(header)) + header + vectors.tobytes())
+        except asyncio.IncompleteReadError:
+            pass  # Klienten gav upp
+        except Exception as e:
+            LOGGER.warning(f"Embedding-förfrågan misslyckades: {e}")
+            header = json.dumps({"error": str(e)}).encode('utf-8')
+            writer.write(_LENGTH.pack(len(header)) + header)
+        try:
+            await writer.drain()
+            writer.close()
+            await writer.wait_closed()
+        except OSError:
+            pass
+
+    async def _run_batches(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            items = [await self._queue.get()]
+            total = len(items[0][0])
+            deadline = loop.time() + self.batch_window
+            while total < self.max_batch:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+                items.append(item)
+                total += len(item[0])
+
+            texts = [text for item_texts, _ in items for text in item_texts]
+            try:
+                vectors = await asyncio.to_thread(self._encode, texts)
+            except Exception as e:
+                LOGGER.error(f"Embedding misslyckades för batch om {len(texts)} texter: {e}")
+                for _, future in items:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            self.stats["requests"] += len(items)
+            self.stats["batches"] += 1
+            self.stats["texts"] += len(texts)
+            start = 0
+            for item_texts, future in items:
+                if not future.done():
+                    future.set_result(vectors[start:start + len(item_texts)])
+                start += len(item_texts)
+
+    def _encode(self, texts: list) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.ascontiguousarray(np.asarray(self.embed_fn(texts), dtype=np.float32))
+
+
+def _load_config() -> dict:
+    config_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'config', 'my_mem_config.yaml')
+    if not os.path.exists(config_path):
+        raise FileNotFoundError("HARDFAIL: Config not found")
+    with open(config_path, 'r') as f:
+        return yaml.safe_load(f)
+
+
+async def _serve(server: EmbeddingServer):
+    await server.start()
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    await stop.wait()
+    await server.stop()
+    LOGGER.info(f"Embedding-server stoppad ({server.stats})")
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(name)s] %(levelname)s: %(message)s')
+    config = _load_config()
+    settings = server_config(config)
+    if not settings["enabled"]:
+        LOGGER.info("embedding_server.enabled är false - startar inte")
+        return
+
+    from services.utils.embedding_backends import backend_settings, create_embedding_function, embedding_id
+    backend = backend_settings(config)
+    try:
+        embed_fn = create_embedding_function(backend)
+    except Exception as e:
+        LOGGER.error(f"HARDFAIL: Kunde inte ladda embedding-modell {backend['model_name']} ({backend['backend']}): {e}")
+        sys.exit(1)
+
+    server = EmbeddingServer(
+        embed_fn, embedding_id(backend['model_name'], backend['backend']), settings["socket"],
+        batch_window_ms=settings["batch_window_ms"], max_batch=settings["max_batch"],
+    )
+    asyncio.run(_serve(server))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+FuzzyMatcher - Trigram-baserad fuzzy matchning av namn.
+
+Ersätter difflib.get_close_matches i entity resolution.
+
+Princip:
+1. Kandidatgenerering: Inverterat index (trigram, namnlängd) -> namn. Endast
+   namn med närliggande längd som delar tillräckligt många trigram med frågan
+   blir kandidater (q-gram-lemmat), så kostnaden beror på posting-listorna
+   inom längdfönstret, inte på antalet namn.
+2. Omrankning: De top-k kandidaterna poängsätts med normaliserad edit distance
+   (1 - levenshtein / max(len)).
+"""
+
+import heapq
+from collections import Counter
+
+
+def _trigrams(text: str) -> set:
+    """Trigram för en sträng, paddad som i pg_trgm ('  abc ')."""
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def levenshtein(a: str, b: str, max_dist: int = None) -> int:
+    """
+    Edit distance mellan två strängar.
+
+    Args:
+        a, b: Strängar att jämföra
+        max_dist: Avbryt tidigt när avståndet garanterat överstiger detta
+
+    Returns:
+        Avståndet (eller max_dist + 1 vid tidigt avbrott)
+    """
+    if a == b:
+        return 0
+    if len(a) < len(b):
+        a, b = b, a
+    if not b:
+        return len(a)
+    if max_dist is not None and len(a) - len(b) > max_dist:
+        return max_dist + 1
+
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(
+                previous[j] + 1,                # borttagning
+                current[j - 1] + 1,             # insättning
+                previous[j - 1] + (ca != cb)    # substitution
+            ))
+        if max_dist is not None and min(current) > max_dist:
+            return max_dist + 1
+        previous = current
+    return previous[-1]
+
+
+def similarity(a: str, b: str) -> float:
+    """Normaliserad likhet 0.0-1.0 baserad på edit distance."""
+    longest = max(len(a), len(b))
+    if longest == 0:
+        return 1.0
+    return 1.0 - levenshtein(a, b) / longest
+
+
+class TrigramIndex:
+    """
+    Inverterat trigram-index över normaliserade namn (en instans per nodtyp).
+
+    Posting-listorna delas upp per namnlängd, så att ett uppslag bara läser
+    längder inom tillåten edit distance. Namn -> node_ids hålls separat så att
+    flera noder kan dela namn och så att index kan uppdateras inkrementellt per nod.
+    """
+
+    def __init__(self):
+        self._postings: dict[tuple, set] = {}   # (trigram, namnlängd) -> namn
+        self._name_ids: dict[str, set] = {}     # namn -> node_ids
+        self._id_names: dict[str, set] = {}     # node_id -> namn
+
+    def __len__(self) -> int:
+        return len(self._name_ids)
+
+    def add(self, name: str, node_id: str):
+        """Lägg till ett (redan normaliserat) namn för en nod."""
+        if not name:
+            return
+        if name not in self._name_ids:
+            self._name_ids[name] = set()
+            for gram in _trigrams(name):
+                self._postings.setdefault((gram, len(name)), set()).add(name)
+        self._name_ids[name].add(node_id)
+        self._id_names.setdefault(node_id, set()).add(name)
+
+    def remove_node(self, node_id: str):
+        """Ta bort alla namn för en nod (namn som delas med andra noder behålls)."""
+        for name in self._id_names.pop(node_id, set()):
+            ids = self._name_ids.get(name)
+            if ids is None:
+                continue
+            ids.discard(node_id)
+            if ids:
+                continue
+            del self._name_ids[name]
+            for gram in _trigrams(name):
+                key = (gram, len(name))
+                posting = self._postings.get(key)
+                if posting is not None:
+                    posting.discard(name)
+                    if not posting:
+                        del self._postings[key]
+
+    def node_ids(self, name: str) -> list:
+        """Node-IDs för ett exakt (normaliserat) namn."""
+        return sorted(self._name_ids.get(name, ()))
+
+    def query(self, name: str, cutoff: float = 0.85, limit: int = 1, candidate_limit: int = 25) -> list:
+        """
+        Hitta de mest lika namnen.
+
+        Args:
+            name: Normaliserat sökord
+            cutoff: Minsta likhet (normaliserad edit distance) för träff
+            limit: Max antal träffar
+            candidate_limit: Antal trigram-kandidater som omrankas
+
+        Returns:
+            Lista med (namn, likhet), bäst först
+        """
+        if not name or not self._name_ids:
+            return []
+
+        grams = _trigrams(name)
+        # q-gram-lemmat: edit distance d förstör högst 3*d trigram
+        max_dist = int((1.0 - cutoff) * len(name) / cutoff) if cutoff > 0 else len(name)
+        min_shared = max(1, len(grams) - 3 * max_dist)
+
+        # Längdfilter: kandidater kan bara skilja max_dist tecken i längd.
+        # Delade trigram räknas per kandidat med Counter (räknar i C), så
+        # vanliga trigram ('son', '  a') kostar bara inom det smala längdfönstret.
+        lengths = range(max(1, len(name) - max_dist), len(name) + max_dist + 1)
+        counts = Counter()
+        for gram in grams:
+            for length in lengths:
+                posting = self._postings.get((gram, length))
+                if posting:
+                    counts.update(posting)
+
+        candidates = heapq.nsmallest(
+            candidate_limit,
+            (cand for cand, shared in counts.items() if shared >= min_shared),
+            key=lambda cand: (-counts[cand], cand)
+        )
+
+        scored = []
+        for cand in candidates:
+            longest = max(len(name), len(cand))
+            allowed = int((1.0 - cutoff) * longest)
+            dist = levenshtein(name, cand, max_dist=allowed)
+            if dist > allowed:
+                continue
+            score = 1.0 - dist / longest
+            if score >= cutoff:
+                scored.append((cand, score))
+
+        scored.sort(key=lambda item: (-item[1], item[0]))
+        return scored[:limit]
@@ -0,0 +1,229 @@
+"""
+GraphAdjacency - In-process CSR-cache över grafens kanter.
+
+Traverseringstunga läsare (Dreamer-guards, get_subgraph, grad/Unit-uppslag)
+gick tidigare till SQL för varje hopp. Cachen håller kanterna som
+NumPy-arrayer i CSR-form (compressed sparse row), så grad-, grann- och
+k-hop-frågor blir array-slicing i stället för SQL.
+
+Princip:
+1. Varje nod (inkl. kantändar som saknar nodrad) får ett heltalsindex.
+   Index följer id-ordning, så grannar sorterade på index är sorterade på id.
+2. Två CSR-strukturer: utgående (source -> target) och inkommande
+   (target -> source). indptr[i]:indptr[i+1] är nod i:s kanter.
+   Grannar lagras som int32 och kanttyper som koder (uint8/int16), dvs
+   ca 10 byte per kant för båda riktningarna. 10M kanter ~ 100 MB.
+3. Cachen är en ögonblicksbild: den bär grafens write_generation och
+   byggs om av GraphService när generationen ändrats (se GraphService.adjacency).
+
+Användning:
+    adjacency = graph.adjacency()
+    adjacency.degree(node_id, exclude_types=["UNIT_MENTIONS"])
+    adjacency.k_hop(["seed-id"], depth=2)
+"""
+
+import numpy as np
+
+
+def _code_dtype(count: int):
+    """Minsta heltalstyp för `count` koder (-1 reserverat för 'saknas')."""
+    return np.int8 if count < 127 else np.int16 if count < 32767 else np.int32
+
+
+class GraphAdjacency:
+    """
+    Oföränderlig CSR-representation av grafens kanter (läs-API).
+
+    Byggs av GraphService.adjacency(); instansen ändras aldrig efter
+    konstruktion och kan därför delas mellan trådar.
+    """
+
+    def __init__(self, ids: list, node_type_codes, node_types: list,
+                 sources, targets, edge_type_codes, edge_types: list, generation: int):
+        """
+        Args:
+            ids: Alla nod-IDs, sorterade (index -> id)
+            node_type_codes: Nodtyp-kod per index (-1 = kantände utan nodrad)
+            node_types: Nodtyp per kod
+            sources: Källindex per kant (int)
+            targets: Målindex per kant (int)
+            edge_type_codes: Kanttyp-kod per kant
+            edge_types: Kanttyp per kod
+            generation: GraphService.write_generation när datat lästes
+        """
+        self.generation = generation
+        self.ids = ids
+        self.node_types = node_types
+        self.edge_types = edge_types
+        self._index = {node_id: i for i, node_id in enumerate(ids)}
+        self._edge_type_index = {edge_type: code for code, edge_type in enumerate(edge_types)}
+
+        n = len(ids)
+        self._node_type_codes = np.asarray(node_type_codes, dtype=_code_dtype(len(node_types)))
+
+        sources = np.asarray(sources, dtype=np.int32)
+        targets = np.asarray(targets, dtype=np.int32)
+        codes = np.asarray(edge_type_codes, dtype=_code_dtype(len(edge_types)))
+
+        # Utgående: sortera på (source, target) - grannar i id-ordning per nod
+        order = np.lexsort((targets, sources))
+        self._out_indptr = self._indptr(sources, n)
+        self._out_neighbors = targets[order]
+        self._out_types = codes[order]
+
+        # Inkommande: sortera på (target, source)
+        order = np.lexsort((sources, targets))
+        self._in_indptr = self._indptr(targets, n)
+        self._in_neighbors = sources[order]
+        self._in_types = codes[order]
+
+    @staticmethod
+    def _indptr(rows, n: int):
+        """CSR-radpekare: indptr[i]:indptr[i+1] är rad i:s element."""
+        indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=n), out=indptr[1:])
+        return indptr
+
+    # --- INTERNALS ---
+
+    def _type_mask(self, codes, edge_types=None, exclude_types=None):
+        """Boolesk mask över kanttyp-koder (None = alla kanter)."""
+        mask = None
+        if edge_types is not None:
+            wanted = [self._edge_type_index[t] for t in edge_types if t in self._edge_type_index]
+            mask = np.isin(codes, wanted)
+        if exclude_types:
+            unwanted = [self._edge_type_index[t] for t in exclude_types if t in self._edge_type_index]
+            if unwanted:
+                keep = ~np.isin(codes, unwanted)
+                mask = keep if mask is None else mask & keep
+        return mask
+
+    def _slice(self, direction: str, i: int, edge_types=None, exclude_types=None):
+        """Grannindex och typkoder för nod i i en riktning, filtrerat på typ."""
+        if direction == "out":
+            indptr, neighbors, types = self._out_indptr, self._out_neighbors, self._out_types
+        else:
+            indptr, neighbors, types = self._in_indptr, self._in_neighbors, self._in_types
+        start, end = indptr[i], indptr[i + 1]
+        neighbors, types = neighbors[start:end], types[start:end]
+        mask = self._type_mask(types, edge_types, exclude_types)
+        if mask is not None:
+            neighbors, types = neighbors[mask], types[mask]
+        return neighbors, types
+
+    @staticmethod
+    def _directions(direction: str) -> tuple:
+        if direction not in ("out", "in", "both"):
+            raise ValueError(f"Okänd riktning: {direction}")
+        return ("out", "in") if direction == "both" else (direction,)
+
+    # --- PUBLIC API ---
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, node_id) -> bool:
+        i = self._index.get(node_id)
+        return i is not None and self._node_type_codes[i] >= 0
+
+    @property
+    def edge_count(self) -> int:
+        return len(self._out_neighbors)
+
+    @property
+    def nbytes(self) -> int:
+        """Minne för arrayerna (exkl. id-mappningen)."""
+        return sum(a.nbytes for a in (
+            self._node_type_codes, self._out_indptr, self._out_neighbors, self._out_types,
+            self._in_indptr, self._in_neighbors, self._in_types
+        ))
+
+    def node_type(self, node_id: str) -> str | None:
+        """Nodens typ, eller None om noden saknas."""
+        i = self._index.get(node_id)
+        if i is None or self._node_type_codes[i] < 0:
+            return None
+        return self.node_types[self._node_type_codes[i]]
+
+    def degree(self, node_id: str, edge_types: list = None, exclude_types: list = None) -> int:
+        """
+        Antal kanter till/från en nod (self-loops räknas en gång).
+
+        Samma semantik som COUNT(*) ... WHERE source = ? OR target = ?.
+
+        Args:
+            edge_types: Räkna bara dessa kanttyper (None = alla)
+            exclude_types: Räkna inte dessa kanttyper
+        """
+        i = self._index.get(node_id)
+        if i is None:
+            return 0
+        out_neighbors, _ = self._slice("out", i, edge_types, exclude_types)
+        in_neighbors, _ = self._slice("in", i, edge_types, exclude_types)
+        return int(len(out_neighbors) + len(in_neighbors) - np.count_nonzero(out_neighbors == i))
+
+    def edges(self, node_id: str, direction: str = "both", edge_types: list = None) -> list[tuple]:
+        """
+        En nods kanter som (source, target, edge_type).
+
+        Self-loops returneras en gång.
+        """
+        i = self._index.get(node_id)
+        if i is None:
+            return []
+        result = []
+        for d in self._directions(direction):
+            neighbors, types = self._slice(d, i, edge_types)
+            for j, code in zip(neighbors.tolist(), types.tolist()):
+                if d == "out":
+                    result.append((node_id, self.ids[j], self.edge_types[code]))
+                elif j != i or direction == "in":
+                    result.append((self.ids[j], node_id, self.edge_types[code]))
+        return result
+
+    def neighbors(self, node_id: str, direction: str = "both", edge_types: list = None) -> list[str]:
+        """Unika grannar (id-ordning) i given riktning ('out', 'in', 'both')."""
+        i = self._index.get(node_id)
+        if i is None:
+            return []
+        parts = [self._slice(d, i, edge_types)[0] for d in self._directions(direction)]
+        return [self.ids[j] for j in np.unique(np.concatenate(parts)).tolist()]
+
+    def k_hop(self, seed_ids: list, depth: int, edge_types: list = None, fanout: int = None) -> dict[str, int]:
+        """
+        Bredden-först-traversering i båda riktningar från startnoderna.
+
+        Fan-out som i get_subgraph: högst `fanout` grannar (lägsta id först,
+        räknat över kanter i båda riktningar) expanderas per nod.
+
+        Args:
+            seed_ids: Startnoder (djup 0)
+            depth: Antal hopp
+            edge_types: Följ bara dessa kanttyper (None = alla)
+            fanout: Max grannar per expanderad nod (None = obegränsat)
+
+        Returns:
+            dict id -> minsta djup, för alla nåbara noder (även kantändar utan nodrad)
+        """
+        frontier = [self._index[s] for s in dict.fromkeys(seed_ids) if s in self._index]
+        reached = {i: 0 for i in frontier}
+
+        for level in range(1, depth + 1):
+            next_frontier = []
+            for i in frontier:
+                candidates = np.concatenate([
+                    self._slice("out", i, edge_types)[0],
+                    self._slice("in", i, edge_types)[0]
+                ])
+                if fanout is not None and len(candidates) > fanout:
+                    candidates = np.partition(candidates, fanout - 1)[:fanout]
+                for j in candidates.tolist():
+                    if j not in reached:
+                        reached[j] = level
+                        next_frontier.append(j)
+            if not next_frontier:
+                break
+            frontier = next_frontier
+
+        return {self.ids[i]: d for i, d in reached.items()}
@@ -0,0 +1,125 @@
+"""
+GraphExport - Parquet-exporter av grafen: manifest, läsning och diff.
+
+GraphService.export_parquet() skriver grafens tabeller (även härledda
+index) som zstd-komprimerade Parquet-filer plus ett manifest;
+import_parquet() läser tillbaka dem. Här finns det som
+inte behöver en GraphService: manifestet och diff mellan två exporter.
+
+Layout:
+    <dir>/manifest.json
+    <dir>/nodes.parquet, edges.parquet, node_context.parquet, ...
+    <dir>/node_names.parquet, node_terms.parquet, ...   (härledda index)
+
+Manifestet skrivs sist, så en export utan manifest är ofullständig.
+
+Användning:
+    con, summary = diff_exports("exports/2024-05-01", "exports/2024-05-02")
+    summary["nodes"]            # {"added": 12, "removed": 3, "changed": 40}
+    con.sql("SELECT * FROM diff_nodes WHERE change = 'changed'")
+"""
+
+import json
+import os
+
+import duckdb
+
+MANIFEST_NAME = "manifest.json"
+EXPORT_FORMAT = "mymemory-graph-parquet"
+EXPORT_VERSION = 1
+
+
+def sql_path(path: str) -> str:
+    """Sökväg som SQL-strängliteral (för COPY/read_parquet)."""
+    return "'" + path.replace("'", "''") + "'"
+
+
+def read_manifest(directory: str) -> dict:
+    """
+    Läs och validera en exports manifest.
+
+    Raises:
+        RuntimeError: HARDFAIL om manifestet saknas, har fel format eller
+                      pekar på filer som inte finns.
+    """
+    path = os.path.join(directory, MANIFEST_NAME)
+    if not os.path.exists(path):
+        raise RuntimeError(f"HARDFAIL: {directory} saknar {MANIFEST_NAME} (ofullständig export?)")
+    with open(path, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    if manifest.get("format") != EXPORT_FORMAT or manifest.get("version", 0) > EXPORT_VERSION:
+        raise RuntimeError(
+            f"HARDFAIL: {path} har okänt format {manifest.get('format')} v{manifest.get('version')}"
+        )
+    for table, entry in manifest["tables"].items():
+        if not os.path.exists(os.path.join(directory, entry["file"])):
+            raise RuntimeError(f"HARDFAIL: {directory} saknar {entry['file']} ({table})")
+    return manifest
+
+
+def write_manifest(directory: str, manifest: dict):
+    """Skriv manifestet atomiskt (sist i exporten)."""
+    path = os.path.join(directory, MANIFEST_NAME)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False, default=str)
+    os.replace(tmp_path, path)
+
+
+def attach_export(con, directory: str, prefix: str = "") -> dict:
+    """
+    Skapa vyer <prefix><tabell> över en exports Parquet-filer.
+
+    Returns:
+        Exportens manifest
+    """
+    manifest = read_manifest(directory)
+    for table, entry in manifest["tables"].items():
+        file_path = os.path.abspath(os.path.join(directory, entry["file"]))
+        con.execute(f"CREATE OR REPLACE VIEW {prefix}{table} AS SELECT * FROM read_parquet({sql_path(file_path)})")
+    return manifest
+
+
+def diff_exports(old_dir: str, new_dir: str, con=None) -> tuple:
+    """
+    Jämför två exporter tabell för tabell (per nyckel ur manifestet).
+
+    Härledda index (sökindex m.m.) jämförs inte.
+
+    Skapar vyerna old_<tabell>, new_<tabell> och diff_<tabell>
+    (nyckelkolumner + change: 'added' | 'removed' | 'changed') i `con`,
+    så att diffen kan frågas vidare med SQL.
+
+    Args:
+        con: DuckDB-anslutning att skapa vyerna i (None = ny in-memory)
+
+    Returns:
+        (con, summary) där summary är {tabell: {added, removed, changed}}
+    """
+    con = con or duckdb.connect()
+    old_manifest = attach_export(con, old_dir, prefix="old_")
+    new_manifest = attach_export(con, new_dir, prefix="new_")
+
+    summary = {}
+    for table, entry in new_manifest["tables"].items():
+        old_entry = old_manifest["tables"].get(table)
+        if old_entry is None or entry.get("derived"):
+            continue
+        key = entry["key"]
+        key_cols = ", ".join(key)
+        # Jämför kolumner som finns i båda exporterna (schemat kan ha vuxit)
+        compared = [c for c in entry["columns"] if c in old_entry["columns"] and c not in key]
+        changed_expr = " OR ".join(f"n.{c} IS DISTINCT FROM o.{c}" for c in compared) or "false"
+        con.execute(f"""
+            CREATE OR REPLACE VIEW diff_{table} AS
+            SELECT {key_cols}, 'added' AS change FROM new_{table} ANTI JOIN old_{table} USING ({key_cols})
+            UNION ALL
+            SELECT {key_cols}, 'removed' FROM old_{table} ANTI JOIN new_{table} USING ({key_cols})
+            UNION ALL
+            SELECT {", ".join(f"n.{c}" for c in key)}, 'changed'
+            FROM new_{table} n JOIN old_{table} o USING ({key_cols})
+            WHERE {changed_expr}
+        """)
+        counts = dict(con.execute(f"SELECT change, COUNT(*) FROM diff_{table} GROUP BY change").fetchall())
+        summary[table] = {change: counts.get(change, 0) for change in ("added", "removed", "changed")}
+    return con, summary
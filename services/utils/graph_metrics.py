@@ -0,0 +1,137 @@
+"""
+GraphMetrics - Strukturella nodmått (grad, PageRank, komponenter) i NumPy.
+
+Mått som beror på hela grafen (PageRank, sammanhängande komponenter) kan
+inte räknas nod för nod. De beräknas i ett batch-jobb över alla kanter och
+lagras i node_metrics (se GraphService.compute_node_metrics), så att
+sökrankning och Dreamer läser färdiga värden.
+
+Princip:
+1. Noder är heltalsindex 0..n-1 och kanter är parallella arrayer
+   (sources, targets, weights) - samma indexering som GraphAdjacency.
+2. PageRank är en power iteration där varje steg är en gles
+   matris-vektor-multiplikation (np.bincount över kanterna).
+   Dangling-noder (utan utgående vikt) fördelar sin massa jämnt.
+3. Komponenter (svagt sammanhängande) via label propagation med
+   pointer jumping: varje nod får minsta index i sin komponent.
+
+Användning:
+    pagerank = weighted_pagerank(n, sources, targets, weights)
+    component, size = connected_components(n, sources, targets)
+"""
+
+import numpy as np
+
+# PageRank-defaults
+PAGERANK_DAMPING = 0.85
+PAGERANK_TOLERANCE = 1e-10
+PAGERANK_MAX_ITER = 100
+
+
+def node_degrees(n: int, sources, targets, mask=None):
+    """
+    Antal kanter per nod (båda riktningar, self-loops räknas en gång).
+
+    Args:
+        mask: Räkna bara kanter där mask är True (None = alla)
+    """
+    sources = np.asarray(sources)
+    targets = np.asarray(targets)
+    if mask is not None:
+        sources, targets = sources[mask], targets[mask]
+    return (np.bincount(sources, minlength=n) +
+            np.bincount(targets[sources != targets], minlength=n)).astype(np.int64)
+
+
+def weighted_pagerank(n: int, sources, targets, weights=None,
+                      damping: float = PAGERANK_DAMPING,
+                      tolerance: float = PAGERANK_TOLERANCE,
+                      max_iter: int = PAGERANK_MAX_ITER):
+    """
+    Viktad PageRank (riktad, source -> target) med power iteration.
+
+    Args:
+        n: Antal noder
+        sources, targets: Kantändar (index)
+        weights: Kantvikt (None = 1.0); icke-positiva vikter ignoreras
+        damping: Sannolikhet att följa en kant i stället för att hoppa
+        tolerance: Stoppa när L1-skillnaden mellan iterationer är mindre
+        max_iter: Max antal iterationer
+
+    Returns:
+        float64-array med PageRank per nod (summerar till 1)
+    """
+    if n == 0:
+        return np.zeros(0)
+
+    sources = np.asarray(sources, dtype=np.int64)
+    targets = np.asarray(targets, dtype=np.int64)
+    weights = np.ones(len(sources)) if weights is None else np.asarray(weights, dtype=np.float64)
+    keep = weights > 0
+    sources, targets, weights = sources[keep], targets[keep], weights[keep]
+
+    # Övergångssannolikhet per kant: vikt / nodens totala utgående vikt
+    out_weight = np.bincount(sources, weights=weights, minlength=n)
+    transition = weights / out_weight[sources]
+    dangling = out_weight == 0
+
+    rank = np.full(n, 1.0 / n)
+    for _ in range(max_iter):
+        spread = np.bincount(targets, weights=rank[sources] * transition, minlength=n)
+        next_rank = (1.0 - damping) / n + damping * (spread + rank[dangling].sum() / n)
+        delta = np.abs(next_rank - rank).sum()
+        rank = next_rank
+        if delta < tolerance:
+            break
+    return rank / rank.sum()
+
+
+def connected_components(n: int, sources, targets) -> tuple:
+    """
+    Svagt sammanhängande komponenter (kantriktning ignoreras).
+
+    Returns:
+        (component, size): komponent-id per nod och komponentens storlek per nod.
+        Komponent-id är täta heltal, 0 = största komponenten (lika stora i
+        ordning efter lägsta nodindex).
+    """
+    if n == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+    sources = np.asarray(sources, dtype=np.int64)
+    targets = np.asarray(targets, dtype=np.int64)
+    labels = np.arange(n, dtype=np.int64)
+
+    while True:
+        # Propagera minsta etikett över kanterna...
+        edge_min = np.minimum(labels[sources], labels[targets])
+        updated = labels.copy()
+        np.minimum.at(updated, sources, edge_min)
+        np.minimum.at(updated, targets, edge_min)
+        # ...och komprimera kedjor (etikett -> etikettens etikett)
+        while True:
+            jumped = updated[updated]
+            if np.array_equal(jumped, updated):
+                break
+            updated = jumped
+        if np.array_equal(updated, labels):
+            break
+        labels = updated
+
+    # Etikett = minsta index i komponenten; numrera om efter storlek
+    roots, inverse, counts = np.unique(labels, return_inverse=True, return_counts=True)
+    order = np.lexsort((roots, -counts))
+    dense = np.empty(len(roots), dtype=np.int64)
+    dense[order] = np.arange(len(roots))
+    return dense[inverse], counts[inverse]
+
+
+def percentile_ranks(values):
+    """Värdenas rangposition i [0, 1] (1 = högst; lika värden får samma rang)."""
+    values = np.asarray(values)
+    if len(values) <= 1:
+        return np.ones(len(values))
+    unique, inverse = np.unique(values, return_inverse=True)
+    # Rang = antal strikt mindre värden
+    below = np.cumsum(np.bincount(inverse, minlength=len(unique))) - np.bincount(inverse, minlength=len(unique))
+    return below[inverse] / (len(values) - 1)
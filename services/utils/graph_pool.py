@@ -0,0 +1,224 @@
+"""
+GraphPool - Processgemensam read-only anslutning till grafen.
+
+Ersätter mönstret "öppna GraphService per anrop" i läsande tjänster
+(t.ex. MCP-servern), där varje verktygsanrop betalade för att öppna DuckDB-filen.
+
+Princip:
+1. En GraphService (read_only) per db-fil och process, delad mellan anrop.
+2. Snapshots först: finns publicerade generationer (se graph_snapshot)
+   läses den senaste, utan lås mot skrivaren. Poolen byter lat till en
+   nyare generation vid nästa lån efter att den publicerats. En snapshot
+   är oföränderlig och blockerar ingen, så anslutningen (och dess
+   CSR-cache) hålls öppen tills en nyare generation finns; idle_ttl och
+   max_age gäller inte.
+3. Hälsokontroll vid varje lån: SELECT 1, samt att filen inte bytts ut
+   (inode/mtime/storlek) av en rebuild eller en skrivares checkpoint.
+4. Utan snapshots läses den levande filen. DuckDB tillåter då inga
+   skrivare medan en read-only anslutning är öppen, så poolen håller ett
+   delat resource_lock("graph") medan anslutningen är öppen och stänger den
+   efter idle_ttl sekunder utan anrop (och senast efter max_age), så att
+   skrivare (som tar exklusivt lås) släpps in.
+
+Användning:
+    from services.utils.graph_pool import get_graph_pool
+
+    with get_graph_pool(GRAPH_PATH).acquire() as graph:
+        node = graph.get_node(node_id)
+"""
+
+import os
+import time
+import logging
+import threading
+from contextlib import contextmanager, ExitStack
+
+import duckdb
+
+from services.utils.graph_service import GraphService
+from services.utils.graph_snapshot import latest_snapshot
+from services.utils.shared_lock import resource_lock
+
+LOGGER = logging.getLogger('GraphPool')
+
+
+class GraphPool:
+    """
+    Trådsäker pool med en långlivad read-only GraphService.
+
+    Lån serialiseras (GraphService delar en DuckDB-anslutning och låser ändå
+    per anrop), vilket också garanterar att anslutningen aldrig stängs mitt i ett lån.
+    """
+
+    _instances = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, db_path: str, idle_ttl: float = 2.0, max_age: float = 60.0,
+                 lock_resource: str | None = "graph", lock_timeout: float = 5.0,
+                 use_snapshots: bool = True):
+        """
+        Args:
+            db_path: Sökväg till DuckDB-filen
+            idle_ttl: Stäng anslutningen till den levande filen efter så många sekunder utan lån
+            max_age: Öppna om anslutningen till den levande filen efter så många sekunder
+                     (släpper in väntande skrivare)
+            lock_resource: Namn för resource_lock, None = ingen samordning med skrivare
+            lock_timeout: Max väntan på delat lås vid öppning (TimeoutError annars)
+            use_snapshots: Läs senaste publicerade snapshot när en sådan finns
+        """
+        self.db_path = db_path
+        self.idle_ttl = idle_ttl
+        self.max_age = max_age
+        self.lock_resource = lock_resource
+        self.lock_timeout = lock_timeout
+        self.use_snapshots = use_snapshots
+
+        self._lock = threading.RLock()
+        self._graph: GraphService | None = None
+        self._lock_stack: ExitStack | None = None
+        self._signature = None
+        self._path = db_path          # Filen som faktiskt är öppen (levande db eller snapshot)
+        self._generation = None       # Snapshot-generation, None = levande db
+        self._opened_at = 0.0
+        self._last_used = 0.0
+        self._reaper: threading.Thread | None = None
+
+    # --- LIFECYCLE ---
+
+    def _file_signature(self):
+        """Identifierar filens version: ändras när filen byts ut eller skrivs om."""
+        try:
+            st = os.stat(self._path)
+        except FileNotFoundError:
+            return None
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    def _latest_generation(self):
+        """Senaste publicerade snapshot (generation, sökväg), eller None."""
+        return latest_snapshot(self.db_path) if self.use_snapshots else None
+
+    def _open(self):
+        """
+        Öppna read-only anslutning: senaste snapshot (utan lås) eller
+        den levande filen (under delat lås om lock_resource är satt).
+        """
+        snapshot = self._latest_generation()
+        stack = ExitStack()
+        try:
+            if snapshot:
+                generation, path = snapshot
+            else:
+                generation, path = None, self.db_path
+                if self.lock_resource:
+                    stack.enter_context(
+                        resource_lock(self.lock_resource, exclusive=False, timeout=self.lock_timeout)
+                    )
+            # Snapshots är oföränderliga: CSR-cachen byggs högst en gång per generation, när den återanvänds
+            graph = GraphService(path, read_only=True, adjacency_cache=snapshot is not None)
+        except Exception:
+            stack.close()
+            raise
+
+        self._graph = graph
+        self._lock_stack = stack
+        self._path = path
+        self._generation = generation
+        self._signature = self._file_signature()
+        self._opened_at = time.monotonic()
+        LOGGER.debug(f"GraphPool öppnad: {path} (generation {generation})")
+
+    def _close(self, reason: str = ""):
+        """Stäng anslutningen och släpp det delade låset."""
+        if self._graph is not None:
+            try:
+                self._graph.close()
+            except Exception as e:
+                LOGGER.warning(f"GraphPool: fel vid stängning: {e}")
+            self._graph = None
+            LOGGER.debug(f"GraphPool stängd ({reason}): {self._path}")
+        if self._lock_stack is not None:
+            self._lock_stack.close()
+            self._lock_stack = None
+        self._signature = None
+
+    def _holds_live_file(self) -> bool:
+        """Anslutningen är mot den levande filen (under delat lås), inte en snapshot."""
+        return self._generation is None
+
+    def _is_healthy(self) -> bool:
+        """Hälsokontroll: ålder (levande fil), generation, att filen är oförändrad och att anslutningen svarar."""
+        if self._holds_live_file() and time.monotonic() - self._opened_at > self.max_age:
+            return False
+        latest = self._latest_generation()
+        if (latest[0] if latest else None) != self._generation:
+            LOGGER.info(f"GraphPool: ny snapshot-generation {latest[0] if latest else None}, byter")
+            return False
+        if self._file_signature() != self._signature:
+            LOGGER.info(f"GraphPool: {self._path} har ändrats, öppnar om")
+            return False
+        try:
+            self._graph.conn.execute("SELECT 1").fetchone()
+        except Exception as e:
+            LOGGER.warning(f"GraphPool: hälsokontroll misslyckades: {e}")
+            return False
+        return True
+
+    def _reap_idle(self):
+        """Bakgrundstråd: stäng anslutningen till den levande filen när den varit oanvänd i idle_ttl sekunder."""
+        while True:
+            time.sleep(max(self.idle_ttl / 2, 0.05))
+            with self._lock:
+                if self._graph is None or not self._holds_live_file():
+                    self._reaper = None
+                    return
+                if time.monotonic() - self._last_used >= self.idle_ttl:
+                    self._close("idle")
+                    self._reaper = None
+                    return
+
+    # --- PUBLIC API ---
+
+    @contextmanager
+    def acquire(self):
+        """
+        Låna den delade read-only GraphService.
+
+        Öppnar (eller öppnar om) anslutningen vid behov. Vid DuckDB-fel under
+        lånet stängs anslutningen så att nästa lån får en ny.
+
+        Yields:
+            GraphService (read_only) - får inte stängas av anroparen
+        """
+        with self._lock:
+            if self._graph is not None and not self._is_healthy():
+                self._close("stale")
+            if self._graph is None:
+                self._open()
+
+            self._last_used = time.monotonic()
+            try:
+                yield self._graph
+            except duckdb.Error:
+                self._close("error")
+                raise
+            finally:
+                self._last_used = time.monotonic()
+                # Bara den levande filen stängs vid inaktivitet (låset blockerar skrivare)
+                if self._graph is not None and self._holds_live_file() and self._reaper is None:
+                    self._reaper = threading.Thread(target=self._reap_idle, name="GraphPoolReaper", daemon=True)
+                    self._reaper.start()
+
+    def close(self):
+        """Stäng anslutningen direkt (t.ex. vid nedstängning)."""
+        with self._lock:
+            self._close("close")
+
+
+def get_graph_pool(db_path: str, **kwargs) -> GraphPool:
+    """Processgemensam GraphPool per db-fil (kwargs används bara första gången)."""
+    key = os.path.abspath(db_path)
+    if key not in GraphPool._instances:
+        with GraphPool._instances_lock:
+            if key not in GraphPool._instances:
+                GraphPool._instances[key] = GraphPool(db_path, **kwargs)
+    return GraphPool._instances[key]
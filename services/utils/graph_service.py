@@ -6,36 +6,129 @@ Replaces KuzuDB (SOLVED-54).
 """
 
 import os
+import re
 import json
 import logging
 import threading
+import uuid
 import duckdb
+import numpy as np
+from collections import Counter
+from contextlib import contextmanager
 from datetime import datetime
 
+from services.utils.fuzzy_matcher import TrigramIndex
+from services.utils.graph_adjacency import GraphAdjacency
+from services.utils.graph_export import (
+    EXPORT_FORMAT, EXPORT_VERSION, MANIFEST_NAME, read_manifest, sql_path, write_manifest
+)
+from services.utils.graph_metrics import (
+    PAGERANK_DAMPING, connected_components, node_degrees, percentile_ranks, weighted_pagerank
+)
+
 # --- LOGGING ---
 LOGGER = logging.getLogger('GraphService')
 
+# Ord för sökindexet (\w matchar även å, ä, ö)
+_TOKEN_RE = re.compile(r"\w+")
+
+# Trigram-index för fuzzy-uppslag, delade av alla GraphService-instanser i processen
+# (ingestion öppnar en ny instans per dokument). Graf-fil ->
+# {"token": (graph_id, names_generation), "indexes": {nodtyp: TrigramIndex}}
+_FUZZY_INDEXES: dict[str, dict] = {}
+_FUZZY_LOCK = threading.RLock()
+
+
+class _GarbageDryRun(Exception):
+    """Avbryter collect_garbage(dry_run=True) så att transaktionen rullas tillbaka."""
+
 
 class GraphService:
     """
     Thread-safe grafdatabas med DuckDB backend.
 
     Schema:
-        nodes(id, type, aliases, properties)
-        edges(source, target, edge_type, properties)
+        nodes(id, type, aliases VARCHAR[], properties JSON, + typade kolumner, se TYPED_COLUMNS)
+        edges(source, target, edge_type, properties JSON)
+        node_names(type, name, node_id)  -- namn/alias-index, underhålls vid skrivning
+        node_terms(term, node_id, tf)     -- inverterat sökindex (BM25) över fälten, underhålls vid skrivning
+        node_context_terms(term, node_id, tf)  -- samma för node_context (utökas vid append)
+        node_term_docs(node_id, type, length, context_length)
+        node_vocab(term)                  -- alla termer i sökindexet (prefix-expansion)
+        node_context(id, node_id, text, origin, created_at)  -- nodernas kontext, append-only
+        node_metrics(node_id, degree, pagerank, centrality, component, component_size, computed_at)
+                                          -- strukturella mått, batch (compute_node_metrics)
+        graph_stats(kind, name, total)    -- antal noder/kanter per typ, underhålls vid skrivning
+        graph_meta(graph_id, names_generation)  -- en rad; generationen ökas när node_names ändras
     """
 
-    def __init__(self, db_path: str, read_only: bool = False):
+    # Antal rader per multi-row INSERT vid staging (bulk-operationer)
+    STAGING_CHUNK_SIZE = 500
+
+    # Heta properties som även lagras som typade kolumner på nodes (dual-write).
+    # properties-JSON är fortsatt komplett; kolumnerna härleds från den vid
+    # varje skrivning och används för sortering/filtrering utan JSON-avkodning.
+    TYPED_COLUMNS = [
+        ("name", "TEXT"),
+        ("status", "TEXT"),
+        ("confidence", "DOUBLE"),
+        ("retrieved_times", "INTEGER"),
+        ("last_retrieved_at", "TIMESTAMP"),
+        ("last_refined_at", "TIMESTAMP"),  # 'never' lagras som NULL
+        ("created_at", "TIMESTAMP"),
+    ]
+
+    # Sökindex (search_nodes): vikt per fält i termfrekvensen
+    SEARCH_FIELD_WEIGHTS = {"name": 3.0, "aliases": 3.0, "email": 3.0, "id": 1.0, "node_context": 1.0}
+    # BM25-parametrar
+    BM25_K1 = 1.2
+    BM25_B = 0.75
+    # Prefix-träffar ('joh' -> 'johan') räknas med reducerad vikt
+    SEARCH_PREFIX_WEIGHT = 0.5
+    SEARCH_PREFIX_MIN_LEN = 3
+    SEARCH_PREFIX_EXPANSIONS = 20
+
+    # Kanttyper från Unit-noder (dokument) till det de nämner
+    UNIT_EDGE_TYPES = ["UNIT_MENTIONS", "DEALS_WITH"]
+
+    # Sökrankning: BM25-poängen skalas med (1 + vikt * centrality), centrality i [0, 1]
+    SEARCH_CENTRALITY_WEIGHT = 0.25
+
+    # Skräpsamling (collect_garbage): källdokumentens nodtyp och kanttypen de nämner entiteter med
+    DOCUMENT_NODE_TYPE = "Document"
+    MENTION_EDGE_TYPE = "MENTIONS"
+    # compact() skriver om filen när minst denna andel av blocken är lediga
+    COMPACT_FREE_RATIO = 0.25
+
+    # Read-only med adjacency_cache: CSR-cachen byggs först vid så många traverseringar
+    # (en kortlivad anslutning med enstaka uppslag klarar sig med SQL)
+    ADJACENCY_MIN_TRAVERSALS = 8
+
+    def __init__(self, db_path: str, read_only: bool = False, adjacency_cache: bool = False):
         """
         Öppna eller skapa en grafdatabas.
 
         Args:
             db_path: Sökväg till DuckDB-filen
             read_only: Om True, öppna i read-only läge
+            adjacency_cache: Låt traverseringar (grad, Unit-uppslag, get_subgraph)
+                             läsa CSR-cachen när den är aktuell (se adjacency()).
+                             Read-only byggs den efter ADJACENCY_MIN_TRAVERSALS traverseringar
         """
         self.db_path = db_path
         self.read_only = read_only
+        self.adjacency_cache = adjacency_cache
         self._lock = threading.RLock()  # RLock allows reentrant locking (e.g. rename_node -> merge_nodes)
+        self._tx_depth = 0  # Nästlingsdjup för _transaction()
+        self._fuzzy_key = os.path.abspath(db_path)  # Nyckel i _FUZZY_INDEXES
+        self._local_fuzzy: dict | None = None  # Trigram-index för grafer utan graph_meta
+        self._write_generation = 0  # Ökas vid varje skrivning (invaliderar adjacency-cachen)
+        self._adjacency: GraphAdjacency | None = None
+        self._traversals = 0  # Traverseringar via SQL sedan öppning (read-only, se _cached_adjacency)
+        self._has_context_table = False  # Sätts när node_context-tabellen finns
+        self._has_metrics_table = False  # Sätts när node_metrics-tabellen finns
+        self._has_stats_table = False  # Sätts när graph_stats-tabellen finns
+        self._has_meta_table = False  # Sätts när graph_meta-tabellen finns
 
         # Skapa mappen om den inte finns
         os.makedirs(os.path.dirname(db_path), exist_ok=True)
@@ -45,7 +138,14 @@ class GraphService:
             self.conn = duckdb.connect(db_path, read_only=True)
         else:
             self.conn = duckdb.connect(db_path)
+        self._check_native_layout()
+        if not read_only:
             self._init_schema()
+        # Äldre grafer (öppnade read-only före migrering) har node_context kvar i properties
+        self._has_context_table = self._table_exists("node_context")
+        self._has_metrics_table = self._table_exists("node_metrics")
+        self._has_stats_table = self._table_exists("graph_stats")
+        self._has_meta_table = self._table_exists("graph_meta")
 
         LOGGER.info(f"GraphService öppnad: {db_path} (read_only={read_only})")
 
@@ -56,8 +156,8 @@ class GraphService:
                 CREATE TABLE IF NOT EXISTS nodes (
                     id TEXT PRIMARY KEY,
                     type TEXT NOT NULL,
-                    aliases TEXT,
-                    properties TEXT
+                    aliases VARCHAR[],
+                    properties JSON
                 )
             """)
             self.conn.execute("""
@@ -65,7 +165,7 @@ class GraphService:
                     source TEXT NOT NULL,
                     target TEXT NOT NULL,
                     edge_type TEXT NOT NULL,
-                    properties TEXT,
+                    properties JSON,
                     PRIMARY KEY (source, target, edge_type)
                 )
             """)
@@ -74,6 +174,169 @@ class GraphService:
             self.conn.execute("CREATE INDEX IF NOT EXISTS idx_edges_source ON edges(source)")
             self.conn.execute("CREATE INDEX IF NOT EXISTS idx_edges_target ON edges(target)")
 
+            # Typade kolumner för heta properties (migrering: lägg till + backfill)
+            typed_columns_missing = not self._column_exists("nodes", "last_refined_at")
+            for column, sql_type in self.TYPED_COLUMNS:
+                self.conn.execute(f"ALTER TABLE nodes ADD COLUMN IF NOT EXISTS {column} {sql_type}")
+            if typed_columns_missing:
+                self._sync_typed_columns()
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_nodes_name ON nodes(name)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_nodes_status ON nodes(status)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_nodes_last_retrieved ON nodes(last_retrieved_at)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_nodes_last_refined ON nodes(last_refined_at)")
+
+            # Kontext (node_context) i egen tabell: append är en INSERT, merge/split
+            # pekar om node_id i stället för att skriva om properties-JSON.
+            # id (sekvens) ger listans ordning.
+            context_table_missing = not self._table_exists("node_context")
+            self.conn.execute("CREATE SEQUENCE IF NOT EXISTS node_context_seq")
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS node_context (
+                    id BIGINT NOT NULL DEFAULT nextval('node_context_seq'),
+                    node_id TEXT NOT NULL,
+                    text TEXT NOT NULL,
+                    origin TEXT,
+                    created_at TIMESTAMP NOT NULL DEFAULT current_timestamp
+                )
+            """)
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_node_context_node ON node_context(node_id)")
+            self._has_context_table = True
+            if context_table_missing:
+                self._migrate_node_context()
+
+            # Strukturella mått (compute_node_metrics). Tom tills batch-jobbet körts;
+            # läsare som saknar rad för en nod räknar den som okänd, inte som 0.
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS node_metrics (
+                    node_id TEXT PRIMARY KEY,
+                    degree INTEGER NOT NULL,
+                    pagerank DOUBLE NOT NULL,
+                    centrality DOUBLE NOT NULL,
+                    component BIGINT NOT NULL,
+                    component_size BIGINT NOT NULL,
+                    computed_at TIMESTAMP NOT NULL
+                )
+            """)
+
+            # Antal noder/kanter per typ (get_stats): uppdateras i samma transaktion
+            # som skrivningen, så statistiken är en liten läsning i stället för
+            # GROUP BY över nodes och edges. kind = 'node' | 'edge'.
+            stats_table_missing = not self._table_exists("graph_stats")
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS graph_stats (
+                    kind TEXT NOT NULL,
+                    name TEXT NOT NULL,
+                    total BIGINT NOT NULL,
+                    PRIMARY KEY (kind, name)
+                )
+            """)
+            self._has_stats_table = True
+            if stats_table_missing:
+                self.rebuild_graph_stats()
+
+            # Generation för node_names: ökas av varje skrivning som ändrar namnindexet,
+            # så att processdelade trigram-index (_get_fuzzy_index) ser när de blivit
+            # inaktuella, även efter skrivningar från andra processer. graph_id skiljer
+            # en återskapad graf-fil (hard reset) från den gamla.
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS graph_meta (
+                    graph_id TEXT NOT NULL,
+                    names_generation BIGINT NOT NULL
+                )
+            """)
+            if self.conn.execute("SELECT COUNT(*) FROM graph_meta").fetchone()[0] == 0:
+                self.conn.execute("INSERT INTO graph_meta VALUES (?, 0)", [str(uuid.uuid4())])
+            self._has_meta_table = True
+
+            # Namn/alias-index för entity resolution (find_node_by_name)
+            # name = normaliserat namn eller alias (strip + lower)
+            name_index_missing = not self._table_exists("node_names")
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS node_names (
+                    type TEXT NOT NULL,
+                    name TEXT NOT NULL,
+                    node_id TEXT NOT NULL
+                )
+            """)
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_node_names_name ON node_names(name)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_node_names_node ON node_names(node_id)")
+
+            # Inverterat sökindex (search_nodes): term -> noder med viktad termfrekvens.
+            # Fälttermer (node_terms) och kontexttermer (node_context_terms) ligger i
+            # varsin tabell: att skriva om en nods fälttermer är då ett rent
+            # node_id-uppslag (DuckDB använder inte indexet om filtret har fler villkor).
+            search_index_missing = not (
+                self._table_exists("node_term_docs") and self._table_exists("node_vocab")
+                and self._table_exists("node_context_terms")
+                and self._column_exists("node_term_docs", "context_length")
+            ) or context_table_missing
+            if self._column_exists("node_terms", "context"):
+                # Äldre layout med context-flagga i node_terms - byggs om nedan
+                self.conn.execute("DROP TABLE node_terms")
+                search_index_missing = True
+            for table in ("node_terms", "node_context_terms"):
+                self.conn.execute(f"""
+                    CREATE TABLE IF NOT EXISTS {table} (
+                        term TEXT NOT NULL,
+                        node_id TEXT NOT NULL,
+                        tf DOUBLE NOT NULL
+                    )
+                """)
+                self.conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_term ON {table}(term)")
+                self.conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_node ON {table}(node_id)")
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS node_term_docs (
+                    node_id TEXT NOT NULL,
+                    type TEXT NOT NULL,
+                    length DOUBLE NOT NULL,
+                    context_length DOUBLE NOT NULL DEFAULT 0
+                )
+            """)
+            self.conn.execute("ALTER TABLE node_term_docs ADD COLUMN IF NOT EXISTS context_length DOUBLE DEFAULT 0")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_node_term_docs_node ON node_term_docs(node_id)")
+            # Vokabulär: liten tabell att prefix-matcha mot i stället för alla postings.
+            # Termer tas inte bort när noder försvinner (de expanderar då bara till inget).
+            self.conn.execute("CREATE TABLE IF NOT EXISTS node_vocab (term TEXT PRIMARY KEY)")
+            # Namnindexet skriver även sökindexet, så båda byggs först när tabellerna finns
+            if name_index_missing:
+                self._rebuild_name_index()
+            elif search_index_missing:
+                self._rebuild_search_index()
+
+    def _check_native_layout(self):
+        """
+        HARDFAIL om grafen har det äldre TEXT-schemat (aliases/properties som JSON-text).
+
+        Migreras en gång med tools/migrate_graph_native_types.py.
+        """
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT data_type FROM information_schema.columns "
+                "WHERE table_name = 'nodes' AND column_name = 'aliases'"
+            ).fetchone()
+        if row and row[0] != "VARCHAR[]":
+            self.conn.close()
+            self.conn = None
+            raise RuntimeError(
+                f"HARDFAIL: {self.db_path} har äldre schema (aliases {row[0]}). "
+                f"Kör: python tools/migrate_graph_native_types.py --confirm"
+            )
+
+    def _table_exists(self, table: str) -> bool:
+        """Kontrollera om en tabell finns i databasen."""
+        with self._lock:
+            return self.conn.execute(
+                "SELECT 1 FROM information_schema.tables WHERE table_name = ?", [table]
+            ).fetchone() is not None
+
+    def _column_exists(self, table: str, column: str) -> bool:
+        """Kontrollera om en kolumn finns i en tabell."""
+        with self._lock:
+            return self.conn.execute(
+                "SELECT 1 FROM information_schema.columns WHERE table_name = ? AND column_name = ?",
+                [table, column]
+            ).fetchone() is not None
+
     def close(self):
         """Stäng databasanslutningen."""
         with self._lock:
@@ -88,12 +351,755 @@ class GraphService:
     def __exit__(self, exc_type, exc_val, exc_tb):
         self.close()
 
+    # --- TRANSACTION & STAGING ---
+
+    @contextmanager
+    def _transaction(self):
+        """
+        Kör ett block i en explicit transaktion (BEGIN/COMMIT, ROLLBACK vid fel).
+
+        Reentrant: nästlade anrop (t.ex. split_node -> upsert_nodes_bulk)
+        återanvänder den yttre transaktionen.
+        """
+        with self._lock:
+            if self._tx_depth > 0:
+                self._tx_depth += 1
+                try:
+                    yield
+                finally:
+                    self._tx_depth -= 1
+                return
+
+            self.conn.execute("BEGIN TRANSACTION")
+            self._tx_depth = 1
+            try:
+                yield
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                # Trigram-index kan ha uppdaterats i transaktionen - bygg om vid behov
+                self._drop_fuzzy_indexes()
+                raise
+            finally:
+                self._tx_depth = 0
+                self._bump_generation()
+
+    def _bump_generation(self):
+        """Markera att grafen skrivits (cacher byggda på en äldre generation blir inaktuella)."""
+        self._write_generation += 1
+
+    @property
+    def write_generation(self) -> int:
+        """Räknare som ökar vid varje skrivning via denna GraphService."""
+        return self._write_generation
+
+    def _stage_rows(self, table: str, columns: str, rows: list):
+        """
+        Skapa en temporär staging-tabell och fyll den med rader.
+
+        Raderna skrivs med multi-row INSERT i chunks om STAGING_CHUNK_SIZE,
+        så att en bulk-operation kostar ett fåtal anrop i stället för ett per rad.
+
+        Args:
+            table: Namn på temp-tabellen (skapas om/ersätts)
+            columns: Kolumndefinition, t.ex. "id TEXT, type TEXT"
+            rows: Lista med tupler i kolumnordning
+        """
+        self.conn.execute(f"CREATE OR REPLACE TEMP TABLE {table} ({columns})")
+        if not rows:
+            return
+
+        row_placeholder = "(" + ", ".join(["?"] * len(rows[0])) + ")"
+        for start in range(0, len(rows), self.STAGING_CHUNK_SIZE):
+            chunk = rows[start:start + self.STAGING_CHUNK_SIZE]
+            params = [value for row in chunk for value in row]
+            self.conn.execute(
+                f"INSERT INTO {table} VALUES {', '.join([row_placeholder] * len(chunk))}",
+                params
+            )
+
+    @staticmethod
+    def _merge_node_properties(current_props: dict | None, new_props: dict) -> dict:
+        """
+        Slå ihop nya properties med existerande (upsert-semantik).
+
+        Args:
+            current_props: Existerande properties, eller None om noden är ny
+            new_props: Inkommande properties (skriver över existerande nycklar)
+
+        Returns:
+            Slutgiltiga properties. Nya noder får schemats systemfält som default.
+        """
+        if current_props is not None:
+            # Noden finns - bevara existerande data, skriv över med nytt
+            final_props = current_props.copy()
+            final_props.update(new_props)
+            return final_props
+
+        # Ny nod - Initiera alla required systemfält enligt schema
+        now_ts = datetime.now().isoformat()
+        final_props = {
+            "created_at": now_ts,
+            "last_synced_at": now_ts,
+            "last_seen_at": now_ts,
+            "last_retrieved_at": now_ts,
+            "retrieved_times": 0,
+            "last_refined_at": "never",
+            "status": "PROVISIONAL",
+            "confidence": 0.5
+        }
+        final_props.update(new_props)
+        return final_props
+
+    # --- ROW DECODING ---
+
+    @staticmethod
+    def _decode_json_values(raw_values: list) -> list:
+        """
+        Avkoda en hel kolumn JSON-text i ETT json.loads-anrop.
+
+        Raderna sätts ihop till en JSON-array så att parsningen sker i C
+        i stället för ett Python-anrop per rad. NULL ger {}.
+        """
+        if not raw_values:
+            return []
+        try:
+            return json.loads("[" + ",".join(v if v else "{}" for v in raw_values) + "]")
+        except ValueError:
+            # Enskild trasig rad - avkoda radvis så att resten överlever
+            decoded = []
+            for value in raw_values:
+                try:
+                    decoded.append(json.loads(value) if value else {})
+                except ValueError:
+                    decoded.append({})
+            return decoded
+
+    @staticmethod
+    def _decode_node_json(aliases_raw, props_raw) -> tuple:
+        """Avkoda en nodrads aliases (VARCHAR[]) och properties (JSON-text)."""
+        aliases = list(aliases_raw) if aliases_raw is not None else []
+        try:
+            props = json.loads(props_raw) if props_raw else {}
+        except (TypeError, ValueError):
+            props = {}
+        return aliases, props
+
+    def _fetch_nodes(self, sql: str, params: list = None) -> list[dict]:
+        """
+        Kör en nodfråga och avkoda resultatet kolumnvis.
+
+        Frågan måste returnera kolumnerna id, type, aliases, properties.
+        Hämtas med fetchnumpy: aliases kommer som native listor och
+        properties avkodas med _decode_json_values.
+
+        Returns:
+            Lista med {id, type, aliases, properties}
+        """
+        with self._lock:
+            columns = self.conn.execute(sql, params or []).fetchnumpy()
+
+        ids = columns["id"].tolist()
+        if not ids:
+            return []
+        types = columns["type"].tolist()
+        aliases = columns["aliases"].tolist()
+        properties = self._decode_json_values(columns["properties"].tolist())
+
+        return [
+            {
+                "id": ids[i],
+                "type": types[i],
+                "aliases": aliases[i].tolist() if aliases[i] is not None else [],
+                "properties": properties[i]
+            }
+            for i in range(len(ids))
+        ]
+
+    def _fetch_edges(self, sql: str, params: list = None) -> list[dict]:
+        """
+        Kör en kantfråga och avkoda resultatet kolumnvis.
+
+        Frågan måste returnera kolumnerna source, target, edge_type, properties.
+
+        Returns:
+            Lista med {source, target, type, properties}
+        """
+        with self._lock:
+            columns = self.conn.execute(sql, params or []).fetchnumpy()
+
+        sources = columns["source"].tolist()
+        if not sources:
+            return []
+        targets = columns["target"].tolist()
+        edge_types = columns["edge_type"].tolist()
+        properties = self._decode_json_values(columns["properties"].tolist())
+
+        return [
+            {"source": sources[i], "target": targets[i], "type": edge_types[i], "properties": properties[i]}
+            for i in range(len(sources))
+        ]
+
+    # --- TYPED COLUMNS ---
+
+    @classmethod
+    def _typed_column_exprs(cls, source: str = "properties") -> list[str]:
+        """
+        SQL-uttryck som härleder de typade kolumnerna ur en properties-JSON.
+
+        Ogiltig JSON och värden som inte kan castas (t.ex. 'never') ger NULL.
+
+        Args:
+            source: SQL-uttryck för properties-texten (kolumn eller EXCLUDED.x)
+        """
+        valid = f"CASE WHEN json_valid({source}) THEN {source} END"
+        return [
+            f"TRY_CAST(json_extract_string({valid}, '$.{column}') AS {sql_type})"
+            for column, sql_type in cls.TYPED_COLUMNS
+        ]
+
+    @classmethod
+    def _typed_column_list(cls) -> str:
+        """Kommaseparerad lista med de typade kolumnnamnen."""
+        return ", ".join(column for column, _ in cls.TYPED_COLUMNS)
+
+    @classmethod
+    def _typed_column_updates(cls) -> str:
+        """SET-lista för ON CONFLICT DO UPDATE av de typade kolumnerna."""
+        return ", ".join(f"{column} = EXCLUDED.{column}" for column, _ in cls.TYPED_COLUMNS)
+
+    def _sync_typed_columns(self, node_ids: list = None):
+        """
+        Härled de typade kolumnerna från properties-JSON.
+
+        Används vid migrering (alla noder) och efter skrivningar som
+        uppdaterar properties direkt med UPDATE.
+
+        Args:
+            node_ids: Noder att synka (None = alla)
+        """
+        assignments = ", ".join(
+            f"{column} = {expr}"
+            for (column, _), expr in zip(self.TYPED_COLUMNS, self._typed_column_exprs())
+        )
+        with self._lock:
+            if node_ids is None:
+                self.conn.execute(f"UPDATE nodes SET {assignments}")
+                return
+            ids = list(dict.fromkeys(node_ids))
+            if not ids:
+                return
+            placeholders = ','.join(['?'] * len(ids))
+            self.conn.execute(f"UPDATE nodes SET {assignments} WHERE id IN ({placeholders})", ids)
+
+    # --- NODE CONTEXT ---
+
+    @staticmethod
+    def _context_rows(node_id: str, entries, created_at: str = None) -> list:
+        """
+        node_context-poster ({text, origin}) som tabellrader.
+
+        Returns:
+            Lista med (node_id, text, origin, created_at). Poster utan text hoppas över.
+        """
+        if not isinstance(entries, list):
+            entries = [entries] if entries else []
+        created_at = created_at or datetime.now().isoformat()
+        rows = []
+        for entry in entries:
+            text, origin = (entry.get("text"), entry.get("origin")) if isinstance(entry, dict) else (entry, None)
+            if text:
+                rows.append((node_id, str(text), None if origin is None else str(origin), created_at))
+        return rows
+
+    def _append_context_rows(self, rows: list) -> list:
+        """
+        Lägg till kontextrader (append). Radernas ordning bevaras via id-sekvensen.
+
+        Identiska rader (node_id, text, origin) i samma batch skrivs en gång.
+        Ogiltig created_at ger nuvarande tid.
+
+        Returns:
+            De skrivna raderna
+        """
+        seen, unique = set(), []
+        for row in rows:
+            if row[:3] not in seen:
+                seen.add(row[:3])
+                unique.append(row)
+        with self._lock:
+            for start in range(0, len(unique), self.STAGING_CHUNK_SIZE):
+                chunk = unique[start:start + self.STAGING_CHUNK_SIZE]
+                values = ", ".join(["(?, ?, ?, COALESCE(TRY_CAST(? AS TIMESTAMP), current_timestamp))"] * len(chunk))
+                self.conn.execute(
+                    f"INSERT INTO node_context (node_id, text, origin, created_at) VALUES {values}",
+                    [value for row in chunk for value in row]
+                )
+        return unique
+
+    def _append_context(self, rows: list):
+        """Append av kontextrader inkl. sökindex (nodernas namnindex måste vara skrivet)."""
+        self._index_context_terms(self._append_context_rows(rows))
+
+    def _migrate_node_context(self):
+        """Flytta node_context ur properties-JSON till node_context-tabellen (äldre grafer)."""
+        with self._lock:
+            nodes = self._fetch_nodes(
+                "SELECT id, type, aliases, properties FROM nodes "
+                "WHERE json_valid(properties) AND json_extract(properties, '$.node_context') IS NOT NULL"
+            )
+            if not nodes:
+                return
+
+            rows, stripped = [], []
+            for node in nodes:
+                props = node["properties"]
+                entries = props.pop("node_context", None)
+                rows.extend(self._context_rows(node["id"], entries, props.get("created_at")))
+                stripped.append((node["id"], json.dumps(props, ensure_ascii=False)))
+
+            with self._transaction():
+                self._append_context_rows(rows)
+                self._stage_rows("_stage_props", "id TEXT, properties JSON", stripped)
+                self.conn.execute(
+                    "UPDATE nodes SET properties = s.properties FROM _stage_props s WHERE nodes.id = s.id"
+                )
+                self.conn.execute("DROP TABLE IF EXISTS _stage_props")
+        LOGGER.info(f"node_context migrerad: {len(rows)} poster från {len(nodes)} noder")
+
+    def _fetch_context(self, node_ids: list, limit: int = None) -> dict[str, list]:
+        """node_id -> [(text, origin)] i ordning (äldst först), max `limit` per nod."""
+        if not node_ids or not self._has_context_table:
+            return {}
+        qualify = "QUALIFY row_number() OVER (PARTITION BY node_id ORDER BY id) <= ?" if limit else ""
+        params = [list(node_ids)] + ([limit] if limit else [])
+        with self._lock:
+            columns = self.conn.execute(f"""
+                SELECT node_id, text, origin FROM node_context
+                WHERE node_id IN (SELECT unnest(CAST(? AS VARCHAR[])))
+                {qualify}
+                ORDER BY node_id, id
+            """, params).fetchnumpy()
+
+        contexts = {}
+        for node_id, text, origin in zip(columns["node_id"].tolist(), columns["text"].tolist(),
+                                         columns["origin"].tolist()):
+            contexts.setdefault(node_id, []).append((text, origin))
+        return contexts
+
+    def get_node_context(self, node_ids: list, limit: int = None) -> dict[str, list]:
+        """
+        Kontext för många noder med EN fråga.
+
+        Args:
+            node_ids: Nod-IDs
+            limit: Max antal poster per nod (de äldsta), None = alla
+
+        Returns:
+            dict id -> [{text, origin}] (äldst först). Noder utan kontext utelämnas.
+        """
+        ids = list(dict.fromkeys(i for i in node_ids if i))
+        return {
+            node_id: [{"text": text, "origin": origin} for text, origin in entries]
+            for node_id, entries in self._fetch_context(ids, limit).items()
+        }
+
+    def attach_node_context(self, nodes: list[dict], limit: int = None) -> list[dict]:
+        """
+        Lägg nodernas kontext i properties["node_context"] (som före tabellen).
+
+        Kontexten läses bara när den efterfrågas - nodfrågorna läser den inte.
+        Äldre grafer utan node_context-tabell har listan kvar i properties.
+
+        Returns:
+            Samma lista (noderna uppdateras på plats)
+        """
+        if not nodes or not self._has_context_table:
+            return nodes
+        contexts = self.get_node_context([n["id"] for n in nodes], limit=limit)
+        for node in nodes:
+            node["properties"]["node_context"] = contexts.get(node["id"], [])
+        return nodes
+
+    def set_node_context(self, node_id: str, entries: list):
+        """
+        Ersätt en nods kontext (t.ex. efter Dreamers prune).
+
+        Args:
+            node_id: Nod-ID
+            entries: Ny lista med {text, origin}
+        """
+        if self.read_only:
+            raise RuntimeError("HARDFAIL: Försöker skriva i read_only mode")
+
+        with self._lock:
+            with self._transaction():
+                self.conn.execute("DELETE FROM node_context WHERE node_id = ?", [node_id])
+                self._append_context_rows(self._context_rows(node_id, entries))
+                self._reindex_names([node_id])
+
+    # --- NAME INDEX ---
+
+    @staticmethod
+    def _normalize_name(name) -> str:
+        """Normalisera ett namn/alias för uppslag (strip + lower)."""
+        return name.strip().lower() if isinstance(name, str) else ""
+
+    @classmethod
+    def _name_keys(cls, aliases: list, properties: dict) -> set:
+        """Alla normaliserade namn en nod ska kunna hittas på (name + aliases)."""
+        candidates = [properties.get("name")]
+        candidates += aliases or []
+        props_aliases = properties.get("aliases")
+        if isinstance(props_aliases, list):
+            candidates += props_aliases
+
+        keys = set()
+        for candidate in candidates:
+            key = cls._normalize_name(candidate)
+            if key:
+                keys.add(key)
+        return keys
+
+    def _index_names(self, entries: list, replace: bool = True):
+        """
+        Skriv om node_names-raderna för givna noder.
+
+        Args:
+            entries: Lista av tupler (id, type, aliases, properties) med
+                     nodernas aktuella (redan skrivna) data
+            replace: Ta bort nodernas gamla rader först
+        """
+        if not entries:
+            return
+
+        staged = []
+        for node_id, node_type, aliases, props in entries:
+            for key in self._name_keys(aliases, props):
+                staged.append((node_type, key, node_id))
+
+        with self._lock:
+            if replace:
+                ids = list(dict.fromkeys(e[0] for e in entries))
+                placeholders = ','.join(['?'] * len(ids))
+                self.conn.execute(f"DELETE FROM node_names WHERE node_id IN ({placeholders})", ids)
+            if staged:
+                self._stage_rows("_stage_names", "type TEXT, name TEXT, node_id TEXT", staged)
+                self.conn.execute("INSERT INTO node_names SELECT DISTINCT type, name, node_id FROM _stage_names")
+                self.conn.execute("DROP TABLE IF EXISTS _stage_names")
+            self._index_search_terms(entries, replace=replace)
+            self._update_fuzzy_names([e[0] for e in entries], staged)
+
+    def _reindex_names(self, node_ids: list):
+        """
+        Synka node_names för givna noder mot nodes-tabellen.
+        Noder som inte längre finns tas bort ur indexet.
+        """
+        ids = list(dict.fromkeys(i for i in node_ids if i))
+        if not ids:
+            return
+
+        placeholders = ','.join(['?'] * len(ids))
+        with self._lock:
+            nodes = self._fetch_nodes(
+                f"SELECT id, type, aliases, properties FROM nodes WHERE id IN ({placeholders})",
+                ids
+            )
+            self.conn.execute(f"DELETE FROM node_names WHERE node_id IN ({placeholders})", ids)
+            self._delete_search_terms(ids)
+            self._update_fuzzy_names(ids)
+            self._index_names([
+                (n["id"], n["type"], n["aliases"], n["properties"]) for n in nodes
+            ], replace=False)
+
+    def _rebuild_name_index(self):
+        """Bygg om hela node_names från nodes (migrering av äldre grafer)."""
+        with self._lock:
+            nodes = self._fetch_nodes("SELECT id, type, aliases, properties FROM nodes")
+            with self._transaction():
+                self.conn.execute("DELETE FROM node_names")
+                # _index_names skriver även sökindexet
+                for table in ("node_terms", "node_context_terms", "node_term_docs"):
+                    self.conn.execute(f"DELETE FROM {table}")
+                self._drop_fuzzy_indexes()
+                self._index_names([
+                    (n["id"], n["type"], n["aliases"], n["properties"]) for n in nodes
+                ], replace=False)
+        LOGGER.info(f"node_names byggd för {len(nodes)} noder")
+
+    # --- SEARCH INDEX ---
+
+    @staticmethod
+    def _tokenize(text) -> list:
+        """Söktermer ur en text (gemener, ord om minst två tecken)."""
+        if not isinstance(text, str):
+            return []
+        return [t for t in _TOKEN_RE.findall(text.lower()) if len(t) > 1]
+
+    @classmethod
+    def _search_terms(cls, node_id: str, aliases: list, properties: dict) -> Counter:
+        """Viktade termfrekvenser för en nods fält (name, aliases, email, id)."""
+        weights = cls.SEARCH_FIELD_WEIGHTS
+        terms = Counter()
+
+        def add(text, weight):
+            for token in cls._tokenize(text):
+                terms[token] += weight
+
+        add(properties.get("name"), weights["name"])
+        for alias in list(aliases or []) + list(properties.get("aliases") or []):
+            add(alias, weights["aliases"])
+        add(properties.get("email"), weights["email"])
+        if isinstance(node_id, str) and node_id:
+            terms[node_id.lower()] += weights["id"]
+        return terms
+
+    @classmethod
+    def _context_terms(cls, texts: list) -> Counter:
+        """Viktade termfrekvenser för kontextposter (node_context)."""
+        weight = cls.SEARCH_FIELD_WEIGHTS["node_context"]
+        terms = Counter()
+        for text in texts:
+            for token in cls._tokenize(text):
+                terms[token] += weight
+        return terms
+
+    def _delete_search_terms(self, node_ids: list):
+        """Ta bort noders rader ur sökindexet."""
+        if not node_ids:
+            return
+        placeholders = ','.join(['?'] * len(node_ids))
+        for table in ("node_terms", "node_context_terms", "node_term_docs"):
+            self.conn.execute(f"DELETE FROM {table} WHERE node_id IN ({placeholders})", node_ids)
+
+    def _insert_postings(self, terms_by_node: dict, context: bool):
+        """Skriv postings (node_terms eller node_context_terms + node_vocab) för {node_id: Counter}."""
+        term_col, term_node_col, tf_col = [], [], []
+        for node_id, terms in terms_by_node.items():
+            term_col.extend(terms)
+            term_node_col.extend([node_id] * len(terms))
+            tf_col.extend(terms.values())
+        if not term_col:
+            return
+
+        # Postings binds som tre listor (kolumnvis) - en sats oavsett antal termer
+        self.conn.execute("""
+            CREATE OR REPLACE TEMP TABLE _stage_terms AS
+            SELECT unnest(CAST(? AS VARCHAR[])) AS term,
+                   unnest(CAST(? AS VARCHAR[])) AS node_id,
+                   unnest(CAST(? AS DOUBLE[])) AS tf
+        """, [term_col, term_node_col, tf_col])
+        table = "node_context_terms" if context else "node_terms"
+        self.conn.execute(f"INSERT INTO {table} (term, node_id, tf) SELECT term, node_id, tf FROM _stage_terms")
+        self.conn.execute("INSERT INTO node_vocab SELECT DISTINCT term FROM _stage_terms ON CONFLICT DO NOTHING")
+        self.conn.execute("DROP TABLE IF EXISTS _stage_terms")
+
+    def _index_search_terms(self, entries: list, replace: bool = True):
+        """
+        Skriv om sökindexet (node_terms/node_term_docs/node_vocab) för givna noder.
+
+        Anropas från _index_names, så indexet följer samma skrivvägar som node_names.
+        replace=True skriver bara om nodernas fälttermer; kontexttermerna
+        (node_context_terms) ligger kvar och utökas av _index_context_terms vid append.
+        replace=False (omindexering) bygger även kontexttermerna från node_context.
+
+        Args:
+            entries: Lista av tupler (id, type, aliases, properties)
+            replace: Ta bort nodernas gamla fälttermer först
+        """
+        if not entries:
+            return
+
+        # Senaste posten per nod vinner (bulk kan innehålla dubbletter)
+        latest = {e[0]: e for e in entries}
+        terms_by_node = {}
+        doc_rows = []
+        for node_id, node_type, aliases, props in latest.values():
+            terms = self._search_terms(node_id, aliases, props)
+            terms_by_node[node_id] = terms
+            doc_rows.append((node_id, node_type, float(sum(terms.values()))))
+
+        ids = list(latest)
+        placeholders = ','.join(['?'] * len(ids))
+        with self._lock:
+            if replace:
+                self.conn.execute(f"DELETE FROM node_terms WHERE node_id IN ({placeholders})", ids)
+            self._insert_postings(terms_by_node, context=False)
+
+            # Dokumentlängd = fälttermer + befintliga kontexttermer
+            self._stage_rows("_stage_term_docs", "node_id TEXT, type TEXT, length DOUBLE", doc_rows)
+            self.conn.execute("""
+                CREATE OR REPLACE TEMP TABLE _stage_term_docs_ctx AS
+                SELECT s.node_id, s.type, s.length + COALESCE(d.context_length, 0) AS length,
+                       COALESCE(d.context_length, 0) AS context_length
+                FROM _stage_term_docs s
+                LEFT JOIN node_term_docs d ON d.node_id = s.node_id
+            """)
+            self.conn.execute(f"DELETE FROM node_term_docs WHERE node_id IN ({placeholders})", ids)
+            self.conn.execute("""
+                INSERT INTO node_term_docs (node_id, type, length, context_length)
+                SELECT node_id, type, length, context_length FROM _stage_term_docs_ctx
+            """)
+            for table in ("_stage_term_docs", "_stage_term_docs_ctx"):
+                self.conn.execute(f"DROP TABLE IF EXISTS {table}")
+
+            if not replace:
+                contexts = self._fetch_context(ids)
+                self._index_context_terms([
+                    (node_id, text) for node_id, entries in contexts.items() for text, _ in entries
+                ])
+
+    def _index_context_terms(self, rows: list):
+        """
+        Lägg till kontextposters termer i sökindexet (inkrementellt, vid append).
+
+        Nodens dokumentlängd ökas med de tillagda termerna; inga befintliga
+        postings skrivs om. Noden måste redan finnas i node_term_docs.
+
+        Args:
+            rows: Lista av (node_id, text, ...) - t.ex. rader från _context_rows
+        """
+        texts_by_node = {}
+        for row in rows:
+            texts_by_node.setdefault(row[0], []).append(row[1])
+        terms_by_node = {node_id: self._context_terms(texts) for node_id, texts in texts_by_node.items()}
+        added = [(node_id, float(sum(terms.values()))) for node_id, terms in terms_by_node.items() if terms]
+        if not added:
+            return
+
+        with self._lock:
+            self._insert_postings(terms_by_node, context=True)
+            self._stage_rows("_stage_context_length", "node_id TEXT, added DOUBLE", added)
+            self.conn.execute("""
+                UPDATE node_term_docs SET
+                    length = node_term_docs.length + s.added,
+                    context_length = node_term_docs.context_length + s.added
+                FROM _stage_context_length s
+                WHERE node_term_docs.node_id = s.node_id
+            """)
+            self.conn.execute("DROP TABLE IF EXISTS _stage_context_length")
+
+    def _rebuild_search_index(self):
+        """Bygg om hela sökindexet från nodes och node_context (migrering eller efter externa skrivningar)."""
+        with self._lock:
+            nodes = self._fetch_nodes("SELECT id, type, aliases, properties FROM nodes")
+            with self._transaction():
+                for table in ("node_terms", "node_context_terms", "node_term_docs", "node_vocab"):
+                    self.conn.execute(f"DELETE FROM {table}")
+                self._index_search_terms([
+                    (n["id"], n["type"], n["aliases"], n["properties"]) for n in nodes
+                ], replace=False)
+        LOGGER.info(f"Sökindex byggt för {len(nodes)} noder")
+
+    def search_index_is_fresh(self) -> bool:
+        """
+        True om sökindexet finns och täcker exakt alla noder.
+
+        Indexet underhålls vid varje skrivning via GraphService; det blir
+        inaktuellt om grafen skrivits av äldre kod eller direkt via SQL.
+        """
+        with self._lock:
+            if not (self._table_exists("node_term_docs") and self._table_exists("node_vocab")):
+                return False
+            nodes, docs = self.conn.execute(
+                "SELECT (SELECT COUNT(*) FROM nodes), (SELECT COUNT(*) FROM node_term_docs)"
+            ).fetchone()
+        return nodes == docs
+
+    def _names_token(self) -> tuple | None:
+        """(graph_id, names_generation) för namnindexet, None om grafen saknar graph_meta."""
+        with self._lock:
+            if not self._has_meta_table:
+                return None
+            return self.conn.execute("SELECT graph_id, names_generation FROM graph_meta").fetchone()
+
+    def _bump_names_generation(self) -> tuple:
+        """Öka names_generation (i pågående transaktion). Returnerar den nya token."""
+        with self._lock:
+            return self.conn.execute("""
+                UPDATE graph_meta SET names_generation = names_generation + 1
+                RETURNING graph_id, names_generation
+            """).fetchone()
+
+    def _drop_fuzzy_indexes(self):
+        """Släpp grafens laddade trigram-index (byggs om vid nästa fuzzy-uppslag)."""
+        with _FUZZY_LOCK:
+            _FUZZY_INDEXES.pop(self._fuzzy_key, None)
+            self._local_fuzzy = None
+
+    def _update_fuzzy_names(self, node_ids: list, added: list = ()):
+        """
+        Anropas av skrivningar som ändrar node_names: ökar names_generation och
+        uppdaterar grafens trigram-index inkrementellt om de är laddade.
+
+        Args:
+            node_ids: Noder vars namn tas bort ur indexen (typen kan ha ändrats)
+            added: (nodtyp, normaliserat namn, node_id) att lägga till
+        """
+        token = self._bump_names_generation()
+        with _FUZZY_LOCK:
+            state = _FUZZY_INDEXES.get(self._fuzzy_key)
+            if state is None:
+                return
+            if state["token"] != (token[0], token[1] - 1):
+                # Skrivet utanför processen sedan indexen byggdes
+                self._drop_fuzzy_indexes()
+                return
+            state["token"] = token
+            for index in state["indexes"].values():
+                for node_id in node_ids:
+                    index.remove_node(node_id)
+            for node_type, key, node_id in added:
+                index = state["indexes"].get(node_type)
+                if index is not None:
+                    index.add(key, node_id)
+
+    def _get_fuzzy_index(self, node_type: str) -> TrigramIndex:
+        """
+        Trigram-index över node_names för en nodtyp.
+
+        Indexen delas av alla GraphService-instanser för samma graf-fil i
+        processen och gäller för en (graph_id, names_generation). Skrivningar
+        via GraphService i processen uppdaterar dem inkrementellt
+        (_update_fuzzy_names); har generationen ändrats på annat sätt (annan
+        process) byggs de om vid nästa uppslag. Anroparen håller _FUZZY_LOCK
+        medan indexet används.
+        """
+        token = self._names_token()
+        with self._lock, _FUZZY_LOCK:
+            if token is None:
+                # Äldre graf utan graph_meta (read-only): index bara för denna instans
+                if self._local_fuzzy is None:
+                    self._local_fuzzy = {"token": None, "indexes": {}}
+                state = self._local_fuzzy
+            else:
+                state = _FUZZY_INDEXES.get(self._fuzzy_key)
+                if state is None or state["token"] != token:
+                    state = {"token": token, "indexes": {}}
+                    _FUZZY_INDEXES[self._fuzzy_key] = state
+
+            index = state["indexes"].get(node_type)
+            if index is None:
+                index = TrigramIndex()
+                rows = self.conn.execute(
+                    "SELECT name, node_id FROM node_names WHERE type = ?", [node_type]
+                ).fetchall()
+                for name, node_id in rows:
+                    index.add(name, node_id)
+                state["indexes"][node_type] = index
+                LOGGER.debug(f"Trigram-index byggt för {node_type}: {len(index)} namn")
+            return index
+
     # --- NODE OPERATIONS ---
 
-    def get_node(self, node_id: str) -> dict | None:
+    def get_node(self, node_id: str, with_context: bool = False) -> dict | None:
         """
         Hämta en nod med givet ID.
 
+        Args:
+            node_id: Nod-ID
+            with_context: Läs även node_context (läggs i properties)
+
         Returns:
             dict med {id, type, aliases, properties} eller None
         """
@@ -106,12 +1112,59 @@ class GraphService:
         if not result:
             return None
 
-        return {
+        aliases, props = self._decode_node_json(result[2], result[3])
+        node = {
             "id": result[0],
             "type": result[1],
-            "aliases": json.loads(result[2]) if result[2] else [],
-            "properties": json.loads(result[3]) if result[3] else {}
+            "aliases": aliases,
+            "properties": props
         }
+        if with_context:
+            self.attach_node_context([node])
+        return node
+
+    def get_nodes(self, node_ids: list, with_context: bool = False) -> dict[str, dict]:
+        """
+        Hämta många noder med EN fråga (i stället för get_node per ID).
+
+        Args:
+            node_ids: Lista med nod-IDs
+            with_context: Läs även node_context (en fråga till)
+
+        Returns:
+            dict id -> {id, type, aliases, properties}. Saknade IDs utelämnas.
+        """
+        ids = list(dict.fromkeys(i for i in node_ids if i))
+        if not ids:
+            return {}
+        nodes = self._fetch_nodes(
+            "SELECT id, type, aliases, properties FROM nodes "
+            "WHERE id IN (SELECT unnest(CAST(? AS VARCHAR[])))",
+            [ids]
+        )
+        if with_context:
+            self.attach_node_context(nodes)
+        return {node["id"]: node for node in nodes}
+
+    def get_names(self, node_ids: list) -> dict[str, str]:
+        """
+        Visningsnamn för många noder med EN fråga.
+
+        Läser den typade name-kolumnen, så ingen properties-JSON avkodas.
+
+        Returns:
+            dict id -> name (id om noden saknar namn). Saknade IDs utelämnas.
+        """
+        ids = list(dict.fromkeys(i for i in node_ids if i))
+        if not ids:
+            return {}
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT id, COALESCE(name, id) FROM nodes "
+                "WHERE id IN (SELECT unnest(CAST(? AS VARCHAR[])))",
+                [ids]
+            ).fetchall()
+        return dict(rows)
 
     def find_nodes_by_type(self, node_type: str) -> list[dict]:
         """
@@ -123,27 +1176,16 @@ class GraphService:
         Returns:
             Lista med noder
         """
-        with self._lock:
-            results = self.conn.execute(
-                "SELECT id, type, aliases, properties FROM nodes WHERE type = ?",
-                [node_type]
-            ).fetchall()
-
-        nodes = []
-        for row in results:
-            nodes.append({
-                "id": row[0],
-                "type": row[1],
-                "aliases": json.loads(row[2]) if row[2] else [],
-                "properties": json.loads(row[3]) if row[3] else {}
-            })
-        return nodes
+        return self._fetch_nodes(
+            "SELECT id, type, aliases, properties FROM nodes WHERE type = ?",
+            [node_type]
+        )
 
     def find_nodes_by_alias(self, alias: str) -> list[dict]:
         """
         Hitta noder där alias matchar.
 
-        Söker i aliases-arrayen (JSON).
+        Söker i aliases-kolumnen (VARCHAR[]).
 
         Args:
             alias: Alias att söka efter
@@ -151,24 +1193,11 @@ class GraphService:
         Returns:
             Lista med matchande noder
         """
-        # DuckDB stöder JSON-funktioner
-        with self._lock:
-            results = self.conn.execute("""
-                SELECT id, type, aliases, properties
-                FROM nodes
-                WHERE aliases IS NOT NULL
-                  AND list_contains(aliases::TEXT[]::TEXT[], ?)
-            """, [alias]).fetchall()
-
-        nodes = []
-        for row in results:
-            nodes.append({
-                "id": row[0],
-                "type": row[1],
-                "aliases": json.loads(row[2]) if row[2] else [],
-                "properties": json.loads(row[3]) if row[3] else {}
-            })
-        return nodes
+        return self._fetch_nodes("""
+            SELECT id, type, aliases, properties
+            FROM nodes
+            WHERE list_contains(aliases, ?)
+        """, [alias])
 
     def upsert_node(self, id: str, type: str, aliases: list = None, properties: dict = None):
         """
@@ -178,360 +1207,1429 @@ class GraphService:
         Args:
             id: Unikt nod-ID
             type: Nodtyp (Unit, Entity, Concept, Person)
-            aliases: Lista med alternativa namn
-            properties: Dict med extra egenskaper
+            aliases: Lista med alternativa namn (None = behåll existerande)
+            properties: Dict med extra egenskaper. node_context läggs till
+                        nodens kontext (append), den ersätts inte.
         """
         if self.read_only:
             raise RuntimeError("HARDFAIL: Försöker skriva i read_only mode")
 
-        new_props = properties or {}
+        new_props = dict(properties or {})
+        context_entries = new_props.pop("node_context", None)
 
         with self._lock:
             # 1. Hämta existerande egenskaper för att bevara systemfält
             existing = self.conn.execute(
-                "SELECT properties FROM nodes WHERE id = ?", [id]
+                "SELECT type, aliases, properties FROM nodes WHERE id = ?", [id]
             ).fetchone()
 
-            final_props = {}
-
+            current_props = None
+            current_aliases = []
+            node_delta = Counter({type: 1})
             if existing:
-                # Noden finns - bevara existerande data, skriv över med nytt
-                try:
-                    current_props = json.loads(existing[0]) if existing[0] else {}
-                except:
-                    current_props = {}
+                current_aliases, current_props = self._decode_node_json(existing[1], existing[2])
+                node_delta[existing[0]] -= 1
+
+            final_props = self._merge_node_properties(current_props, new_props)
+            final_aliases = list(aliases) if aliases is not None else current_aliases
+
+            properties_json = json.dumps(final_props, ensure_ascii=False)
+
+            # 2. Skriv till DB (UPSERT) + namnindex
+            with self._transaction():
+                self.conn.execute(f"""
+                    INSERT INTO nodes (id, type, aliases, properties, {self._typed_column_list()})
+                    SELECT id, type, aliases, properties, {', '.join(self._typed_column_exprs())}
+                    FROM (VALUES (?, ?, ?, ?)) AS v(id, type, aliases, properties)
+                    ON CONFLICT (id) DO UPDATE SET
+                        type = EXCLUDED.type,
+                        aliases = EXCLUDED.aliases,
+                        properties = EXCLUDED.properties,
+                        {self._typed_column_updates()}
+                """, [id, type, final_aliases, properties_json])
+                self._adjust_stats(nodes=node_delta)
+                self._index_names([(id, type, final_aliases, final_props)])
+                self._append_context(self._context_rows(id, context_entries))
+
+    def upsert_nodes_bulk(self, nodes: list[dict]) -> int:
+        """
+        Skapa eller uppdatera många noder i en transaktion.
+
+        Samma semantik som upsert_node per nod (inkl. merge av properties och
+        default-systemfält för nya noder), men existerande properties hämtas
+        med EN fråga och allt skrivs via en staging-tabell.
+        Förekommer samma ID flera gånger appliceras de i ordning.
+        node_context i properties läggs till nodens kontext (append).
+
+        Args:
+            nodes: Lista av dicts {id, type, aliases?, properties?}
+
+        Returns:
+            Antal unika noder som skrevs
+        """
+        if self.read_only:
+            raise RuntimeError("HARDFAIL: Försöker skriva i read_only mode")
+
+        nodes = [n for n in nodes if n.get("id") and n.get("type")]
+        if not nodes:
+            return 0
+
+        ids = list(dict.fromkeys(n["id"] for n in nodes))
+
+        with self._lock:
+            # 1. Hämta existerande data med en fråga
+            placeholders = ','.join(['?'] * len(ids))
+            rows = self.conn.execute(
+                f"SELECT id, type, aliases, properties FROM nodes WHERE id IN ({placeholders})",
+                ids
+            ).fetchall()
+
+            state = {}  # id -> [type, aliases, properties]
+            node_delta = Counter()
+            for node_id, node_type, aliases_raw, props_raw in rows:
+                aliases, props = self._decode_node_json(aliases_raw, props_raw)
+                state[node_id] = [None, aliases, props]
+                node_delta[node_type] -= 1
+
+            # 2. Merga i Python (i inkommande ordning); kontexten skrivs separat
+            context_rows = []
+            for node in nodes:
+                node_id = node["id"]
+                current = state.get(node_id)
+                current_props = current[2] if current else None
+                current_aliases = current[1] if current else []
+
+                new_props = dict(node.get("properties") or {})
+                context_rows.extend(self._context_rows(node_id, new_props.pop("node_context", None)))
+                final_props = self._merge_node_properties(current_props, new_props)
+                aliases = node.get("aliases")
+                final_aliases = list(aliases) if aliases is not None else current_aliases
+
+                state[node_id] = [node["type"], final_aliases, final_props]
+
+            staged = [
+                (node_id, state[node_id][0], state[node_id][1],
+                 json.dumps(state[node_id][2], ensure_ascii=False))
+                for node_id in ids
+            ]
+            node_delta.update(state[node_id][0] for node_id in ids)
+
+            # 3. Skriv allt i en transaktion
+            with self._transaction():
+                self._stage_rows("_stage_nodes", "id TEXT, type TEXT, aliases VARCHAR[], properties TEXT", staged)
+                self.conn.execute(f"""
+                    INSERT INTO nodes (id, type, aliases, properties, {self._typed_column_list()})
+                    SELECT id, type, aliases, properties, {', '.join(self._typed_column_exprs())}
+                    FROM _stage_nodes
+                    ON CONFLICT (id) DO UPDATE SET
+                        type = EXCLUDED.type,
+                        aliases = EXCLUDED.aliases,
+                        properties = EXCLUDED.properties,
+                        {self._typed_column_updates()}
+                """)
+                self.conn.execute("DROP TABLE IF EXISTS _stage_nodes")
+                self._adjust_stats(nodes=node_delta)
+                self._index_names([(node_id, *state[node_id]) for node_id in ids])
+                self._append_context(context_rows)
+
+        return len(staged)
+
+    def register_usage(self, node_ids: list):
+        """
+        Registrera att noder har använts i ett svar (Relevans).
+        Ökar retrieved_times och sätter last_retrieved_at till nu.
+        """
+        if not node_ids: return
+
+        now_ts = datetime.now().isoformat()
+        hits = Counter(i for i in node_ids if i)
+        self.register_usage_bulk({node_id: (count, now_ts) for node_id, count in hits.items()})
+
+    def register_usage_bulk(self, usage: dict) -> int:
+        """
+        Applicera ackumulerad användning med EN set-baserad UPDATE.
+
+        Används av UsageAccumulator (läsvägar buffrar träffar i minnet och
+        flushar periodiskt) och av register_usage.
+
+        Args:
+            usage: dict node_id -> (antal träffar, senaste tidpunkt som ISO-sträng)
+
+        Returns:
+            Antal noder i batchen
+        """
+        if self.read_only:
+            raise RuntimeError("HARDFAIL: Försöker skriva i read_only mode")
+        if not usage:
+            return 0
+
+        rows = [(node_id, int(hits), ts) for node_id, (hits, ts) in usage.items()]
+
+        with self._lock:
+            with self._transaction():
+                self._stage_rows("_stage_usage", "id TEXT, hits INTEGER, last_retrieved_at TEXT", rows)
+                # Typade kolumner + patch av properties-JSON (ingen avkodning i Python)
+                self.conn.execute("""
+                    UPDATE nodes SET
+                        retrieved_times = COALESCE(nodes.retrieved_times, 0) + s.hits,
+                        last_retrieved_at = CAST(s.last_retrieved_at AS TIMESTAMP),
+                        properties = json_merge_patch(
+                            CASE WHEN json_valid(nodes.properties) THEN nodes.properties ELSE '{}' END,
+                            json_object('retrieved_times', COALESCE(nodes.retrieved_times, 0) + s.hits,
+                                        'last_retrieved_at', s.last_retrieved_at)
+                        )
+                    FROM _stage_usage s
+                    WHERE nodes.id = s.id
+                """)
+                self.conn.execute("DROP TABLE IF EXISTS _stage_usage")
+
+        LOGGER.info(f"Registered usage for {len(rows)} nodes")
+        return len(rows)
+
+    def get_refinement_candidates(self, limit: int = 50) -> list[dict]:
+        """
+        Hämta kandidater för Dreamer-underhåll enligt 80/20-principen.
+
+        - 80% Relevans: Heta noder (nyligen använda).
+        - 20% Underhåll: Glömda noder (aldrig städade eller gamla).
+
+        Lika prioriterade noder (t.ex. alla ostädade) ordnas efter PageRank
+        (node_metrics), så strukturellt viktiga noder städas först.
+        Kandidaterna returneras med node_context (Dreamer resonerar om den).
+        """
+        relevance_limit = int(limit * 0.8)
+        maintenance_limit = limit - relevance_limit
+        if self._has_metrics_table:
+            metrics_join = "LEFT JOIN node_metrics m ON m.node_id = nodes.id"
+            pagerank_order = ", m.pagerank DESC NULLS LAST"
+        else:
+            metrics_join, pagerank_order = "", ""
+
+        # 1. Relevans (Heta noder) - Sortera på last_retrieved_at DESC
+        rel_nodes = self._fetch_nodes(f"""
+            SELECT id, type, aliases, properties
+            FROM nodes
+            {metrics_join}
+            ORDER BY last_retrieved_at DESC NULLS LAST{pagerank_order}, id
+            LIMIT ?
+        """, [relevance_limit])
+
+        # 2. Underhåll (Glömda noder)
+        # Prioritera 'never' (ostädade, NULL i kolumnen) först, sedan äldsta datum
+        maint_nodes = self._fetch_nodes(f"""
+            SELECT id, type, aliases, properties
+            FROM nodes
+            {metrics_join}
+            ORDER BY last_refined_at ASC NULLS FIRST{pagerank_order}, id
+            LIMIT ?
+        """, [maintenance_limit])
+
+        # Slå ihop och deduplicera
+        candidates = []
+        seen_ids = set()
+        for node in rel_nodes + maint_nodes:
+            if node["id"] not in seen_ids:
+                candidates.append(node)
+                seen_ids.add(node["id"])
+
+        return self.attach_node_context(candidates)
+
+    def delete_node(self, node_id: str) -> bool:
+        """
+        Ta bort en nod och alla dess kanter.
+
+        Args:
+            node_id: ID på noden att ta bort
+
+        Returns:
+            True om noden fanns och togs bort
+        """
+        if self.read_only:
+            raise RuntimeError("HARDFAIL: Försöker skriva i read_only mode")
+
+        with self._lock, self._transaction():
+            # Ta bort kanter först (två indexuppslag i stället för OR)
+            edge_delta = Counter()
+            for column in ("source", "target"):
+                edge_delta.subtract(row[0] for row in self.conn.execute(
+                    f"DELETE FROM edges WHERE {column} = ? RETURNING edge_type", [node_id]
+                ).fetchall())
+            # Ta bort noden
+            result = self.conn.execute(
+                "DELETE FROM nodes WHERE id = ? RETURNING type",
+                [node_id]
+            ).fetchone()
+            self._adjust_stats(nodes=Counter({result[0]: -1}) if result else None, edges=edge_delta)
+            self.conn.execute("DELETE FROM node_names WHERE node_id = ?", [node_id])
+            self.conn.execute("DELETE FROM node_context WHERE node_id = ?", [node_id])
+            self.conn.execute("DELETE FROM node_metrics WHERE node_id = ?", [node_id])
+            self._delete_search_terms([node_id])
+            self._update_fuzzy_names([node_id])
+
+            return result is not None
+
+    def delete_nodes_bulk(self, node_ids: list) -> int:
+        """
+        Ta bort många noder och alla deras kanter i en transaktion (set-baserat).
+
+        Samma effekt som delete_node per nod, men varje tabell rensas med EN
+        sats mot en staging-tabell med ID:na.
+
+        Returns:
+            Antal noder som fanns och togs bort
+        """
+        if self.read_only:
+            raise RuntimeError("HARDFAIL: Försöker skriva i read_only mode")
+
+        ids = list(dict.fromkeys(i for i in node_ids if i))
+        if not ids:
+            return 0
+
+        with self._lock, self._transaction():
+            self._stage_rows("_stage_delete", "id TEXT", [(node_id,) for node_id in ids])
+            edge_types = self.conn.execute("""
+                DELETE FROM edges
+                WHERE source IN (SELECT id FROM _stage_delete) OR target IN (SELECT id FROM _stage_delete)
+                RETURNING edge_type
+            """).fetchall()
+            node_types = self.conn.execute(
+                "DELETE FROM nodes WHERE id IN (SELECT id FROM _stage_delete) RETURNING type"
+            ).fetchall()
+            node_delta, edge_delta = Counter(), Counter()
+            node_delta.subtract(row[0] for row in node_types)
+            edge_delta.subtract(row[0] for row in edge_types)
+            self._adjust_stats(nodes=node_delta, edges=edge_delta)
+            for table in ("node_names", "node_context", "node_metrics",
+                          "node_terms", "node_context_terms", "node_term_docs"):
+                self.conn.execute(f"DELETE FROM {table} WHERE node_id IN (SELECT id FROM _stage_delete)")
+            self.conn.execute("DROP TABLE IF EXISTS _stage_delete")
+            self._update_fuzzy_names(ids)
+
+        return len(node_types)
+
+    def find_node_by_name(self, node_type: str, name: str, fuzzy: bool = True) -> str | None:
+        """
+        Sök efter en nod baserat på namn (exakt eller fuzzy).
+
+        Exakt uppslag är en indexerad fråga mot node_names (namn + aliases).
+
+        Args:
+            node_type: Nodtyp att söka i (Person, Organization, etc.)
+            name: Namnet att söka efter
+            fuzzy: Om True, använd fuzzy matching (trigram-index, 85% likhet)
+
+        Returns:
+            UUID om matchning hittas, annars None
+        """
+        name_lower = self._normalize_name(name)
+        if not name_lower:
+            return None
+
+        if not self._table_exists("node_names"):
+            # Äldre graf öppnad read-only innan någon skrivare migrerat den
+            return self._find_node_by_name_scan(node_type, name, fuzzy)
+
+        # 1. Exakt matchning (index på name, typ filtreras efteråt)
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT type, node_id FROM node_names WHERE name = ?", [name_lower]
+            ).fetchall()
+
+        hits = [node_id for row_type, node_id in rows if row_type == node_type]
+        if hits:
+            if len(hits) > 1:
+                # Flera träffar - returnera första (eller None om osäkert)
+                LOGGER.warning(f"find_node_by_name: Flera träffar för '{name}' ({node_type}): {hits}")
+            return hits[0]
+
+        # 2. Fuzzy matchning (om aktiverat)
+        if fuzzy:
+            with self._lock, _FUZZY_LOCK:
+                index = self._get_fuzzy_index(node_type)
+                matches = index.query(name_lower, cutoff=0.85, limit=1)
+                hits = index.node_ids(matches[0][0]) if matches else []
+            if hits:
+                LOGGER.info(f"find_node_by_name: Fuzzy '{name}' ~= '{matches[0][0]}' -> {hits[0]}")
+                return hits[0]
+
+        return None
+
+    def _find_node_by_name_scan(self, node_type: str, name: str, fuzzy: bool = True) -> str | None:
+        """Fallback för find_node_by_name utan node_names: skannar alla noder av typen."""
+        name_lower = self._normalize_name(name)
+
+        with self._lock:
+            rows = self.conn.execute("""
+                SELECT id, aliases, properties FROM nodes WHERE type = ?
+            """, [node_type]).fetchall()
+
+        # Bygg namn-index
+        name_to_uuid: dict[str, list[str]] = {}
+        for node_id, aliases_raw, props_raw in rows:
+            aliases, props = self._decode_node_json(aliases_raw, props_raw)
+            for key in self._name_keys(aliases, props):
+                name_to_uuid.setdefault(key, []).append(node_id)
+
+        if name_lower in name_to_uuid:
+            return name_to_uuid[name_lower][0]
+
+        if fuzzy:
+            index = TrigramIndex()
+            for key, node_ids in name_to_uuid.items():
+                for node_id in node_ids:
+                    index.add(key, node_id)
+            matches = index.query(name_lower, cutoff=0.85, limit=1)
+            if matches:
+                return name_to_uuid[matches[0][0]][0]
+
+        return None
+
+    # --- EDGE OPERATIONS ---
+
+    # Indexanvändning: DuckDB använder ett ART-index bara när tabellscanningen har
+    # ETT likhetsfilter på den indexerade kolumnen. Ett extra villkor (edge_type)
+    # eller OR (source = ? OR target = ?) ger sekventiell scanning, och index över
+    # flera kolumner används inte för uppslag. Uppslag med typfilter hämtar därför
+    # nodens kanter i en MATERIALIZED CTE (bara nyckelfiltret når scanningen) och
+    # filtrerar typen efteråt; OR delas i två uppslag (UNION ALL / två DELETE).
+    # DELETE kan inte använda CTE:n (rowid-filter scannar hela tabellen) utan
+    # jämför övriga kolumner som radvärde, vilket inte trycks ned i scanningen.
+    # Samma gäller sökindexets termer: postings hämtas med en IN-lista på term.
+    # Regressionstest: tools/test_index_coverage.py (mätning: tools/benchmarks/bench_index_coverage.py)
+
+    def get_edges_from(self, node_id: str) -> list[dict]:
+        """
+        Hämta alla utgående kanter från en nod.
+
+        Returns:
+            Lista med {source, target, type, properties}
+        """
+        return self._fetch_edges(
+            "SELECT source, target, edge_type, properties FROM edges WHERE source = ?",
+            [node_id]
+        )
+
+    def get_edges_to(self, node_id: str) -> list[dict]:
+        """
+        Hämta alla inkommande kanter till en nod.
+
+        Returns:
+            Lista med {source, target, type, properties}
+        """
+        return self._fetch_edges(
+            "SELECT source, target, edge_type, properties FROM edges WHERE target = ?",
+            [node_id]
+        )
+
+    def get_neighbor_edges(self, node_id: str) -> list[dict]:
+        """
+        Alla kanter till/från en nod med grannens namn och typ i EN fråga.
+
+        Ersätter get_edges_from + get_edges_to + get_node per granne.
+
+        Returns:
+            Lista med {direction ('out'/'in'), neighbor, neighbor_name, neighbor_type, type}.
+            neighbor_name är grannens ID om noden saknas eller saknar namn.
+        """
+        with self._lock:
+            rows = self.conn.execute("""
+                SELECT 'out', e.target, COALESCE(n.name, e.target), n.type, e.edge_type
+                FROM edges e LEFT JOIN nodes n ON n.id = e.target
+                WHERE e.source = ?
+                UNION ALL
+                SELECT 'in', e.source, COALESCE(n.name, e.source), n.type, e.edge_type
+                FROM edges e LEFT JOIN nodes n ON n.id = e.source
+                WHERE e.target = ?
+            """, [node_id, node_id]).fetchall()
+
+        return [
+            {"direction": r[0], "neighbor": r[1], "neighbor_name": r[2], "neighbor_type": r[3], "type": r[4]}
+            for r in rows
+        ]
+
+    def upsert_edge(self, source: str, target: str, edge_type: str, properties: dict = None):
+        """
+        Skapa eller uppdatera en kant.
+
+        Args:
+            source: Käll-nod ID
+            target: Mål-nod ID
+            edge_type: Typ av relation (DEALS_WITH, CREATED_BY, etc.)
+            properties: Extra egenskaper
+        """
+        if self.read_only:
+            raise RuntimeError("HARDFAIL: Försöker skriva i read_only mode")
+
+        properties_json = json.dumps(properties or {}, ensure_ascii=False)
+
+        with self._lock, self._transaction():
+            existing = self.conn.execute("""
+                WITH outgoing AS MATERIALIZED (
+                    SELECT target, edge_type FROM edges WHERE source = ?
+                )
+                SELECT 1 FROM outgoing WHERE target = ? AND edge_type = ?
+            """, [source, target, edge_type]).fetchone()
+            self.conn.execute("""
+                INSERT INTO edges (source, target, edge_type, properties)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT (source, target, edge_type) DO UPDATE SET
+                    properties = EXCLUDED.properties
+            """, [source, target, edge_type, properties_json])
+            if existing is None:
+                self._adjust_stats(edges=Counter({edge_type: 1}))
+
+    def upsert_edges_bulk(self, edges: list[dict], overwrite: bool = True) -> int:
+        """
+        Skapa eller uppdatera många kanter i en transaktion.
+
+        Args:
+            edges: Lista av dicts {source, target, edge_type, properties?}
+            overwrite: True = existerande kanter får nya properties (som upsert_edge).
+                       False = existerande kanter lämnas orörda (INSERT OR IGNORE).
+
+        Returns:
+            Antal unika kanter i batchen
+        """
+        if self.read_only:
+            raise RuntimeError("HARDFAIL: Försöker skriva i read_only mode")
+
+        # Deduplicera på nyckel: sista vinner vid overwrite, annars första
+        unique = {}
+        for edge in edges:
+            key = (edge.get("source"), edge.get("target"), edge.get("edge_type"))
+            if not all(key):
+                continue
+            if overwrite or key not in unique:
+                unique[key] = json.dumps(edge.get("properties") or {}, ensure_ascii=False)
+
+        if not unique:
+            return 0
+
+        staged = [(s, t, e, props) for (s, t, e), props in unique.items()]
+        conflict_action = "DO UPDATE SET properties = EXCLUDED.properties" if overwrite else "DO NOTHING"
+
+        with self._lock:
+            with self._transaction():
+                self._stage_rows("_stage_edges", "source TEXT, target TEXT, edge_type TEXT, properties TEXT", staged)
+                existing_sql, params = self._edges_from_sql(list(dict.fromkeys(s for s, _, _, _ in staged)))
+                new_edges = self.conn.execute(f"""
+                    WITH existing AS MATERIALIZED ({existing_sql})
+                    SELECT s.edge_type, COUNT(*) FROM _stage_edges s
+                    ANTI JOIN existing e USING (source, target, edge_type)
+                    GROUP BY s.edge_type
+                """, params).fetchall()
+                self.conn.execute(f"""
+                    INSERT INTO edges (source, target, edge_type, properties)
+                    SELECT source, target, edge_type, properties FROM _stage_edges
+                    ON CONFLICT (source, target, edge_type) {conflict_action}
+                """)
+                self._adjust_stats(edges=Counter(dict(new_edges)))
+                self.conn.execute("DROP TABLE IF EXISTS _stage_edges")
+
+        return len(staged)
+
+    def upsert_graph_bulk(self, nodes: list[dict], edges: list[dict], overwrite: bool = True) -> tuple[int, int]:
+        """
+        upsert_nodes_bulk + upsert_edges_bulk i EN transaktion.
+
+        Misslyckas kanterna rullas även noderna tillbaka, så ett dokument
+        committas aldrig med noder utan sina kanter.
+
+        Returns:
+            (antal noder, antal kanter) som skrevs
+        """
+        with self._lock, self._transaction():
+            return self.upsert_nodes_bulk(nodes), self.upsert_edges_bulk(edges, overwrite=overwrite)
+
+    def delete_edge(self, source: str, target: str, edge_type: str) -> bool:
+        """
+        Ta bort en specifik kant.
+
+        Returns:
+            True om kanten fanns och togs bort
+        """
+        if self.read_only:
+            raise RuntimeError("HARDFAIL: Försöker skriva i read_only mode")
+
+        with self._lock, self._transaction():
+            # Radvärdesjämförelsen trycks inte ned i scanningen: bara source = ?
+            # når den, så raderingen går via idx_edges_source (se ovan)
+            result = self.conn.execute("""
+                DELETE FROM edges
+                WHERE source = ? AND (target, edge_type) = (?, ?)
+                RETURNING source
+            """, [source, target, edge_type]).fetchone()
+            if result is not None:
+                self._adjust_stats(edges=Counter({edge_type: -1}))
+
+            return result is not None
+
+    # --- TRAVERSAL ---
+
+    # Alla nod-IDs i grafen, inkl. kantändar utan nodrad (indexeras i id-ordning)
+    _ALL_IDS_SQL = "SELECT id FROM nodes UNION SELECT source FROM edges UNION SELECT target FROM edges"
+
+    def adjacency(self) -> GraphAdjacency:
+        """
+        CSR-cache över grafens kanter (se GraphAdjacency), aktuell för write_generation.
+
+        Byggs vid första anropet och byggs om när grafen skrivits sedan dess.
+        Indexering (id -> heltal, typkoder) görs i DuckDB, så Python-sidan
+        bara läser heltalskolumner.
+        """
+        with self._lock:
+            if self._adjacency is not None and self._adjacency.generation == self._write_generation:
+                return self._adjacency
+
+            nodes = self.conn.execute(f"""
+                SELECT u.id, CASE WHEN n.type IS NULL THEN -1
+                                  ELSE dense_rank() OVER (ORDER BY n.type) - 1 END AS type_code
+                FROM ({self._ALL_IDS_SQL}) u LEFT JOIN nodes n ON n.id = u.id
+                ORDER BY u.id
+            """).fetchnumpy()
+            edges = self.conn.execute(f"""
+                WITH ids AS (SELECT id, row_number() OVER (ORDER BY id) - 1 AS idx FROM ({self._ALL_IDS_SQL}))
+                SELECT s.idx AS source, t.idx AS target,
+                       dense_rank() OVER (ORDER BY e.edge_type) - 1 AS type_code
+                FROM edges e
+                JOIN ids s ON s.id = e.source
+                JOIN ids t ON t.id = e.target
+            """).fetchnumpy()
+            node_types = [r[0] for r in self.conn.execute(
+                "SELECT DISTINCT type FROM nodes ORDER BY type").fetchall()]
+            edge_types = [r[0] for r in self.conn.execute(
+                "SELECT DISTINCT edge_type FROM edges ORDER BY edge_type").fetchall()]
+
+            self._adjacency = GraphAdjacency(
+                nodes["id"].tolist(), nodes["type_code"], node_types,
+                edges["source"], edges["target"], edges["type_code"], edge_types,
+                generation=self._write_generation
+            )
+            LOGGER.info(
+                f"Adjacency-cache byggd: {len(self._adjacency)} noder, {self._adjacency.edge_count} kanter "
+                f"({self._adjacency.nbytes / 1e6:.1f} MB, generation {self._write_generation})"
+            )
+            return self._adjacency
+
+    def _cached_adjacency(self) -> GraphAdjacency | None:
+        """
+        CSR-cachen om den får användas av läsmetoderna, annars None (SQL).
+
+        Bygget läser hela kanttabellen, så det lönar sig bara om cachen
+        återanvänds. Read-only: grafen ändras inte under anslutningens
+        livstid; cachen byggs vid den ADJACENCY_MIN_TRAVERSALS:e traverseringen
+        (eller när ägaren anropar adjacency()) och används sedan för resten.
+        Skrivbar: bara en aktuell cache används - efter en skrivning faller
+        läsningar tillbaka på SQL tills adjacency() anropas, så att
+        läs/skriv-växlande loopar inte bygger om cachen per varv.
+        """
+        if not self.adjacency_cache:
+            return None
+        adjacency = self._adjacency
+        if adjacency is not None and adjacency.generation == self._write_generation:
+            return adjacency
+        if self.read_only:
+            self._traversals += 1
+            if self._traversals >= self.ADJACENCY_MIN_TRAVERSALS:
+                return self.adjacency()
+        return None
+
+    # Tak för get_subgraph (skydd mot hubbar, t.ex. dokument med tusentals kanter)
+    SUBGRAPH_MAX_DEPTH = 4
+    SUBGRAPH_FANOUT = 50
+
+    def get_subgraph(self, seed_ids: list, depth: int = 2, edge_types: list = None,
+                     limit: int = 100, fanout: int = None) -> dict:
+        """
+        Hämta delgrafen runt en eller flera noder (flera hopp i en fråga).
+
+        Traverseringen är en rekursiv CTE som följer kanter i båda riktningar.
+        Cykelskydd: rekursionen är en UNION över (nod, djup), så varje nod
+        expanderas högst en gång per djup och cykler kan inte växa obegränsat.
+        Fan-out: högst `fanout` grannar expanderas per nod och djup.
+        Med adjacency_cache görs traverseringen i CSR-cachen i stället (samma resultat).
+
+        Args:
+            seed_ids: Start-noder (djup 0)
+            depth: Antal hopp (max SUBGRAPH_MAX_DEPTH)
+            edge_types: Följ bara dessa kanttyper (None = alla)
+            limit: Max antal noder i resultatet (närmast först)
+            fanout: Max grannar per nod och djup (default SUBGRAPH_FANOUT)
+
+        Returns:
+            dict med:
+                nodes: Lista med {id, type, aliases, properties, depth}
+                edges: Lista med {source, target, type, properties} mellan noderna
+        """
+        seeds = list(dict.fromkeys(i for i in seed_ids or [] if i))
+        if not seeds:
+            return {"nodes": [], "edges": []}
 
-                final_props = current_props.copy()
-                final_props.update(new_props)
+        depth = max(0, min(int(depth), self.SUBGRAPH_MAX_DEPTH))
+        fanout = fanout or self.SUBGRAPH_FANOUT
+        types = list(edge_types) if edge_types else None
 
+        with self._lock:
+            adjacency = self._cached_adjacency()
+            if adjacency is not None:
+                walked = adjacency.k_hop(seeds, depth, edge_types=types, fanout=fanout)
+                reached = sorted(
+                    ((node_id, d) for node_id, d in walked.items() if node_id in adjacency),
+                    key=lambda item: (item[1], item[0])
+                )[:limit]
             else:
-                # Ny nod - Initiera alla required systemfält enligt schema
-                now_ts = datetime.now().isoformat()
-                defaults = {
-                    "created_at": now_ts,
-                    "last_synced_at": now_ts,
-                    "last_seen_at": now_ts,
-                    "last_retrieved_at": now_ts,
-                    "retrieved_times": 0,
-                    "last_refined_at": "never",
-                    "status": "PROVISIONAL",
-                    "confidence": 0.5
-                }
-                final_props = defaults
-                final_props.update(new_props)
-
-            aliases_json = json.dumps(aliases or [], ensure_ascii=False)
-            properties_json = json.dumps(final_props, ensure_ascii=False)
+                reached = self._walk_subgraph(seeds, depth, types, fanout, limit)
 
-            # 2. Skriv till DB (UPSERT)
-            self.conn.execute("""
-                INSERT INTO nodes (id, type, aliases, properties)
-                VALUES (?, ?, ?, ?)
-                ON CONFLICT (id) DO UPDATE SET
-                    type = EXCLUDED.type,
-                    aliases = EXCLUDED.aliases,
-                    properties = EXCLUDED.properties
-            """, [id, type, aliases_json, properties_json])
+            if not reached:
+                return {"nodes": [], "edges": []}
 
-    def register_usage(self, node_ids: list):
-        """
-        Registrera att noder har använts i ett svar (Relevans).
-        Ökar retrieved_times och sätter last_retrieved_at till nu.
-        """
-        if not node_ids: return
+            depth_by_id = dict(reached)
+            ids = list(depth_by_id)
 
-        now_ts = datetime.now().isoformat()
+            nodes = list(self.get_nodes(ids).values())
+            edges = self._fetch_edges("""
+                SELECT source, target, edge_type, properties FROM edges
+                WHERE source IN (SELECT unnest(CAST(? AS VARCHAR[])))
+                  AND target IN (SELECT unnest(CAST(? AS VARCHAR[])))
+                  AND (? IS NULL OR list_contains(CAST(? AS VARCHAR[]), edge_type))
+            """, [ids, ids, types, types])
 
-        with self._lock:
-            # Batch-uppdatering via Read-Modify-Write för säkerhet
-            placeholders = ','.join(['?'] * len(node_ids))
-            rows = self.conn.execute(
-                f"SELECT id, properties FROM nodes WHERE id IN ({placeholders})",
-                node_ids
-            ).fetchall()
+        for node in nodes:
+            node["depth"] = depth_by_id[node["id"]]
+        nodes.sort(key=lambda n: (n["depth"], n["id"]))
 
-            for r in rows:
-                nid = r[0]
-                try:
-                    props = json.loads(r[1]) if r[1] else {}
-                except:
-                    props = {}
+        return {"nodes": nodes, "edges": edges}
 
-                # Uppdatera räknare
-                count = props.get('retrieved_times', 0)
-                if not isinstance(count, int): count = 0
+    def _walk_subgraph(self, seeds: list, depth: int, types: list | None, fanout: int, limit: int) -> list:
+        """get_subgraph-traversering i SQL: [(id, djup)] sorterat på (djup, id)."""
+        with self._lock:
+            return self.conn.execute("""
+                WITH RECURSIVE
+                    adjacency AS (
+                        SELECT source AS node_id, target AS neighbor FROM edges
+                        WHERE ? IS NULL OR list_contains(CAST(? AS VARCHAR[]), edge_type)
+                        UNION ALL
+                        SELECT target, source FROM edges
+                        WHERE ? IS NULL OR list_contains(CAST(? AS VARCHAR[]), edge_type)
+                    ),
+                    walk(node_id, depth) AS (
+                        SELECT DISTINCT unnest(CAST(? AS VARCHAR[])), 0
+                        UNION
+                        SELECT a.neighbor, w.depth + 1
+                        FROM walk w
+                        JOIN adjacency a ON a.node_id = w.node_id
+                        WHERE w.depth < ?
+                        QUALIFY row_number() OVER (PARTITION BY w.node_id ORDER BY a.neighbor) <= ?
+                    )
+                SELECT w.node_id, min(w.depth) AS depth
+                FROM walk w
+                JOIN nodes n ON n.id = w.node_id
+                GROUP BY w.node_id
+                ORDER BY depth, w.node_id
+                LIMIT ?
+            """, [types, types, types, types, seeds, depth, fanout, limit]).fetchall()
 
-                props['retrieved_times'] = count + 1
-                props['last_retrieved_at'] = now_ts
+    # --- STATISTICS ---
 
-                # Skriv tillbaka
-                self.conn.execute(
-                    "UPDATE nodes SET properties = ? WHERE id = ?",
-                    [json.dumps(props, ensure_ascii=False), nid]
-                )
+    # Facit för graph_stats: antal per typ räknat direkt i tabellerna (full scan)
+    _STATS_COUNT_SQL = {
+        "node": "SELECT type, COUNT(*) FROM nodes GROUP BY type",
+        "edge": "SELECT edge_type, COUNT(*) FROM edges GROUP BY edge_type",
+    }
 
-        LOGGER.info(f"Registered usage for {len(node_ids)} nodes")
+    def _count_by_type(self) -> dict[str, dict]:
+        """Antal noder/kanter per typ via GROUP BY: {"node": {typ: n}, "edge": {typ: n}}."""
+        with self._lock:
+            return {kind: dict(self.conn.execute(sql).fetchall()) for kind, sql in self._STATS_COUNT_SQL.items()}
 
-    def get_refinement_candidates(self, limit: int = 50) -> list[dict]:
+    def _adjust_stats(self, nodes: Counter = None, edges: Counter = None):
         """
-        Hämta kandidater för Dreamer-underhåll enligt 80/20-principen.
+        Applicera en förändring av antal per typ på graph_stats.
 
-        - 80% Relevans: Heta noder (nyligen använda).
-        - 20% Underhåll: Glömda noder (aldrig städade eller gamla).
+        Anropas inom samma transaktion som skrivningen den beskriver.
+        Typer som når 0 tas bort.
         """
-        relevance_limit = int(limit * 0.8)
-        maintenance_limit = limit - relevance_limit
+        rows = [
+            (kind, name, delta)
+            for kind, deltas in (("node", nodes), ("edge", edges))
+            for name, delta in (deltas or {}).items() if delta
+        ]
+        if not rows or not self._has_stats_table:
+            return
+        kinds, names, deltas = (list(column) for column in zip(*rows))
+        self.conn.execute("""
+            INSERT INTO graph_stats (kind, name, total)
+            SELECT unnest(CAST(? AS VARCHAR[])), unnest(CAST(? AS VARCHAR[])), unnest(CAST(? AS BIGINT[]))
+            ON CONFLICT (kind, name) DO UPDATE SET total = total + EXCLUDED.total
+        """, [kinds, names, deltas])
+        self.conn.execute("DELETE FROM graph_stats WHERE total = 0")
+
+    def _edges_from_sql(self, sources: list) -> tuple[str, list]:
+        """
+        (sql, params) för nyckelkolumnerna hos kanter ut från `sources`.
 
-        candidates = []
+        Få källor: indexuppslag med IN-lista (se EDGE OPERATIONS). Många:
+        hela tabellen, som då är billigare att scanna än att binda parametrarna.
+        """
+        if len(sources) > self.STAGING_CHUNK_SIZE:
+            return "SELECT source, target, edge_type FROM edges", []
+        placeholders = ','.join(['?'] * len(sources))
+        return f"SELECT source, target, edge_type FROM edges WHERE source IN ({placeholders})", sources
 
-        with self._lock:
-            # 1. Relevans (Heta noder) - Sortera på last_retrieved_at DESC
-            rel_rows = self.conn.execute(f"""
-                SELECT id, type, aliases, properties
-                FROM nodes
-                ORDER BY json_extract_string(properties, '$.last_retrieved_at') DESC
-                LIMIT ?
-            """, [relevance_limit]).fetchall()
-
-            # 2. Underhåll (Glömda noder)
-            # Prioritera 'never' (ostädade) först, sedan äldsta datum
-            maint_rows = self.conn.execute(f"""
-                SELECT id, type, aliases, properties
-                FROM nodes
-                ORDER BY
-                    CASE WHEN json_extract_string(properties, '$.last_refined_at') = 'never' THEN 0 ELSE 1 END,
-                    json_extract_string(properties, '$.last_refined_at') ASC
-                LIMIT ?
-            """, [maintenance_limit]).fetchall()
-
-            # Slå ihop och deduplicera
-            seen_ids = set()
-            for r in rel_rows + maint_rows:
-                if r[0] not in seen_ids:
-                    candidates.append({
-                        "id": r[0],
-                        "type": r[1],
-                        "aliases": json.loads(r[2]) if r[2] else [],
-                        "properties": json.loads(r[3]) if r[3] else {}
-                    })
-                    seen_ids.add(r[0])
-
-        return candidates
+    def _incident_edge_counts(self, node_ids: list) -> Counter:
+        """
+        Antal kanter per typ som berör någon av noderna (varje kant räknas en gång).
 
-    def delete_node(self, node_id: str) -> bool:
+        Komplexa skrivningar (merge, split) räknar före och efter och
+        applicerar skillnaden: kanter utan ände bland noderna rörs inte.
         """
-        Ta bort en nod och alla dess kanter.
+        ids = list(dict.fromkeys(node_ids))
+        if not ids:
+            return Counter()
+        placeholders = ','.join(['?'] * len(ids))
+        rows = self.conn.execute(f"""
+            WITH outgoing AS MATERIALIZED (
+                SELECT source, target, edge_type FROM edges WHERE source IN ({placeholders})
+            ),
+            incoming AS MATERIALIZED (
+                SELECT source, target, edge_type FROM edges WHERE target IN ({placeholders})
+            )
+            SELECT edge_type, COUNT(*)
+            FROM (SELECT * FROM outgoing UNION SELECT * FROM incoming)
+            GROUP BY edge_type
+        """, ids + ids).fetchall()
+        return Counter(dict(rows))
 
-        Args:
-            node_id: ID på noden att ta bort
+    def rebuild_graph_stats(self) -> dict[str, dict]:
+        """
+        Räkna om graph_stats från nodes/edges (migrering, import, reparation).
 
         Returns:
-            True om noden fanns och togs bort
+            Antal per typ: {"node": {typ: n}, "edge": {typ: n}}
         """
         if self.read_only:
             raise RuntimeError("HARDFAIL: Försöker skriva i read_only mode")
 
         with self._lock:
-            # Ta bort kanter först
-            self.conn.execute(
-                "DELETE FROM edges WHERE source = ? OR target = ?",
-                [node_id, node_id]
-            )
-            # Ta bort noden
-            result = self.conn.execute(
-                "DELETE FROM nodes WHERE id = ? RETURNING id",
-                [node_id]
-            ).fetchone()
+            counts = self._count_by_type()
+            rows = [(kind, name, total) for kind, by_type in counts.items() for name, total in by_type.items()]
+            with self._transaction():
+                self.conn.execute("DELETE FROM graph_stats")
+                if rows:
+                    kinds, names, totals = (list(column) for column in zip(*rows))
+                    self.conn.execute("""
+                        INSERT INTO graph_stats (kind, name, total)
+                        SELECT unnest(CAST(? AS VARCHAR[])), unnest(CAST(? AS VARCHAR[])),
+                               unnest(CAST(? AS BIGINT[]))
+                    """, [kinds, names, totals])
+        return counts
+
+    def check_graph_stats(self) -> dict[tuple, tuple]:
+        """
+        Jämför graph_stats med faktiska antal (GROUP BY över nodes och edges).
 
-            return result is not None
+        Returns:
+            {(kind, typ): (lagrat, faktiskt)} för typer som avviker; tom dict = konsistent
+        """
+        with self._lock:
+            actual = self._count_by_type()
+            stored = {"node": {}, "edge": {}}
+            if self._has_stats_table:
+                for kind, name, total in self.conn.execute("SELECT kind, name, total FROM graph_stats").fetchall():
+                    stored.setdefault(kind, {})[name] = total
+        return {
+            (kind, name): (stored[kind].get(name, 0), actual[kind].get(name, 0))
+            for kind in actual
+            for name in set(stored[kind]) | set(actual[kind])
+            if stored[kind].get(name, 0) != actual[kind].get(name, 0)
+        }
 
-    def find_node_by_name(self, node_type: str, name: str, fuzzy: bool = True) -> str | None:
+    def get_stats(self) -> dict:
         """
-        Sök efter en nod baserat på namn (exakt eller fuzzy).
+        Hämta statistik om grafen.
 
-        Args:
-            node_type: Nodtyp att söka i (Person, Organization, etc.)
-            name: Namnet att söka efter
-            fuzzy: Om True, använd fuzzy matching (difflib, 85% likhet)
+        Läses ur graph_stats (underhålls vid skrivning); äldre grafer utan
+        tabellen (öppnade read-only före migrering) räknas med GROUP BY.
 
         Returns:
-            UUID om matchning hittas, annars None
+            dict med total_nodes, total_edges, nodes per typ, edges per typ
         """
-        import difflib
-
-        name_lower = name.strip().lower()
-
         with self._lock:
-            # Hämta alla noder av typen
-            rows = self.conn.execute("""
-                SELECT id, properties FROM nodes WHERE type = ?
-            """, [node_type]).fetchall()
+            if self._has_stats_table:
+                counts = {"node": {}, "edge": {}}
+                for kind, name, total in self.conn.execute(
+                    "SELECT kind, name, total FROM graph_stats ORDER BY kind, total DESC, name"
+                ).fetchall():
+                    counts[kind][name] = total
+            else:
+                counts = self._count_by_type()
 
-        # Bygg namn-index
-        name_to_uuid: dict[str, list[str]] = {}
-        for node_id, props_raw in rows:
-            props = json.loads(props_raw) if props_raw else {}
-            node_name = props.get('name', '').strip().lower()
-            if node_name:
-                if node_name not in name_to_uuid:
-                    name_to_uuid[node_name] = []
-                name_to_uuid[node_name].append(node_id)
-
-            # Kolla även aliases
-            aliases_raw = props.get('aliases', [])
-            if aliases_raw:
-                for alias in aliases_raw:
-                    alias_lower = alias.strip().lower()
-                    if alias_lower not in name_to_uuid:
-                        name_to_uuid[alias_lower] = []
-                    name_to_uuid[alias_lower].append(node_id)
-
-        # 1. Exakt matchning
-        if name_lower in name_to_uuid:
-            hits = name_to_uuid[name_lower]
-            if len(hits) == 1:
-                return hits[0]
-            # Flera träffar - returnera första (eller None om osäkert)
-            LOGGER.warning(f"find_node_by_name: Flera träffar för '{name}' ({node_type}): {hits}")
-            return hits[0]
+        nodes_dict = counts["node"]
+        edges_dict = counts["edge"]
 
-        # 2. Fuzzy matchning (om aktiverat)
-        if fuzzy:
-            candidates = list(name_to_uuid.keys())
-            matches = difflib.get_close_matches(name_lower, candidates, n=1, cutoff=0.85)
-            if matches:
-                matched_name = matches[0]
-                hits = name_to_uuid[matched_name]
-                LOGGER.info(f"find_node_by_name: Fuzzy '{name}' ~= '{matched_name}' -> {hits[0]}")
-                return hits[0]
+        return {
+            "total_nodes": sum(nodes_dict.values()),
+            "total_edges": sum(edges_dict.values()),
+            "nodes": nodes_dict,
+            "edges": edges_dict
+        }
 
-        return None
+    def compute_node_metrics(self, damping: float = PAGERANK_DAMPING) -> int:
+        """
+        Batch-jobb: beräkna strukturella mått för alla noder och ersätt node_metrics.
 
-    # --- EDGE OPERATIONS ---
+        Mått (se graph_metrics):
+            degree: Antal relationer exkl. Unit-kanter (samma som get_node_degree)
+            pagerank: Viktad PageRank över alla kanter (vikt = kantens confidence, default 1.0)
+            centrality: PageRank som percentil i [0, 1] bland noderna (för rankning)
+            component, component_size: Svagt sammanhängande komponent (0 = största)
 
-    def get_edges_from(self, node_id: str) -> list[dict]:
+        Returns:
+            Antal noder med mått
         """
-        Hämta alla utgående kanter från en nod.
+        if self.read_only:
+            raise RuntimeError("HARDFAIL: Försöker skriva i read_only mode")
+
+        with self._lock:
+            started = datetime.now()
+            ids = self.conn.execute(f"""
+                SELECT u.id, n.id IS NOT NULL AS is_node
+                FROM ({self._ALL_IDS_SQL}) u LEFT JOIN nodes n ON n.id = u.id
+                ORDER BY u.id
+            """).fetchnumpy()
+            edges = self.conn.execute(f"""
+                WITH ids AS (SELECT id, row_number() OVER (ORDER BY id) - 1 AS idx FROM ({self._ALL_IDS_SQL}))
+                SELECT s.idx AS source, t.idx AS target,
+                       COALESCE(TRY_CAST(json_extract_string(e.properties, '$.confidence') AS DOUBLE), 1.0) AS weight,
+                       e.edge_type IN (SELECT unnest(CAST(? AS VARCHAR[]))) AS is_unit
+                FROM edges e
+                JOIN ids s ON s.id = e.source
+                JOIN ids t ON t.id = e.target
+            """, [self.UNIT_EDGE_TYPES]).fetchnumpy()
+
+            n = len(ids["id"])
+            sources = edges["source"].astype(np.int64)
+            targets = edges["target"].astype(np.int64)
+            degree = node_degrees(n, sources, targets, mask=~edges["is_unit"].astype(bool))
+            pagerank = weighted_pagerank(n, sources, targets, edges["weight"], damping=damping)
+            component, component_size = connected_components(n, sources, targets)
+
+            # Lagra bara riktiga noder (kantändar utan nodrad ingår i beräkningen)
+            is_node = ids["is_node"].astype(bool)
+            node_ids = ids["id"][is_node].tolist()
+            pagerank = pagerank[is_node]
+
+            with self._transaction():
+                self.conn.execute("DELETE FROM node_metrics")
+                # En array per kolumn: ett bundet värde per kolumn oavsett antal noder
+                self.conn.execute("""
+                    INSERT INTO node_metrics
+                    SELECT unnest(CAST(? AS VARCHAR[])), unnest(CAST(? AS INTEGER[])),
+                           unnest(CAST(? AS DOUBLE[])), unnest(CAST(? AS DOUBLE[])),
+                           unnest(CAST(? AS BIGINT[])), unnest(CAST(? AS BIGINT[])), ?
+                """, [
+                    node_ids, degree[is_node].tolist(), pagerank.tolist(),
+                    percentile_ranks(pagerank).tolist(),
+                    component[is_node].tolist(), component_size[is_node].tolist(), started
+                ])
+
+        LOGGER.info(
+            f"Node metrics beräknade: {len(node_ids)} noder, {len(sources)} kanter, "
+            f"{len(np.unique(component[is_node]))} komponenter "
+            f"({(datetime.now() - started).total_seconds():.2f}s)"
+        )
+        return len(node_ids)
+
+    def get_node_metrics(self, node_ids: list) -> dict[str, dict]:
+        """
+        Lagrade mått (compute_node_metrics) för en lista noder.
+
+        Noder utan rad (nya sedan senaste beräkningen) saknas i resultatet.
 
         Returns:
-            Lista med {source, target, type, properties}
+            dict id -> {degree, pagerank, centrality, component, component_size, computed_at}
         """
+        ids = list(dict.fromkeys(i for i in node_ids or [] if i))
+        if not ids or not self._has_metrics_table:
+            return {}
         with self._lock:
-            results = self.conn.execute(
-                "SELECT source, target, edge_type, properties FROM edges WHERE source = ?",
-                [node_id]
-            ).fetchall()
-
-        edges = []
-        for row in results:
-            edges.append({
-                "source": row[0],
-                "target": row[1],
-                "type": row[2],
-                "properties": json.loads(row[3]) if row[3] else {}
-            })
-        return edges
+            rows = self.conn.execute("""
+                SELECT node_id, degree, pagerank, centrality, component, component_size, computed_at
+                FROM node_metrics
+                WHERE node_id IN (SELECT unnest(CAST(? AS VARCHAR[])))
+            """, [ids]).fetchall()
+        return {
+            row[0]: {"degree": row[1], "pagerank": row[2], "centrality": row[3],
+                     "component": row[4], "component_size": row[5], "computed_at": row[6]}
+            for row in rows
+        }
 
-    def get_edges_to(self, node_id: str) -> list[dict]:
+    # --- EXPORT / IMPORT ---
+
+    # Tabeller i en Parquet-export: tabell -> (nyckel för diff, sortering i filen).
+    # pending_reviews finns bara om Dreamer skapat den.
+    EXPORT_TABLES = {
+        "nodes": (["id"], "id"),
+        "edges": (["source", "target", "edge_type"], "source, target, edge_type"),
+        "node_context": (["node_id", "text", "origin"], "id"),
+        "node_metrics": (["node_id"], "node_id"),
+        "pending_reviews": (["id"], "id"),
+    }
+    # Härledda index följer med så att import slipper bygga om dem (diff hoppar över dem)
+    EXPORT_DERIVED_TABLES = {
+        "node_names": (["type", "name", "node_id"], "name, node_id"),
+        "node_terms": (["term", "node_id"], "term, node_id"),
+        "node_context_terms": (["term", "node_id"], "term, node_id"),
+        "node_term_docs": (["node_id"], "node_id"),
+        "node_vocab": (["term"], "term"),
+    }
+
+    def export_parquet(self, directory: str) -> dict:
         """
-        Hämta alla inkommande kanter till en nod.
+        Exportera grafen som zstd-komprimerade Parquet-filer plus manifest.
+
+        Varje tabell skrivs med COPY ... TO (FORMAT PARQUET), sorterad på
+        nyckeln så att filerna blir deterministiska och komprimerar bra.
+        Härledda index (EXPORT_DERIVED_TABLES) följer med för snabb import.
+        Manifestet (radantal, kolumner, nycklar) skrivs sist. Exporter kan
+        jämföras med graph_export.diff_exports.
+
+        Args:
+            directory: Målmapp (skapas; får inte innehålla en tidigare export)
 
         Returns:
-            Lista med {source, target, type, properties}
+            Manifestet
         """
+        if os.path.exists(os.path.join(directory, MANIFEST_NAME)):
+            raise RuntimeError(f"HARDFAIL: {directory} innehåller redan en export")
+        os.makedirs(directory, exist_ok=True)
+
+        started = datetime.now()
+        tables = {}
         with self._lock:
-            results = self.conn.execute(
-                "SELECT source, target, edge_type, properties FROM edges WHERE target = ?",
-                [node_id]
-            ).fetchall()
+            for table, (key, order) in {**self.EXPORT_TABLES, **self.EXPORT_DERIVED_TABLES}.items():
+                if not self._table_exists(table):
+                    continue
+                filename = f"{table}.parquet"
+                self.conn.execute(f"""
+                    COPY (SELECT * FROM {table} ORDER BY {order})
+                    TO {sql_path(os.path.join(directory, filename))} (FORMAT PARQUET, COMPRESSION ZSTD)
+                """)
+                columns = [row[0] for row in self.conn.execute(f"DESCRIBE {table}").fetchall()]
+                rows = self.conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                tables[table] = {"file": filename, "rows": rows, "key": key, "columns": columns,
+                                 "derived": table in self.EXPORT_DERIVED_TABLES}
+
+        manifest = {
+            "format": EXPORT_FORMAT,
+            "version": EXPORT_VERSION,
+            "created_at": started.isoformat(),
+            "source": os.path.abspath(self.db_path),
+            "compression": "zstd",
+            "tables": tables,
+        }
+        write_manifest(directory, manifest)
+        LOGGER.info(
+            f"Graf exporterad till {directory}: "
+            + ", ".join(f"{t} {e['rows']}" for t, e in tables.items())
+            + f" ({(datetime.now() - started).total_seconds():.2f}s)"
+        )
+        return manifest
+
+    def import_parquet(self, directory: str) -> dict:
+        """
+        Ersätt grafens innehåll med en Parquet-export (se export_parquet).
 
-        edges = []
-        for row in results:
-            edges.append({
-                "source": row[0],
-                "target": row[1],
-                "type": row[2],
-                "properties": json.loads(row[3]) if row[3] else {}
-            })
-        return edges
+        Allt görs i en transaktion: tabellerna töms och fylls från filerna
+        (INSERT ... BY NAME, så exporter med färre kolumner går att läsa).
+        Namn- och sökindex läses ur exporten om de finns där med aktuellt
+        schema, annars byggs de om från noderna.
 
-    def upsert_edge(self, source: str, target: str, edge_type: str, properties: dict = None):
+        Args:
+            directory: Mapp med manifest.json och Parquet-filer
+
+        Returns:
+            dict tabell -> antal importerade rader
         """
-        Skapa eller uppdatera en kant.
+        if self.read_only:
+            raise RuntimeError("HARDFAIL: Försöker skriva i read_only mode")
+
+        manifest = read_manifest(directory)
+        started = datetime.now()
+        counts = {}
+        with self._lock:
+            with self._transaction():
+                for table in self.EXPORT_TABLES:
+                    entry = manifest["tables"].get(table)
+                    if table == "pending_reviews":
+                        if entry is None:
+                            continue
+                        self._ensure_pending_reviews_table()
+                    if not self._table_exists(table):
+                        continue
+                    self.conn.execute(f"DELETE FROM {table}")
+                    if entry is None:
+                        counts[table] = 0
+                        continue
+                    source = f"read_parquet({sql_path(os.path.join(directory, entry['file']))})"
+                    if table == "node_context":
+                        # Nya id ur sekvensen (i exportens ordning) - sekvensen kan inte sättas om
+                        self.conn.execute(f"""
+                            INSERT INTO node_context (node_id, text, origin, created_at)
+                            SELECT node_id, text, origin, created_at FROM {source} ORDER BY id
+                        """)
+                    else:
+                        self.conn.execute(f"INSERT INTO {table} BY NAME SELECT * FROM {source}")
+                    counts[table] = self.conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+                # Typade kolumner härleds om exporten saknar dem
+                if "last_refined_at" not in manifest["tables"]["nodes"]["columns"]:
+                    self._sync_typed_columns()
+
+                derived = {t: manifest["tables"].get(t) for t in self.EXPORT_DERIVED_TABLES}
+                if all(entry and set(entry["columns"]) == {
+                    row[0] for row in self.conn.execute(f"DESCRIBE {t}").fetchall()
+                } for t, entry in derived.items()):
+                    for table, entry in derived.items():
+                        self.conn.execute(f"DELETE FROM {table}")
+                        self.conn.execute(f"""
+                            INSERT INTO {table} BY NAME
+                            SELECT * FROM read_parquet({sql_path(os.path.join(directory, entry['file']))})
+                        """)
+                else:
+                    self.conn.execute("DELETE FROM node_vocab")
+                    self._rebuild_name_index()
+                self.rebuild_graph_stats()
+                self._bump_names_generation()
+            self._drop_fuzzy_indexes()
+            self._adjacency = None
+
+        LOGGER.info(
+            f"Graf importerad från {directory}: "
+            + ", ".join(f"{t} {n}" for t, n in counts.items())
+            + f" ({(datetime.now() - started).total_seconds():.2f}s)"
+        )
+        return counts
+
+    # --- MAINTENANCE ---
+
+    def collect_garbage(self, policies: dict = None, document_ids: set = None,
+                        dry_run: bool = False, now: datetime = None) -> dict:
+        """
+        Set-baserad skräpsamling i tre steg (i en transaktion, i denna ordning):
+
+        1. Dinglande kanter: source eller target saknas i nodes (t.ex. kvar
+           efter merge/split/delete). Tas alltid bort.
+        2. Dokument utan källa: DOCUMENT_NODE_TYPE-noder vars ID inte finns i
+           `document_ids` (Lake). Tas bort med sina kanter.
+        3. Föräldralösa noder (typer med healing_policy, ej dokument): inga
+           inkommande MENTION_EDGE_TYPE-kanter eller färre kanter än
+           min_connections_to_survive. Tas bort om noden är PROVISIONAL och
+           äldre än max_days_as_provisional; övriga rapporteras bara.
+
+        Steg 3 räknas efter steg 1-2, så entiteter som bara nämndes av
+        borttagna dokument blir föräldralösa i samma körning. dry_run kör
+        samma steg och rullar tillbaka, så rapporten är exakt den en riktig
+        körning ger. Anropas utanför andra transaktioner.
 
         Args:
-            source: Käll-nod ID
-            target: Mål-nod ID
-            edge_type: Typ av relation (DEALS_WITH, CREATED_BY, etc.)
-            properties: Extra egenskaper
+            policies: nodtyp -> healing_policy ur grafschemat
+                      ({"min_connections_to_survive", "max_days_as_provisional"}).
+                      Typer utan policy rörs inte i steg 3.
+            document_ids: ID:n för dokument som finns i Lake (None = hoppa över steg 2)
+            dry_run: Rapportera utan att ändra grafen
+            now: Referenstid för ålder (default nu)
+
+        Returns:
+            {"dangling_edges": {kanttyp: antal}, "documents_without_source": [id],
+             "orphans": [{"id", "type", "status", "connections", "mentions", "age_days", "action"}],
+             "removed_nodes": antal, "dry_run": bool}
         """
         if self.read_only:
             raise RuntimeError("HARDFAIL: Försöker skriva i read_only mode")
 
-        properties_json = json.dumps(properties or {}, ensure_ascii=False)
+        now = now or datetime.now()
+        report = {"dangling_edges": {}, "documents_without_source": [], "orphans": [],
+                  "removed_nodes": 0, "dry_run": dry_run}
 
         with self._lock:
-            self.conn.execute("""
-                INSERT INTO edges (source, target, edge_type, properties)
-                VALUES (?, ?, ?, ?)
-                ON CONFLICT (source, target, edge_type) DO UPDATE SET
-                    properties = EXCLUDED.properties
-            """, [source, target, edge_type, properties_json])
-
-    def delete_edge(self, source: str, target: str, edge_type: str) -> bool:
+            try:
+                with self._transaction():
+                    # 1. DINGLANDE KANTER
+                    dangling = Counter(row[0] for row in self.conn.execute("""
+                        DELETE FROM edges
+                        WHERE source NOT IN (SELECT id FROM nodes) OR target NOT IN (SELECT id FROM nodes)
+                        RETURNING edge_type
+                    """).fetchall())
+                    edge_delta = Counter()
+                    edge_delta.subtract(dangling)
+                    self._adjust_stats(edges=edge_delta)
+                    report["dangling_edges"] = dict(dangling)
+
+                    # 2. DOKUMENT UTAN KÄLLA
+                    if document_ids is not None:
+                        documents = self.conn.execute("""
+                            SELECT n.id FROM nodes n
+                            ANTI JOIN (SELECT unnest(CAST(? AS VARCHAR[])) AS id) lake ON lake.id = n.id
+                            WHERE n.type = ?
+                        """, [list(document_ids), self.DOCUMENT_NODE_TYPE]).fetchall()
+                        report["documents_without_source"] = sorted(row[0] for row in documents)
+                        report["removed_nodes"] += self.delete_nodes_bulk(report["documents_without_source"])
+
+                    # 3. FÖRÄLDRALÖSA NODER
+                    report["orphans"] = self._find_orphans(policies or {}, now)
+                    report["removed_nodes"] += self.delete_nodes_bulk(
+                        [o["id"] for o in report["orphans"] if o["action"] == "remove"]
+                    )
+
+                    if dry_run:
+                        raise _GarbageDryRun()
+            except _GarbageDryRun:
+                pass
+
+        removed_orphans = sum(1 for o in report["orphans"] if o["action"] == "remove")
+        LOGGER.info(
+            f"GC{' (dry run)' if dry_run else ''}: {sum(report['dangling_edges'].values())} dinglande kanter, "
+            f"{len(report['documents_without_source'])} dokument utan källa, "
+            f"{removed_orphans}/{len(report['orphans'])} föräldralösa noder borttagna"
+        )
+        return report
+
+    def _find_orphans(self, policies: dict, now: datetime) -> list[dict]:
+        """Föräldralösa noder enligt healing_policy (se collect_garbage, steg 3)."""
+        policy_rows = [
+            (node_type, int(policy.get("min_connections_to_survive", 0)),
+             int(policy.get("max_days_as_provisional", 0)))
+            for node_type, policy in policies.items()
+            if policy and node_type != self.DOCUMENT_NODE_TYPE
+        ]
+        if not policy_rows:
+            return []
+        types, min_connections, max_days = (list(column) for column in zip(*policy_rows))
+        rows = self.conn.execute("""
+            WITH policy AS (
+                SELECT unnest(CAST(? AS VARCHAR[])) AS type,
+                       unnest(CAST(? AS INTEGER[])) AS min_connections,
+                       unnest(CAST(? AS INTEGER[])) AS max_days
+            ),
+            ends AS (
+                -- Self-loops räknas en gång
+                SELECT source AS node_id, false AS incoming, edge_type FROM edges WHERE source <> target
+                UNION ALL
+                SELECT target, true, edge_type FROM edges
+            ),
+            degree AS (
+                SELECT node_id,
+                       COUNT(*) AS connections,
+                       COUNT(*) FILTER (WHERE incoming AND edge_type = ?) AS mentions
+                FROM ends
+                GROUP BY node_id
+            )
+            SELECT n.id, n.type, n.status,
+                   COALESCE(d.connections, 0), COALESCE(d.mentions, 0),
+                   date_diff('day', n.created_at, CAST(? AS TIMESTAMP)),
+                   n.status = 'PROVISIONAL'
+                       AND n.created_at < CAST(? AS TIMESTAMP) - to_days(p.max_days)
+            FROM nodes n
+            JOIN policy p ON p.type = n.type
+            LEFT JOIN degree d ON d.node_id = n.id
+            WHERE COALESCE(d.mentions, 0) = 0 OR COALESCE(d.connections, 0) < p.min_connections
+            ORDER BY n.type, n.id
+        """, [types, min_connections, max_days, self.MENTION_EDGE_TYPE, now, now]).fetchall()
+        return [
+            {"id": node_id, "type": node_type, "status": status, "connections": connections,
+             "mentions": mentions, "age_days": age_days, "action": "remove" if expired else "keep"}
+            for node_id, node_type, status, connections, mentions, age_days, expired in rows
+        ]
+
+    def compact(self, force: bool = False) -> dict:
         """
-        Ta bort en specifik kant.
+        CHECKPOINT och vid behov omskrivning av databasfilen.
+
+        DuckDB krymper inte filen när rader tas bort: blocken blir lediga och
+        återanvänds, och VACUUM frigör inget. Är minst COMPACT_FREE_RATIO av
+        blocken lediga (eller force) kopieras databasen till en ny fil
+        (COPY FROM DATABASE, inkl. index och sekvenser) som ersätter den gamla.
+        Kräver grafens skrivlås: ingen annan process får ha filen öppen.
 
         Returns:
-            True om kanten fanns och togs bort
+            {"bytes_before", "bytes_after", "free_ratio", "rewritten"}
         """
         if self.read_only:
             raise RuntimeError("HARDFAIL: Försöker skriva i read_only mode")
 
         with self._lock:
-            result = self.conn.execute(
-                "DELETE FROM edges WHERE source = ? AND target = ? AND edge_type = ? RETURNING source",
-                [source, target, edge_type]
+            if self._tx_depth:
+                raise RuntimeError("HARDFAIL: compact() kan inte köras i en transaktion")
+            self.conn.execute("CHECKPOINT")
+            bytes_before = os.path.getsize(self.db_path)
+            total_blocks, free_blocks = self.conn.execute(
+                "SELECT total_blocks, free_blocks FROM pragma_database_size() WHERE database_name = current_database()"
             ).fetchone()
+            free_ratio = free_blocks / total_blocks if total_blocks else 0.0
+            result = {"bytes_before": bytes_before, "bytes_after": bytes_before,
+                      "free_ratio": free_ratio, "rewritten": False}
+            if not force and free_ratio < self.COMPACT_FREE_RATIO:
+                return result
+
+            compact_path = self.db_path + ".compact"
+            for path in (compact_path, compact_path + ".wal"):
+                if os.path.exists(path):
+                    os.remove(path)
+            database = self.conn.execute("SELECT current_database()").fetchone()[0]
+            self.conn.execute(f"ATTACH {sql_path(compact_path)} AS compact_target")
+            try:
+                self.conn.execute(f'COPY FROM DATABASE "{database}" TO compact_target')
+            finally:
+                self.conn.execute("DETACH compact_target")
+            self.conn.close()
+            try:
+                os.replace(compact_path, self.db_path)
+            finally:
+                self.conn = duckdb.connect(self.db_path)
+            self._adjacency = None
+            self._bump_generation()
+
+            result["bytes_after"] = os.path.getsize(self.db_path)
+            result["rewritten"] = True
+            LOGGER.info(
+                f"Graf komprimerad: {bytes_before / 1e6:.1f} MB -> {result['bytes_after'] / 1e6:.1f} MB "
+                f"({free_ratio:.0%} lediga block)"
+            )
+            return result
 
-            return result is not None
-
-    # --- STATISTICS ---
+    # --- SEARCH HELPERS ---
 
-    def get_stats(self) -> dict:
+    def search_nodes(self, query: str, node_type: str = None, limit: int = 15,
+                     with_context: bool = False) -> list[dict]:
         """
-        Hämta statistik om grafen.
+        Rankad fritextsökning (BM25) över name, aliases, email, id och node_context.
+
+        Alla termer i frågan vägs ihop (OR-semantik). Termer om minst
+        SEARCH_PREFIX_MIN_LEN tecken matchar även som prefix ('joh' -> 'johan')
+        med reducerad vikt. Strukturellt centrala noder (node_metrics.centrality)
+        rankas upp med upp till SEARCH_CENTRALITY_WEIGHT.
+
+        Args:
+            query: Sökfråga
+            node_type: Begränsa till en nodtyp (valfritt)
+            limit: Max antal resultat
+            with_context: Läs även node_context för träffarna
 
         Returns:
-            dict med total_nodes, total_edges, nodes per typ, edges per typ
+            Lista med noder (bäst först), varje nod med "score"
         """
-        with self._lock:
-            # Räkna noder per typ
-            node_counts = self.conn.execute(
-                "SELECT type, COUNT(*) FROM nodes GROUP BY type"
-            ).fetchall()
+        terms = list(dict.fromkeys(self._tokenize(query)))
+        if not terms:
+            return []
 
-            # Räkna kanter per typ
-            edge_counts = self.conn.execute(
-                "SELECT edge_type, COUNT(*) FROM edges GROUP BY edge_type"
-            ).fetchall()
-
-        nodes_dict = {row[0]: row[1] for row in node_counts}
-        edges_dict = {row[0]: row[1] for row in edge_counts}
+        with self._lock:
+            # 1. Expandera frågetermerna mot vokabulären: exakt träff eller prefix
+            prefix_terms = [t for t in terms if len(t) >= self.SEARCH_PREFIX_MIN_LEN]
+            expanded = set(terms)
+            if prefix_terms:
+                # Kortaste expansionerna först (närmast frågetermen), max SEARCH_PREFIX_EXPANSIONS per term
+                expanded.update(row[0] for row in self.conn.execute("""
+                    SELECT v.term
+                    FROM node_vocab v
+                    JOIN (SELECT unnest(CAST(? AS VARCHAR[])) AS prefix) p ON starts_with(v.term, p.prefix)
+                    QUALIFY row_number() OVER (PARTITION BY p.prefix ORDER BY length(v.term), v.term) <= ?
+                """, [prefix_terms, self.SEARCH_PREFIX_EXPANSIONS]).fetchall())
+
+            # (frågeterm, indexterm, vikt) - en indexterm kan matcha flera frågetermer
+            q_terms, idx_terms, weights = [], [], []
+            for qterm in terms:
+                for term in expanded:
+                    if term == qterm:
+                        weight = 1.0
+                    elif qterm in prefix_terms and term.startswith(qterm):
+                        weight = self.SEARCH_PREFIX_WEIGHT
+                    else:
+                        continue
+                    q_terms.append(qterm)
+                    idx_terms.append(term)
+                    weights.append(weight)
+
+            type_filter = "WHERE d.type = ?" if node_type else ""
+            vocabulary = sorted(expanded)
+            placeholders = ','.join(['?'] * len(vocabulary))
+            params = [q_terms, idx_terms, weights, *vocabulary, *vocabulary,
+                      self.BM25_K1, self.BM25_K1, self.BM25_B, self.BM25_B]
+            if node_type:
+                params.append(node_type)
+            # Äldre read-only grafer saknar node_metrics - ren BM25
+            if self._has_metrics_table:
+                centrality = "COALESCE(m.centrality, 0)"
+                metrics_join = "LEFT JOIN node_metrics m ON m.node_id = s.node_id"
+            else:
+                centrality, metrics_join = "0", ""
+            params += [self.SEARCH_CENTRALITY_WEIGHT, limit]
+
+            # 2. BM25 över postings för de expanderade termerna. IN-listan når
+            #    scanningen som filter, så uppslaget går via idx_*_term (se EDGE OPERATIONS)
+            scored = self.conn.execute(f"""
+                WITH q AS (
+                    SELECT unnest(CAST(? AS VARCHAR[])) AS qterm,
+                           unnest(CAST(? AS VARCHAR[])) AS term,
+                           unnest(CAST(? AS DOUBLE[])) AS weight
+                ),
+                postings AS MATERIALIZED (
+                    SELECT term, node_id, tf FROM node_terms WHERE term IN ({placeholders})
+                    UNION ALL
+                    SELECT term, node_id, tf FROM node_context_terms WHERE term IN ({placeholders})
+                ),
+                hits AS (
+                    SELECT q.qterm, t.node_id, SUM(t.tf * q.weight) AS tf
+                    FROM postings t
+                    JOIN q ON t.term = q.term
+                    GROUP BY q.qterm, t.node_id
+                ),
+                corpus AS (
+                    SELECT COUNT(*) AS n, AVG(length) AS avgdl FROM node_term_docs
+                ),
+                df AS (
+                    SELECT qterm, COUNT(*) AS df FROM hits GROUP BY qterm
+                ),
+                bm25 AS (
+                    SELECT h.node_id,
+                           SUM(
+                               ln(1 + (c.n - df.df + 0.5) / (df.df + 0.5))
+                               * h.tf * (? + 1)
+                               / (h.tf + ? * (1 - ? + ? * d.length / c.avgdl))
+                           ) AS score
+                    FROM hits h
+                    JOIN df USING (qterm)
+                    JOIN node_term_docs d ON d.node_id = h.node_id
+                    CROSS JOIN corpus c
+                    {type_filter}
+                    GROUP BY h.node_id
+                )
+                SELECT s.node_id, s.score * (1 + ? * {centrality}) AS score
+                FROM bm25 s
+                {metrics_join}
+                ORDER BY score DESC, s.node_id
+                LIMIT ?
+            """, params).fetchall()
 
-        return {
-            "total_nodes": sum(nodes_dict.values()),
-            "total_edges": sum(edges_dict.values()),
-            "nodes": nodes_dict,
-            "edges": edges_dict
-        }
+        if not scored:
+            return []
 
-    # --- SEARCH HELPERS ---
+        nodes = self.get_nodes([node_id for node_id, _ in scored], with_context=with_context)
+        results = []
+        for node_id, score in scored:
+            node = nodes.get(node_id)
+            if node is not None:
+                node["score"] = score
+                results.append(node)
+        return results
 
     def find_nodes_fuzzy(self, term: str, limit: int = 10) -> list[dict]:
         """
         Fuzzy-sök efter noder baserat på ID eller alias.
 
+        Använder det rankade sökindexet (search_nodes) när det är aktuellt,
+        annars ILIKE över id och aliases.
+
         Args:
             term: Sökterm
             limit: Max antal resultat
@@ -539,25 +2637,17 @@ class GraphService:
         Returns:
             Lista med matchande noder
         """
+        if self.search_index_is_fresh():
+            return self.search_nodes(term, limit=limit)
+
         # Sök i id och aliases
-        with self._lock:
-            results = self.conn.execute("""
-                SELECT id, type, aliases, properties
-                FROM nodes
-                WHERE id ILIKE ?
-                   OR (aliases IS NOT NULL AND aliases ILIKE ?)
-                LIMIT ?
-            """, [f"%{term}%", f"%{term}%", limit]).fetchall()
-
-        nodes = []
-        for row in results:
-            nodes.append({
-                "id": row[0],
-                "type": row[1],
-                "aliases": json.loads(row[2]) if row[2] else [],
-                "properties": json.loads(row[3]) if row[3] else {}
-            })
-        return nodes
+        return self._fetch_nodes("""
+            SELECT id, type, aliases, properties
+            FROM nodes
+            WHERE id ILIKE ?
+               OR array_to_string(aliases, ' ') ILIKE ?
+            LIMIT ?
+        """, [f"%{term}%", f"%{term}%", limit])
 
     def get_related_units(self, entity_id: str, limit: int = 10) -> list[str]:
         """
@@ -571,10 +2661,18 @@ class GraphService:
             Lista med Unit-IDs
         """
         with self._lock:
+            adjacency = self._cached_adjacency()
+            if adjacency is not None:
+                return adjacency.neighbors(entity_id, direction="in", edge_types=["UNIT_MENTIONS"])[:limit]
+            # MATERIALIZED: target-uppslaget får idx_edges_target (se EDGE OPERATIONS)
             results = self.conn.execute("""
+                WITH incoming AS MATERIALIZED (
+                    SELECT source, edge_type FROM edges WHERE target = ?
+                )
                 SELECT DISTINCT source
-                FROM edges
-                WHERE target = ? AND edge_type = 'UNIT_MENTIONS'
+                FROM incoming
+                WHERE edge_type = 'UNIT_MENTIONS'
+                ORDER BY source
                 LIMIT ?
             """, [entity_id, limit]).fetchall()
 
@@ -582,17 +2680,9 @@ class GraphService:
 
     # --- DREAMER SUPPORT ---
 
-    def add_pending_review(self, entity: str, master_node: str, score: float, reason: str, context: dict):
-        """
-        Lägg till en manuell granskning (för Dreamer).
-        """
-        import uuid
-
-        review_id = str(uuid.uuid4())
-        context_json = json.dumps(context, ensure_ascii=False)
-
+    def _ensure_pending_reviews_table(self):
+        """Skapa pending_reviews om den saknas (skapas först när den behövs)."""
         with self._lock:
-            # Skapa tabellen om den saknas
             self.conn.execute("""
                 CREATE TABLE IF NOT EXISTS pending_reviews (
                     id TEXT PRIMARY KEY,
@@ -605,6 +2695,17 @@ class GraphService:
                 )
             """)
 
+    def add_pending_review(self, entity: str, master_node: str, score: float, reason: str, context: dict):
+        """
+        Lägg till en manuell granskning (för Dreamer).
+        """
+        import uuid
+
+        review_id = str(uuid.uuid4())
+        context_json = json.dumps(context, ensure_ascii=False)
+
+        with self._lock:
+            self._ensure_pending_reviews_table()
             self.conn.execute("""
                 INSERT INTO pending_reviews (id, entity, master_node, score, reason, context)
                 VALUES (?, ?, ?, ?, ?, ?)
@@ -612,6 +2713,51 @@ class GraphService:
 
             LOGGER.info(f"Saved pending review: {entity} vs {master_node} ({score})")
 
+    @staticmethod
+    def _aggregate_merge_properties(props_t: dict, props_s: dict) -> dict:
+        """
+        Aggregera källnodens properties in i målnodens (merge-semantik).
+
+        Listor slås ihop och dedupliceras (list of dicts, t.ex. node_context,
+        på innehåll). Skalära värden kopieras bara om de saknas i målet.
+        """
+        merged_props = props_t.copy()
+
+        for k, v in props_s.items():
+            # Om det är en lista (t.ex. keywords, evidence, node_context)
+            if isinstance(v, list) and k in merged_props and isinstance(merged_props[k], list):
+                combined = merged_props[k] + v
+
+                # SPECIALHANTERING: List of Dicts (t.ex. node_context)
+                if combined and isinstance(combined[0], dict):
+                    # Deduplicera baserat på innehåll genom serialisering
+                    seen = set()
+                    unique_list = []
+                    for item in combined:
+                        try:
+                            # Skapar en hashbar representation av dictet (sorterade keys)
+                            item_key = tuple(sorted((ik, str(iv)) for ik, iv in item.items()))
+                            if item_key not in seen:
+                                seen.add(item_key)
+                                unique_list.append(item)
+                        except Exception:
+                            # Fallback om datat är komplext: behåll allt
+                            unique_list.append(item)
+                    merged_props[k] = unique_list
+
+                # STANDARD: List of Strings/Ints
+                else:
+                    try:
+                        merged_props[k] = list(set(combined))
+                    except TypeError:
+                        merged_props[k] = combined  # Fallback
+
+            # Om skalärt värde saknas i target, kopiera från source
+            elif k not in merged_props:
+                merged_props[k] = v
+
+        return merged_props
+
     def merge_nodes(self, target_id: str, source_id: str):
         """
         Slå ihop source_id in i target_id (ROBUST & ATOMÄR).
@@ -621,111 +2767,181 @@ class GraphService:
         2. Flytta alla relationer.
         3. Flytta alias.
         4. Radera källnoden.
-        """
-        if self.read_only:
-            raise RuntimeError("HARDFAIL: Read-only mode")
-
-        with self._lock:
-            # 1. HÄMTA DATA
-            res_target = self.conn.execute("SELECT properties FROM nodes WHERE id = ?", [target_id]).fetchone()
-            res_source = self.conn.execute("SELECT properties FROM nodes WHERE id = ?", [source_id]).fetchone()
-
-            if not res_target or not res_source:
-                LOGGER.warning(f"Merge aborted: Node missing ({target_id} or {source_id})")
-                return
-
-            try:
-                props_t = json.loads(res_target[0]) if res_target[0] else {}
-                props_s = json.loads(res_source[0]) if res_source[0] else {}
-            except Exception as e:
-                LOGGER.error(f"JSON decode error during merge: {e}")
-                return
-
-            # 2. AGGREGERA PROPERTIES
-            merged_props = props_t.copy()
-
-            for k, v in props_s.items():
-                # Om det är en lista (t.ex. keywords, evidence, node_context)
-                if isinstance(v, list) and k in merged_props and isinstance(merged_props[k], list):
-                    combined = merged_props[k] + v
-
-                    # SPECIALHANTERING: List of Dicts (t.ex. node_context)
-                    if combined and isinstance(combined[0], dict):
-                        # Deduplicera baserat på innehåll genom serialisering
-                        seen = set()
-                        unique_list = []
-                        for item in combined:
-                            # Sortera keys för konsekvent hashning
-                            try:
-                                # Skapar en hashbar representation av dictet
-                                item_key = tuple(sorted((k, str(v)) for k, v in item.items()))
-                                if item_key not in seen:
-                                    seen.add(item_key)
-                                    unique_list.append(item)
-                            except Exception:
-                                # Fallback om datat är komplext: behåll allt
-                                unique_list.append(item)
-                        merged_props[k] = unique_list
-
-                    # STANDARD: List of Strings/Ints
-                    else:
-                        try:
-                            merged_props[k] = list(set(combined))
-                        except TypeError:
-                            merged_props[k] = combined # Fallback
-
-                # Om skalärt värde saknas i target, kopiera från source
-                elif k not in merged_props:
-                    merged_props[k] = v
-
-            # SPARA TARGET (Innan vi flyttar kanter)
-            self.conn.execute("UPDATE nodes SET properties = ? WHERE id = ?",
-                            [json.dumps(merged_props, ensure_ascii=False), target_id])
 
-            # 3. FLYTTA UTGÅENDE KANTER (source -> X) till (target -> X)
-            self.conn.execute("""
-                UPDATE edges
-                SET source = ?
-                WHERE source = ?
-                AND NOT EXISTS (
-                    SELECT 1 FROM edges e2
-                    WHERE e2.source = ? AND e2.target = edges.target AND e2.edge_type = edges.edge_type
-                )
-            """, [target_id, source_id, target_id])
-
-            # 4. FLYTTA INKOMMANDE KANTER (X -> source) till (X -> target)
-            self.conn.execute("""
-                UPDATE edges
-                SET target = ?
-                WHERE target = ?
-                AND NOT EXISTS (
-                    SELECT 1 FROM edges e2
-                    WHERE e2.source = edges.source AND e2.target = ? AND e2.edge_type = edges.edge_type
-                )
-            """, [target_id, source_id, target_id])
+        Se merge_many (en transaktion, set-baserad).
+        """
+        self.merge_many([(target_id, source_id)])
 
-            # 5. STÄDA KANTER (Ta bort dubbletter som uppstod vid flytt eller self-loops)
-            self.conn.execute("DELETE FROM edges WHERE source = ? OR target = ?", [source_id, source_id])
-            # Ta bort self-loops på target om de skapades
-            self.conn.execute("DELETE FROM edges WHERE source = ? AND target = ?", [target_id, target_id])
+    def merge_many(self, pairs: list) -> list[dict]:
+        """
+        Slå ihop många nodpar i EN transaktion.
 
-            # 6. FLYTTA ALIASES
-            res_source_a = self.conn.execute("SELECT aliases FROM nodes WHERE id = ?", [source_id]).fetchone()
-            aliases_s = json.loads(res_source_a[0]) if res_source_a and res_source_a[0] else []
+        Kedjor löses upp i förväg: (B, A) följt av (C, B) slår ihop både A
+        och B in i C. Par vars källa redan slagits ihop, eller som skulle slå
+        ihop en nod med sig själv (cykel), hoppas över.
 
-            res_target_a = self.conn.execute("SELECT aliases FROM nodes WHERE id = ?", [target_id]).fetchone()
-            aliases_t = json.loads(res_target_a[0]) if res_target_a and res_target_a[0] else []
+        Kanter flyttas set-baserat via en staging-tabell (källa -> slutligt mål):
+        dubbletter mot målets befintliga kanter och self-loops tas bort.
+        Kontexten flyttas med UPDATE node_context SET node_id; identiska
+        poster (text, origin) på målet dedupliceras.
 
-            # Gamla IDt blir ett alias
-            new_aliases = list(set(aliases_t + aliases_s + [source_id]))
+        Args:
+            pairs: Lista av (target_id, source_id)
 
-            self.conn.execute("UPDATE nodes SET aliases = ? WHERE id = ?",
-                            [json.dumps(new_aliases, ensure_ascii=False), target_id])
+        Returns:
+            Ett resultat per par (samma ordning):
+            {"target", "source", "merged_into", "status": "merged"|"skipped", "reason"}
+        """
+        if self.read_only:
+            raise RuntimeError("HARDFAIL: Read-only mode")
 
-            # 7. RADERA SOURCE
-            self.conn.execute("DELETE FROM nodes WHERE id = ?", [source_id])
+        with self._lock:
+            # 1. LÖS UPP KEDJOR (source -> slutligt mål)
+            ids = list(dict.fromkeys(i for pair in pairs for i in pair if i))
+            nodes = self.get_nodes(ids)
+
+            parent = {}  # source -> target (innan upplösning)
+
+            def resolve(node_id):
+                while node_id in parent:
+                    node_id = parent[node_id]
+                return node_id
+
+            results = []
+            accepted = []  # (source, target) i ordning
+            for target_id, source_id in pairs:
+                result = {"target": target_id, "source": source_id, "merged_into": None,
+                          "status": "skipped", "reason": None}
+                results.append(result)
+
+                if target_id not in nodes or source_id not in nodes:
+                    result["reason"] = "node_missing"
+                    continue
+                if source_id in parent:
+                    result["reason"] = "source_already_merged"
+                    continue
+                final_target = resolve(target_id)
+                if final_target == source_id:
+                    result["reason"] = "cycle"
+                    continue
+
+                parent[source_id] = final_target
+                accepted.append((source_id, result))
+
+            if not accepted:
+                for r in results:
+                    LOGGER.warning(f"Merge skipped ({r['reason']}): {r['source']} -> {r['target']}")
+                return results
+
+            mapping = {source_id: resolve(source_id) for source_id, _ in accepted}
+            for source_id, result in accepted:
+                result["merged_into"] = mapping[source_id]
+                result["status"] = "merged"
+
+            # 2. AGGREGERA PROPERTIES + ALIAS per slutligt mål (i parens ordning)
+            merged = {}  # target -> (aliases, properties)
+            for source_id, _ in accepted:
+                target_id = mapping[source_id]
+                if target_id not in merged:
+                    target = nodes[target_id]
+                    merged[target_id] = (list(target["aliases"]), target["properties"])
+                aliases_t, props_t = merged[target_id]
+                source = nodes[source_id]
+                props = self._aggregate_merge_properties(props_t, source["properties"])
+                # Gamla IDt blir ett alias
+                aliases = list(set(aliases_t + list(source["aliases"]) + [source_id]))
+                merged[target_id] = (aliases, props)
+
+            sources = list(mapping)
+            targets = list(merged)
+
+            with self._transaction():
+                # Alla kanter som flyttas/tas bort berör en källa eller ett mål
+                edges_before = self._incident_edge_counts(sources + targets)
+                self._stage_rows("_stage_merge", "source TEXT, target TEXT", list(mapping.items()))
+
+                # 3. FLYTTA KANTER: peka om källorna till slutligt mål
+                self.conn.execute("""
+                    CREATE OR REPLACE TEMP TABLE _moved_edges AS
+                    SELECT COALESCE(ms.target, e.source) AS source,
+                           COALESCE(mt.target, e.target) AS target,
+                           e.edge_type,
+                           e.properties
+                    FROM edges e
+                    LEFT JOIN _stage_merge ms ON e.source = ms.source
+                    LEFT JOIN _stage_merge mt ON e.target = mt.source
+                    WHERE ms.source IS NOT NULL OR mt.source IS NOT NULL
+                """)
+                self.conn.execute("""
+                    DELETE FROM edges
+                    WHERE source IN (SELECT source FROM _stage_merge)
+                       OR target IN (SELECT source FROM _stage_merge)
+                """)
+                # Målets befintliga kanter vinner; self-loops och dubbletter tas bort
+                self.conn.execute("""
+                    INSERT INTO edges (source, target, edge_type, properties)
+                    SELECT m.source, m.target, m.edge_type, m.properties
+                    FROM _moved_edges m
+                    WHERE m.source <> m.target
+                      AND NOT EXISTS (
+                          SELECT 1 FROM edges e
+                          WHERE e.source = m.source AND e.target = m.target AND e.edge_type = m.edge_type
+                      )
+                    QUALIFY row_number() OVER (PARTITION BY m.source, m.target, m.edge_type) = 1
+                """)
+                # Self-loops på målen
+                self.conn.execute("""
+                    DELETE FROM edges
+                    WHERE source = target AND source IN (SELECT DISTINCT target FROM _stage_merge)
+                """)
+
+                # 4. FLYTTA KONTEXT (äldsta förekomsten av en dubblett behålls)
+                self.conn.execute("""
+                    UPDATE node_context SET node_id = m.target
+                    FROM _stage_merge m
+                    WHERE node_context.node_id = m.source
+                """)
+                self.conn.execute("""
+                    DELETE FROM node_context WHERE id IN (
+                        SELECT id FROM node_context
+                        WHERE node_id IN (SELECT DISTINCT target FROM _stage_merge)
+                        QUALIFY row_number() OVER (PARTITION BY node_id, text, origin ORDER BY id) > 1
+                    )
+                """)
+
+                # 5. SPARA MÅLEN
+                self._stage_rows("_stage_merged_nodes", "id TEXT, aliases VARCHAR[], properties JSON", [
+                    (target_id, aliases, json.dumps(props, ensure_ascii=False))
+                    for target_id, (aliases, props) in merged.items()
+                ])
+                self.conn.execute("""
+                    UPDATE nodes SET aliases = s.aliases, properties = s.properties
+                    FROM _stage_merged_nodes s
+                    WHERE nodes.id = s.id
+                """)
+
+                # 6. RADERA KÄLLORNA
+                self.conn.execute("DELETE FROM nodes WHERE id IN (SELECT source FROM _stage_merge)")
+                self.conn.execute("DELETE FROM node_metrics WHERE node_id IN (SELECT source FROM _stage_merge)")
+
+                for table in ("_stage_merge", "_moved_edges", "_stage_merged_nodes"):
+                    self.conn.execute(f"DROP TABLE IF EXISTS {table}")
+
+                edge_delta = self._incident_edge_counts(sources + targets)
+                edge_delta.subtract(edges_before)
+                node_delta = Counter()
+                node_delta.subtract(nodes[source_id]["type"] for source_id in sources)
+                self._adjust_stats(nodes=node_delta, edges=edge_delta)
+                self._sync_typed_columns(targets)
+                self._reindex_names(targets + sources)
+
+            for r in results:
+                if r["status"] == "merged":
+                    LOGGER.info(f"Merged {r['source']} into {r['merged_into']} (Data aggregated)")
+                else:
+                    LOGGER.warning(f"Merge skipped ({r['reason']}): {r['source']} -> {r['target']}")
 
-            LOGGER.info(f"Merged {source_id} into {target_id} (Data aggregated)")
+        return results
 
     def rename_node(self, old_id: str, new_name: str):
         """
@@ -749,12 +2965,14 @@ class GraphService:
                     LOGGER.warning(f"Rename failed: Source {old_id} not found")
                     return
 
-                # Skapa nya noden (Klon)
-                self.conn.execute("INSERT INTO nodes (id, type, aliases, properties) VALUES (?, ?, ?, ?)",
-                                [new_name, res[0], res[1], res[2]])
+                with self._transaction():
+                    # Skapa nya noden (Klon)
+                    self.conn.execute("INSERT INTO nodes (id, type, aliases, properties) VALUES (?, ?, ?, ?)",
+                                    [new_name, res[0], res[1], res[2]])
+                    self._adjust_stats(nodes=Counter({res[0]: 1}))
 
-                # Använd merge-logiken för att flytta kanter och städa upp gamla noden
-                self.merge_nodes(new_name, old_id)
+                    # Använd merge-logiken för att flytta kanter och städa upp gamla noden
+                    self.merge_nodes(new_name, old_id)
                 LOGGER.info(f"Renamed {old_id} -> {new_name}")
 
     def split_node(self, original_id: str, split_map: list):
@@ -781,72 +2999,88 @@ class GraphService:
             except:
                 orig_props = {}
 
-            node_context = orig_props.get("node_context", [])
+            # Kontextposternas id i listordning (context_indices pekar hit)
+            context_ids = [r[0] for r in self.conn.execute(
+                "SELECT id FROM node_context WHERE node_id = ? ORDER BY id", [original_id]
+            ).fetchall()]
 
-            # 2. Skapa nya noder
-            created_nodes = []
+            # 2. Bygg nya noder
+            new_nodes = []
+            # (kontextpost-id, ny nod): första tilldelningen flyttas, övriga kopieras
+            moved, copied, assigned = [], [], set()
             for item in split_map:
                 new_name = item.get("name")
                 indices = item.get("context_indices", [])
 
                 if not new_name: continue
 
-                # Bygg properties för den nya noden
-                new_props = orig_props.copy()
-
-                # Filtrera node_context baserat på index
-                if node_context:
-                    specific_context = [ctx for i, ctx in enumerate(node_context) if i in indices]
-                    new_props["node_context"] = specific_context
+                for i in dict.fromkeys(indices):
+                    if not (isinstance(i, int) and 0 <= i < len(context_ids)):
+                        continue
+                    context_id = context_ids[i]
+                    (copied if context_id in assigned else moved).append((context_id, new_name))
+                    assigned.add(context_id)
 
-                # Spara nya noden
-                # (Om den redan finns, gör vi en upsert på properties för att inte krascha,
+                # (Om noden redan finns blir det en upsert på properties för att inte krascha,
                 # men logiskt sett borde Split skapa nya unika namn)
-                props_json = json.dumps(new_props, ensure_ascii=False)
-
-                # Check exist
-                exists = self.conn.execute("SELECT 1 FROM nodes WHERE id = ?", [new_name]).fetchone()
-                if not exists:
-                    self.conn.execute("INSERT INTO nodes (id, type, aliases, properties) VALUES (?, ?, '[]', ?)",
-                                    [new_name, orig_type, props_json])
-                else:
-                    # Om den finns, uppdatera properties (merge:a in kontexten)
-                    # För enkelhetens skull i denna operation skriver vi över properties med den splittade datan
-                    # eftersom syftet är att isolera kluster.
-                    self.conn.execute("UPDATE nodes SET properties = ? WHERE id = ?", [props_json, new_name])
-
-                created_nodes.append(new_name)
-
-            # 3. Kopiera relationer (Brute force copy)
-            # Eftersom vi inte vet vilken relation som hör till vilket kluster,
-            # kopierar vi ALLA relationer till ALLA nya noder.
-            # Dreamer får städa detta i framtida cykler (relevans-städning).
-
-            # Utgående
-            out_edges = self.conn.execute("SELECT target, edge_type, properties FROM edges WHERE source = ?", [original_id]).fetchall()
-            for new_node in created_nodes:
-                for target, etype, props in out_edges:
-                    # Undvik self-loops om nya noden råkar vara target
-                    if target == new_node: continue
-                    try:
-                        self.conn.execute("INSERT OR IGNORE INTO edges (source, target, edge_type, properties) VALUES (?, ?, ?, ?)",
-                                        [new_node, target, etype, props])
-                    except: pass
-
-            # Inkommande
-            in_edges = self.conn.execute("SELECT source, edge_type, properties FROM edges WHERE target = ?", [original_id]).fetchall()
-            for new_node in created_nodes:
-                for source, etype, props in in_edges:
-                    if source == new_node: continue
-                    try:
-                        self.conn.execute("INSERT OR IGNORE INTO edges (source, target, edge_type, properties) VALUES (?, ?, ?, ?)",
-                                        [source, new_node, etype, props])
-                    except: pass
-
-            # 4. Radera originalnoden
-            # Detta tar också bort dess kanter via Cascade (om implementerat) eller manuell delete
-            self.conn.execute("DELETE FROM edges WHERE source = ? OR target = ?", [original_id, original_id])
-            self.conn.execute("DELETE FROM nodes WHERE id = ?", [original_id])
+                new_nodes.append({"id": new_name, "type": orig_type, "properties": orig_props.copy()})
+
+            created_nodes = list(dict.fromkeys(n["id"] for n in new_nodes))
+
+            with self._transaction():
+                # Kopierade och borttagna kanter berör originalet eller en ny nod
+                edges_before = self._incident_edge_counts([original_id] + created_nodes)
+                self.upsert_nodes_bulk(new_nodes)
+
+                # 3. Kopiera relationer (Brute force copy)
+                # Eftersom vi inte vet vilken relation som hör till vilket kluster,
+                # kopierar vi ALLA relationer till ALLA nya noder.
+                # Dreamer får städa detta i framtida cykler (relevans-städning).
+                # Set-baserat: kanterna korsas mot en temp-tabell med de nya noderna.
+                self._stage_rows("_split_nodes", "id TEXT", [(node_id,) for node_id in created_nodes])
+                # Utgående (undvik self-loops om nya noden råkar vara target)
+                self.conn.execute("""
+                    INSERT INTO edges (source, target, edge_type, properties)
+                    SELECT n.id, e.target, e.edge_type, e.properties
+                    FROM edges e CROSS JOIN _split_nodes n
+                    WHERE e.source = ? AND e.target <> n.id
+                    ON CONFLICT (source, target, edge_type) DO NOTHING
+                """, [original_id])
+                # Inkommande
+                self.conn.execute("""
+                    INSERT INTO edges (source, target, edge_type, properties)
+                    SELECT e.source, n.id, e.edge_type, e.properties
+                    FROM edges e CROSS JOIN _split_nodes n
+                    WHERE e.target = ? AND e.source <> n.id
+                    ON CONFLICT (source, target, edge_type) DO NOTHING
+                """, [original_id])
+                self.conn.execute("DROP TABLE IF EXISTS _split_nodes")
+
+                # 4. Fördela kontexten: UPDATE SET node_id, kopior för poster i flera kluster
+                self._stage_rows("_split_context", "id BIGINT, node_id TEXT", copied)
+                self.conn.execute("""
+                    INSERT INTO node_context (node_id, text, origin, created_at)
+                    SELECT s.node_id, c.text, c.origin, c.created_at
+                    FROM _split_context s JOIN node_context c ON c.id = s.id
+                    ORDER BY c.id
+                """)
+                self._stage_rows("_split_context", "id BIGINT, node_id TEXT", moved)
+                self.conn.execute("""
+                    UPDATE node_context SET node_id = s.node_id
+                    FROM _split_context s
+                    WHERE node_context.id = s.id
+                """)
+                self.conn.execute("DROP TABLE IF EXISTS _split_context")
+
+                # 5. Radera originalnoden, dess kanter och kontext som inte fördelats
+                self.conn.execute("DELETE FROM edges WHERE source = ?", [original_id])
+                self.conn.execute("DELETE FROM edges WHERE target = ?", [original_id])
+                self.conn.execute("DELETE FROM node_context WHERE node_id = ?", [original_id])
+                self.conn.execute("DELETE FROM nodes WHERE id = ?", [original_id])
+                edge_delta = self._incident_edge_counts([original_id] + created_nodes)
+                edge_delta.subtract(edges_before)
+                self._adjust_stats(nodes=Counter({orig_type: -1}), edges=edge_delta)
+                self._reindex_names([original_id] + created_nodes)
 
             LOGGER.info(f"Split {original_id} into {created_nodes}")
 
@@ -858,30 +3092,54 @@ class GraphService:
 
         with self._lock:
             # Kontrollera att noden finns
-            exists = self.conn.execute("SELECT 1 FROM nodes WHERE id = ?", [node_id]).fetchone()
+            exists = self.conn.execute("SELECT type FROM nodes WHERE id = ?", [node_id]).fetchone()
             if not exists:
                 LOGGER.warning(f"Recategorize failed: Node {node_id} not found")
                 return
 
-            self.conn.execute("UPDATE nodes SET type = ? WHERE id = ?", [new_type, node_id])
+            with self._transaction():
+                self.conn.execute("UPDATE nodes SET type = ? WHERE id = ?", [new_type, node_id])
+                node_delta = Counter({new_type: 1})
+                node_delta[exists[0]] -= 1
+                self._adjust_stats(nodes=node_delta)
+                self._reindex_names([node_id])
             LOGGER.info(f"Recategorized {node_id} -> {new_type}")
 
     def get_node_degree(self, node_id: str) -> int:
         """Returnerar antal unika relationer (exklusive inkommande från Unit-noder)."""
         with self._lock:
             # Vi räknar kopplingar mot andra entiteter/koncept för att mäta 'viktighet'
+            adjacency = self._cached_adjacency()
+            if adjacency is not None:
+                return adjacency.degree(node_id, exclude_types=self.UNIT_EDGE_TYPES)
+            # Två indexuppslag (se EDGE OPERATIONS); self-loops räknas en gång
             res = self.conn.execute("""
-                SELECT count(*) FROM edges
-                WHERE (source = ? OR target = ?)
-                AND edge_type NOT IN ('UNIT_MENTIONS', 'DEALS_WITH')
-            """, [node_id, node_id]).fetchone()
+                WITH outgoing AS MATERIALIZED (
+                    SELECT edge_type FROM edges WHERE source = ?
+                ),
+                incoming AS MATERIALIZED (
+                    SELECT source, edge_type FROM edges WHERE target = ?
+                )
+                SELECT count(*) FROM (
+                    SELECT edge_type FROM outgoing
+                    UNION ALL
+                    SELECT edge_type FROM incoming WHERE source <> ?
+                )
+                WHERE edge_type NOT IN ('UNIT_MENTIONS', 'DEALS_WITH')
+            """, [node_id, node_id, node_id]).fetchone()
             return res[0] if res else 0
 
     def get_related_unit_ids(self, node_id: str) -> list:
         """Hämtar alla Unit-IDs (filer) som refererar till denna nod."""
         with self._lock:
+            adjacency = self._cached_adjacency()
+            if adjacency is not None:
+                return adjacency.neighbors(node_id, direction="in", edge_types=self.UNIT_EDGE_TYPES)
             rows = self.conn.execute("""
-                SELECT DISTINCT source FROM edges
-                WHERE target = ? AND edge_type IN ('UNIT_MENTIONS', 'DEALS_WITH')
+                WITH incoming AS MATERIALIZED (
+                    SELECT source, edge_type FROM edges WHERE target = ?
+                )
+                SELECT DISTINCT source FROM incoming
+                WHERE edge_type IN ('UNIT_MENTIONS', 'DEALS_WITH')
             """, [node_id]).fetchall()
             return [r[0] for r in rows]
@@ -0,0 +1,202 @@
+"""
+GraphSnapshot - Publicerade läskopior (generationer) av grafdatabasen.
+
+DuckDB tillåter bara en skrivande process, och ingestion/Dreamer/rebuild
+håller grafen länge. Läsare (MCP-servern, export) läser därför en
+publicerad kopia i stället för den levande filen.
+
+Princip:
+1. Skrivaren publicerar efter varje commit-batch: CHECKPOINT (allt i
+   huvudfilen, tom WAL), kopia till en temporär fil i snapshot-mappen och
+   atomisk os.replace till gen_<N>.duckdb. En generation syns alltså
+   först när den är komplett. Kopian är hela filen, så skrivare som
+   committar ofta (realtidsingestion) samlar publiceringarna med
+   SnapshotScheduler: högst en per min_interval sekunder.
+2. Läsare öppnar den senaste generationen read-only och byter lat när en
+   nyare publicerats (se GraphPool). Ingen låsning mot skrivaren behövs.
+3. De SNAPSHOT_KEEP senaste generationerna behålls. Äldre tas bort; en
+   läsare som fortfarande har en borttagen fil öppen påverkas inte (POSIX).
+
+Layout:
+    <graph_db>.snapshots/gen_00000042.duckdb
+
+Användning:
+    from services.utils.graph_snapshot import publish_snapshot, latest_snapshot
+
+    publish_snapshot(graph)              # skrivaren, efter commit
+    gen, path = latest_snapshot(GRAPH_PATH)
+
+    scheduler = SnapshotScheduler(publish_fn, min_interval=30)
+    scheduler.mark_dirty()               # efter varje commit, publicerar i bakgrunden
+    scheduler.flush()                    # vid avslut
+
+Config (my_mem_config.yaml):
+    graph_snapshot:
+      min_interval_s: 30           # minsta tid mellan publiceringar (ingestion)
+      publish_per_document: false  # true: publicera direkt efter varje dokument
+"""
+
+import os
+import re
+import shutil
+import logging
+import threading
+import time
+
+LOGGER = logging.getLogger('GraphSnapshot')
+
+SNAPSHOT_KEEP = 3
+DEFAULT_SNAPSHOT_CONFIG = {
+    "min_interval_s": 30,
+    "publish_per_document": False,
+}
+_GENERATION_RE = re.compile(r"^gen_(\d+)\.duckdb$")
+
+
+def snapshot_config(config: dict) -> dict:
+    """graph_snapshot-sektionen med defaults."""
+    return {**DEFAULT_SNAPSHOT_CONFIG, **(config.get('graph_snapshot') or {})}
+
+
+def snapshot_dir(db_path: str) -> str:
+    """Mapp för publicerade generationer av en graf-db."""
+    return f"{os.path.abspath(db_path)}.snapshots"
+
+
+def list_snapshots(db_path: str) -> list[tuple[int, str]]:
+    """Alla publicerade generationer som (generation, sökväg), äldst först."""
+    directory = snapshot_dir(db_path)
+    try:
+        entries = os.scandir(directory)
+    except FileNotFoundError:
+        return []
+
+    snapshots = []
+    with entries:
+        for entry in entries:
+            match = _GENERATION_RE.match(entry.name)
+            if match:
+                snapshots.append((int(match.group(1)), entry.path))
+    snapshots.sort()
+    return snapshots
+
+
+def latest_snapshot(db_path: str) -> tuple[int, str] | None:
+    """Senaste generationen som (generation, sökväg), eller None om ingen publicerats."""
+    snapshots = list_snapshots(db_path)
+    return snapshots[-1] if snapshots else None
+
+
+def publish_snapshot(graph, keep: int = SNAPSHOT_KEEP) -> int:
+    """
+    Publicera en konsistent läskopia av grafen som ny generation.
+
+    Ska anropas av skrivaren efter en commit (inga öppna transaktioner).
+
+    Args:
+        graph: Skrivbar GraphService
+        keep: Antal generationer att behålla
+
+    Returns:
+        Den publicerade generationens nummer
+    """
+    if graph.read_only:
+        raise RuntimeError("HARDFAIL: publish_snapshot kräver en skrivbar GraphService")
+
+    directory = snapshot_dir(graph.db_path)
+    os.makedirs(directory, exist_ok=True)
+
+    with graph._lock:
+        if graph._tx_depth > 0:
+            raise RuntimeError("HARDFAIL: publish_snapshot anropad inne i en transaktion")
+
+        latest = latest_snapshot(graph.db_path)
+        generation = latest[0] + 1 if latest else 1
+        final_path = os.path.join(directory, f"gen_{generation:08d}.duckdb")
+        tmp_path = os.path.join(directory, f".gen_{generation:08d}.{os.getpid()}.tmp")
+
+        # Allt till huvudfilen, sedan kopia medan låset hindrar nya skrivningar
+        graph.conn.execute("CHECKPOINT")
+        try:
+            shutil.copyfile(graph.db_path, tmp_path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    # Atomiskt: läsare ser antingen ingen eller en komplett generation
+    os.replace(tmp_path, final_path)
+    LOGGER.info(f"Snapshot publicerad: generation {generation} ({final_path})")
+
+    for old_generation, old_path in list_snapshots(graph.db_path)[:-keep]:
+        try:
+            os.remove(old_path)
+        except OSError as e:
+            LOGGER.warning(f"Kunde inte ta bort snapshot {old_generation}: {e}")
+
+    return generation
+
+
+class SnapshotScheduler:
+    """
+    Samlar publiceringar från en skrivare som committar ofta.
+
+    mark_dirty() anropas efter varje commit. publish_fn körs i en
+    bakgrundstråd, tidigast min_interval sekunder efter förra publiceringen,
+    så en skur av commits ger en publicering. publish_fn ansvarar själv för
+    låsning och anslutning (skrivarens anslutning kan vara stängd när den körs).
+    Ett misslyckat försök loggas och görs om efter min_interval.
+    """
+
+    def __init__(self, publish_fn, min_interval: float = DEFAULT_SNAPSHOT_CONFIG["min_interval_s"]):
+        """
+        Args:
+            publish_fn: Funktion utan argument som publicerar en generation
+            min_interval: Minsta antal sekunder mellan två publiceringar
+        """
+        self.publish_fn = publish_fn
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._publishing = threading.Lock()  # En publicering i taget (timer och flush)
+        self._timer = None
+        self._dirty = False
+        self._last_publish = float("-inf")
+
+    def mark_dirty(self):
+        """Grafen har skrivits: schemalägg en publicering om ingen väntar."""
+        with self._lock:
+            self._dirty = True
+            self._schedule_locked()
+
+    def flush(self):
+        """Publicera direkt om en publicering väntar och vänta in en pågående (t.ex. vid avslut)."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        self._run()
+
+    def _schedule_locked(self):
+        if self._timer is not None:
+            return
+        delay = max(0.0, self._last_publish + self.min_interval - time.monotonic())
+        self._timer = threading.Timer(delay, self._run)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _run(self):
+        with self._publishing:
+            with self._lock:
+                self._timer = None
+                if not self._dirty:
+                    return
+                # Commits under publiceringen schemalägger nästa, min_interval härifrån
+                self._dirty = False
+                self._last_publish = time.monotonic()
+            try:
+                self.publish_fn()
+            except Exception as e:
+                LOGGER.warning(f"Snapshot-publicering misslyckades, försöker igen om {self.min_interval} s: {e}")
+                with self._lock:
+                    self._dirty = True
+                    self._schedule_locked()
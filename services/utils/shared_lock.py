@@ -126,7 +126,6 @@ def resource_lock(resource: str, exclusive: bool = True, timeout: Optional[float
                     # Expected when lock is held - retry until timeout
                     elapsed = time.monotonic() - start_time
                     if elapsed >= timeout:
-                        lock_file.close()
                         raise TimeoutError(
                             f"Could not acquire {lock_type_str} lock on {resource} "
                             f"within {timeout}s"
@@ -137,7 +136,12 @@ def resource_lock(resource: str, exclusive: bool = True, timeout: Optional[float
             LOGGER.debug(f"Waiting for {lock_type_str} lock on {resource}...")
             fcntl.flock(lock_file, lock_type)
             LOGGER.debug(f"Acquired {lock_type_str} lock on {resource}")
+    except BaseException:
+        # Lock never acquired - nothing to release
+        lock_file.close()
+        raise
 
+    try:
         yield
 
     finally:
@@ -0,0 +1,231 @@
+"""
+UsageAccumulator - Buffrad registrering av nodanvändning (Relevans).
+
+Läsvägar (MCP-verktyg, svar) ska inte skriva i grafen. Träffar samlas i
+minnet per nod (antal + senaste tidpunkt) och lämnas periodiskt, eller när
+bufferten når max_pending noder, över till en skrivare som applicerar dem
+som EN set-baserad UPDATE (GraphService.register_usage_bulk).
+
+Princip:
+1. record() är billig: bara en dict-uppdatering under ett trådlås.
+2. Flush sker i en bakgrundstråd (aldrig på anroparens tråd vid tröskel).
+3. Misslyckas en flush läggs träffarna tillbaka och skrivs vid nästa försök.
+4. Läsare som inte får skriva i grafen (MCP-servern) flushar till en
+   spool: en JSON-fil per flush i <graph_db>.usage/, skriven till en
+   temporär fil och atomiskt omdöpt. Ingen graflåsning behövs. En
+   befintlig skrivare (dreamer_daemon) tömmer spoolen med
+   drain_usage_spool under sitt exklusiva lås.
+
+Användning:
+    from services.utils.usage_accumulator import UsageAccumulator, spool_usage, drain_usage_spool
+
+    usage = UsageAccumulator(lambda batch: spool_usage(GRAPH_PATH, batch))
+    usage.record([node_id])
+
+    drain_usage_spool(graph)             # skrivaren, skrivbar GraphService
+"""
+
+import atexit
+import json
+import logging
+import os
+import re
+import threading
+import time
+from datetime import datetime
+
+LOGGER = logging.getLogger('UsageAccumulator')
+
+
+class UsageAccumulator:
+    """Trådsäker buffert som slår ihop användning per nod innan den skrivs."""
+
+    def __init__(self, flush_fn, flush_interval: float = 30.0, max_pending: int = 500):
+        """
+        Args:
+            flush_fn: Tar dict node_id -> (antal, senaste ISO-tid) och skriver den
+            flush_interval: Sekunder mellan periodiska flushar
+            max_pending: Antal noder i bufferten som triggar flush direkt
+        """
+        self.flush_fn = flush_fn
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+
+        self._pending: dict[str, tuple[int, str]] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = False
+        self._thread: threading.Thread | None = None
+
+    def _merge(self, node_id: str, hits: int, ts: str):
+        """Slå ihop träffar för en nod (anroparen håller self._lock)."""
+        prev = self._pending.get(node_id)
+        if prev is None:
+            self._pending[node_id] = (hits, ts)
+        else:
+            self._pending[node_id] = (prev[0] + hits, max(prev[1], ts))
+
+    def _run(self):
+        """Bakgrundstråd: flusha periodiskt eller när tröskeln nåtts."""
+        while not self._stopped:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                LOGGER.warning(f"UsageAccumulator: flush misslyckades, försöker igen senare: {e}")
+
+    def _ensure_thread(self):
+        """Starta flush-tråden vid första record (anroparen håller self._lock)."""
+        if self._thread is None and not self._stopped:
+            self._thread = threading.Thread(target=self._run, name="UsageFlusher", daemon=True)
+            self._thread.start()
+            atexit.register(self.close)
+
+    # --- PUBLIC API ---
+
+    def record(self, node_ids: list):
+        """Registrera att noder användes nu (skrivs vid nästa flush)."""
+        if not node_ids:
+            return
+        now_ts = datetime.now().isoformat()
+        with self._lock:
+            for node_id in node_ids:
+                if node_id:
+                    self._merge(node_id, 1, now_ts)
+            self._ensure_thread()
+            if len(self._pending) >= self.max_pending:
+                self._wakeup.set()
+
+    def pending(self) -> int:
+        """Antal noder som väntar på flush."""
+        with self._lock:
+            return len(self._pending)
+
+    def flush(self) -> int:
+        """
+        Skriv buffrad användning med flush_fn.
+
+        Vid fel läggs batchen tillbaka i bufferten och felet kastas vidare.
+
+        Returns:
+            Antal noder som skrevs
+        """
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+            if not batch:
+                return 0
+            try:
+                self.flush_fn(batch)
+            except BaseException:
+                with self._lock:
+                    for node_id, (hits, ts) in batch.items():
+                        self._merge(node_id, hits, ts)
+                raise
+            LOGGER.debug(f"UsageAccumulator: flushade {len(batch)} noder")
+            return len(batch)
+
+    def close(self):
+        """Stoppa bakgrundstråden och gör ett sista flush-försök."""
+        self._stopped = True
+        self._wakeup.set()
+        try:
+            self.flush()
+        except Exception as e:
+            LOGGER.warning(f"UsageAccumulator: {self.pending()} noders användning gick förlorad: {e}")
+
+
+# --- SPOOL ---
+
+_SPOOL_RE = re.compile(r"^usage_\d+_\d+\.json$")
+
+
+def usage_spool_dir(db_path: str) -> str:
+    """Mapp för spoolad användning till en graf-db."""
+    return f"{os.path.abspath(db_path)}.usage"
+
+
+def list_usage_spool(db_path: str) -> list[str]:
+    """Kompletta spool-filer, äldst först (temporära filer ignoreras)."""
+    directory = usage_spool_dir(db_path)
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return []
+    return [os.path.join(directory, name) for name in sorted(names) if _SPOOL_RE.match(name)]
+
+
+def spool_usage(db_path: str, batch: dict) -> str:
+    """
+    Skriv en batch (node_id -> (antal, senaste ISO-tid)) till spoolen.
+
+    Filen syns för drain_usage_spool först när den är komplett (os.replace).
+
+    Returns:
+        Sökväg till spool-filen
+    """
+    directory = usage_spool_dir(db_path)
+    os.makedirs(directory, exist_ok=True)
+    name = f"usage_{time.time_ns():020d}_{os.getpid()}"
+    tmp_path = os.path.join(directory, f".{name}.tmp")
+    final_path = os.path.join(directory, f"{name}.json")
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({node_id: [hits, ts] for node_id, (hits, ts) in batch.items()}, f, ensure_ascii=False)
+        os.replace(tmp_path, final_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return final_path
+
+
+def drain_usage_spool(graph) -> int:
+    """
+    Applicera all spoolad användning på grafen och ta bort spool-filerna.
+
+    Alla filer slås ihop till en batch och skrivs med EN register_usage_bulk.
+    Filerna tas bort först efter commit; misslyckas skrivningen ligger de
+    kvar till nästa försök. Trasiga filer döps om till .bad och hoppas över.
+
+    Args:
+        graph: Skrivbar GraphService (anroparen håller skrivarlåset)
+
+    Returns:
+        Antal noder som skrevs
+    """
+    if graph.read_only:
+        raise RuntimeError("HARDFAIL: drain_usage_spool kräver en skrivbar GraphService")
+
+    paths = list_usage_spool(graph.db_path)
+    if not paths:
+        return 0
+
+    usage: dict[str, tuple[int, str]] = {}
+    drained = []
+    for path in paths:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                batch = json.load(f)
+            rows = [(node_id, int(hits), str(ts)) for node_id, (hits, ts) in batch.items()]
+        except FileNotFoundError:
+            continue
+        except (ValueError, TypeError, AttributeError) as e:
+            LOGGER.warning(f"UsageAccumulator: trasig spool-fil {path} hoppas över: {e}")
+            os.replace(path, path + ".bad")
+            continue
+        for node_id, hits, ts in rows:
+            prev = usage.get(node_id)
+            usage[node_id] = (hits, ts) if prev is None else (prev[0] + hits, max(prev[1], ts))
+        drained.append(path)
+
+    written = graph.register_usage_bulk(usage)
+    for path in drained:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+    LOGGER.info(f"UsageAccumulator: tömde {len(drained)} spool-filer ({written} noder)")
+    return written
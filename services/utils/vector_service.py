@@ -7,6 +7,7 @@ Implementerar Multiton-mönster för att hantera olika collections.
 """
 
 import os
+import json
 import yaml
 import logging
 import threading
@@ -26,11 +27,124 @@ tqdm.auto.tqdm.__init__ = _silent_tqdm_init
 # --- NY KOD SLUT ---
 
 import chromadb
-from chromadb.utils import embedding_functions
+import numpy as np
+from chromadb.api.types import Documents, EmbeddingFunction, Embeddings
+from chromadb.utils.embedding_functions.schemas import validate_config_schema
 from typing import List, Dict, Any, Optional
 
+from services.utils.embedding_backends import backend_settings, create_embedding_function, embedding_id
+from services.utils.embedding_cache import EmbeddingCache, text_hash
+from services.utils.embedding_server import EmbeddingClient, server_config
+
 LOGGER = logging.getLogger("VectorService")
 
+# Antal texter per embedding-anrop/Chroma-anrop (ai_engine.embedding_batch_size)
+DEFAULT_EMBEDDING_BATCH_SIZE = 64
+# Max antal vektorer i embedding-cachen (ai_engine.embedding_cache_size, 0 = av)
+DEFAULT_EMBEDDING_CACHE_SIZE = 100000
+# Metadata-nyckel med hash av (modell, text, metadata) för oförändrade dokument
+CONTENT_HASH_KEY = "content_hash"
+# Lake-dokument: allt utom grafnoder ($ne matchar även poster utan 'source')
+DOCUMENTS_ONLY = {"source": {"$ne": "graph_node"}}
+# Chunkning av Lake-dokument (vector_chunking i my_mem_config.yaml)
+DEFAULT_CHUNKING = {
+    "enabled": True,
+    "chunk_size": 2000,       # tecken per chunk
+    "overlap": 200,           # tecken som upprepas mellan chunkar
+    "search_oversample": 5,   # chunkar per önskat dokument i search_documents
+}
+# Dokumenttext utan chunkning (tidigare beteende: bara början indexeras)
+UNCHUNKED_MAX_CHARS = 8000
+
+
+def chunk_text(text: str, chunk_size: int, overlap: int) -> List[tuple]:
+    """
+    Dela text i överlappande chunkar [(offset, text)].
+
+    Klipper helst vid radbrytning (annars mellanslag) i chunkens andra
+    halva, så att stycken och ord hålls ihop.
+    """
+    if len(text) <= chunk_size:
+        return [(0, text)]
+    chunks = []
+    start = 0
+    while start < len(text):
+        end = min(start + chunk_size, len(text))
+        if end < len(text):
+            lo = start + chunk_size // 2
+            cut = text.rfind("\n", lo, end)
+            if cut == -1:
+                cut = text.rfind(" ", lo, end)
+            if cut != -1:
+                end = cut + 1
+        chunks.append((start, text[start:end]))
+        if end >= len(text):
+            break
+        start = max(end - overlap, start + 1)
+    return chunks
+
+
+class SharedEmbeddingFunction(EmbeddingFunction):
+    """
+    Embedding via den delade embedding-servern när den körs, annars via en
+    lokal modell (vald backend, se embedding_backends) som laddas först när
+    den behövs. En process som bara läser (count, get) eller har servern
+    laddar alltså aldrig modellen.
+    """
+
+    def __init__(self, settings: Dict[str, Any], client: Optional[EmbeddingClient] = None):
+        self.settings = settings
+        self.model_name = settings['model_name']
+        self.client = client
+        self._local = None
+        self._local_lock = threading.Lock()
+
+    @staticmethod
+    def name() -> str:
+        # Chroma >= 1.0 jämför namnet mot collectionens sparade embedding-
+        # funktion. Befintliga knowledge_base skapades med Chromas
+        # SentenceTransformerEmbeddingFunction, och torch-vägen ger samma vektorer.
+        return "sentence_transformer"
+
+    def get_config(self) -> Dict[str, Any]:
+        # Samma sparade config som SentenceTransformerEmbeddingFunction (utan
+        # normalisering), så att collectionen kan öppnas även utan VectorService.
+        # Backend och server är körval: vektorerna är desamma.
+        return {"model_name": self.model_name, "device": "cpu", "normalize_embeddings": False, "kwargs": {}}
+
+    @staticmethod
+    def build_from_config(config: Dict[str, Any]) -> "SharedEmbeddingFunction":
+        """Återskapa från en sparad collection-config: lokal modell, standard-backend."""
+        if config.get("normalize_embeddings") or config.get("kwargs"):
+            raise RuntimeError(
+                f"HARDFAIL: Collection-config {config} kräver andra vektorer än SharedEmbeddingFunction ger"
+            )
+        models = {"embedding_model": config["model_name"]}
+        return SharedEmbeddingFunction(backend_settings({"ai_engine": {"models": models}}))
+
+    @staticmethod
+    def validate_config(config: Dict[str, Any]) -> None:
+        validate_config_schema(config, "sentence_transformer")
+
+    def __call__(self, input: Documents) -> Embeddings:
+        if self.client is not None:
+            vectors = self.client.embed(list(input))
+            if vectors is not None:
+                return list(vectors)
+        return self._local_function()(input)
+
+    def _local_function(self):
+        with self._local_lock:
+            if self._local is None:
+                LOGGER.info(f"Laddar embedding-modell lokalt: {self.model_name} ({self.settings['backend']})")
+                try:
+                    self._local = create_embedding_function(self.settings)
+                except Exception as e:
+                    LOGGER.error(f"HARDFAIL: Kunde inte ladda embedding-modell {self.model_name}: {e}")
+                    raise RuntimeError(f"Kunde inte ladda embedding-modell: {e}") from e
+            return self._local
+
+
 class VectorService:
     _instances = {}
     _lock = threading.Lock()
@@ -51,19 +165,39 @@ class VectorService:
         os.makedirs(self.db_path, exist_ok=True)
         self.client = chromadb.PersistentClient(path=self.db_path)
         
-        # MODEL SELECTION - Läser från ai_engine.models.embedding_model
-        model_name = self.config.get('ai_engine', {}).get('models', {}).get(
-            'embedding_model',
-            "paraphrase-multilingual-MiniLM-L12-v2"  # Fallback om config saknas
-        )
-        LOGGER.info(f"Using embedding model: {model_name}")
+        # MODEL SELECTION - Läser från ai_engine.models.embedding_model / embedding_backend
+        backend = backend_settings(self.config)
+        model_name = backend['model_name']
+        LOGGER.info(f"Using embedding model: {model_name} (backend: {backend['backend']})")
         self.model_name = model_name
+        self.embedding_backend = backend['backend']
+        # Nyckel för vektorerna i cache, content_hash och server (backends blandas inte)
+        self.embedding_id = embedding_id(model_name, backend['backend'])
+        self.batch_size = int(self.config.get('ai_engine', {}).get(
+            'embedding_batch_size', DEFAULT_EMBEDDING_BATCH_SIZE
+        ))
+        self.chunking = {**DEFAULT_CHUNKING, **(self.config.get('vector_chunking') or {})}
+        if self.chunking['enabled'] and not 0 <= self.chunking['overlap'] < self.chunking['chunk_size']:
+            raise RuntimeError(
+                f"HARDFAIL: vector_chunking.overlap ({self.chunking['overlap']}) måste vara "
+                f"mindre än chunk_size ({self.chunking['chunk_size']})"
+            )
         
-        try:
-            self.embedding_func = embedding_functions.SentenceTransformerEmbeddingFunction(model_name=model_name)
-        except Exception as e:
-            LOGGER.error(f"HARDFAIL: Kunde inte ladda embedding-modell {model_name}: {e}")
-            raise RuntimeError(f"Kunde inte ladda embedding-modell: {e}") from e
+        # Delad embedding-server om den körs, annars lokal modell (laddas lat)
+        server = server_config(self.config)
+        client = EmbeddingClient(server['socket'], self.embedding_id) if server['enabled'] else None
+        self.embedding_func = SharedEmbeddingFunction(backend, client)
+
+        # Embedding-cache per (modell, sha256(text)), delas av alla collections och processer
+        cache_size = int(self.config.get('ai_engine', {}).get(
+            'embedding_cache_size', DEFAULT_EMBEDDING_CACHE_SIZE
+        ))
+        self.embedding_cache = None
+        if cache_size > 0:
+            cache_path = os.path.expanduser(
+                paths.get('embedding_cache') or f"{os.path.normpath(self.db_path)}.embedding_cache.sqlite"
+            )
+            self.embedding_cache = EmbeddingCache(cache_path, self.embedding_id, max_entries=cache_size)
         
         # Get/Create Collection
         try:
@@ -97,13 +231,81 @@ class VectorService:
 
     def upsert(self, id: str, text: str, metadata: Dict[str, Any] = None):
         if not text: return
-        self.collection.upsert(ids=[id], documents=[text], metadatas=[metadata or {}])
+        self.upsert_many([id], [text], [metadata])
 
-    def upsert_node(self, node: Dict):
-        if not node: return
+    def upsert_many(self, ids: List[str], texts: List[str], metadatas: List[Dict[str, Any]] = None,
+                    batch_size: int = None) -> int:
+        """
+        Upserta många dokument i batchar.
+
+        Varje batch om batch_size texter embeddas med ETT modellanrop och skrivs
+        med ETT Chroma-anrop (i stället för en rundresa per dokument).
+        Dokument vars lagrade content_hash är oförändrad hoppas över helt
+        (ingen embedding, ingen skrivning); övriga embeddas via cachen.
+        Tomma texter hoppas över. Dubblett-ID:n: sista förekomsten vinner.
+
+        Returns:
+            Antal skrivna dokument
+        """
+        metadatas = metadatas if metadatas is not None else [None] * len(ids)
+        if not len(ids) == len(texts) == len(metadatas):
+            raise RuntimeError(
+                f"HARDFAIL: upsert_many fick {len(ids)} ids, {len(texts)} texter, {len(metadatas)} metadata"
+            )
+        # Chroma avvisar dubbletter inom samma anrop
+        items = {doc_id: (text, metadata or {}) for doc_id, text, metadata in zip(ids, texts, metadatas) if text}
+        batch = list(items.items())
+        size = batch_size or self.batch_size
+        written = 0
+        for start in range(0, len(batch), size):
+            chunk = [
+                (doc_id, text, {**metadata, CONTENT_HASH_KEY: self._content_hash(text, metadata)})
+                for doc_id, (text, metadata) in batch[start:start + size]
+            ]
+            stored = self.collection.get(ids=[doc_id for doc_id, _, _ in chunk], include=["metadatas"])
+            stored_hashes = {
+                doc_id: (metadata or {}).get(CONTENT_HASH_KEY)
+                for doc_id, metadata in zip(stored['ids'], stored['metadatas'] or [])
+            }
+            chunk = [item for item in chunk if stored_hashes.get(item[0]) != item[2][CONTENT_HASH_KEY]]
+            if not chunk:
+                continue
+            self.collection.upsert(
+                ids=[doc_id for doc_id, _, _ in chunk],
+                documents=[text for _, text, _ in chunk],
+                metadatas=[metadata for _, _, metadata in chunk],
+                embeddings=self._embed([text for _, text, _ in chunk])
+            )
+            written += len(chunk)
+        return written
+
+    def _content_hash(self, text: str, metadata: Dict[str, Any]) -> str:
+        """Hash av (modell, text, metadata) - lika hash betyder att dokumentet inte behöver skrivas om."""
+        return text_hash(f"{self.embedding_id}\n{json.dumps(metadata, sort_keys=True, default=str)}\n{text}")
+
+    def _embed(self, texts: List[str]) -> List[List[float]]:
+        """Embeddings för texter. Cache-träffar läses; bara missar går till modellen (ETT anrop)."""
+        if self.embedding_cache is None:
+            return [np.asarray(vec, dtype=np.float32).tolist() for vec in self.embedding_func(texts)]
+
+        hashes = [text_hash(text) for text in texts]
+        vectors = self.embedding_cache.get_many(hashes)
+        missing = list(dict.fromkeys(text for text, h in zip(texts, hashes) if h not in vectors))
+        if missing:
+            new = {
+                text_hash(text): np.asarray(vec, dtype=np.float32)
+                for text, vec in zip(missing, self.embedding_func(missing))
+            }
+            self.embedding_cache.put_many(new)
+            vectors.update(new)
+        return [vectors[h].tolist() for h in hashes]
+
+    def _node_document(self, node: Dict) -> Optional[tuple]:
+        """(id, text, metadata) för en grafnod, eller None om noden saknar namn."""
+        if not node: return None
         node_id = node.get('id')
         name = node.get('properties', {}).get('name', '')
-        if not name: return
+        if not name: return None
 
         parts = [f"Name: {name}", f"Type: {node.get('type')}"]
         props = node.get('properties', {})
@@ -117,34 +319,178 @@ class VectorService:
                     parts.append(f"Context: {' | '.join(ctx_texts)}")
             
         full_text = ". ".join(parts)
-        self.upsert(id=node_id, text=full_text, metadata={
+        return node_id, full_text, {
             "type": node.get('type'),
             "name": name,
             "source": "graph_node"
-        })
+        }
+
+    def upsert_node(self, node: Dict):
+        self.upsert_nodes([node])
+
+    def upsert_nodes(self, nodes: List[Dict], batch_size: int = None) -> int:
+        """Upserta många grafnoder i batchar (se upsert_many). Noder utan namn hoppas över."""
+        docs = [doc for doc in map(self._node_document, nodes) if doc]
+        if not docs: return 0
+        ids, texts, metadatas = zip(*docs)
+        return self.upsert_many(list(ids), list(texts), list(metadatas), batch_size=batch_size)
 
     def search(self, query_text: str, limit: int = 5, where: Dict = None) -> List[Dict]:
         if not query_text: return []
-        results = self.collection.query(query_texts=[query_text], n_results=limit, where=where)
-        formatted = []
-        if not results['ids']: return []
-        
-        ids = results['ids'][0]
-        distances = results['distances'][0] if results['distances'] else [0.0]*len(ids)
-        metadatas = results['metadatas'][0] if results['metadatas'] else [{}]*len(ids)
-        documents = results['documents'][0] if results['documents'] else [""]*len(ids)
+        return self.search_many([query_text], limit=limit, where=where)[0]
+
+    def search_many(self, queries: List[str], limit: int = 5, where: Dict = None,
+                    batch_size: int = None) -> List[List[Dict]]:
+        """
+        Sök med många frågor i batchar (ETT Chroma-anrop per batch).
+        Frågevektorerna går via embedding-cachen (Dreamer söker samma
+        kandidattexter varje cykel).
+
+        Returns:
+            En resultatlista per fråga, i samma ordning som queries
+            (tom lista för tomma frågor).
+        """
+        formatted = [[] for _ in queries]
+        positions = [i for i, query in enumerate(queries) if query]
+        size = batch_size or self.batch_size
+        for start in range(0, len(positions), size):
+            chunk = positions[start:start + size]
+            results = self.collection.query(
+                query_embeddings=self._embed([queries[i] for i in chunk]), n_results=limit, where=where
+            )
+            for row, i in enumerate(chunk):
+                formatted[i] = self._format_results(results, row)
+        return formatted
+
+    @staticmethod
+    def _format_results(results: Dict, row: int) -> List[Dict]:
+        """Platta ut rad `row` i ett Chroma query-svar till [{id, distance, metadata, document}]."""
+        if not results['ids'] or row >= len(results['ids']): return []
+
+        ids = results['ids'][row]
+        distances = results['distances'][row] if results['distances'] else [0.0]*len(ids)
+        metadatas = results['metadatas'][row] if results['metadatas'] else [{}]*len(ids)
+        documents = results['documents'][row] if results['documents'] else [""]*len(ids)
         
-        for i in range(len(ids)):
-            formatted.append({
+        return [
+            {
                 "id": ids[i],
                 "distance": distances[i],
                 "metadata": metadatas[i],
                 "document": documents[i]
-            })
-        return formatted
+            }
+            for i in range(len(ids))
+        ]
+
+    # --- DOKUMENT (LAKE) ---
+
+    def upsert_documents(self, ids: List[str], headers: List[str], bodies: List[str],
+                         metadatas: List[Dict[str, Any]] = None, batch_size: int = None) -> int:
+        """
+        Indexera Lake-dokument.
+
+        Med vector_chunking.enabled delas body i överlappande chunkar
+        (id "<unit_id>#<n>"), var och en med header som prefix. Metadata får
+        parent_unit_id, chunk_index, chunk_count och chunk_offset
+        (teckenposition i body, dvs. Lake-filen efter frontmatter).
+        Utan chunkning indexeras header + body[:UNCHUNKED_MAX_CHARS] som
+        ett dokument (tidigare beteende).
+
+        Alla dokumentens chunkar embeddas i batchar via upsert_many. Chunkar
+        från en tidigare version av dokumentet (fler chunkar eller annat
+        läge) tas bort.
+
+        Returns:
+            Antal skrivna vektorer
+        """
+        metadatas = metadatas if metadatas is not None else [None] * len(ids)
+        if not len(ids) == len(headers) == len(bodies) == len(metadatas):
+            raise RuntimeError(
+                f"HARDFAIL: upsert_documents fick {len(ids)} ids, {len(headers)} headers, "
+                f"{len(bodies)} texter, {len(metadatas)} metadata"
+            )
+        chunked = self.chunking['enabled']
+        chunk_ids, texts, chunk_metadatas = [], [], []
+        for unit_id, header, body, metadata in zip(ids, headers, bodies, metadatas):
+            if chunked:
+                pieces = chunk_text(body, self.chunking['chunk_size'], self.chunking['overlap'])
+            else:
+                pieces = [(0, body[:UNCHUNKED_MAX_CHARS])]
+            for index, (offset, piece) in enumerate(pieces):
+                chunk_ids.append(f"{unit_id}#{index}" if chunked else unit_id)
+                texts.append(f"{header}\n\nCONTENT:\n{piece}")
+                chunk_metadatas.append({
+                    **(metadata or {}),
+                    "parent_unit_id": unit_id,
+                    "chunk_index": index,
+                    "chunk_count": len(pieces),
+                    "chunk_offset": offset,
+                })
+
+        self._delete_stale_chunks(list(ids), set(chunk_ids))
+        return self.upsert_many(chunk_ids, texts, chunk_metadatas, batch_size=batch_size)
+
+    def _delete_stale_chunks(self, unit_ids: List[str], keep: set):
+        """Ta bort dokumentens vektorer som inte ingår i `keep` (gamla chunkar / gammalt läge)."""
+        if not unit_ids: return
+        existing = set(self.collection.get(where={"parent_unit_id": {"$in": unit_ids}}, include=[])['ids'])
+        # Odelade dokument från före chunkningen (id = unit_id, utan parent_unit_id).
+        # Grafnoder kan ha samma id (Document-noder) och ska vara kvar.
+        whole = self.collection.get(ids=unit_ids, include=["metadatas"])
+        existing.update(
+            doc_id for doc_id, metadata in zip(whole['ids'], whole['metadatas'] or [])
+            if (metadata or {}).get('source') != "graph_node"
+        )
+        stale = existing - keep
+        if stale:
+            self.collection.delete(ids=list(stale))
+
+    def search_documents(self, query_text: str, limit: int = 5, where: Dict = None) -> List[Dict]:
+        """
+        Sök Lake-dokument: bästa chunk per dokument, de `limit` bästa dokumenten.
+
+        Hämtar limit * search_oversample chunkar och aggregerar per
+        parent_unit_id. Grafnoder filtreras bort i Chroma (DOCUMENTS_ONLY,
+        kombinerat med `where`) så att de inte tränger undan dokument.
+        Resultatens id är dokumentets unit_id, chunk_id den matchade chunken
+        och metadata innehåller chunk_offset.
+        """
+        if not query_text: return []
+        oversample = int(self.chunking['search_oversample'])
+        where = {"$and": [where, DOCUMENTS_ONLY]} if where else DOCUMENTS_ONLY
+        hits = self.search_many([query_text], limit=limit * oversample, where=where)[0]
+        return self._best_chunk_per_parent(hits, limit)
+
+    @staticmethod
+    def _best_chunk_per_parent(hits: List[Dict], limit: int) -> List[Dict]:
+        """Top-k dokument efter bästa (lägsta) chunk-distans, aggregerat i NumPy."""
+        if not hits: return []
+        parents = np.array([(hit['metadata'] or {}).get('parent_unit_id') or hit['id'] for hit in hits])
+        distances = np.array([hit['distance'] for hit in hits], dtype=np.float64)
+
+        order = np.argsort(distances, kind='stable')
+        _, first = np.unique(parents[order], return_index=True)
+        best = order[first]
+        best = best[np.argsort(distances[best], kind='stable')][:limit]
+        return [{**hits[i], "id": str(parents[i]), "chunk_id": hits[i]['id']} for i in best]
+
+    def document_ids(self) -> set:
+        """unit_id för alla indexerade Lake-dokument (chunkade eller ej, utan grafnoder)."""
+        data = self.collection.get(include=["metadatas"])
+        return {
+            (metadata or {}).get('parent_unit_id') or doc_id
+            for doc_id, metadata in zip(data['ids'], data['metadatas'] or [])
+            if (metadata or {}).get('source') != "graph_node"
+        }
 
     def delete(self, id: str):
-        self.collection.delete(ids=[id])
+        self.delete_many([id])
+
+    def delete_many(self, ids: List[str]):
+        """Ta bort många dokument (och deras chunkar) med ETT Chroma-anrop per slag."""
+        if not ids: return
+        self.collection.delete(ids=list(ids))
+        self.collection.delete(where={"parent_unit_id": {"$in": list(ids)}})
 
     def count(self) -> int:
         return self.collection.count()
@@ -13,6 +13,7 @@ LOGGER = logging.getLogger('StartServices')
 
 # Import validering från tool_validate_system
 from tools.tool_validate_system import run_startup_checks
+from services.utils.embedding_server import server_config, wait_until_ready
 
 # Tjänsterna som ska startas (som moduler för korrekt PYTHONPATH)
 SERVICES = [
@@ -23,6 +24,11 @@ SERVICES = [
     # vector_indexer borttagen - vektor-skrivning sker nu i DocConverter
 ]
 
+# Delad embedding-modell; startas före auto_repair och övriga tjänster
+EMBEDDING_SERVER = {"module": "services.utils.embedding_server", "name": "Embedding Server"}
+# Max väntan på att embedding-servern laddat modellen
+EMBEDDING_SERVER_READY_TIMEOUT = 120.0
+
 processes = []
 
 def _ts():
@@ -58,13 +64,14 @@ def auto_repair(health_info):
             lake_id_set = set(lake_ids_dict.keys())
 
             vector_service = get_vector_service("knowledge_base")
-            coll = vector_service.collection
-            vector_ids = set(coll.get()['ids'])
+            vector_ids = vector_service.document_ids()
 
             missing = lake_id_set - vector_ids
             if missing:
                 print(f"{_ts()} 🔧 REPAIR: Indexerar {len(missing)} saknade filer i Vector...")
 
+                # Läs alla saknade filer först, embedda sedan i batchar (upsert_documents)
+                ids, headers, bodies, metadatas = [], [], [], []
                 for uid in missing:
                     filename = lake_ids_dict.get(uid, f"{uid}.md")
                     filepath = os.path.join(lake_store, filename)
@@ -84,16 +91,15 @@ def auto_repair(health_info):
                         ai_summary = metadata.get('ai_summary') or ""
                         timestamp = metadata.get('timestamp_ingestion') or ""
 
-                        full_doc = f"FILENAME: {filename}\nSUMMARY: {ai_summary}\n\nCONTENT:\n{text[:8000]}"
-
-                        coll.upsert(
-                            ids=[uid],
-                            documents=[full_doc],
-                            metadatas=[{"timestamp": timestamp, "filename": filename}]
-                        )
+                        ids.append(uid)
+                        headers.append(f"FILENAME: {filename}\nSUMMARY: {ai_summary}")
+                        bodies.append(text)
+                        metadatas.append({"timestamp": timestamp, "filename": filename})
                     except Exception as e:
-                        LOGGER.warning(f"Kunde inte indexera {filename}: {e}")
-                        print(f"{_ts()} ⚠️ Kunde inte indexera {filename}: {e}")
+                        LOGGER.warning(f"Kunde inte läsa {filename}: {e}")
+                        print(f"{_ts()} ⚠️ Kunde inte läsa {filename}: {e}")
+
+                vector_service.upsert_documents(ids, headers, bodies, metadatas)
 
                 print(f"{_ts()} ✅ REPAIR: Vector klar")
                 repaired = True
@@ -106,14 +112,38 @@ def auto_repair(health_info):
         print()
 
 
+def start_embedding_server(python_exec: str):
+    """Starta embedding-servern (om den inte redan kör) och vänta tills modellen är laddad."""
+    settings = server_config(_load_config() or {})
+    if not settings['enabled']:
+        return
+    if wait_until_ready(settings['socket'], timeout=0.1):
+        print(f"{_ts()} ✅ {EMBEDDING_SERVER['name']} kör redan")
+        return
+    try:
+        processes.append(subprocess.Popen([python_exec, "-m", EMBEDDING_SERVER['module']]))
+    except Exception as e:
+        LOGGER.error(f"Kunde inte starta {EMBEDDING_SERVER['name']}: {e}")
+        print(f"{_ts()} ❌ {EMBEDDING_SERVER['name']}: {e}")
+        return
+    if wait_until_ready(settings['socket'], timeout=EMBEDDING_SERVER_READY_TIMEOUT):
+        print(f"{_ts()} ✅ {EMBEDDING_SERVER['name']} redo")
+    else:
+        # Tjänsterna faller tillbaka till egen modell tills servern svarar
+        print(f"{_ts()} ⚠️ {EMBEDDING_SERVER['name']} svarade inte inom {EMBEDDING_SERVER_READY_TIMEOUT:.0f} s")
+
+
 def start_all():
     print(f"\n--- MyMem Services (v6.0) ---\n")
     
+    python_exec = sys.executable
+
+    # Embedding-servern först, så att auto_repair och tjänsterna delar dess modell
+    start_embedding_server(python_exec)
+
     # Kör validering (inkl. loggrensning) och auto-repair
     health_info = run_startup_checks()
     auto_repair(health_info)
-    
-    python_exec = sys.executable
 
     for service in SERVICES:
         module_name = service["module"]
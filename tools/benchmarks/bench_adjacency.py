@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+BENCHMARK: Traverseringar via SQL jämfört med CSR-cachen (GraphAdjacency).
+
+Jämför per anrop:
+- get_node_degree
+- get_related_unit_ids
+- get_subgraph (djup 2)
+
+samt byggtid och minne per kant för cachen. Resultaten kontrolleras mot SQL.
+
+Kör: python tools/benchmarks/bench_adjacency.py [--nodes 20000] [--edges 200000] [--queries 200]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from services.utils.graph_service import GraphService
+
+EDGE_TYPES = ["UNIT_MENTIONS", "DEALS_WITH", "WORKS_AT", "KNOWS", "PART_OF"]
+
+
+def build_graph(graph: GraphService, node_count: int, edge_count: int, seed: int = 42):
+    """Syntetisk graf: 10% Unit-noder, slumpade kanter med skev gradfördelning."""
+    rng = random.Random(seed)
+    units = node_count // 10
+    graph.upsert_nodes_bulk(
+        [{"id": f"u{i}", "type": "Unit"} for i in range(units)] +
+        [{"id": f"n{i}", "type": "Person"} for i in range(node_count - units)]
+    )
+    edges = []
+    for _ in range(edge_count):
+        target = f"n{int(rng.paretovariate(1.2)) % (node_count - units)}"
+        if rng.random() < 0.6:
+            edges.append({"source": f"u{rng.randrange(units)}", "target": target,
+                          "edge_type": rng.choice(EDGE_TYPES[:2])})
+        else:
+            edges.append({"source": f"n{rng.randrange(node_count - units)}", "target": target,
+                          "edge_type": rng.choice(EDGE_TYPES[2:])})
+    graph.upsert_edges_bulk(edges)
+
+
+def timed(fn, ids) -> tuple[list, float]:
+    """Kör fn per id; returnerar (resultat, median ms)."""
+    results, timings = [], []
+    for node_id in ids:
+        start = time.perf_counter()
+        results.append(fn(node_id))
+        timings.append((time.perf_counter() - start) * 1000)
+    return results, statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark: SQL vs CSR-cache för traverseringar")
+    parser.add_argument("--nodes", type=int, default=20000)
+    parser.add_argument("--edges", type=int, default=200000)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        graph = GraphService(os.path.join(tmp, "bench_graph.duckdb"))
+        build_graph(graph, args.nodes, args.edges)
+        ids = [f"n{i}" for i in random.Random(1).sample(range(args.nodes * 9 // 10), args.queries)]
+
+        start = time.perf_counter()
+        adjacency = graph.adjacency()
+        build_ms = (time.perf_counter() - start) * 1000
+        print(f"Cache: {len(adjacency)} noder, {adjacency.edge_count} kanter, byggd på {build_ms:.0f} ms, "
+              f"{adjacency.nbytes / adjacency.edge_count:.1f} byte/kant\n")
+
+        cases = (
+            ("get_node_degree", graph.get_node_degree, lambda r: r),
+            ("get_related_unit_ids", graph.get_related_unit_ids, sorted),
+            ("get_subgraph (djup 2)", lambda i: graph.get_subgraph([i], depth=2, limit=60),
+             lambda r: [(n["id"], n["depth"]) for n in r["nodes"]]),
+        )
+        for label, fn, normalize in cases:
+            graph.adjacency_cache = False
+            sql_results, sql_ms = timed(fn, ids)
+            graph.adjacency_cache = True
+            cached_results, cached_ms = timed(fn, ids)
+            assert [normalize(r) for r in sql_results] == [normalize(r) for r in cached_results], \
+                f"{label}: avvikande resultat"
+            print(f"{label:<24} SQL median {sql_ms:8.3f} ms | cache median {cached_ms:8.3f} ms")
+
+        graph.close()
+
+
+if __name__ == "__main__":
+    main()
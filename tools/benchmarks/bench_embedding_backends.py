@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+BENCHMARK: Embedding-backends torch mot onnx_int8 (CPU).
+
+Kör varje backend i en egen process (så att RSS inte blandas) och mäter:
+- laddtid för modellen
+- meningar/s vid indexering (batchar om --batch-size)
+- max RSS för processen
+- cosinus-överensstämmelse mellan backendarnas vektorer (min/medel)
+
+Utan --onnx-dir exporteras modellen först till en temporär katalog
+(tools/tool_export_onnx.py gör samma sak till den konfigurerade katalogen).
+
+Kör: python tools/benchmarks/bench_embedding_backends.py [--sentences 2000] [--batch-size 64] [--onnx-dir <katalog>]
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from services.utils.embedding_backends import (
+    AGREEMENT_SENTENCES, backend_settings, cosine_agreement, create_embedding_function, export_onnx,
+)
+
+MODEL = "paraphrase-multilingual-MiniLM-L12-v2"
+
+
+def corpus(count: int) -> list:
+    """Varierade meningar (referensmeningarna med numrerade varianter)."""
+    return [f"{AGREEMENT_SENTENCES[i % len(AGREEMENT_SENTENCES)]} (variant {i})" for i in range(count)]
+
+
+def max_rss_mb() -> float:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 1e6 if sys.platform == "darwin" else rss / 1e3  # byte på macOS, KB på Linux
+
+
+def child(backend: str, onnx_dir: str, sentences: int, batch_size: int, out_path: str):
+    """Mät en backend i denna process och skriv resultat + vektorer till out_path(.json/.npy)."""
+    settings = backend_settings({"ai_engine": {"models": {
+        "embedding_model": MODEL, "embedding_backend": backend, "embedding_onnx_dir": onnx_dir,
+    }}})
+    start = time.perf_counter()
+    embed = create_embedding_function(settings)
+    embed(["uppvärmning"])
+    load_s = time.perf_counter() - start
+
+    texts = corpus(sentences)
+    start = time.perf_counter()
+    vectors = []
+    for i in range(0, len(texts), batch_size):
+        vectors.extend(embed(texts[i:i + batch_size]))
+    encode_s = time.perf_counter() - start
+
+    np.save(f"{out_path}.npy", np.asarray(vectors, dtype=np.float32))
+    with open(f"{out_path}.json", "w") as f:
+        json.dump({"load_s": load_s, "per_s": len(texts) / encode_s, "rss_mb": max_rss_mb()}, f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark: torch vs onnx_int8")
+    parser.add_argument("--sentences", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--onnx-dir")
+    parser.add_argument("--child", nargs=2, metavar=("BACKEND", "OUT"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child[0], args.onnx_dir, args.sentences, args.batch_size, args.child[1])
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        onnx_dir = args.onnx_dir
+        if not onnx_dir:
+            onnx_dir = os.path.join(tmp, "onnx")
+            exported = export_onnx(MODEL, onnx_dir)
+            print(f"Exporterad till {onnx_dir} (cosinus på referensmeningar: min {exported['cosine_min']:.4f})")
+
+        results = {}
+        for backend in ("torch", "onnx_int8"):
+            out_path = os.path.join(tmp, backend)
+            subprocess.run([
+                sys.executable, os.path.abspath(__file__), "--child", backend, out_path,
+                "--onnx-dir", onnx_dir, "--sentences", str(args.sentences), "--batch-size", str(args.batch_size),
+            ], check=True)
+            with open(f"{out_path}.json") as f:
+                results[backend] = json.load(f)
+            results[backend]["vectors"] = np.load(f"{out_path}.npy")
+
+    cosines = cosine_agreement(results["torch"]["vectors"], results["onnx_int8"]["vectors"])
+    print(f"\n{args.sentences} meningar, batch {args.batch_size}\n")
+    for backend, r in results.items():
+        print(f"{backend:<10} laddning {r['load_s']:6.2f} s   {r['per_s']:8.1f} meningar/s   RSS {r['rss_mb']:7.1f} MB")
+    speedup = results["onnx_int8"]["per_s"] / results["torch"]["per_s"]
+    print(f"\nonnx_int8 / torch: {speedup:.2f}x genomströmning")
+    print(f"Cosinus torch <-> onnx_int8: min {cosines.min():.4f}, medel {cosines.mean():.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+BENCHMARK: Embedding-cache och content_hash i VectorService.
+
+Simulerar Dreamer-cykler: samma kandidatnoder indexeras (upsert_nodes) och
+söks (search_many) varje cykel. Mäter på en temporär Chroma-databas:
+- kall cykel (allt embeddas)
+- oförändrad cykel (content_hash lika: ingen embedding, ingen skrivning)
+- ny collection med samma texter (embeddings från cachen, bara Chroma-skrivning)
+- en andel noder med ändrad kontext (bara de ändrade embeddas)
+
+Kör: python tools/benchmarks/bench_embedding_cache.py [--nodes 2000] [--changed-share 0.1]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import yaml
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from services.utils.vector_service import VectorService
+
+
+def synthetic_nodes(count: int, revision: int = 0, changed_share: float = 0.0) -> list:
+    changed = int(count * changed_share)
+    return [
+        {
+            "id": f"n{i}",
+            "type": "Person",
+            "aliases": [f"P{i}"],
+            "properties": {
+                "name": f"Person {i}",
+                "node_context": [
+                    {"text": f"Arbetar med projekt {i % 50} och kund {i % 13}"},
+                    {"text": f"Nämnd i möte {i % 200} (rev {revision if i < changed else 0})"},
+                ],
+            },
+        }
+        for i in range(count)
+    ]
+
+
+def cycle(service: VectorService, nodes: list) -> tuple:
+    """(sekunder, skrivna noder) för en Dreamer-liknande cykel."""
+    queries = [f"{n['properties']['name']} {n['type']}" for n in nodes]
+    start = time.perf_counter()
+    written = service.upsert_nodes(nodes)
+    service.search_many(queries, limit=10)
+    return time.perf_counter() - start, written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark: embedding-cache och content_hash")
+    parser.add_argument("--nodes", type=int, default=2000)
+    parser.add_argument("--changed-share", type=float, default=0.1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        config_path = os.path.join(tmp, "config.yaml")
+        with open(config_path, "w") as f:
+            yaml.safe_dump({"paths": {"vector_db": os.path.join(tmp, "chroma")}}, f)
+
+        service = VectorService(config_path, collection_name="bench_cache")
+        cold_s, cold_n = cycle(service, synthetic_nodes(args.nodes))
+        same_s, same_n = cycle(service, synthetic_nodes(args.nodes))
+        changed_s, changed_n = cycle(service, synthetic_nodes(args.nodes, revision=1,
+                                                                 changed_share=args.changed_share))
+
+        # Samma texter i en tom collection: embeddings hämtas ur cachen
+        other = VectorService(config_path, collection_name="bench_cache_other")
+        cached_s, cached_n = cycle(other, synthetic_nodes(args.nodes))
+        cache_size = service.embedding_cache.count()
+
+    print(f"{args.nodes} noder per cykel, cache: {cache_size} vektorer\n")
+    print(f"kall cykel:                {cold_s:7.2f} s ({cold_n} skrivna)")
+    print(f"oförändrad cykel:          {same_s:7.2f} s ({same_n} skrivna)")
+    print(f"{args.changed_share:.0%} ändrade:               {changed_s:7.2f} s ({changed_n} skrivna)")
+    print(f"ny collection, cachad:     {cached_s:7.2f} s ({cached_n} skrivna)")
+    if same_n != 0 or changed_n != int(args.nodes * args.changed_share):
+        print("\nAVVIKELSE: oväntat antal skrivna noder")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+BENCHMARK: Delad embedding-server (mikrobatchning över klienter) jämfört
+med att varje klient anropar modellen själv.
+
+Startar en EmbeddingServer i en tråd (samma modell som VectorService) och mäter:
+- uppstart: ladda modellen lokalt mot första svaret från en redo server
+- genomströmning: --clients trådar som var och en skickar --requests små
+  förfrågningar (som Dreamer/MCP-sökningar), via servern respektive
+  direkt mot modellen (ett modellanrop per förfrågan)
+
+Kör: python tools/benchmarks/bench_embedding_server.py [--clients 8] [--requests 50] [--texts 4]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from chromadb.utils import embedding_functions
+
+from services.utils.embedding_server import EmbeddingClient, EmbeddingServer, wait_until_ready
+
+MODEL = "paraphrase-multilingual-MiniLM-L12-v2"
+
+
+def run_clients(clients: int, requests: int, texts: int, embed) -> float:
+    """Sekunder för clients trådar x requests förfrågningar om texts texter."""
+    def worker(c):
+        for r in range(requests):
+            embed([f"klient {c} fråga {r} text {t} om projekt och kunder" for t in range(texts)])
+
+    threads = [threading.Thread(target=worker, args=(c,)) for c in range(clients)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark: delad embedding-server")
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--texts", type=int, default=4)
+    parser.add_argument("--window-ms", type=float, default=5)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    local = embedding_functions.SentenceTransformerEmbeddingFunction(model_name=MODEL)
+    local(["uppvärmning"])
+    load_s = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as tmp:
+        socket_path = os.path.join(tmp, "embedding.sock")
+        server = EmbeddingServer(local, MODEL, socket_path, batch_window_ms=args.window_ms)
+        loop = asyncio.new_event_loop()
+
+        def serve():
+            asyncio.set_event_loop(loop)
+            loop.run_until_complete(server.start())
+            loop.run_forever()
+
+        threading.Thread(target=serve, daemon=True).start()
+        if not wait_until_ready(socket_path, timeout=30):
+            print("Servern startade inte")
+            sys.exit(1)
+
+        client = EmbeddingClient(socket_path, MODEL)
+        start = time.perf_counter()
+        client.embed(["första anropet"])
+        first_s = time.perf_counter() - start
+
+        direct_s = run_clients(args.clients, args.requests, args.texts, local)
+        shared_s = run_clients(args.clients, args.requests, args.texts, client.embed)
+        stats = dict(server.stats)
+        asyncio.run_coroutine_threadsafe(server.stop(), loop).result(timeout=10)
+
+    total = args.clients * args.requests
+    print(f"{args.clients} klienter x {args.requests} förfrågningar x {args.texts} texter\n")
+    print(f"ladda modell lokalt:       {load_s:7.2f} s (per process utan server)")
+    print(f"första svar från server:   {first_s * 1000:7.2f} ms\n")
+    print(f"direkt mot modellen:       {direct_s:7.2f} s ({total / direct_s:7.1f} förfrågningar/s)")
+    print(f"via server:                {shared_s:7.2f} s ({total / shared_s:7.1f} förfrågningar/s)")
+    print(f"serverns batchar:          {stats['batches']} för {stats['requests']} förfrågningar "
+          f"({stats['texts'] / max(stats['batches'], 1):.1f} texter/batch)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+BENCHMARK: Fuzzy-matchning i entity resolution.
+
+Jämför difflib.get_close_matches (tidigare väg i find_node_by_name)
+mot TrigramIndex (services/utils/fuzzy_matcher.py) på syntetiska namn.
+
+Mäter:
+- Byggtid för trigram-indexet
+- Medellatens per uppslag (felstavade namn)
+- Träffgrad (hittar rätt originalnamn)
+- Tid per dokument i ingestion-mönstret (GraphService.find_node_by_name):
+  ny read-only GraphService per dokument för entity resolution, sedan en
+  skrivande GraphService som lägger till dokumentets noder. Jämför delade
+  trigram-index (byggs en gång per process) med index per instans (byggs
+  om för varje dokument, tidigare beteende).
+
+Kör: python tools/benchmarks/bench_fuzzy_matcher.py [--sizes 1000 10000 100000] [--queries 200]
+     [--doc-sizes 10000 100000] [--documents 20]
+"""
+
+import argparse
+import difflib
+import os
+import random
+import statistics
+import string
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import services.utils.graph_service as graph_service_module
+from services.utils.fuzzy_matcher import TrigramIndex
+from services.utils.graph_service import GraphService
+
+SYLLABLES = ["an", "ber", "da", "el", "fri", "gus", "hel", "in", "jo", "ka", "lars", "ma",
+             "ni", "ol", "per", "qvist", "ri", "sson", "to", "ul", "va", "win", "ström", "åke",
+             "ed", "mund", "ga", "lin", "holm", "sten", "ne", "dahl", "ro", "se", "bo", "li"]
+CUTOFF = 0.85
+
+
+def make_names(count: int, seed: int = 42) -> list:
+    """Unika syntetiska namn ('förnamn efternamn', 2-3 + 2-4 stavelser)."""
+    rng = random.Random(seed)
+    names = set()
+    while len(names) < count:
+        first = "".join(rng.choices(SYLLABLES, k=rng.randint(2, 3)))
+        last = "".join(rng.choices(SYLLABLES, k=rng.randint(2, 4)))
+        names.add(f"{first} {last}")
+    return sorted(names)
+
+
+def misspell(name: str, rng: random.Random) -> str:
+    """En slumpmässig edit (substitution, borttagning eller insättning)."""
+    pos = rng.randrange(len(name))
+    op = rng.choice(("sub", "del", "ins"))
+    char = rng.choice(string.ascii_lowercase)
+    if op == "sub":
+        return name[:pos] + char + name[pos + 1:]
+    if op == "del":
+        return name[:pos] + name[pos + 1:]
+    return name[:pos] + char + name[pos:]
+
+
+def bench_size(size: int, query_count: int, difflib_limit: int) -> dict:
+    """Kör båda metoderna för en namnmängd."""
+    rng = random.Random(size)
+    names = make_names(size)
+    targets = rng.sample(names, min(query_count, len(names)))
+    queries = [(misspell(t, rng), t) for t in targets]
+
+    start = time.perf_counter()
+    index = TrigramIndex()
+    for i, name in enumerate(names):
+        index.add(name, f"node-{i}")
+    build_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    trigram_hits = 0
+    for query, expected in queries:
+        matches = index.query(query, cutoff=CUTOFF, limit=1)
+        trigram_hits += bool(matches) and matches[0][0] == expected
+    trigram_ms = (time.perf_counter() - start) * 1000 / len(queries)
+
+    # difflib är O(N) per uppslag - begränsa antalet frågor på stora mängder
+    difflib_queries = queries[:difflib_limit]
+    start = time.perf_counter()
+    difflib_hits = 0
+    for query, expected in difflib_queries:
+        matches = difflib.get_close_matches(query, names, n=1, cutoff=CUTOFF)
+        difflib_hits += bool(matches) and matches[0] == expected
+    difflib_ms = (time.perf_counter() - start) * 1000 / len(difflib_queries)
+
+    return {
+        "size": size,
+        "build_s": build_s,
+        "trigram_ms": trigram_ms,
+        "trigram_recall": trigram_hits / len(queries),
+        "difflib_ms": difflib_ms,
+        "difflib_recall": difflib_hits / len(difflib_queries),
+        "difflib_queries": len(difflib_queries),
+    }
+
+
+def bench_documents(size: int, documents: int, lookups: int, shared: bool) -> list:
+    """
+    (resolve, write) i sekunder per dokument: lookups fuzzy-uppslag i en ny
+    read-only GraphService, sedan en ny nod via en ny skrivande GraphService.
+    shared=False släpper de delade indexen före varje dokument.
+    """
+    rng = random.Random(size)
+    names = make_names(size + documents)
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "graph.duckdb")
+        with GraphService(db_path) as graph:
+            graph.upsert_nodes_bulk([
+                {"id": f"node-{i}", "type": "Person", "aliases": [], "properties": {"name": name}}
+                for i, name in enumerate(names[:size])
+            ])
+
+        timings = []
+        for doc in range(documents):
+            if not shared:
+                graph_service_module._FUZZY_INDEXES.clear()
+            start = time.perf_counter()
+            with GraphService(db_path, read_only=True) as graph:
+                for target in rng.sample(names[:size], lookups):
+                    graph.find_node_by_name("Person", misspell(target, rng))
+            resolved = time.perf_counter()
+            with GraphService(db_path) as graph:
+                graph.upsert_nodes_bulk([{
+                    "id": f"doc-node-{doc}", "type": "Person", "aliases": [],
+                    "properties": {"name": names[size + doc]},
+                }])
+            timings.append((resolved - start, time.perf_counter() - resolved))
+        graph_service_module._FUZZY_INDEXES.clear()
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark: difflib vs TrigramIndex")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--queries", type=int, default=200, help="Antal uppslag per storlek")
+    parser.add_argument("--difflib-queries", type=int, default=20,
+                        help="Max antal difflib-uppslag per storlek (långsamt)")
+    parser.add_argument("--doc-sizes", type=int, nargs="*", default=[10000, 100000],
+                        help="Antal namn i grafen för dokumentmätningen")
+    parser.add_argument("--documents", type=int, default=20, help="Dokument per storlek")
+    parser.add_argument("--lookups", type=int, default=10, help="Fuzzy-uppslag per dokument")
+    args = parser.parse_args()
+
+    print(f"{'namn':>8} | {'bygg (s)':>9} | {'trigram ms':>10} | {'recall':>6} | "
+          f"{'difflib ms':>10} | {'recall':>6} | {'speedup':>7}")
+    print("-" * 76)
+    for size in args.sizes:
+        r = bench_size(size, args.queries, args.difflib_queries)
+        speedup = r["difflib_ms"] / r["trigram_ms"] if r["trigram_ms"] else float("inf")
+        print(f"{r['size']:>8} | {r['build_s']:>9.2f} | {r['trigram_ms']:>10.3f} | "
+              f"{r['trigram_recall']:>6.2f} | {r['difflib_ms']:>10.2f} | "
+              f"{r['difflib_recall']:>6.2f} | {speedup:>6.0f}x")
+
+    if not args.doc_sizes:
+        return
+    # Öppna/stäng loggas per GraphService
+    graph_service_module.LOGGER.setLevel("WARNING")
+    print(f"\nIngestion: {args.lookups} fuzzy-uppslag + en skrivning per dokument, {args.documents} dokument")
+    print(f"{'namn':>8} | {'index':>11} | {'resolve dok 1 (s)':>17} | {'resolve övriga (s)':>18} | "
+          f"{'skrivning (s)':>13}")
+    print("-" * 80)
+    for size in args.doc_sizes:
+        for shared in (False, True):
+            timings = bench_documents(size, args.documents, args.lookups, shared)
+            print(f"{size:>8} | {'delat' if shared else 'per instans':>11} | {timings[0][0]:>17.3f} | "
+                  f"{statistics.median(t[0] for t in timings[1:]):>18.3f} | "
+                  f"{statistics.median(t[1] for t in timings):>13.3f}")
+
+
+if __name__ == "__main__":
+    main()
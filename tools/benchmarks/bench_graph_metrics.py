@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+BENCHMARK: Grad per nod via SQL jämfört med batch-beräknade node_metrics.
+
+Jämför:
+- get_node_degree för alla noder (en OR-fråga per nod, tidigare mönster)
+- compute_node_metrics (grad + viktad PageRank + komponenter för hela grafen)
+  följt av get_node_metrics för samma noder
+
+Graderna kontrolleras mot SQL.
+
+Kör: python tools/benchmarks/bench_graph_metrics.py [--nodes 20000] [--edges 200000] [--sample 500]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from services.utils.graph_service import GraphService
+from tools.benchmarks.bench_adjacency import build_graph
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark: get_node_degree vs node_metrics")
+    parser.add_argument("--nodes", type=int, default=20000)
+    parser.add_argument("--edges", type=int, default=200000)
+    parser.add_argument("--sample", type=int, default=500, help="Noder att mäta SQL-graden för")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        graph = GraphService(os.path.join(tmp, "bench_graph.duckdb"))
+        build_graph(graph, args.nodes, args.edges)
+        ids = [f"n{i}" for i in random.Random(1).sample(range(args.nodes * 9 // 10), args.sample)]
+
+        start = time.perf_counter()
+        sql_degrees = {node_id: graph.get_node_degree(node_id) for node_id in ids}
+        sql_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        count = graph.compute_node_metrics()
+        batch_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        metrics = graph.get_node_metrics(ids)
+        lookup_ms = (time.perf_counter() - start) * 1000
+
+        assert {i: m["degree"] for i, m in metrics.items()} == sql_degrees, "avvikande grad"
+        pagerank_sum = graph.conn.execute("SELECT sum(pagerank) FROM node_metrics").fetchone()[0]
+
+        print(f"get_node_degree, {args.sample} noder:        {sql_ms:9.1f} ms "
+              f"({sql_ms / args.sample:.3f} ms/nod, alla {args.nodes}: ~{sql_ms / args.sample * args.nodes / 1000:.1f} s)")
+        print(f"compute_node_metrics, {count} noder:  {batch_ms:9.1f} ms (grad + PageRank + komponenter)")
+        print(f"get_node_metrics, {args.sample} noder:       {lookup_ms:9.1f} ms")
+        print(f"\nPageRank-summa för noder: {pagerank_sum:.4f}")
+
+        graph.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+BENCHMARK: Parquet-export och återställning av hela grafen.
+
+Mäter:
+- export_parquet (COPY ... TO, zstd) och storlek jämfört med DuckDB-filen
+- import_parquet till en tom graf (inkl. ombyggt namn- och sökindex)
+- diff_exports mellan två exporter efter en liten ändring
+
+Grafen fylls direkt med SQL (range) för att snabbt nå miljonstorlek.
+
+Kör: python tools/benchmarks/bench_graph_parquet.py [--nodes 100000] [--edges 1000000]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from services.utils.graph_export import diff_exports
+from services.utils.graph_service import GraphService
+
+
+def build_graph(graph: GraphService, node_count: int, edge_count: int):
+    """Syntetisk graf via SQL: Person-noder med namn, slumpade kanter och kontext."""
+    with graph._transaction():
+        graph.conn.execute("""
+            INSERT INTO nodes (id, type, aliases, properties)
+            SELECT 'n' || i, CASE WHEN i % 10 = 0 THEN 'Unit' ELSE 'Person' END,
+                   ['Alias ' || i],
+                   json_object('name', 'Person ' || i, 'confidence', 0.8,
+                               'created_at', '2024-01-01T00:00:00')
+            FROM range(?) t(i)
+        """, [node_count])
+        graph.conn.execute("""
+            INSERT INTO edges
+            SELECT DISTINCT ON (s, t, et) s, t, et, json_object('confidence', 0.5)
+            FROM (
+                SELECT 'n' || (hash(i) % ?) AS s, 'n' || (hash(i * 7 + 1) % ?) AS t,
+                       CASE WHEN i % 3 = 0 THEN 'UNIT_MENTIONS' ELSE 'KNOWS' END AS et
+                FROM range(?) r(i)
+            )
+        """, [node_count, node_count, edge_count])
+        graph.conn.execute("""
+            INSERT INTO node_context (node_id, text, origin)
+            SELECT 'n' || (i % ?), 'Omnämnd i möte ' || i, 'doc' || i FROM range(?) t(i)
+        """, [node_count, node_count])
+        graph._sync_typed_columns()
+    graph._rebuild_name_index()
+    graph.rebuild_graph_stats()
+
+
+def dir_size(path: str) -> int:
+    return sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark: Parquet-export/import av grafen")
+    parser.add_argument("--nodes", type=int, default=100000)
+    parser.add_argument("--edges", type=int, default=1000000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source_path = os.path.join(tmp, "source.duckdb")
+        graph = GraphService(source_path)
+        build_graph(graph, args.nodes, args.edges)
+        graph.conn.execute("CHECKPOINT")
+        edges = graph.get_stats()["total_edges"]
+
+        start = time.perf_counter()
+        graph.export_parquet(os.path.join(tmp, "export_a"))
+        export_s = time.perf_counter() - start
+
+        # Liten ändring för diffen
+        graph.upsert_node("n1", "Person", properties={"status": "ändrad"})
+        graph.delete_node("n2")
+        graph.upsert_node("ny-nod", "Person", properties={"name": "Ny Nod"})
+        graph.export_parquet(os.path.join(tmp, "export_b"))
+        graph.close()
+
+        restored = GraphService(os.path.join(tmp, "restored.duckdb"))
+        start = time.perf_counter()
+        counts = restored.import_parquet(os.path.join(tmp, "export_a"))
+        import_s = time.perf_counter() - start
+        assert counts["edges"] == edges, "avvikande antal kanter"
+        assert restored.search_nodes("Person 42", limit=1)[0]["id"] == "n42", "sökindex ej återställt"
+        restored.close()
+
+        start = time.perf_counter()
+        _, summary = diff_exports(os.path.join(tmp, "export_a"), os.path.join(tmp, "export_b"))
+        diff_ms = (time.perf_counter() - start) * 1000
+
+        print(f"Graf: {args.nodes} noder, {edges} kanter\n")
+        print(f"DuckDB-fil:        {os.path.getsize(source_path) / 1e6:8.1f} MB")
+        print(f"Parquet (zstd):    {dir_size(os.path.join(tmp, 'export_a')) / 1e6:8.1f} MB\n")
+        print(f"export_parquet:    {export_s:8.2f} s")
+        print(f"import_parquet:    {import_s:8.2f} s (inkl. namn- och sökindex)")
+        print(f"diff_exports:      {diff_ms:8.1f} ms -> nodes {summary['nodes']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+BENCHMARK: Latens för punktuppslag i grafen.
+
+Jämför det tidigare mönstret i MCP-servern (öppna GraphService read-only
+per anrop) mot GraphPool (en delad, långlivad read-only anslutning).
+
+Kör: python tools/benchmarks/bench_graph_pool.py [--nodes 10000] [--lookups 500]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from services.utils.graph_service import GraphService
+from services.utils.graph_pool import GraphPool
+
+
+def build_graph(db_path: str, node_count: int):
+    """Syntetisk graf: Person-noder med en kedja av KNOWS-kanter."""
+    graph = GraphService(db_path)
+    graph.upsert_nodes_bulk([
+        {"id": f"p{i}", "type": "Person", "properties": {"name": f"Person {i}"}}
+        for i in range(node_count)
+    ])
+    graph.upsert_edges_bulk([
+        {"source": f"p{i}", "target": f"p{i + 1}", "edge_type": "KNOWS"}
+        for i in range(node_count - 1)
+    ])
+    graph.close()
+
+
+def measure(fn, ids: list) -> list:
+    """Latens per anrop i millisekunder."""
+    timings = []
+    for node_id in ids:
+        start = time.perf_counter()
+        fn(node_id)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def report(label: str, timings: list):
+    timings = sorted(timings)
+    p95 = timings[int(len(timings) * 0.95) - 1]
+    print(f"{label:<28} median {statistics.median(timings):8.3f} ms | p95 {p95:8.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark: GraphService per anrop vs GraphPool")
+    parser.add_argument("--nodes", type=int, default=10000)
+    parser.add_argument("--lookups", type=int, default=500)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench_graph.duckdb")
+        build_graph(db_path, args.nodes)
+        ids = [f"p{random.randrange(args.nodes)}" for _ in range(args.lookups)]
+
+        # Ingen resource_lock: benchmarken mäter anslutningskostnaden
+        pool = GraphPool(db_path, lock_resource=None)
+
+        operations = {
+            "get_node": lambda graph, node_id: graph.get_node(node_id),
+            "get_node + get_edges_from": lambda graph, node_id: (
+                graph.get_node(node_id), graph.get_edges_from(node_id)
+            ),
+        }
+
+        print(f"{args.nodes} noder, {args.lookups} uppslag per mätning")
+        for name, operation in operations.items():
+            def open_per_call(node_id):
+                graph = GraphService(db_path, read_only=True)
+                operation(graph, node_id)
+                graph.close()
+
+            def pooled(node_id):
+                with pool.acquire() as graph:
+                    operation(graph, node_id)
+
+            print(f"\n{name}:")
+            report("  GraphService per anrop", measure(open_per_call, ids))
+            report("  GraphPool", measure(pooled, ids))
+
+        pool.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+BENCHMARK: Nodsökning (search_graph_nodes).
+
+Jämför:
+- ILIKE: '%q%' över id, aliases och hela properties-JSON (tidigare mönster, full scan)
+- search_nodes: BM25 över det inverterade sökindexet (node_terms)
+
+Kör: python tools/benchmarks/bench_graph_search.py [--nodes 20000] [--runs 20]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from services.utils.graph_service import GraphService
+
+SYLLABLES = ["an", "ber", "da", "el", "fi", "gus", "han", "is", "jo", "ka", "li", "ma", "ny", "ol", "per", "ri", "sa", "te", "ul", "vi"]
+WORDS = ["möte", "budget", "leverans", "kund", "avtal", "workshop", "plattform", "strategi", "rekrytering",
+         "integration", "migrering", "offert", "styrgrupp", "prototyp", "analys", "säkerhet", "roadmap"]
+QUERIES = ["Johan Ström", "digitalist", "Kaliper", "styrgrupp offert", "projektledare"]
+
+
+def make_name(rng: random.Random) -> str:
+    first = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 3))).capitalize()
+    last = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize()
+    return f"{first} {last}"
+
+
+def build_graph(graph: GraphService, node_count: int):
+    """Syntetiska Person-noder med namn, e-post och 4-11 node_context-poster."""
+    rng = random.Random(42)
+    nodes = []
+    for i in range(node_count):
+        name = make_name(rng)
+        nodes.append({
+            "id": f"p{i}", "type": "Person", "aliases": [name.split()[0]],
+            "properties": {
+                "name": name,
+                "email": f"{name.replace(' ', '.').lower()}@example.com",
+                "node_context": [{"text": f"{name} arbetar som {rng.choice(['utvecklare', 'projektledare', 'säljare'])} "
+                                          f"på {rng.choice(['Digitalist', 'Acme AB', 'Kaliper'])}", "origin": "bench"}] +
+                                [{"text": " ".join(rng.choice(WORDS) for _ in range(25)), "origin": f"doc{j}"}
+                                 for j in range(rng.randint(3, 10))]
+            }
+        })
+    nodes.append({"id": "johan", "type": "Person", "properties": {"name": "Johan Ström"}})
+    graph.upsert_nodes_bulk(nodes)
+
+
+def ilike(graph: GraphService, query: str, limit: int) -> list:
+    return graph._fetch_nodes(
+        "SELECT id, type, aliases, properties FROM nodes WHERE "
+        "(id ILIKE ? OR array_to_string(aliases, ' ') ILIKE ? OR CAST(properties AS VARCHAR) ILIKE ?) LIMIT ?",
+        [f"%{query}%", f"%{query}%", f"%{query}%", limit]
+    )
+
+
+def ranked(graph: GraphService, query: str, limit: int) -> list:
+    return graph.search_nodes(query, limit=limit)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark: nodsökning ILIKE vs BM25-index")
+    parser.add_argument("--nodes", type=int, default=20000)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=15)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        graph = GraphService(os.path.join(tmp, "bench_graph.duckdb"))
+        start = time.perf_counter()
+        build_graph(graph, args.nodes)
+        print(f"{args.nodes} noder indexerade på {time.perf_counter() - start:.1f} s\n")
+
+        for label, fn in (("ILIKE (full scan)", ilike), ("search_nodes (BM25)", ranked)):
+            timings = []
+            for _ in range(args.runs):
+                for query in QUERIES:
+                    t0 = time.perf_counter()
+                    fn(graph, query, args.limit)
+                    timings.append((time.perf_counter() - t0) * 1000)
+            print(f"{label:<22} median {statistics.median(timings):8.2f} ms | max {max(timings):8.2f} ms")
+
+        top = [n["id"] for n in ranked(graph, "Johan Ström", args.limit)[:1]]
+        print(f"\nToppträff för 'Johan Ström': {top}")
+        graph.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+BENCHMARK: Kostnad för snapshot-publicering vid realtidsingestion.
+
+Simulerar ingestion: --documents dokument, vart och ett en skrivande
+GraphService som lägger till några noder och kanter, med --gap sekunder
+mellan dokumenten. Jämför:
+- per dokument: publish_snapshot efter varje skrivning (CHECKPOINT + kopia
+  av hela filen medan skrivlåset hålls)
+- SnapshotScheduler: mark_dirty efter varje skrivning, högst en publicering
+  per --min-interval sekunder
+
+Skrivningar och publiceringar tar samma lås (som resource_lock("graph") i
+ingestion). Mäter tid i skrivvägen per dokument, tid per publicering
+(CHECKPOINT + kopia), antal publiceringar och kopierade MB.
+
+Kör: python tools/benchmarks/bench_graph_snapshot.py [--nodes 100000] [--documents 30] [--gap 0.05] [--min-interval 5]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+import services.utils.graph_service as graph_service_module
+from services.utils.graph_service import GraphService
+from services.utils.graph_snapshot import SnapshotScheduler, publish_snapshot
+
+
+def build_graph(db_path: str, node_count: int):
+    """Syntetisk graf: Person-noder med en kedja av KNOWS-kanter."""
+    with GraphService(db_path) as graph:
+        graph.upsert_nodes_bulk([
+            {"id": f"p{i}", "type": "Person", "properties": {"name": f"Person {i}"}}
+            for i in range(node_count)
+        ])
+        graph.upsert_edges_bulk([
+            {"source": f"p{i}", "target": f"p{i + 1}", "edge_type": "KNOWS"}
+            for i in range(node_count - 1)
+        ])
+
+
+def write_document(db_path: str, doc: int, per_document: bool) -> float:
+    """
+    Som ingestion_engine.write_graph: Document-nod, fem entiteter, MENTIONS-kanter.
+
+    Returns:
+        Sekunder i publish_snapshot (0 om per_document är av)
+    """
+    with GraphService(db_path) as graph:
+        nodes = [{"id": f"doc{doc}", "type": "Document", "properties": {"name": f"doc_{doc}.txt"}}]
+        nodes += [{"id": f"d{doc}e{i}", "type": "Person", "properties": {"name": f"Ny person {doc}-{i}"}}
+                  for i in range(5)]
+        graph.upsert_nodes_bulk(nodes)
+        graph.upsert_edges_bulk([{"source": f"doc{doc}", "target": n["id"], "edge_type": "MENTIONS"}
+                                 for n in nodes[1:]])
+        if not per_document:
+            return 0.0
+        start = time.perf_counter()
+        publish_snapshot(graph)
+        return time.perf_counter() - start
+
+
+def run(db_path: str, documents: int, gap: float, per_document: bool, min_interval: float) -> dict:
+    publish_timings = []
+    graph_lock = threading.Lock()
+
+    def publish():
+        with graph_lock, GraphService(db_path) as graph:
+            start = time.perf_counter()
+            publish_snapshot(graph)
+            publish_timings.append(time.perf_counter() - start)
+
+    scheduler = None if per_document else SnapshotScheduler(publish, min_interval=min_interval)
+    timings = []
+    start_all = time.perf_counter()
+    for doc in range(documents):
+        start = time.perf_counter()
+        with graph_lock:
+            publish_s = write_document(db_path, doc, per_document)
+        if per_document:
+            publish_timings.append(publish_s)
+        if scheduler is not None:
+            scheduler.mark_dirty()
+        timings.append(time.perf_counter() - start)
+        time.sleep(gap)
+    if scheduler is not None:
+        scheduler.flush()
+    total_s = time.perf_counter() - start_all
+
+    return {
+        "write_ms": statistics.median(timings) * 1000,
+        "publish_ms": statistics.median(publish_timings) * 1000,
+        "publish_total_s": sum(publish_timings),
+        "total_s": total_s,
+        "publishes": len(publish_timings),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark: snapshot-publicering per dokument vs schemalagd")
+    parser.add_argument("--nodes", type=int, default=100000)
+    parser.add_argument("--documents", type=int, default=30)
+    parser.add_argument("--gap", type=float, default=0.05, help="Sekunder mellan dokument")
+    parser.add_argument("--min-interval", type=float, default=5.0)
+    args = parser.parse_args()
+
+    graph_service_module.LOGGER.setLevel("WARNING")
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in ("per dokument", "schemalagd"):
+            db_path = os.path.join(tmp, mode.replace(" ", "_"), "graph.duckdb")
+            build_graph(db_path, args.nodes)
+            size_mb = os.path.getsize(db_path) / 1e6
+            results[mode] = run(db_path, args.documents, args.gap, mode == "per dokument", args.min_interval)
+            results[mode]["copied_mb"] = results[mode]["publishes"] * size_mb
+
+    print(f"{args.nodes} noder ({size_mb:.0f} MB), {args.documents} dokument, {args.gap * 1000:.0f} ms mellan dokument, "
+          f"min_interval {args.min_interval} s\n")
+    print(f"{'läge':<13} | {'skrivväg median (ms)':>20} | {'publicering median (ms)':>23} | "
+          f"{'publiceringar':>13} | {'publicering totalt (s)':>22} | {'kopierat (MB)':>13} | {'totalt (s)':>10}")
+    print("-" * 135)
+    for mode, r in results.items():
+        print(f"{mode:<13} | {r['write_ms']:>20.1f} | {r['publish_ms']:>23.1f} | {r['publishes']:>13} | "
+              f"{r['publish_total_s']:>22.2f} | {r['copied_mb']:>13.0f} | {r['total_s']:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
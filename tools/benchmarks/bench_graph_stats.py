@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+BENCHMARK: Grafstatistik via underhållna räknare (graph_stats) jämfört med GROUP BY.
+
+Mäter:
+- get_stats (läser graph_stats) mot GROUP BY över nodes och edges (tidigare mönster)
+- skrivkostnaden för räknarna: upsert_edge, upsert_edges_bulk och delete_node
+- att räknarna stämmer efter skrivningarna (check_graph_stats)
+
+Kör: python tools/benchmarks/bench_graph_stats.py [--nodes 100000] [--edges 1000000]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from services.utils.graph_service import GraphService
+from tools.benchmarks.bench_graph_parquet import build_graph
+
+ROUNDS = 20
+
+
+def median_ms(fn, rounds: int = ROUNDS) -> float:
+    samples = []
+    for i in range(rounds):
+        start = time.perf_counter()
+        fn(i)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark: graph_stats vs GROUP BY")
+    parser.add_argument("--nodes", type=int, default=100000)
+    parser.add_argument("--edges", type=int, default=1000000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        graph = GraphService(os.path.join(tmp, "bench_graph.duckdb"))
+        build_graph(graph, args.nodes, args.edges)
+        stats = graph.get_stats()
+        print(f"Graf: {stats['total_nodes']} noder, {stats['total_edges']} kanter\n")
+
+        group_by_ms = median_ms(lambda i: graph._count_by_type())
+        counters_ms = median_ms(lambda i: graph.get_stats())
+
+        edge_ms = median_ms(lambda i: graph.upsert_edge(f"n{i}", f"n{i + 1}", "BENCH_EDGE"))
+        bulk_ms = median_ms(lambda i: graph.upsert_edges_bulk([
+            {"source": f"n{i * 100 + j}", "target": f"n{j}", "edge_type": "BENCH_BULK"} for j in range(100)
+        ]))
+        delete_ms = median_ms(lambda i: graph.delete_node(f"n{50000 + i}"))
+
+        drift = graph.check_graph_stats()
+        graph.close()
+
+    print(f"get_stats, GROUP BY (tidigare):   {group_by_ms:8.2f} ms")
+    print(f"get_stats, graph_stats:           {counters_ms:8.2f} ms\n")
+    print(f"upsert_edge (inkl. räknare):      {edge_ms:8.2f} ms")
+    print(f"upsert_edges_bulk, 100 kanter:    {bulk_ms:8.2f} ms")
+    print(f"delete_node:                      {delete_ms:8.2f} ms\n")
+    print("Räknarna stämmer." if not drift else f"AVVIKELSE: {drift}")
+    if drift:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
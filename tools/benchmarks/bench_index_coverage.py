@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+BENCHMARK/REGRESSION: Indextäckning för GraphService punktuppslag.
+
+Kör varje uppslagsmetod (en nod/kant åt gången) mot en syntetisk graf med
+1M kanter och profilerar varje SQL-sats metoden kör (DuckDB-profilering,
+samma operatorträd som EXPLAIN ANALYZE). Om någon sats läser en stor
+tabell (edges, nodes, node_context, node_names, ...) med Sequential Scan
+i stället för Index Scan (och läser fler än MAX_SCANNED_ROWS rader) listas
+den och skriptet avslutas med kod 1.
+
+DuckDB använder ett ART-index bara när tabellscanningen har ETT
+likhetsfilter på den indexerade kolumnen; ett extra filter (t.ex.
+edge_type) eller OR ger sekventiell scanning. Se GraphService, EDGE OPERATIONS.
+Samma krav körs i testsviten på en mindre graf: tools/test_index_coverage.py
+
+Kör: python tools/benchmarks/bench_index_coverage.py [--nodes 100000] [--edges 1000000]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from services.utils.graph_service import GraphService
+from tools.benchmarks.bench_graph_parquet import build_graph
+
+# Tabeller som inte får scannas fullt av ett punktuppslag
+LARGE_TABLES = {
+    "edges", "nodes", "node_context", "node_names", "node_terms",
+    "node_context_terms", "node_term_docs", "node_metrics",
+}
+# Sekventiell scanning under denna radgräns räknas inte (t.ex. ett uppslag som
+# DuckDB redan kortslutit till några tusen rader via zonkartor)
+MAX_SCANNED_ROWS = 10000
+
+
+class ProfilingConnection:
+    """DuckDB-anslutning som sparar tabellscanningar per sats (delegerar allt annat)."""
+
+    def __init__(self, conn):
+        self._conn = conn
+        self.statements = []
+        conn.execute("PRAGMA enable_profiling='no_output'")
+
+    def execute(self, sql, params=None):
+        result = self._conn.execute(sql, params or [])
+        profile = json.loads(self._conn.get_profiling_information(format="json"))
+        self.statements.append((" ".join(sql.split()), self._scans(profile, [])))
+        return result
+
+    @classmethod
+    def _scans(cls, node: dict, out: list) -> list:
+        if node.get("operator_type") == "TABLE_SCAN":
+            info = node.get("extra_info", {})
+            out.append((info.get("Table", "").split(".")[-1], info.get("Type"), node.get("operator_rows_scanned", 0)))
+        for child in node.get("children", []):
+            cls._scans(child, out)
+        return out
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+def lookups(graph: GraphService) -> list:
+    """(etikett, anrop) för alla punktuppslag som ska täckas av index."""
+    return [
+        ("get_node", lambda: graph.get_node("n42")),
+        ("get_node(with_context)", lambda: graph.get_node("n42", with_context=True)),
+        ("get_nodes", lambda: graph.get_nodes(["n42", "n43"])),
+        ("get_names", lambda: graph.get_names(["n42", "n43"])),
+        ("get_node_context", lambda: graph.get_node_context(["n42"])),
+        ("get_node_metrics", lambda: graph.get_node_metrics(["n42"])),
+        ("find_node_by_name", lambda: graph.find_node_by_name("Person", "Person 42")),
+        ("get_edges_from", lambda: graph.get_edges_from("n42")),
+        ("get_edges_to", lambda: graph.get_edges_to("n42")),
+        ("get_neighbor_edges", lambda: graph.get_neighbor_edges("n42")),
+        ("get_node_degree", lambda: graph.get_node_degree("n42")),
+        ("get_related_unit_ids", lambda: graph.get_related_unit_ids("n42")),
+        ("get_related_units", lambda: graph.get_related_units("n42")),
+        ("upsert_edge", lambda: graph.upsert_edge("n42", "n43", "BENCH_EDGE")),
+        ("delete_edge", lambda: graph.delete_edge("n42", "n43", "BENCH_EDGE")),
+        ("upsert_node", lambda: graph.upsert_node("n44", "Person", properties={"status": "bench"})),
+        ("delete_node", lambda: graph.delete_node("n45")),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Regression: indextäckning för punktuppslag")
+    parser.add_argument("--nodes", type=int, default=100000)
+    parser.add_argument("--edges", type=int, default=1000000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        graph = GraphService(os.path.join(tmp, "bench_graph.duckdb"))
+        build_graph(graph, args.nodes, args.edges)
+        graph.compute_node_metrics()
+        edges = graph.get_stats()["total_edges"]
+        print(f"Graf: {args.nodes} noder, {edges} kanter\n")
+
+        profiler = ProfilingConnection(graph.conn)
+        graph.conn = profiler
+        failures = []
+        for label, call in lookups(graph):
+            profiler.statements.clear()
+            start = time.perf_counter()
+            call()
+            elapsed_ms = (time.perf_counter() - start) * 1000
+
+            full_scans = [
+                (sql, table, rows) for sql, scans in profiler.statements
+                for table, scan_type, rows in scans
+                if table in LARGE_TABLES and scan_type == "Sequential Scan" and rows > MAX_SCANNED_ROWS
+            ]
+            status = "FULL SCAN" if full_scans else "ok"
+            print(f"{label:<24} {elapsed_ms:8.2f} ms  {len(profiler.statements):3} satser  {status}")
+            failures += [(label, *scan) for scan in full_scans]
+
+        graph.conn = profiler._conn
+        graph.close()
+
+    if failures:
+        print("\nSekventiella scanningar:")
+        for label, sql, table, rows in failures:
+            print(f"  [{label}] {table} ({rows} rader): {sql[:140]}")
+        sys.exit(1)
+    print("\nAlla punktuppslag använder index.")
+
+
+if __name__ == "__main__":
+    main()
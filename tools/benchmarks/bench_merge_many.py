@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+BENCHMARK: Sammanslagning av många nodpar (Dreamer fas 2).
+
+Jämför:
+- merge_nodes per par (tidigare mönster)
+- merge_many: alla par i EN transaktion med set-baserad kantflytt
+
+Kör: python tools/benchmarks/bench_merge_many.py [--pairs 200] [--nodes 5000]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from services.utils.graph_service import GraphService
+
+
+def build_graph(graph: GraphService, node_count: int, pairs: int):
+    """Person-noder med kanter till dokument; de första 2*pairs noderna slås ihop parvis."""
+    graph.upsert_nodes_bulk(
+        [{"id": f"p{i}", "type": "Person", "aliases": [f"P{i}"],
+          "properties": {"name": f"Person {i}", "node_context": [{"text": f"Kontext {i}", "origin": f"d{i % 50}"}]}}
+         for i in range(node_count)] +
+        [{"id": f"d{i}", "type": "Document", "properties": {"name": f"Dokument {i}"}} for i in range(50)]
+    )
+    graph.upsert_edges_bulk(
+        [{"source": f"d{i % 50}", "target": f"p{i}", "edge_type": "MENTIONS"} for i in range(node_count)] +
+        [{"source": f"p{i}", "target": f"p{(i + 7) % node_count}", "edge_type": "KNOWS"} for i in range(node_count)]
+    )
+    return [(f"p{2 * i}", f"p{2 * i + 1}") for i in range(pairs)]
+
+
+def run(label: str, args, fn):
+    with tempfile.TemporaryDirectory() as tmp:
+        graph = GraphService(os.path.join(tmp, "bench_graph.duckdb"))
+        pairs = build_graph(graph, args.nodes, args.pairs)
+        start = time.perf_counter()
+        fn(graph, pairs)
+        elapsed = time.perf_counter() - start
+        stats = graph.get_stats()
+        graph.close()
+    print(f"{label:<22} {elapsed * 1000:9.1f} ms ({elapsed / len(pairs) * 1000:6.2f} ms/par) | "
+          f"{stats['total_nodes']} noder, {stats['total_edges']} kanter kvar")
+
+
+def per_pair(graph: GraphService, pairs: list):
+    for target, source in pairs:
+        graph.merge_nodes(target, source)
+
+
+def batched(graph: GraphService, pairs: list):
+    graph.merge_many(pairs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark: merge_nodes per par vs merge_many")
+    parser.add_argument("--pairs", type=int, default=200)
+    parser.add_argument("--nodes", type=int, default=5000)
+    args = parser.parse_args()
+
+    run("merge_nodes per par", args, per_pair)
+    run("merge_many", args, batched)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+BENCHMARK: Grannuppslag för en nod med hög grad (get_neighbor_network).
+
+Jämför:
+- N+1: get_edges_from/get_edges_to + get_node per granne (tidigare mönster)
+- get_names: kanter + EN batch-fråga för grannarnas namn
+- get_neighbor_edges: kanter och namn i EN join-fråga
+
+Kör: python tools/benchmarks/bench_neighbor_lookup.py [--degree 500] [--nodes 20000] [--runs 20]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from services.utils.graph_service import GraphService
+
+HUB_ID = "hub-document"
+
+
+def build_graph(graph: GraphService, node_count: int, degree: int):
+    """Syntetisk graf: node_count Person-noder, en hubb med `degree` MENTIONS-kanter."""
+    graph.upsert_nodes_bulk(
+        [{"id": HUB_ID, "type": "Document", "properties": {"name": "Hubb"}}] +
+        [{"id": f"p{i}", "type": "Person",
+          "properties": {"name": f"Person {i}", "node_context": [{"text": "x" * 200, "origin": "bench"}]}}
+         for i in range(node_count)]
+    )
+    step = max(1, node_count // degree)
+    graph.upsert_edges_bulk([
+        {"source": HUB_ID, "target": f"p{i}", "edge_type": "MENTIONS"}
+        for i in range(0, step * degree, step)
+    ])
+
+
+def n_plus_one(graph: GraphService) -> dict:
+    names = {}
+    edges = graph.get_edges_from(HUB_ID) + graph.get_edges_to(HUB_ID)
+    for e in edges:
+        for nid in (e["source"], e["target"]):
+            if nid != HUB_ID and nid not in names:
+                n = graph.get_node(nid)
+                names[nid] = n["properties"].get("name", nid) if n else nid
+    return names
+
+
+def batch_names(graph: GraphService) -> dict:
+    edges = graph.get_edges_from(HUB_ID) + graph.get_edges_to(HUB_ID)
+    ids = {e["target"] for e in edges} | {e["source"] for e in edges}
+    ids.discard(HUB_ID)
+    return graph.get_names(list(ids))
+
+
+def joined(graph: GraphService) -> dict:
+    return {e["neighbor"]: e["neighbor_name"] for e in graph.get_neighbor_edges(HUB_ID)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark: grannuppslag för nod med hög grad")
+    parser.add_argument("--degree", type=int, default=500)
+    parser.add_argument("--nodes", type=int, default=20000)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        graph = GraphService(os.path.join(tmp, "bench_graph.duckdb"))
+        build_graph(graph, args.nodes, args.degree)
+
+        expected = n_plus_one(graph)
+        print(f"Hubb med {len(expected)} grannar, {args.nodes} noder totalt\n")
+
+        for label, fn in (("N+1 get_node", n_plus_one),
+                          ("get_names (batch)", batch_names),
+                          ("get_neighbor_edges (join)", joined)):
+            timings = []
+            for _ in range(args.runs):
+                start = time.perf_counter()
+                result = fn(graph)
+                timings.append((time.perf_counter() - start) * 1000)
+            assert result == expected, f"{label}: avvikande resultat"
+            print(f"{label:<28} median {statistics.median(timings):9.2f} ms | min {min(timings):9.2f} ms")
+
+        graph.close()
+
+
+if __name__ == "__main__":
+    main()
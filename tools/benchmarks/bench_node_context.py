@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+BENCHMARK: Append av node_context till en het nod med lång kontext.
+
+Jämför:
+- JSON-blob: läs properties, lägg till posten, skriv om hela JSON (tidigare lagring)
+- node_context-tabell: upsert_node med en ny post (INSERT av en rad)
+
+samt merge av två heta noder (merge_many, UPDATE ... SET node_id).
+
+Kör: python tools/benchmarks/bench_node_context.py [--entries 500] [--appends 100]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from services.utils.graph_service import GraphService
+
+HOT_ID = "hot-person"
+BLOB_ID = "hot-blob"
+
+
+def context(i: int) -> dict:
+    return {"text": f"Omnämnd i möte {i} om budget, leveranser och bemanning för kvartalet", "origin": f"doc{i}"}
+
+
+def json_blob_append(graph: GraphService, i: int):
+    """Tidigare mönster: kontexten ligger i properties-JSON och skrivs om vid varje tillägg."""
+    with graph._lock:
+        props = json.loads(graph.conn.execute(
+            "SELECT properties FROM nodes WHERE id = ?", [BLOB_ID]).fetchone()[0])
+        props.setdefault("blob_context", []).append(context(i))
+        graph.conn.execute("UPDATE nodes SET properties = ? WHERE id = ?",
+                           [json.dumps(props, ensure_ascii=False), BLOB_ID])
+
+
+def table_append(graph: GraphService, i: int):
+    graph.upsert_node(HOT_ID, "Person", properties={"node_context": [context(i)]})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark: node_context i JSON vs egen tabell")
+    parser.add_argument("--entries", type=int, default=500)
+    parser.add_argument("--appends", type=int, default=100)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        graph = GraphService(os.path.join(tmp, "bench_graph.duckdb"))
+        entries = [context(i) for i in range(args.entries)]
+        graph.upsert_nodes_bulk([
+            {"id": HOT_ID, "type": "Person", "properties": {"name": "Het Person", "node_context": entries}},
+            {"id": "hot-dup", "type": "Person", "properties": {"name": "Het Person", "node_context": entries}},
+            # Samma kontext som JSON-blob för jämförelsen
+            {"id": BLOB_ID, "type": "Person", "properties": {"name": "Het Blob", "blob_context": entries}},
+        ])
+
+        print(f"Het nod med {args.entries} kontextposter, {args.appends} tillägg\n")
+        for label, fn in (("JSON-blob (omskrivning)", json_blob_append), ("node_context (INSERT)", table_append)):
+            timings = []
+            for i in range(args.appends):
+                start = time.perf_counter()
+                fn(graph, args.entries + i)
+                timings.append((time.perf_counter() - start) * 1000)
+            print(f"{label:<26} median {statistics.median(timings):8.2f} ms | max {max(timings):8.2f} ms")
+
+        start = time.perf_counter()
+        graph.merge_many([(HOT_ID, "hot-dup")])
+        merged = len(graph.get_node_context([HOT_ID])[HOT_ID])
+        print(f"\nmerge_many (UPDATE SET node_id + dedup): {(time.perf_counter() - start) * 1000:.1f} ms, "
+              f"{merged} poster efter merge")
+
+        graph.close()
+
+
+if __name__ == "__main__":
+    main()
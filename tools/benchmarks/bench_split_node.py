@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+BENCHMARK: split_node på en nod med hög grad.
+
+Jämför kantkopieringen:
+- per kant: en INSERT OR IGNORE per (ny nod, kant) i try/except (tidigare mönster)
+- split_node: INSERT ... SELECT korsat mot en temp-tabell med de nya noderna, en transaktion
+
+Kör: python tools/benchmarks/bench_split_node.py [--degree 2000] [--parts 3]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from services.utils.graph_service import GraphService
+
+HUB_ID = "hub-person"
+
+
+def build_graph(graph: GraphService, degree: int):
+    """En hubb med degree/2 utgående och degree/2 inkommande kanter."""
+    half = degree // 2
+    graph.upsert_nodes_bulk(
+        [{"id": HUB_ID, "type": "Person",
+          "properties": {"name": "Hubb", "node_context": [{"text": f"Kontext {i}", "origin": "bench"} for i in range(6)]}}] +
+        [{"id": f"n{i}", "type": "Project", "properties": {"name": f"Nod {i}"}} for i in range(degree)]
+    )
+    graph.upsert_edges_bulk(
+        [{"source": HUB_ID, "target": f"n{i}", "edge_type": "WORKS_ON", "properties": {"i": i}} for i in range(half)] +
+        [{"source": f"n{i}", "target": HUB_ID, "edge_type": "HAS_MEMBER", "properties": {"i": i}}
+         for i in range(half, degree)]
+    )
+
+
+def split_map(parts: int) -> list:
+    return [{"name": f"{HUB_ID}-{p}", "context_indices": [p]} for p in range(parts)]
+
+
+def split_per_edge(graph: GraphService, parts: int):
+    """Tidigare mönster: en insert per (ny nod, kant), utan transaktion."""
+    new_nodes = [item["name"] for item in split_map(parts)]
+    graph.upsert_nodes_bulk([{"id": n, "type": "Person", "properties": {"name": n}} for n in new_nodes])
+    conn = graph.conn
+    out_edges = conn.execute("SELECT target, edge_type, properties FROM edges WHERE source = ?", [HUB_ID]).fetchall()
+    in_edges = conn.execute("SELECT source, edge_type, properties FROM edges WHERE target = ?", [HUB_ID]).fetchall()
+    for new_node in new_nodes:
+        for target, etype, props in out_edges:
+            if target == new_node:
+                continue
+            try:
+                conn.execute("INSERT OR IGNORE INTO edges (source, target, edge_type, properties) VALUES (?, ?, ?, ?)",
+                             [new_node, target, etype, props])
+            except Exception:
+                pass
+        for source, etype, props in in_edges:
+            if source == new_node:
+                continue
+            try:
+                conn.execute("INSERT OR IGNORE INTO edges (source, target, edge_type, properties) VALUES (?, ?, ?, ?)",
+                             [source, new_node, etype, props])
+            except Exception:
+                pass
+    conn.execute("DELETE FROM edges WHERE source = ? OR target = ?", [HUB_ID, HUB_ID])
+    conn.execute("DELETE FROM nodes WHERE id = ?", [HUB_ID])
+
+
+def split_set_based(graph: GraphService, parts: int):
+    graph.split_node(HUB_ID, split_map(parts))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark: split_node på nod med hög grad")
+    parser.add_argument("--degree", type=int, default=2000)
+    parser.add_argument("--parts", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"Hubb med {args.degree} kanter, split i {args.parts} delar "
+          f"({args.degree * args.parts} kopierade kanter)\n")
+
+    for label, fn in (("per kant (INSERT OR IGNORE)", split_per_edge),
+                      ("split_node (set-baserad)", split_set_based)):
+        with tempfile.TemporaryDirectory() as tmp:
+            graph = GraphService(os.path.join(tmp, "bench_graph.duckdb"))
+            build_graph(graph, args.degree)
+            start = time.perf_counter()
+            fn(graph, args.parts)
+            elapsed = time.perf_counter() - start
+            edges = graph.get_stats()["total_edges"]
+            graph.close()
+        print(f"{label:<30} {elapsed * 1000:10.1f} ms | {edges} kanter efter split")
+
+
+if __name__ == "__main__":
+    main()
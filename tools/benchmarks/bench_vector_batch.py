@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+BENCHMARK: Batchad embedding i VectorService (upsert_many/search_many)
+jämfört med ett anrop per dokument/fråga (tidigare mönster).
+
+Mäter på en temporär Chroma-databas med syntetiska dokument:
+- upsert per dokument mot upsert_many (en batch per embedding_batch_size)
+- search per fråga mot search_many
+
+Kör: python tools/benchmarks/bench_vector_batch.py [--docs 2000] [--queries 200] [--batch-size 64]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import yaml
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from services.utils.vector_service import VectorService
+
+WORDS = ("projekt", "möte", "budget", "kund", "leverans", "avtal", "risk", "plan", "team", "beslut")
+
+
+def synthetic_text(i: int) -> str:
+    words = " ".join(WORDS[(i * 7 + j) % len(WORDS)] for j in range(40))
+    return f"FILENAME: doc_{i}.md\nSUMMARY: Dokument {i} om {WORDS[i % len(WORDS)]}\n\nCONTENT:\n{words}"
+
+
+def timed(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark: upsert_many/search_many vs ett anrop per post")
+    parser.add_argument("--docs", type=int, default=2000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=64)
+    args = parser.parse_args()
+
+    ids = [f"doc_{i}" for i in range(args.docs)]
+    texts = [synthetic_text(i) for i in range(args.docs)]
+    metadatas = [{"filename": f"doc_{i}.md"} for i in range(args.docs)]
+    queries = [f"{WORDS[i % len(WORDS)]} {WORDS[(i * 3) % len(WORDS)]}" for i in range(args.queries)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        config_path = os.path.join(tmp, "config.yaml")
+        with open(config_path, "w") as f:
+            yaml.safe_dump({
+                "paths": {"vector_db": os.path.join(tmp, "chroma")},
+                # Utan embedding-cache: andra körningen ska inte få cacheträffar
+                "ai_engine": {"embedding_batch_size": args.batch_size, "embedding_cache_size": 0},
+            }, f)
+
+        single = VectorService(config_path, collection_name="bench_single")
+        single_upsert_s = timed(lambda: [single.upsert(i, t, m) for i, t, m in zip(ids, texts, metadatas)])
+        single_search_s = timed(lambda: [single.search(q, limit=10) for q in queries])
+
+        batched = VectorService(config_path, collection_name="bench_batched")
+        batch_upsert_s = timed(lambda: batched.upsert_many(ids, texts, metadatas))
+        batch_search_s = timed(lambda: batched.search_many(queries, limit=10))
+
+        # Samma träffar oavsett anropsmönster
+        same = [r["id"] for r in single.search(queries[0], limit=10)] == \
+               [r["id"] for r in batched.search_many(queries[:1], limit=10)[0]]
+
+    print(f"{args.docs} dokument, {args.queries} frågor, batch {args.batch_size}\n")
+    print(f"upsert per dokument:  {single_upsert_s:7.2f} s ({args.docs / single_upsert_s:7.1f} dok/s)")
+    print(f"upsert_many:          {batch_upsert_s:7.2f} s ({args.docs / batch_upsert_s:7.1f} dok/s)")
+    print(f"search per fråga:     {single_search_s:7.2f} s ({args.queries / single_search_s:7.1f} frågor/s)")
+    print(f"search_many:          {batch_search_s:7.2f} s ({args.queries / batch_search_s:7.1f} frågor/s)")
+    print("\nSamma träffar." if same else "\nAVVIKELSE: batchad sökning gav andra träffar")
+    if not same:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -8,8 +8,13 @@ Princip:
 1. Raderar hela målmappen (Total Rewrite).
 2. Noder -> Filer (med frontmatter för Aliases/Props).
 3. Kanter -> Wikilinks.
+
+Källa: senaste snapshot av grafen, eller en Parquet-export
+(GraphService.export_parquet, t.ex. en backup) med --parquet <mapp>.
 """
 
+import argparse
+
 import os
 import sys
 import yaml
@@ -18,9 +23,19 @@ import duckdb
 import re
 import logging
 import shutil
-import time
 from datetime import datetime
 
+# Lägg till projektroten för imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.utils.graph_export import attach_export
+from services.utils.graph_service import GraphService
+from services.utils.graph_snapshot import latest_snapshot, publish_snapshot
+from services.utils.shared_lock import resource_lock
+
+# Max väntan på skrivlås när ingen snapshot finns och en måste publiceras
+SNAPSHOT_LOCK_TIMEOUT = 60.0
+
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
 logger = logging.getLogger("ShadowGraph")
@@ -62,7 +77,23 @@ def clean_filename(name):
     clean = re.sub(r'[\\/*?:"<>|]', '_', name)
     return clean.strip()
 
-def export_graph():
+def _connect_snapshot(db_path):
+    """Read-only anslutning till senaste snapshot (publiceras först om ingen finns)."""
+    snapshot = latest_snapshot(db_path)
+    if snapshot is None:
+        logger.info("Ingen snapshot publicerad - publicerar en...")
+        with resource_lock("graph", exclusive=True, timeout=SNAPSHOT_LOCK_TIMEOUT):
+            graph = GraphService(db_path)
+            try:
+                publish_snapshot(graph)
+            finally:
+                graph.close()
+        snapshot = latest_snapshot(db_path)
+    generation, snapshot_path = snapshot
+    logger.info(f"Läser snapshot generation {generation}: {snapshot_path}")
+    return duckdb.connect(snapshot_path, read_only=True)
+
+def export_graph(parquet_dir=None):
     config = load_config()
     db_path = config['paths']['graph_db']
     lake_path = config['paths']['lake_store']
@@ -74,7 +105,7 @@ def export_graph():
     logger.info(f"Kopplar upp mot grafdatabas: {db_path}")
     logger.info(f"Export destination: {output_dir}")
     
-    if not os.path.exists(db_path):
+    if not parquet_dir and not os.path.exists(db_path):
         logger.error(f"HARDFAIL: Databasfilen saknas: {db_path}")
         sys.exit(1)
 
@@ -91,15 +122,18 @@ def export_graph():
     os.makedirs(output_dir, exist_ok=True)
 
     # --- STEG 2: SNAPSHOT ---
-    timestamp = int(time.time())
-    snapshot_path = f"{db_path}.snapshot.{timestamp}.duckdb"
-    
+    # Läs senaste publicerade läskopian (graph_snapshot). Finns ingen
+    # publiceras en först, under skrivlås så att kopian blir konsistent.
+    # Med --parquet läses en export via vyer med samma tabellnamn.
     try:
-        shutil.copy2(db_path, snapshot_path)
-        con = duckdb.connect(snapshot_path, read_only=True)
+        if parquet_dir:
+            con = duckdb.connect()
+            manifest = attach_export(con, parquet_dir)
+            logger.info(f"Läser Parquet-export från {manifest['created_at']}: {parquet_dir}")
+        else:
+            con = _connect_snapshot(db_path)
     except Exception as e:
         logger.error(f"HARDFAIL vid DB-anslutning: {e}")
-        if os.path.exists(snapshot_path): os.remove(snapshot_path)
         sys.exit(1)
 
     try:
@@ -115,6 +149,18 @@ def export_graph():
         """
         nodes = con.sql(nodes_query).fetchall()
         
+        # Hämta kontext (egen tabell; äldre grafer har den kvar i properties)
+        context_by_node = {}
+        has_context_table = con.execute(
+            "SELECT 1 FROM information_schema.tables WHERE table_name = 'node_context'"
+        ).fetchone()
+        if has_context_table:
+            logger.info("Hämtar kontext...")
+            for node_id, text, origin in con.sql(
+                "SELECT node_id, text, origin FROM node_context ORDER BY node_id, id"
+            ).fetchall():
+                context_by_node.setdefault(node_id, []).append({"text": text, "origin": origin})
+
         # Hämta kanter
         logger.info("Hämtar kanter...")
         edges = con.sql("SELECT source, target, edge_type FROM edges").fetchall()
@@ -145,6 +191,8 @@ def export_graph():
                 except: props = {"raw_value": props_raw}
             elif isinstance(props_raw, dict):
                 props = props_raw
+            if node_id in context_by_node:
+                props["node_context"] = context_by_node[node_id]
 
             # Filnamn
             filename = clean_filename(node_id) + ".md"
@@ -206,9 +254,9 @@ def export_graph():
     finally:
         try: con.close() 
         except: pass
-        if os.path.exists(snapshot_path):
-            try: os.remove(snapshot_path)
-            except: pass
 
 if __name__ == "__main__":
-    export_graph()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Exportera grafen till Obsidian-markdown")
+    parser.add_argument("--parquet", help="Läs en Parquet-export (mapp med manifest.json) i stället för grafen")
+    args = parser.parse_args()
+    export_graph(parquet_dir=args.parquet)
\ No newline at end of file
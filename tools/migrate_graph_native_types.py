@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+migrate_graph_native_types.py - Migrerar grafen till native kolumntyper.
+
+Äldre grafer lagrar JSON som TEXT:
+- nodes.aliases     TEXT  -> VARCHAR[]
+- nodes.properties  TEXT  -> JSON
+- edges.properties  TEXT  -> JSON
+
+Tabellerna byggs om (CREATE + INSERT SELECT + RENAME) i en transaktion.
+Trasig JSON ersätts med tom lista/tomt objekt (antal rapporteras i dry-run).
+En kopia av databasen sparas bredvid originalet innan migreringen.
+Index återskapas av GraphService när grafen öppnas efteråt.
+
+Användning:
+    python tools/migrate_graph_native_types.py --dry-run   # Visa vad som skulle ändras
+    python tools/migrate_graph_native_types.py --confirm   # Kör migrationen
+"""
+
+import os
+import sys
+import shutil
+import argparse
+from datetime import datetime
+
+import duckdb
+import yaml
+
+# Lägg till projektroten för imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.utils.graph_service import GraphService
+
+# Konvertering av äldre TEXT-kolumner (trasig JSON -> tomt värde).
+# DuckDB kortsluter inte AND: castens fel för ogiltig JSON undviks bara med CASE.
+ALIASES_IS_ARRAY = "CASE WHEN json_valid(aliases) THEN json_type(aliases::JSON) = 'ARRAY' END"
+ALIASES_EXPR = f"""
+    CASE WHEN {ALIASES_IS_ARRAY}
+         THEN from_json(aliases::JSON, '["VARCHAR"]')
+         ELSE []::VARCHAR[] END
+"""
+PROPERTIES_EXPR = "CASE WHEN json_valid(properties) THEN properties::JSON ELSE '{}'::JSON END"
+
+
+def load_config():
+    """Laddar huvudconfig för sökvägar"""
+    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    config_path = os.path.join(base_dir, "config", "my_mem_config.yaml")
+
+    with open(config_path, 'r', encoding='utf-8') as f:
+        config = yaml.safe_load(f)
+
+    for k, v in config.get('paths', {}).items():
+        if isinstance(v, str):
+            config['paths'][k] = os.path.expanduser(v)
+
+    return config
+
+
+def column_types(con, table: str) -> dict:
+    """Kolumnnamn -> datatyp för en tabell."""
+    rows = con.execute(
+        "SELECT column_name, data_type FROM information_schema.columns WHERE table_name = ?",
+        [table]
+    ).fetchall()
+    return dict(rows)
+
+
+def inspect(con) -> dict:
+    """
+    Kontrollera vad som behöver migreras.
+
+    Returns:
+        Dict med statistik
+    """
+    node_cols = column_types(con, "nodes")
+    edge_cols = column_types(con, "edges")
+
+    stats = {
+        "nodes_legacy": node_cols.get("aliases") == "VARCHAR" or node_cols.get("properties") == "VARCHAR",
+        "edges_legacy": edge_cols.get("properties") == "VARCHAR",
+        "nodes": con.execute("SELECT COUNT(*) FROM nodes").fetchone()[0],
+        "edges": con.execute("SELECT COUNT(*) FROM edges").fetchone()[0],
+        "bad_aliases": 0,
+        "bad_node_properties": 0,
+        "bad_edge_properties": 0,
+        "missing_typed_columns": [c for c, _ in GraphService.TYPED_COLUMNS if c not in node_cols],
+    }
+
+    if stats["nodes_legacy"]:
+        stats["bad_aliases"] = con.execute(f"""
+            SELECT COUNT(*) FROM nodes
+            WHERE aliases IS NOT NULL AND NOT coalesce({ALIASES_IS_ARRAY}, false)
+        """).fetchone()[0]
+        stats["bad_node_properties"] = con.execute(
+            "SELECT COUNT(*) FROM nodes WHERE properties IS NOT NULL AND NOT json_valid(properties)"
+        ).fetchone()[0]
+    if stats["edges_legacy"]:
+        stats["bad_edge_properties"] = con.execute(
+            "SELECT COUNT(*) FROM edges WHERE properties IS NOT NULL AND NOT json_valid(properties)"
+        ).fetchone()[0]
+
+    return stats
+
+
+def migrate(con, stats: dict):
+    """Bygg om nodes/edges med native typer i en transaktion."""
+    typed_columns = ", ".join(f"{c} {t}" for c, t in GraphService.TYPED_COLUMNS)
+    typed_names = ", ".join(c for c, _ in GraphService.TYPED_COLUMNS)
+    typed_exprs = ", ".join(GraphService._typed_column_exprs("properties"))
+
+    con.execute("BEGIN TRANSACTION")
+    try:
+        if stats["nodes_legacy"]:
+            con.execute(f"""
+                CREATE TABLE nodes_native (
+                    id TEXT PRIMARY KEY,
+                    type TEXT NOT NULL,
+                    aliases VARCHAR[],
+                    properties JSON,
+                    {typed_columns}
+                )
+            """)
+            # Typade kolumner härleds från den konverterade JSON:en
+            con.execute(f"""
+                INSERT INTO nodes_native (id, type, aliases, properties, {typed_names})
+                SELECT id, type, aliases, properties, {typed_exprs}
+                FROM (
+                    SELECT id, type, {ALIASES_EXPR} AS aliases, {PROPERTIES_EXPR} AS properties
+                    FROM nodes
+                )
+            """)
+            con.execute("DROP TABLE nodes")
+            con.execute("ALTER TABLE nodes_native RENAME TO nodes")
+
+        if stats["edges_legacy"]:
+            con.execute("""
+                CREATE TABLE edges_native (
+                    source TEXT NOT NULL,
+                    target TEXT NOT NULL,
+                    edge_type TEXT NOT NULL,
+                    properties JSON,
+                    PRIMARY KEY (source, target, edge_type)
+                )
+            """)
+            con.execute(f"""
+                INSERT INTO edges_native
+                SELECT source, target, edge_type, {PROPERTIES_EXPR} FROM edges
+            """)
+            con.execute("DROP TABLE edges")
+            con.execute("ALTER TABLE edges_native RENAME TO edges")
+
+        con.execute("COMMIT")
+    except Exception:
+        con.execute("ROLLBACK")
+        raise
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Migrerar grafens aliases/properties från TEXT till VARCHAR[]/JSON"
+    )
+    parser.add_argument('--dry-run', action='store_true',
+                        help='Visa vad som skulle ändras utan att faktiskt ändra')
+    parser.add_argument('--confirm', action='store_true',
+                        help='Kör migrationen (krävs för att faktiskt ändra)')
+    args = parser.parse_args()
+
+    if not args.dry_run and not args.confirm:
+        print("Användning:")
+        print("  --dry-run    Visa vad som skulle ändras")
+        print("  --confirm    Kör migrationen")
+        sys.exit(1)
+
+    config = load_config()
+    graph_path = config.get('paths', {}).get('graph_db')
+
+    if not graph_path or not os.path.exists(graph_path):
+        print(f"HARDFAIL: Graf-db saknas: {graph_path}")
+        sys.exit(1)
+
+    print(f"Graf-databas: {graph_path}")
+
+    con = duckdb.connect(graph_path, read_only=args.dry_run)
+    try:
+        stats = inspect(con)
+
+        print(f"\nNoder: {stats['nodes']} (äldre schema: {'ja' if stats['nodes_legacy'] else 'nej'})")
+        print(f"Kanter: {stats['edges']} (äldre schema: {'ja' if stats['edges_legacy'] else 'nej'})")
+        print(f"  - trasiga aliases (blir []): {stats['bad_aliases']}")
+        print(f"  - trasiga nod-properties (blir {{}}): {stats['bad_node_properties']}")
+        print(f"  - trasiga kant-properties (blir {{}}): {stats['bad_edge_properties']}")
+        if stats["missing_typed_columns"]:
+            print(f"  - typade kolumner som skapas: {', '.join(stats['missing_typed_columns'])}")
+
+        if not stats["nodes_legacy"] and not stats["edges_legacy"]:
+            print("\n✅ Grafen har redan native typer. Inget att göra.")
+            return
+
+        if args.dry_run:
+            print("\n[DRY-RUN] Inga ändringar gjordes.")
+            return
+
+        # Säkerhetskopia innan tabellerna byggs om
+        con.execute("CHECKPOINT")
+        con.close()
+        con = None
+        backup_path = f"{graph_path}.pre_native_types.{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        shutil.copy2(graph_path, backup_path)
+        print(f"\nBackup: {backup_path}")
+
+        print("Kör migration...")
+        con = duckdb.connect(graph_path)
+        migrate(con, stats)
+        con.close()
+        con = None
+
+        # GraphService återskapar index och verifierar schemat
+        graph = GraphService(graph_path)
+        try:
+            after = graph.get_stats()
+        finally:
+            graph.close()
+
+        if after["total_nodes"] != stats["nodes"] or after["total_edges"] != stats["edges"]:
+            print(f"HARDFAIL: Antal rader ändrades ({after['total_nodes']} noder, "
+                  f"{after['total_edges']} kanter). Återställ från {backup_path}")
+            sys.exit(1)
+
+        print(f"\n✅ Migrerade {stats['nodes']} noder och {stats['edges']} kanter.")
+    finally:
+        if con is not None:
+            con.close()
+
+
+if __name__ == "__main__":
+    main()
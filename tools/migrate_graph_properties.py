@@ -133,6 +133,8 @@ def migrate_nodes(graph: GraphService, dry_run: bool = True):
                 [props_json, node["id"]]
             )
             stats["migrated"] += 1
+        # Håll typade kolumner (status, confidence, ...) i synk med JSON
+        graph._sync_typed_columns([node["id"] for node in nodes_to_update])
 
     print(f"\n✅ Migrerade {stats['migrated']} noder.")
     return stats
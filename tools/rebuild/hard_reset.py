@@ -93,11 +93,12 @@ def clear_index(path, name, recreate_dir=True):
 
 
 def clear_duckdb(path, name):
-    """Radera DuckDB-filer (huvudfil + WAL).
+    """Radera DuckDB-filer (huvudfil + WAL + publicerade snapshots).
     
     DuckDB skapar två filer:
     - path (huvudfilen)
     - path.wal (Write-Ahead Log)
+    Läskopior (graph_snapshot) ligger i path.snapshots/
     """
     deleted = []
     for ext in ['', '.wal']:
@@ -105,6 +106,10 @@ def clear_duckdb(path, name):
         if os.path.exists(fpath):
             os.remove(fpath)
             deleted.append(os.path.basename(fpath))
+    snapshots = path + '.snapshots'
+    if os.path.isdir(snapshots):
+        shutil.rmtree(snapshots)
+        deleted.append(os.path.basename(snapshots))
     
     if deleted:
         print(f"  🗑️  {name}: Raderade {', '.join(deleted)}")
@@ -112,8 +117,45 @@ def clear_duckdb(path, name):
         print(f"  ⏭️  {name}: Finns inte")
 
 
+def _ignore_graph_files(directory, names):
+    """copytree-filter: DuckDB-grafen (fil, WAL, snapshots) säkras som Parquet i stället."""
+    if os.path.abspath(directory) != os.path.dirname(os.path.abspath(GRAPH_PATH)):
+        return []
+    graph_name = os.path.basename(GRAPH_PATH)
+    return [n for n in names if n in (graph_name, graph_name + '.wal', graph_name + '.snapshots')]
+
+
+def backup_graph(backup_path):
+    """
+    Säkra grafen som Parquet-export (GraphService.export_parquet).
+
+    Återställs med: python tools/tool_graph_parquet.py import <backup>/graph_parquet
+    Går exporten inte att göra (t.ex. äldre schema) kopieras DuckDB-filen som den är.
+    """
+    from services.utils.graph_service import GraphService
+
+    if not os.path.exists(GRAPH_PATH):
+        return
+    export_dir = os.path.join(backup_path, 'graph_parquet')
+    try:
+        graph = GraphService(GRAPH_PATH, read_only=True)
+        try:
+            manifest = graph.export_parquet(export_dir)
+        finally:
+            graph.close()
+        print(f"  📦 Graf exporterad: {manifest['tables']['edges']['rows']} kanter -> {export_dir}")
+    except Exception as e:
+        print(f"  ⚠️  Parquet-export misslyckades ({e}), kopierar DuckDB-filen")
+        shutil.rmtree(export_dir, ignore_errors=True)
+        graph_backup_dir = os.path.join(backup_path, 'graph_db')
+        os.makedirs(graph_backup_dir, exist_ok=True)
+        for ext in ['', '.wal']:
+            if os.path.exists(GRAPH_PATH + ext):
+                shutil.copy2(GRAPH_PATH + ext, graph_backup_dir)
+
+
 def create_backup():
-    """Skapar backup av hela MyMemory-mappen."""
+    """Skapar backup av hela MyMemory-mappen (grafen som Parquet, se backup_graph)."""
     if not os.path.exists(MYMEMORY_ROOT):
         print(f"  ⏭️  Backup: MyMemory-mapp finns inte")
         return None
@@ -125,7 +167,8 @@ def create_backup():
     print(f"     Detta kan ta en stund...")
     
     try:
-        shutil.copytree(MYMEMORY_ROOT, backup_path)
+        shutil.copytree(MYMEMORY_ROOT, backup_path, ignore=_ignore_graph_files)
+        backup_graph(backup_path)
         
         # Räkna storlek
         total_size = 0
@@ -19,6 +19,7 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspa
 from tools.rebuild.file_manager import FileManager
 from tools.rebuild.process_manager import CompletionWatcher
 from services.utils.graph_service import GraphService
+from services.utils.graph_snapshot import publish_snapshot
 from services.utils.shared_lock import resource_lock, clear_stale_locks
 
 LOGGER = logging.getLogger('RebuildOrchestrator')
@@ -58,7 +59,7 @@ class RebuildOrchestrator:
             with resource_lock("graph", exclusive=True):
                 with resource_lock("vector", exclusive=True):
                     # Initiera tjänster
-                    graph_service = GraphService(graph_path)
+                    graph_service = GraphService(graph_path, adjacency_cache=True)
                     vector_service = VectorService()
                     dreamer = Dreamer(graph_service, vector_service)
 
@@ -66,6 +67,8 @@ class RebuildOrchestrator:
                     stats = dreamer.run_resolution_cycle(dry_run=False)
 
                     _log(f"  ✅ Dreamer klar: Merged={stats.get('merged', 0)}, Renamed={stats.get('renamed', 0)}")
+                    # Publicera läskopia för MCP-läsare
+                    publish_snapshot(graph_service)
                     graph_service.close()
 
             # Reset counter after Dreamer run
@@ -173,20 +176,31 @@ class RebuildOrchestrator:
                 # Detta säkerställer samma pipeline som realtids-ingestion (OBJEKT-73)
                 _log(f"   🔧 Processar {len(day_pending)} filer via IngestionEngine...")
                 try:
-                    from services.engines.ingestion_engine import process_document
+                    from services.engines.ingestion_engine import process_document, flush_vectors
 
                     # Ta lås på graph och vector för hela dagens batch
                     with resource_lock("graph", exclusive=True):
                         with resource_lock("vector", exclusive=True):
-                            for f in day_pending:
-                                if os.path.exists(f['path']):
-                                    _log(f"      → {f['filename']}")
-                                    try:
-                                        # _lock_held=True eftersom vi redan har låsen
-                                        process_document(f['path'], f['filename'], _lock_held=True)
-                                    except Exception as doc_err:
-                                        LOGGER.error(f"HARDFAIL: Fel vid processning av {f['filename']}: {doc_err}")
-                                        raise RuntimeError(f"HARDFAIL: Document processing failed for {f['filename']}: {doc_err}") from doc_err
+                            try:
+                                for f in day_pending:
+                                    if os.path.exists(f['path']):
+                                        _log(f"      → {f['filename']}")
+                                        try:
+                                            # _lock_held=True eftersom vi redan har låsen
+                                            process_document(f['path'], f['filename'], _lock_held=True)
+                                        except Exception as doc_err:
+                                            LOGGER.error(f"HARDFAIL: Fel vid processning av {f['filename']}: {doc_err}")
+                                            raise RuntimeError(f"HARDFAIL: Document processing failed for {f['filename']}: {doc_err}") from doc_err
+                            finally:
+                                # Dagens vektorer embeddas i batchar (även de som hann klart före ett fel)
+                                flush_vectors()
+
+                            # En läskopia per dagsbatch (process_document publicerar inte med _lock_held)
+                            graph_service = GraphService(os.path.expanduser(self.config['paths']['graph_db']))
+                            try:
+                                publish_snapshot(graph_service)
+                            finally:
+                                graph_service.close()
                 except ImportError as e:
                     LOGGER.error(f"HARDFAIL: Kunde inte importera IngestionEngine: {e}")
                     raise RuntimeError(f"IngestionEngine import failed: {e}")
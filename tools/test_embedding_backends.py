@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+test_embedding_backends.py - ONNX int8 mot sentence-transformers (torch).
+
+Exporterar modellen till en temporär katalog och jämför vektorerna från
+onnx_int8-backenden med torch-backenden, både på AGREEMENT_SENTENCES
+(det exporten själv mäter) och på ett fast urval som exporten inte sett.
+Lägsta cosinus ska nå DEFAULT_MIN_COSINE; uppmätt min/medel skrivs ut
+(pytest -s) och sparas som test-properties (--junitxml).
+
+Hoppas över utan torch, sentence-transformers eller onnxruntime, eller
+om modellen inte kan laddas (t.ex. utan nätverk).
+
+Kör: python tools/test_embedding_backends.py   (eller pytest -s tools/test_embedding_backends.py)
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+pytest.importorskip("torch")
+pytest.importorskip("sentence_transformers")
+pytest.importorskip("onnxruntime")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.utils.embedding_backends import (
+    AGREEMENT_SENTENCES, DEFAULT_MIN_COSINE, backend_settings, cosine_agreement, create_embedding_function,
+    export_onnx,
+)
+
+MODEL = "paraphrase-multilingual-MiniLM-L12-v2"
+
+# Fast urval utanför AGREEMENT_SENTENCES (svenska + engelska, kort + långt)
+HELD_OUT_SENTENCES = [
+    "Leverantören bekräftade att servern flyttas till det nya datacentret i mars.",
+    "Maria skickade offerten till kunden efter lunch.",
+    "Name: Erik Lind. Type: Person. Role: Projektledare",
+    "The contract renewal is blocked until legal has reviewed the liability clause.",
+    "Ok",
+    "FILENAME: anteckningar.txt\nSUMMARY: Planering av workshop\n\nCONTENT:\n"
+    "Workshopen hålls på kontoret. Agenda: genomgång av kraven, prioritering av backloggen "
+    "och fördelning av ansvar inför nästa sprint.",
+]
+
+
+@pytest.fixture(scope="module")
+def backends(tmp_path_factory):
+    """(torch-funktion, onnx-funktion, export-config) för MODEL."""
+    onnx_dir = str(tmp_path_factory.mktemp("onnx"))
+    try:
+        exported = export_onnx(MODEL, onnx_dir)
+    except OSError as e:
+        pytest.skip(f"Modellen {MODEL} kunde inte laddas: {e}")
+    functions = {}
+    for backend in ("torch", "onnx_int8"):
+        settings = backend_settings({"ai_engine": {"models": {
+            "embedding_model": MODEL, "embedding_backend": backend, "embedding_onnx_dir": onnx_dir,
+        }}})
+        functions[backend] = create_embedding_function(settings)
+    return functions["torch"], functions["onnx_int8"], exported
+
+
+@pytest.mark.parametrize("sample", ["agreement", "held_out"])
+def test_onnx_agrees_with_sentence_transformers(backends, sample, record_property):
+    torch_fn, onnx_fn, _ = backends
+    sentences = AGREEMENT_SENTENCES if sample == "agreement" else HELD_OUT_SENTENCES
+    reference = np.asarray(torch_fn(sentences), dtype=np.float32)
+    vectors = np.asarray(onnx_fn(sentences), dtype=np.float32)
+
+    assert vectors.shape == reference.shape
+    cosines = cosine_agreement(reference, vectors)
+    record_property("cosine_min", float(cosines.min()))
+    record_property("cosine_mean", float(cosines.mean()))
+    print(f"\n{sample}: {len(sentences)} meningar, cosinus min {cosines.min():.4f}, medel {cosines.mean():.4f}")
+    assert cosines.min() >= DEFAULT_MIN_COSINE
+
+
+def test_export_records_agreement(backends):
+    _, _, exported = backends
+    assert exported["agreement_sentences"] == len(AGREEMENT_SENTENCES)
+    assert DEFAULT_MIN_COSINE <= exported["cosine_min"] <= exported["cosine_mean"] <= 1.0 + 1e-6
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q", "-s"]))
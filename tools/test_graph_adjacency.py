@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+test_graph_adjacency.py - CSR-cachen för traverseringar (adjacency_cache).
+
+Verifierar att en read-only anslutning bara bygger cachen när den
+återanvänds (efter ADJACENCY_MIN_TRAVERSALS traverseringar, eller när
+ägaren anropar adjacency()), att en skrivbar anslutning aldrig läser en
+inaktuell cache efter att en skrivning ökat write_generation, och att
+grad, Unit-uppslag och k_hop/get_subgraph ger samma svar via cachen som
+via SQL före och efter skrivningar.
+
+Kör: python tools/test_graph_adjacency.py   (eller pytest tools/test_graph_adjacency.py)
+"""
+
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.utils.graph_service import GraphService
+
+PEOPLE = [f"p{i:02d}" for i in range(40)]
+UNITS = [f"u{i}" for i in range(6)]
+SUBGRAPH_QUERIES = [
+    (["p00"], 2, None, None),
+    (["p05", "p17"], 3, ["KNOWS"], 3),
+    (["u0"], 2, None, 4),
+    (["p30"], 4, ["KNOWS", "WORKS_WITH"], None),
+]
+
+
+def build_graph(graph: GraphService, seed: int = 14):
+    rng = random.Random(seed)
+    graph.upsert_nodes_bulk([{"id": node_id, "type": "Person"} for node_id in PEOPLE] +
+                            [{"id": unit, "type": "Unit"} for unit in UNITS])
+    edges = [{"source": rng.choice(PEOPLE), "target": rng.choice(PEOPLE),
+              "edge_type": rng.choice(["KNOWS", "WORKS_WITH"])} for _ in range(120)]
+    edges += [{"source": rng.choice(UNITS), "target": rng.choice(PEOPLE),
+               "edge_type": rng.choice(GraphService.UNIT_EDGE_TYPES)} for _ in range(40)]
+    edges += [{"source": "p01", "target": "p01", "edge_type": "KNOWS"}]  # Self-loop
+    graph.upsert_edges_bulk(edges)
+
+
+def traversals(graph: GraphService) -> dict:
+    """Alla cachade läsmetoders svar för grafens noder."""
+    result = {}
+    for node_id in PEOPLE + ["saknas"]:
+        result[node_id] = (
+            graph.get_node_degree(node_id),
+            sorted(graph.get_related_unit_ids(node_id)),
+            sorted(graph.get_related_units(node_id, limit=100)),
+        )
+    for seeds, depth, edge_types, fanout in SUBGRAPH_QUERIES:
+        subgraph = graph.get_subgraph(seeds, depth=depth, edge_types=edge_types, fanout=fanout, limit=1000)
+        result[tuple(seeds), depth] = (
+            [(n["id"], n["depth"]) for n in subgraph["nodes"]],
+            sorted((e["source"], e["target"], e["type"]) for e in subgraph["edges"]),
+        )
+    return result
+
+
+def sql_traversals(graph: GraphService) -> dict:
+    """Samma svar via SQL (cachen avstängd)."""
+    enabled, graph.adjacency_cache = graph.adjacency_cache, False
+    try:
+        return traversals(graph)
+    finally:
+        graph.adjacency_cache = enabled
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "graph.duckdb")
+    with GraphService(path) as graph:
+        build_graph(graph)
+    return path
+
+
+def test_read_only_builds_only_when_reused(db_path):
+    with GraphService(db_path, read_only=True, adjacency_cache=True) as graph:
+        for _ in range(GraphService.ADJACENCY_MIN_TRAVERSALS - 1):
+            graph.get_node_degree("p00")
+        assert graph._adjacency is None
+
+        graph.get_related_unit_ids("p00")
+        adjacency = graph._adjacency
+        assert adjacency is not None
+        expected = sql_traversals(graph)
+        assert traversals(graph) == expected
+        assert graph._adjacency is adjacency   # Byggs en gång
+
+    # Ägaren kan bygga direkt (långlivad anslutning)
+    with GraphService(db_path, read_only=True, adjacency_cache=True) as graph:
+        adjacency = graph.adjacency()
+        graph.get_node_degree("p00")
+        assert graph._cached_adjacency() is adjacency
+
+    with GraphService(db_path, read_only=True) as graph:
+        for _ in range(GraphService.ADJACENCY_MIN_TRAVERSALS + 1):
+            graph.get_node_degree("p00")
+        assert graph._adjacency is None
+
+
+def test_writable_cache_matches_sql_across_writes(db_path):
+    with GraphService(db_path, adjacency_cache=True) as graph:
+        adjacency = graph.adjacency()
+        assert graph._cached_adjacency() is adjacency
+        assert traversals(graph) == sql_traversals(graph)
+
+        writes = [
+            lambda: graph.upsert_graph_bulk(
+                [{"id": "p40", "type": "Person"}],
+                [{"source": "p00", "target": "p40", "edge_type": "KNOWS"},
+                 {"source": "u0", "target": "p40", "edge_type": "UNIT_MENTIONS"}]),
+            lambda: graph.delete_edge("p00", "p40", "KNOWS"),
+            lambda: graph.merge_many([("p02", "p03"), ("p05", "p06")]),
+            lambda: graph.split_node("p07", [{"name": "p07a"}, {"name": "p07b"}]),
+            lambda: graph.delete_node("p10"),
+        ]
+        for write in writes:
+            generation = graph._write_generation
+            write()
+            assert graph._write_generation > generation
+            # Inaktuell cache används inte: läsningarna går via SQL
+            assert graph._cached_adjacency() is None
+            expected = sql_traversals(graph)
+            assert traversals(graph) == expected
+            assert graph._adjacency is adjacency
+
+            adjacency = graph.adjacency()
+            assert adjacency.generation == graph._write_generation
+            assert traversals(graph) == expected
+
+            # k_hop direkt mot den rekursiva CTE:n
+            for seeds, depth, edge_types, fanout in SUBGRAPH_QUERIES:
+                fanout = fanout or GraphService.SUBGRAPH_FANOUT
+                walked = adjacency.k_hop(seeds, depth, edge_types=edge_types, fanout=fanout)
+                csr = sorted(((i, d) for i, d in walked.items() if graph.get_node(i)), key=lambda r: (r[1], r[0]))
+                cte = graph._walk_subgraph(seeds, depth, edge_types, fanout, 1000)
+                assert csr == [tuple(row) for row in cte]
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+test_graph_gc.py - Skräpsamling och komprimering av grafen (collect_garbage, compact).
+
+Verifierar att collect_garbage tar bort dinglande kanter, dokument utan
+källa och föräldralösa PROVISIONAL-noder äldre än max_days_as_provisional
+(övriga föräldralösa rapporteras bara), att dry_run ger exakt samma rapport
+som en riktig körning utan att ändra grafen, och att compact skriver om
+filen med data, index och graph_stats bevarade.
+
+Kör: python tools/test_graph_gc.py   (eller pytest tools/test_graph_gc.py)
+"""
+
+import os
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.utils.graph_service import GraphService
+
+NOW = datetime(2025, 6, 1, 12, 0, 0)
+POLICIES = {
+    "Person": {"min_connections_to_survive": 2, "max_days_as_provisional": 7},
+    "Document": {"min_connections_to_survive": 5, "max_days_as_provisional": 0},  # Dokument rörs inte i steg 3
+}
+
+
+def person(node_id: str, status: str, age_days: int) -> dict:
+    created = (NOW - timedelta(days=age_days)).isoformat()
+    return {"id": node_id, "type": "Person", "aliases": [f"{node_id} alias"],
+            "properties": {"name": node_id, "status": status, "created_at": created,
+                           "node_context": [{"text": f"Om {node_id}", "origin": "test"}]}}
+
+
+@pytest.fixture
+def graph(tmp_path):
+    graph = GraphService(str(tmp_path / "graph.duckdb"))
+    graph.upsert_nodes_bulk([
+        {"id": "doc1", "type": "Document"},
+        {"id": "doc2", "type": "Document"},                  # Saknas i Lake
+        person("keep1", "PROVISIONAL", 30),
+        person("keep2", "PROVISIONAL", 30),
+        person("only-doc2", "PROVISIONAL", 30),              # Föräldralös när doc2 tas bort
+        person("old-prov", "PROVISIONAL", 30),               # Föräldralös, för gammal
+        person("new-prov", "PROVISIONAL", 2),                # Föräldralös, ung: behålls
+        person("verified", "VERIFIED", 300),                 # Föräldralös, ej PROVISIONAL: behålls
+        person("one-link", "PROVISIONAL", 30),               # Nämnd men för få kanter
+        {"id": "proj", "type": "Project"},                   # Ingen policy
+    ])
+    graph.upsert_edges_bulk([
+        {"source": "doc1", "target": "keep1", "edge_type": "MENTIONS"},
+        {"source": "doc1", "target": "keep2", "edge_type": "MENTIONS"},
+        {"source": "doc1", "target": "one-link", "edge_type": "MENTIONS"},
+        {"source": "keep1", "target": "keep2", "edge_type": "KNOWS"},
+        {"source": "doc2", "target": "only-doc2", "edge_type": "MENTIONS"},
+        {"source": "only-doc2", "target": "keep1", "edge_type": "KNOWS"},
+        {"source": "keep1", "target": "spöke", "edge_type": "KNOWS"},       # Dinglande
+        {"source": "spöke", "target": "proj", "edge_type": "WORKS_ON"},     # Dinglande
+    ])
+    yield graph
+    graph.close()
+
+
+def snapshot(graph: GraphService) -> tuple:
+    """Hela grafens innehåll (för att se att dry_run inte ändrar något)."""
+    return tuple(
+        graph.conn.execute(f"SELECT * FROM {table} ORDER BY ALL").fetchall()
+        for table in ("nodes", "edges", "node_names", "node_context", "graph_stats", "node_terms")
+    )
+
+
+def collect(graph: GraphService, dry_run: bool = False) -> dict:
+    return graph.collect_garbage(POLICIES, document_ids={"doc1"}, dry_run=dry_run, now=NOW)
+
+
+def test_dry_run_reports_exactly_what_a_real_run_does(graph):
+    before = snapshot(graph)
+    preview = collect(graph, dry_run=True)
+    assert snapshot(graph) == before
+
+    report = collect(graph)
+    assert preview == {**report, "dry_run": True}
+
+    assert report["dangling_edges"] == {"KNOWS": 1, "WORKS_ON": 1}
+    assert report["documents_without_source"] == ["doc2"]
+    actions = {o["id"]: o["action"] for o in report["orphans"]}
+    assert actions == {"only-doc2": "remove", "old-prov": "remove", "one-link": "remove",
+                       "new-prov": "keep", "verified": "keep"}
+    assert report["removed_nodes"] == 4
+
+
+def test_real_run_removes_nodes_and_their_traces(graph):
+    collect(graph)
+
+    remaining = {row[0] for row in graph.conn.execute("SELECT id FROM nodes").fetchall()}
+    assert remaining == {"doc1", "keep1", "keep2", "new-prov", "verified", "proj"}
+    assert graph.conn.execute("SELECT source, target, edge_type FROM edges ORDER BY ALL").fetchall() == [
+        ("doc1", "keep1", "MENTIONS"), ("doc1", "keep2", "MENTIONS"), ("keep1", "keep2", "KNOWS"),
+    ]
+    for table in ("node_names", "node_context", "node_terms"):
+        ids = {row[0] for row in graph.conn.execute(f"SELECT DISTINCT node_id FROM {table}").fetchall()}
+        assert not ids & {"doc2", "only-doc2", "old-prov", "one-link"}, table
+    assert graph.find_node_by_name("Person", "old-prov alias", fuzzy=False) is None
+    assert graph.check_graph_stats() == {}
+
+    # En andra körning har bara de behållna att rapportera
+    again = collect(graph)
+    assert again["removed_nodes"] == 0 and again["dangling_edges"] == {}
+    assert [o["id"] for o in again["orphans"]] == ["new-prov", "verified"]
+
+
+def test_without_lake_ids_documents_are_kept(graph):
+    report = graph.collect_garbage(POLICIES, now=NOW)
+    assert report["documents_without_source"] == []
+    assert graph.get_node("doc2") is not None
+    assert "only-doc2" not in {o["id"] for o in report["orphans"]}
+
+
+def test_compact_rewrites_file_and_keeps_data(graph):
+    graph.upsert_nodes_bulk([{"id": f"fyll{i}", "type": "Person", "properties": {"name": "x" * 200}}
+                             for i in range(5000)])
+    graph.conn.execute("CHECKPOINT")
+    graph.delete_nodes_bulk([f"fyll{i}" for i in range(5000)])
+    before = snapshot(graph)
+    indexes = graph.conn.execute("SELECT index_name FROM duckdb_indexes() ORDER BY ALL").fetchall()
+
+    result = graph.compact(force=True)
+    assert result["rewritten"] and result["free_ratio"] > 0
+    assert result["bytes_after"] < result["bytes_before"]
+    assert snapshot(graph) == before
+    assert graph.conn.execute("SELECT index_name FROM duckdb_indexes() ORDER BY ALL").fetchall() == indexes
+
+    # Anslutningen är fortfarande skrivbar och sekvenserna fortsätter
+    graph.upsert_node("efter", "Person", properties={"node_context": [{"text": "ny", "origin": "t"}]})
+    assert graph.get_node_context(["efter"]) == {"efter": [{"text": "ny", "origin": "t"}]}
+    assert graph.check_graph_stats() == {}
+
+    assert graph.compact()["rewritten"] is False
+    with graph._transaction():
+        with pytest.raises(RuntimeError, match="HARDFAIL"):
+            graph.compact()
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+test_graph_merge.py - Sammanslagning av noder (merge_many).
+
+Verifierar att kedjor löses upp i förväg ((B, A) följt av (C, B) slår ihop
+både A och B in i C), att kanter flyttas till det slutliga målet utan
+dubbletter och self-loops (målets befintliga kant vinner), att alias,
+gamla ID och kontext följer med, att ogiltiga par hoppas över och att
+graph_stats stämmer efteråt.
+
+Kör: python tools/test_graph_merge.py   (eller pytest tools/test_graph_merge.py)
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.utils.graph_service import GraphService
+
+
+@pytest.fixture
+def graph(tmp_path):
+    graph = GraphService(str(tmp_path / "graph.duckdb"))
+    graph.upsert_nodes_bulk([
+        {"id": "A", "type": "Person", "aliases": ["Anders"], "properties": {
+            "name": "Anders", "role": "CTO",
+            "node_context": [{"text": "Leder plattformen", "origin": "d1"}, {"text": "Delad", "origin": "d0"}]}},
+        {"id": "B", "type": "Person", "aliases": ["Berit"], "properties": {
+            "name": "Berit", "node_context": [{"text": "Delad", "origin": "d0"}, {"text": "Äger budgeten", "origin": "d2"}]}},
+        {"id": "C", "type": "Person", "aliases": ["Cecilia"], "properties": {
+            "name": "Cecilia", "node_context": [{"text": "Ny i teamet", "origin": "d3"}]}},
+        {"id": "D", "type": "Document", "properties": {"name": "möte.txt"}},
+        {"id": "E", "type": "Project", "properties": {"name": "Plattform"}},
+    ])
+    graph.upsert_edges_bulk([
+        {"source": "D", "target": "A", "edge_type": "MENTIONS"},
+        {"source": "D", "target": "B", "edge_type": "MENTIONS"},
+        {"source": "A", "target": "B", "edge_type": "KNOWS"},   # Blir self-loop
+        {"source": "B", "target": "C", "edge_type": "KNOWS"},   # Blir self-loop
+        {"source": "A", "target": "E", "edge_type": "WORKS_ON", "properties": {"confidence": 0.1}},
+        {"source": "C", "target": "E", "edge_type": "WORKS_ON", "properties": {"confidence": 0.9}},
+        {"source": "E", "target": "B", "edge_type": "OWNED_BY"},
+    ])
+    yield graph
+    graph.close()
+
+
+def all_edges(graph: GraphService) -> list:
+    return graph.conn.execute("SELECT source, target, edge_type FROM edges ORDER BY ALL").fetchall()
+
+
+def test_chain_resolves_to_final_target(graph):
+    results = graph.merge_many([("B", "A"), ("C", "B")])
+
+    assert [(r["source"], r["merged_into"], r["status"]) for r in results] == [
+        ("A", "C", "merged"), ("B", "C", "merged")
+    ]
+    assert graph.get_node("A") is None and graph.get_node("B") is None
+
+    target = graph.get_node("C")
+    assert {"Cecilia", "Anders", "Berit", "A", "B"} <= set(target["aliases"])
+    assert target["properties"]["name"] == "Cecilia"   # Målets skalärer vinner
+    assert target["properties"]["role"] == "CTO"       # Saknade kopieras från källan
+    for name in ("Anders", "Berit", "A", "B"):
+        assert graph.find_node_by_name("Person", name, fuzzy=False) == "C"
+
+
+def test_edges_move_without_duplicates_or_self_loops(graph):
+    graph.merge_many([("B", "A"), ("C", "B")])
+
+    assert all_edges(graph) == [
+        ("C", "E", "WORKS_ON"), ("D", "C", "MENTIONS"), ("E", "C", "OWNED_BY"),
+    ]
+    # Målets befintliga kant vinner över den flyttade
+    assert graph.get_edges_from("C")[0]["properties"] == {"confidence": 0.9}
+    assert graph.conn.execute(
+        "SELECT COUNT(*) FROM edges WHERE source IN ('A', 'B') OR target IN ('A', 'B')"
+    ).fetchone()[0] == 0
+
+
+def test_context_moves_and_is_deduplicated(graph):
+    graph.merge_many([("B", "A"), ("C", "B")])
+
+    contexts = graph.get_node_context(["A", "B", "C"])
+    assert set(contexts) == {"C"}
+    entries = [(e["text"], e["origin"]) for e in contexts["C"]]
+    assert sorted(entries) == sorted([
+        ("Ny i teamet", "d3"), ("Leder plattformen", "d1"), ("Delad", "d0"), ("Äger budgeten", "d2"),
+    ])
+    assert graph.search_nodes("budgeten")[0]["id"] == "C"
+
+
+def test_invalid_pairs_are_skipped(graph):
+    results = graph.merge_many([
+        ("B", "A"), ("A", "B"), ("E", "A"), ("C", "saknas"),
+    ])
+    assert [(r["status"], r["reason"]) for r in results] == [
+        ("merged", None), ("skipped", "cycle"), ("skipped", "source_already_merged"), ("skipped", "node_missing"),
+    ]
+    assert graph.get_node("B") is not None and graph.get_node("E") is not None
+    assert graph.merge_many([("C", "C")])[0]["reason"] == "cycle"
+
+
+def test_stats_consistent_after_merge(graph):
+    graph.merge_many([("B", "A"), ("C", "B")])
+    assert graph.check_graph_stats() == {}
+    stats = graph.get_stats()
+    assert (stats["total_nodes"], stats["total_edges"]) == (3, 3)
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
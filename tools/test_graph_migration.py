@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+test_graph_migration.py - Schemamigreringar av grafdatabasen.
+
+Verifierar:
+- att en graf utan de typade kolumnerna (TYPED_COLUMNS) får dem tillagda
+  och ifyllda från properties när den öppnas skrivbar, och att kolumnerna
+  hålls i synk med properties-JSON vid skrivningar
+- att en graf med det ursprungliga TEXT-schemat vägras med HARDFAIL och,
+  efter tools/migrate_graph_native_types.py, öppnas med properties,
+  aliases och kanter bevarade (trasig JSON blir []/{})
+- att node_context i properties-JSON (grafer före node_context-tabellen)
+  flyttas till tabellen i ordning, med origin, när grafen öppnas skrivbar
+
+Kör: python tools/test_graph_migration.py   (eller pytest tools/test_graph_migration.py)
+"""
+
+import json
+import os
+import sys
+
+import duckdb
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import migrate_graph_native_types
+from services.utils.graph_service import GraphService
+
+NODES = [
+    ("p1", "Person", ["Anna A"], {
+        "name": "Anna", "status": "VERIFIED", "confidence": 0.9, "retrieved_times": 3,
+        "last_retrieved_at": "2025-01-02T03:04:05", "last_refined_at": "never",
+        "created_at": "2024-12-01T00:00:00", "role": "CTO",
+    }),
+    ("o1", "Organization", [], {"name": "Acme AB", "confidence": "inte ett tal"}),
+]
+
+
+def typed_mismatches(graph: GraphService) -> list:
+    """Noder vars typade kolumner avviker från värdena härledda ur properties."""
+    columns = [column for column, _ in GraphService.TYPED_COLUMNS]
+    checks = " OR ".join(
+        f"{column} IS DISTINCT FROM {expr}"
+        for column, expr in zip(columns, GraphService._typed_column_exprs())
+    )
+    return [row[0] for row in graph.conn.execute(f"SELECT id FROM nodes WHERE {checks}").fetchall()]
+
+
+def create_untyped_graph(db_path: str):
+    """Graf med native typer men utan typade kolumner (före TYPED_COLUMNS)."""
+    con = duckdb.connect(db_path)
+    con.execute("""
+        CREATE TABLE nodes (id TEXT PRIMARY KEY, type TEXT NOT NULL, aliases VARCHAR[], properties JSON)
+    """)
+    con.execute("""
+        CREATE TABLE edges (source TEXT NOT NULL, target TEXT NOT NULL, edge_type TEXT NOT NULL,
+                            properties JSON, PRIMARY KEY (source, target, edge_type))
+    """)
+    for node_id, node_type, aliases, props in NODES:
+        con.execute("INSERT INTO nodes VALUES (?, ?, ?, ?)", [node_id, node_type, aliases, json.dumps(props)])
+    con.execute("INSERT INTO edges VALUES ('p1', 'o1', 'WORKS_AT', '{}')")
+    con.close()
+
+
+def create_baseline_graph(db_path: str, nodes: list = NODES):
+    """Graf med det ursprungliga schemat: aliases och properties som JSON-text."""
+    con = duckdb.connect(db_path)
+    con.execute("CREATE TABLE nodes (id TEXT PRIMARY KEY, type TEXT NOT NULL, aliases TEXT, properties TEXT)")
+    con.execute("""
+        CREATE TABLE edges (source TEXT NOT NULL, target TEXT NOT NULL, edge_type TEXT NOT NULL,
+                            properties TEXT, PRIMARY KEY (source, target, edge_type))
+    """)
+    con.execute("CREATE INDEX idx_nodes_type ON nodes(type)")
+    con.execute("CREATE INDEX idx_edges_source ON edges(source)")
+    con.execute("CREATE INDEX idx_edges_target ON edges(target)")
+    for node_id, node_type, aliases, props in nodes:
+        con.execute("INSERT INTO nodes VALUES (?, ?, ?, ?)",
+                    [node_id, node_type, json.dumps(aliases, ensure_ascii=False), json.dumps(props, ensure_ascii=False)])
+    con.execute("""INSERT INTO edges VALUES ('p1', 'o1', 'WORKS_AT', '{"confidence": 0.8}')""")
+    con.close()
+
+
+def migrate_baseline(db_path: str) -> dict:
+    """Kör migreringsverktyget (utan backup-steget) och returnera dess statistik."""
+    con = duckdb.connect(db_path)
+    try:
+        stats = migrate_graph_native_types.inspect(con)
+        migrate_graph_native_types.migrate(con, stats)
+    finally:
+        con.close()
+    return stats
+
+
+def test_typed_columns_added_and_backfilled(tmp_path):
+    db_path = str(tmp_path / "graph.duckdb")
+    create_untyped_graph(db_path)
+
+    with GraphService(db_path) as graph:
+        assert typed_mismatches(graph) == []
+        row = graph.conn.execute("""
+            SELECT name, status, confidence, retrieved_times, last_retrieved_at, last_refined_at, created_at
+            FROM nodes WHERE id = 'p1'
+        """).fetchone()
+        assert row[:4] == ("Anna", "VERIFIED", 0.9, 3)
+        assert str(row[4]) == "2025-01-02 03:04:05"
+        assert row[5] is None  # 'never' lagras som NULL
+        assert str(row[6]) == "2024-12-01 00:00:00"
+        # Värden som inte kan castas blir NULL; properties är oförändrad
+        assert graph.conn.execute("SELECT confidence FROM nodes WHERE id = 'o1'").fetchone()[0] is None
+        assert graph.get_node("o1")["properties"]["confidence"] == "inte ett tal"
+        assert graph.get_node("p1")["properties"] == NODES[0][3]
+        indexes = {r[0] for r in graph.conn.execute("SELECT index_name FROM duckdb_indexes()").fetchall()}
+        assert {"idx_nodes_name", "idx_nodes_status", "idx_nodes_last_refined"} <= indexes
+
+
+def test_typed_columns_follow_writes(tmp_path):
+    with GraphService(str(tmp_path / "graph.duckdb")) as graph:
+        graph.upsert_node("p1", "Person", properties={"name": "Anna", "status": "PROVISIONAL"})
+        graph.upsert_nodes_bulk([{"id": "p2", "type": "Person", "properties": {"name": "Bo", "confidence": 0.3}},
+                                 {"id": "p1", "type": "Person", "properties": {"status": "VERIFIED"}}])
+        graph.register_usage(["p1", "p1", "p2"])
+        graph.merge_nodes("p1", "p2")
+        graph.rename_node("p1", "p-anna")
+
+        assert typed_mismatches(graph) == []
+        row = graph.conn.execute(
+            "SELECT name, status, retrieved_times FROM nodes WHERE id = 'p-anna'"
+        ).fetchone()
+        assert row == ("Anna", "VERIFIED", 2)
+
+
+def test_baseline_schema_is_refused(tmp_path):
+    db_path = str(tmp_path / "graph.duckdb")
+    create_baseline_graph(db_path)
+    with pytest.raises(RuntimeError, match="HARDFAIL.*migrate_graph_native_types"):
+        GraphService(db_path)
+    with pytest.raises(RuntimeError, match="HARDFAIL"):
+        GraphService(db_path, read_only=True)
+
+
+def test_baseline_schema_migration_preserves_data(tmp_path):
+    db_path = str(tmp_path / "graph.duckdb")
+    create_baseline_graph(db_path, NODES + [("x1", "Person", [], {"name": "Trasig"})])
+    con = duckdb.connect(db_path)
+    con.execute("""UPDATE nodes SET aliases = 'inte json', properties = '{"name": ' WHERE id = 'x1'""")
+    con.close()
+
+    stats = migrate_baseline(db_path)
+    assert stats["nodes_legacy"] and stats["edges_legacy"]
+    assert (stats["nodes"], stats["edges"]) == (3, 1)
+    assert (stats["bad_aliases"], stats["bad_node_properties"], stats["bad_edge_properties"]) == (1, 1, 0)
+
+    with GraphService(db_path) as graph:
+        types = dict(graph.conn.execute(
+            "SELECT column_name, data_type FROM information_schema.columns WHERE table_name = 'nodes'"
+        ).fetchall())
+        assert (types["aliases"], types["properties"]) == ("VARCHAR[]", "JSON")
+
+        for node_id, node_type, aliases, props in NODES:
+            node = graph.get_node(node_id)
+            assert (node["type"], node["aliases"], node["properties"]) == (node_type, aliases, props)
+        assert (graph.get_node("x1")["aliases"], graph.get_node("x1")["properties"]) == ([], {})
+        assert graph.get_edges_from("p1")[0]["properties"] == {"confidence": 0.8}
+
+        assert typed_mismatches(graph) == []
+        assert graph.find_node_by_name("Person", "Anna A", fuzzy=False) == "p1"
+        assert graph.check_graph_stats() == {}
+        stats_after = graph.get_stats()
+        assert (stats_after["total_nodes"], stats_after["total_edges"]) == (3, 1)
+
+    # En andra körning har inget att göra
+    con = duckdb.connect(db_path)
+    try:
+        again = migrate_graph_native_types.inspect(con)
+    finally:
+        con.close()
+    assert not again["nodes_legacy"] and not again["edges_legacy"] and again["missing_typed_columns"] == []
+
+
+def test_node_context_moves_from_properties_to_table(tmp_path):
+    db_path = str(tmp_path / "graph.duckdb")
+    context = [{"text": "Leder plattformen", "origin": "d1"}, {"text": "Ny roll", "origin": "d2"}, "Bara text"]
+    create_baseline_graph(db_path, [
+        ("p1", "Person", ["Anna A"], {"name": "Anna", "created_at": "2024-12-01T00:00:00",
+                                      "node_context": context}),
+        ("o1", "Organization", [], {"name": "Acme AB", "node_context": []}),
+    ])
+    migrate_baseline(db_path)
+
+    # Read-only före migreringen: kontexten ligger kvar i properties
+    with GraphService(db_path, read_only=True) as reader:
+        assert reader.get_node("p1", with_context=True)["properties"]["node_context"] == context
+
+    with GraphService(db_path) as graph:
+        assert graph.get_node_context(["p1", "o1"]) == {"p1": [
+            {"text": "Leder plattformen", "origin": "d1"},
+            {"text": "Ny roll", "origin": "d2"},
+            {"text": "Bara text", "origin": None},
+        ]}
+        created = graph.conn.execute("SELECT DISTINCT created_at FROM node_context").fetchall()
+        assert [str(row[0]) for row in created] == ["2024-12-01 00:00:00"]
+        # Nyckeln tas bort ur properties; övriga fält orörda
+        raw = json.loads(graph.conn.execute("SELECT properties FROM nodes WHERE id = 'p1'").fetchone()[0])
+        assert raw == {"name": "Anna", "created_at": "2024-12-01T00:00:00"}
+        assert "node_context" not in json.loads(
+            graph.conn.execute("SELECT properties FROM nodes WHERE id = 'o1'").fetchone()[0]
+        )
+        assert graph.get_node("p1", with_context=True)["properties"]["node_context"][0]["origin"] == "d1"
+        assert graph.search_nodes("plattformen")[0]["id"] == "p1"
+
+    # En andra öppning flyttar inget mer
+    with GraphService(db_path) as graph:
+        assert graph.conn.execute("SELECT COUNT(*) FROM node_context").fetchone()[0] == 3
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
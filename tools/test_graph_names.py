@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+test_graph_names.py - Namnindexet node_names (find_node_by_name).
+
+Verifierar att namn och alias slås upp exakt via node_names och att
+indexet följer med när noder byter namn, slås ihop, byter typ och
+raderas, samt att en graf utan node_names får indexet byggt när den
+öppnas skrivbar.
+
+Kör: python tools/test_graph_names.py   (eller pytest tools/test_graph_names.py)
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.utils.graph_service import GraphService
+
+
+@pytest.fixture
+def graph(tmp_path):
+    graph = GraphService(str(tmp_path / "graph.duckdb"))
+    graph.upsert_nodes_bulk([
+        {"id": "p-anna", "type": "Person", "aliases": ["Anna A", "anna.andersson@example.com"],
+         "properties": {"name": "Anna Andersson"}},
+        {"id": "p-anna2", "type": "Person", "aliases": ["Annie"], "properties": {"name": "A. Andersson"}},
+        {"id": "o-acme", "type": "Organization", "properties": {"name": "Acme AB"}},
+    ])
+    yield graph
+    graph.close()
+
+
+def test_exact_lookup_by_name_and_alias(graph):
+    assert graph.find_node_by_name("Person", "Anna Andersson", fuzzy=False) == "p-anna"
+    assert graph.find_node_by_name("Person", "  anna a ", fuzzy=False) == "p-anna"
+    assert graph.find_node_by_name("Person", "ANNA.ANDERSSON@example.com", fuzzy=False) == "p-anna"
+    # Typen filtreras: samma namn under annan typ matchar inte
+    assert graph.find_node_by_name("Organization", "Anna Andersson", fuzzy=False) is None
+    assert graph.find_node_by_name("Organization", "acme ab", fuzzy=False) == "o-acme"
+
+
+def test_aliases_follow_rename(graph):
+    graph.rename_node("p-anna", "p-anna-andersson")
+
+    assert graph.get_node("p-anna") is None
+    for name in ("Anna Andersson", "Anna A", "anna.andersson@example.com", "p-anna"):
+        assert graph.find_node_by_name("Person", name, fuzzy=False) == "p-anna-andersson"
+
+
+def test_aliases_follow_merge(graph):
+    graph.merge_nodes("p-anna", "p-anna2")
+
+    # Källans namn, alias och gamla ID pekar på målet; inga rader kvar för källan
+    for name in ("Anna Andersson", "Annie", "p-anna2", "Anna A"):
+        assert graph.find_node_by_name("Person", name, fuzzy=False) == "p-anna"
+    rows = graph.conn.execute("SELECT COUNT(*) FROM node_names WHERE node_id = 'p-anna2'").fetchone()
+    assert rows[0] == 0
+
+
+def test_index_follows_update_recategorize_and_delete(graph):
+    graph.upsert_node("o-acme", "Organization", aliases=["Acme"], properties={"name": "Acme Group"})
+    assert graph.find_node_by_name("Organization", "Acme Group", fuzzy=False) == "o-acme"
+    assert graph.find_node_by_name("Organization", "Acme", fuzzy=False) == "o-acme"
+    assert graph.find_node_by_name("Organization", "Acme AB", fuzzy=False) is None
+
+    graph.recategorize_node("o-acme", "Project")
+    assert graph.find_node_by_name("Organization", "Acme", fuzzy=False) is None
+    assert graph.find_node_by_name("Project", "Acme", fuzzy=False) == "o-acme"
+
+    graph.delete_node("o-acme")
+    assert graph.find_node_by_name("Project", "Acme", fuzzy=False) is None
+
+
+def test_fuzzy_lookup_sees_rename(graph):
+    assert graph.find_node_by_name("Person", "Anna Anderson") == "p-anna"
+    graph.rename_node("p-anna", "p-anna-andersson")
+    assert graph.find_node_by_name("Person", "Anna Anderson") == "p-anna-andersson"
+
+
+def test_missing_index_is_built_on_open(tmp_path):
+    db_path = str(tmp_path / "graph.duckdb")
+    with GraphService(db_path) as graph:
+        graph.upsert_nodes_bulk([{"id": "p1", "type": "Person", "aliases": ["Pelle"],
+                                  "properties": {"name": "Per Persson"}}])
+        graph.conn.execute("DROP TABLE node_names")
+
+    with GraphService(db_path, read_only=True) as reader:
+        # Read-only utan index: skanning ger samma svar
+        assert reader.find_node_by_name("Person", "pelle", fuzzy=False) == "p1"
+
+    with GraphService(db_path) as graph:
+        assert graph.conn.execute("SELECT COUNT(*) FROM node_names").fetchone()[0] == 2
+        assert graph.find_node_by_name("Person", "Per Persson", fuzzy=False) == "p1"
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+test_graph_pool.py - Processgemensam read-only anslutning (GraphPool).
+
+Verifierar att en anslutning mot en publicerad snapshot (med sin
+CSR-cache) behålls oavsett idle_ttl/max_age tills en nyare generation
+publicerats, och att en anslutning mot den levande filen stängs efter
+idle_ttl och öppnas om efter max_age så att skrivare släpps in.
+
+Kör: python tools/test_graph_pool.py   (eller pytest tools/test_graph_pool.py)
+"""
+
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.utils.graph_pool import GraphPool
+from services.utils.graph_service import GraphService
+from services.utils.graph_snapshot import publish_snapshot
+
+IDLE_TTL = 0.1
+MAX_AGE = 0.3
+
+
+def write(graph: GraphService, node_id: str):
+    graph.upsert_graph_bulk([{"id": node_id, "type": "Person"}],
+                            [{"source": "hub", "target": node_id, "edge_type": "KNOWS"}])
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "graph.duckdb")
+    with GraphService(path) as graph:
+        graph.upsert_node("hub", "Person")
+        write(graph, "a")
+    return path
+
+
+def make_pool(db_path: str) -> GraphPool:
+    # Ingen resource_lock: testet ska inte röra den delade låskatalogen
+    return GraphPool(db_path, idle_ttl=IDLE_TTL, max_age=MAX_AGE, lock_resource=None)
+
+
+def test_snapshot_connection_outlives_idle_ttl_and_max_age(db_path):
+    with GraphService(db_path) as writer:
+        publish_snapshot(writer)
+        pool = make_pool(db_path)
+        try:
+            with pool.acquire() as graph:
+                first = graph
+                assert graph.get_node_degree("hub") == 1
+                csr = graph.adjacency()
+
+            time.sleep(MAX_AGE + 3 * IDLE_TTL)
+            assert pool._graph is first
+            with pool.acquire() as graph:
+                assert graph is first
+                assert graph._adjacency is csr    # CSR byggs inte om
+
+            # Skrivningar i den levande filen syns först med nästa generation
+            write(writer, "b")
+            with pool.acquire() as graph:
+                assert graph is first and graph.get_node("b") is None
+            publish_snapshot(writer)
+            with pool.acquire() as graph:
+                assert graph is not first
+                assert pool._generation == 2
+                assert graph.get_node_degree("hub") == 2
+        finally:
+            pool.close()
+
+
+def test_live_connection_is_closed_when_idle(db_path):
+    pool = make_pool(db_path)
+    try:
+        with pool.acquire() as graph:
+            assert pool._generation is None
+            assert graph.get_node("a") is not None
+
+        deadline = time.monotonic() + 5
+        while pool._graph is not None and time.monotonic() < deadline:
+            time.sleep(IDLE_TTL / 2)
+        assert pool._graph is None
+
+        # Filen är släppt: en skrivare kan öppna den
+        with GraphService(db_path) as writer:
+            write(writer, "b")
+        with pool.acquire() as graph:
+            assert graph.get_node("b") is not None
+    finally:
+        pool.close()
+
+
+def test_live_connection_is_reopened_after_max_age(db_path):
+    pool = make_pool(db_path)
+    try:
+        with pool.acquire() as graph:
+            first = graph
+        # Lån tätare än idle_ttl: bara max_age stänger anslutningen
+        deadline = time.monotonic() + MAX_AGE + IDLE_TTL
+        while time.monotonic() < deadline:
+            with pool.acquire() as graph:
+                current = graph
+            time.sleep(IDLE_TTL / 4)
+        assert current is not first
+    finally:
+        pool.close()
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
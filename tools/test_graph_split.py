@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+test_graph_split.py - Uppdelning av en nod (split_node).
+
+Verifierar att split_node kopierar originalets in- och utgående kanter
+till varje ny nod (utan self-loops, befintliga kanter behålls), fördelar
+kontexten enligt context_indices (flyttas till första klustret, kopieras
+till övriga, otilldelad kontext tas bort) och tar bort originalet med
+dess namn och kanter, samt att graph_stats stämmer efteråt.
+
+Kör: python tools/test_graph_split.py   (eller pytest tools/test_graph_split.py)
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.utils.graph_service import GraphService
+
+CONTEXT = [
+    {"text": "Säljchef på Acme", "origin": "d1"},
+    {"text": "Spelar fotboll", "origin": "d2"},
+    {"text": "Bor i Malmö", "origin": "d3"},
+    {"text": "Okänd kontext", "origin": "d4"},
+]
+
+
+@pytest.fixture
+def graph(tmp_path):
+    graph = GraphService(str(tmp_path / "graph.duckdb"))
+    graph.upsert_nodes_bulk([
+        {"id": "Johan", "type": "Person", "aliases": ["J"],
+         "properties": {"name": "Johan", "role": "Sälj", "node_context": CONTEXT}},
+        {"id": "Johan S", "type": "Person", "properties": {"name": "Johan S"}},
+        {"id": "acme", "type": "Organization", "properties": {"name": "Acme"}},
+        {"id": "doc", "type": "Document", "properties": {"name": "möte.txt"}},
+    ])
+    graph.upsert_edges_bulk([
+        {"source": "Johan", "target": "acme", "edge_type": "WORKS_AT", "properties": {"confidence": 0.7}},
+        {"source": "doc", "target": "Johan", "edge_type": "MENTIONS"},
+        {"source": "Johan", "target": "Johan S", "edge_type": "KNOWS"},      # Blir self-loop för Johan S
+        {"source": "Johan S", "target": "acme", "edge_type": "WORKS_AT", "properties": {"confidence": 0.2}},
+    ])
+    yield graph
+    graph.close()
+
+
+SPLIT_MAP = [
+    {"name": "Johan S", "context_indices": [0, 2]},
+    {"name": "Johan F", "context_indices": [1, 2, 99]},   # 2 delas, 99 finns inte
+]
+
+
+def test_edges_are_copied_to_every_new_node(graph):
+    graph.split_node("Johan", SPLIT_MAP)
+
+    edges = graph.conn.execute("SELECT source, target, edge_type FROM edges ORDER BY ALL").fetchall()
+    assert edges == [
+        ("Johan F", "Johan S", "KNOWS"),
+        ("Johan F", "acme", "WORKS_AT"),
+        ("Johan S", "acme", "WORKS_AT"),
+        ("doc", "Johan F", "MENTIONS"),
+        ("doc", "Johan S", "MENTIONS"),
+    ]
+    # Befintlig kant behålls, kopierad kant får originalets properties
+    works_at = {e["source"]: e["properties"] for e in graph.get_edges_to("acme")}
+    assert works_at == {"Johan S": {"confidence": 0.2}, "Johan F": {"confidence": 0.7}}
+
+
+def test_context_is_distributed(graph):
+    graph.split_node("Johan", SPLIT_MAP)
+
+    contexts = graph.get_node_context(["Johan", "Johan S", "Johan F"])
+    assert set(contexts) == {"Johan S", "Johan F"}
+    assert [e["text"] for e in contexts["Johan S"]] == ["Säljchef på Acme", "Bor i Malmö"]
+    assert [e["text"] for e in contexts["Johan F"]] == ["Spelar fotboll", "Bor i Malmö"]
+    # Otilldelad kontext försvinner med originalet
+    assert graph.conn.execute("SELECT COUNT(*) FROM node_context").fetchone()[0] == 4
+    assert graph.search_nodes("fotboll")[0]["id"] == "Johan F"
+
+
+def test_original_is_removed(graph):
+    graph.split_node("Johan", SPLIT_MAP)
+
+    assert graph.get_node("Johan") is None
+    assert graph.find_node_by_name("Person", "J", fuzzy=False) is None
+    new = graph.get_node("Johan F")
+    assert (new["type"], new["properties"]["role"]) == ("Person", "Sälj")
+    assert graph.check_graph_stats() == {}
+    stats = graph.get_stats()
+    assert (stats["total_nodes"], stats["total_edges"]) == (4, 5)
+
+
+def test_missing_node_is_noop(graph):
+    graph.split_node("saknas", SPLIT_MAP)
+    assert graph.get_node("Johan F") is None
+    assert graph.check_graph_stats() == {}
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+test_graph_stats.py - Underhållna räknare per nod- och kanttyp (graph_stats).
+
+Verifierar att check_graph_stats() är tom (graph_stats == COUNT(*) per typ)
+efter varje skrivande operation: upsert (enstaka och bulk, även typbyte och
+dubbletter i batchen), merge, rename, split, recategorize, delete av kant
+och nod (enstaka och bulk), skräpsamling och en återrullad transaktion,
+samt att rebuild_graph_stats reparerar avvikande räknare.
+
+Kör: python tools/test_graph_stats.py   (eller pytest tools/test_graph_stats.py)
+"""
+
+import os
+import random
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.utils.graph_service import GraphService
+
+
+def actual_counts(graph: GraphService) -> tuple:
+    return tuple(graph.conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0] for table in ("nodes", "edges"))
+
+
+def assert_consistent(graph: GraphService):
+    assert graph.check_graph_stats() == {}
+    stats = graph.get_stats()
+    assert (stats["total_nodes"], stats["total_edges"]) == actual_counts(graph)
+
+
+@pytest.fixture
+def graph(tmp_path):
+    graph = GraphService(str(tmp_path / "graph.duckdb"))
+    graph.upsert_nodes_bulk(
+        [{"id": f"p{i}", "type": "Person", "properties": {"name": f"Person {i}"}} for i in range(8)] +
+        [{"id": "o1", "type": "Organization"}, {"id": "doc1", "type": "Document"}, {"id": "doc2", "type": "Document"}]
+    )
+    graph.upsert_edges_bulk(
+        [{"source": "doc1", "target": f"p{i}", "edge_type": "MENTIONS"} for i in range(8)] +
+        [{"source": f"p{i}", "target": f"p{(i + 1) % 8}", "edge_type": "KNOWS"} for i in range(8)] +
+        [{"source": f"p{i}", "target": "o1", "edge_type": "WORKS_AT"} for i in range(0, 8, 2)]
+    )
+    assert_consistent(graph)
+    yield graph
+    graph.close()
+
+
+STEPS = [
+    ("upsert_node ny", lambda g: g.upsert_node("p8", "Person")),
+    ("upsert_node byter typ", lambda g: g.upsert_node("p8", "Project")),
+    ("upsert_nodes_bulk med dubblett", lambda g: g.upsert_nodes_bulk([
+        {"id": "p9", "type": "Person"}, {"id": "p9", "type": "Person"}, {"id": "o1", "type": "Organization"}])),
+    ("upsert_edge ny och befintlig", lambda g: (g.upsert_edge("p8", "p9", "KNOWS"), g.upsert_edge("p8", "p9", "KNOWS"))),
+    ("upsert_edges_bulk med dubblett", lambda g: g.upsert_edges_bulk([
+        {"source": "doc2", "target": "p1", "edge_type": "MENTIONS"},
+        {"source": "doc2", "target": "p1", "edge_type": "MENTIONS"},
+        {"source": "doc1", "target": "p1", "edge_type": "MENTIONS"}], overwrite=False)),
+    ("upsert_graph_bulk", lambda g: g.upsert_graph_bulk(
+        [{"id": "doc3", "type": "Document"}], [{"source": "doc3", "target": "p9", "edge_type": "MENTIONS"}])),
+    ("delete_edge", lambda g: (g.delete_edge("p8", "p9", "KNOWS"), g.delete_edge("p8", "p9", "KNOWS"))),
+    ("merge_many med kedja", lambda g: g.merge_many([("p0", "p1"), ("p2", "p0"), ("p3", "p3")])),
+    ("rename_node", lambda g: g.rename_node("p4", "p4-ny")),
+    ("rename_node till befintlig", lambda g: g.rename_node("p5", "p6")),
+    ("split_node", lambda g: g.split_node("p7", [{"name": "p7a"}, {"name": "p7b"}, {"name": "p6"}])),
+    ("recategorize_node", lambda g: g.recategorize_node("p9", "Organization")),
+    ("delete_node", lambda g: (g.delete_node("p6"), g.delete_node("saknas"))),
+    ("delete_nodes_bulk", lambda g: g.delete_nodes_bulk(["doc3", "p7a", "saknas"])),
+    ("dinglande kant", lambda g: g.upsert_edge("p2", "borta", "KNOWS")),
+    ("collect_garbage", lambda g: g.collect_garbage(
+        {"Person": {"min_connections_to_survive": 2, "max_days_as_provisional": 0}},
+        document_ids={"doc1"}, now=datetime.now() + timedelta(days=1))),
+]
+
+
+def test_stats_follow_every_write(graph):
+    for label, step in STEPS:
+        step(graph)
+        drift = graph.check_graph_stats()
+        assert drift == {}, f"{label}: {drift}"
+        stats = graph.get_stats()
+        assert (stats["total_nodes"], stats["total_edges"]) == actual_counts(graph), label
+
+
+def test_rolled_back_write_leaves_stats(graph):
+    before = graph.get_stats()
+    with pytest.raises(TypeError):
+        graph.upsert_graph_bulk([{"id": "ny", "type": "Person"}],
+                                [{"source": "ny", "target": "p1", "edge_type": "KNOWS",
+                                  "properties": {"x": object()}}])
+    assert graph.get_stats() == before
+    assert_consistent(graph)
+
+
+def test_random_writes(graph):
+    rng = random.Random(19)
+    ids = [f"r{i}" for i in range(30)]
+    types = ["Person", "Project", "Organization"]
+    for _ in range(60):
+        op = rng.random()
+        if op < 0.3:
+            graph.upsert_nodes_bulk([{"id": rng.choice(ids), "type": rng.choice(types)} for _ in range(5)])
+        elif op < 0.6:
+            graph.upsert_edges_bulk([{"source": rng.choice(ids), "target": rng.choice(ids),
+                                      "edge_type": rng.choice(["KNOWS", "WORKS_ON"])} for _ in range(8)])
+        elif op < 0.75:
+            graph.merge_many([(rng.choice(ids), rng.choice(ids)) for _ in range(3)])
+        elif op < 0.85:
+            graph.delete_node(rng.choice(ids))
+        else:
+            node_id = rng.choice(ids)
+            graph.split_node(node_id, [{"name": f"{node_id}-a"}, {"name": rng.choice(ids)}])
+    assert_consistent(graph)
+
+
+def test_rebuild_repairs_drift(graph):
+    graph.conn.execute("UPDATE graph_stats SET total = total + 5 WHERE kind = 'edge' AND name = 'KNOWS'")
+    graph.conn.execute("DELETE FROM graph_stats WHERE kind = 'node' AND name = 'Document'")
+    assert graph.check_graph_stats() == {("edge", "KNOWS"): (13, 8), ("node", "Document"): (0, 2)}
+
+    counts = graph.rebuild_graph_stats()
+    assert counts["edge"]["KNOWS"] == 8
+    assert_consistent(graph)
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+test_graph_subgraph.py - Flerstegstraversering (get_subgraph).
+
+Verifierar att get_subgraph begränsar djupet till SUBGRAPH_MAX_DEPTH och
+grannarna per nod till SUBGRAPH_FANOUT (lägsta id först), följer kanter i
+båda riktningar utan att fastna i cykler, filtrerar på kanttyp, och att
+den rekursiva CTE:n och CSR-cachen (adjacency_cache) ger samma noder,
+djup och kanter.
+
+Kör: python tools/test_graph_subgraph.py   (eller pytest tools/test_graph_subgraph.py)
+"""
+
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.utils.graph_service import GraphService
+
+CHAIN_LENGTH = 10
+HUB_DEGREE = GraphService.SUBGRAPH_FANOUT + 30
+
+
+def build_graph(graph: GraphService):
+    """Kedja c0 -> c9, hubb med HUB_DEGREE blad, en cykel och ett slumpat nät."""
+    nodes = [{"id": f"c{i}", "type": "Concept"} for i in range(CHAIN_LENGTH)]
+    nodes += [{"id": "hub", "type": "Document"}]
+    nodes += [{"id": f"leaf{i:03d}", "type": "Person"} for i in range(HUB_DEGREE)]
+    nodes += [{"id": f"r{i:02d}", "type": "Person" if i % 2 else "Project"} for i in range(60)]
+    edges = [{"source": f"c{i}", "target": f"c{i + 1}", "edge_type": "NEXT"} for i in range(CHAIN_LENGTH - 1)]
+    edges += [{"source": "hub", "target": f"leaf{i:03d}", "edge_type": "MENTIONS"} for i in range(HUB_DEGREE)]
+    edges += [{"source": "c3", "target": "c0", "edge_type": "NEXT"}]  # Cykel
+    rng = random.Random(7)
+    edge_types = ["KNOWS", "WORKS_ON", "MENTIONS"]
+    for _ in range(240):
+        a, b = rng.sample(range(60), 2)
+        edges.append({"source": f"r{a:02d}", "target": f"r{b:02d}", "edge_type": rng.choice(edge_types)})
+    edges += [{"source": "r00", "target": "hub", "edge_type": "MENTIONS"},
+              {"source": "r01", "target": "c5", "edge_type": "KNOWS"},
+              {"source": "r02", "target": "saknad-nod", "edge_type": "KNOWS"}]  # Kantände utan nodrad
+    graph.upsert_graph_bulk(nodes, edges)
+
+
+@pytest.fixture(scope="module")
+def graphs(tmp_path_factory):
+    """(SQL-graf, CSR-graf) över samma fil."""
+    db_path = str(tmp_path_factory.mktemp("graph") / "graph.duckdb")
+    with GraphService(db_path) as graph:
+        build_graph(graph)
+    sql = GraphService(db_path, read_only=True)
+    csr = GraphService(db_path, read_only=True, adjacency_cache=True)
+    csr.adjacency()
+    yield sql, csr
+    sql.close()
+    csr.close()
+
+
+def summary(result: dict) -> tuple:
+    nodes = [(n["id"], n["depth"]) for n in result["nodes"]]
+    edges = sorted((e["source"], e["target"], e["type"]) for e in result["edges"])
+    return nodes, edges
+
+
+def test_depth_is_capped(graphs):
+    sql, _ = graphs
+    result = sql.get_subgraph(["c9"], depth=100, edge_types=["NEXT"])
+    depths = {n["id"]: n["depth"] for n in result["nodes"]}
+    assert max(depths.values()) == GraphService.SUBGRAPH_MAX_DEPTH
+    assert depths == {f"c{9 - d}": d for d in range(GraphService.SUBGRAPH_MAX_DEPTH + 1)}
+
+
+def test_fanout_is_capped(graphs):
+    sql, _ = graphs
+    result = sql.get_subgraph(["hub"], depth=1, edge_types=["MENTIONS"], limit=1000)
+    # Lägsta id först över båda riktningarna: bladen före den inkommande r00
+    assert [n["id"] for n in result["nodes"]] == (
+        ["hub"] + [f"leaf{i:03d}" for i in range(GraphService.SUBGRAPH_FANOUT)]
+    )
+
+    narrow = sql.get_subgraph(["r00"], depth=2, fanout=3, limit=1000)
+    hub_children = [n["id"] for n in narrow["nodes"] if n["id"].startswith("leaf")]
+    assert hub_children == ["leaf000", "leaf001", "leaf002"]
+
+
+def test_cycles_both_directions_and_edges(graphs):
+    sql, _ = graphs
+    result = sql.get_subgraph(["c0"], depth=2, edge_types=["NEXT"])
+    assert [(n["id"], n["depth"]) for n in result["nodes"]] == [
+        ("c0", 0), ("c1", 1), ("c3", 1), ("c2", 2), ("c4", 2)
+    ]
+    # Alla kanter mellan de returnerade noderna, inga andra
+    assert summary(result)[1] == [
+        ("c0", "c1", "NEXT"), ("c1", "c2", "NEXT"), ("c2", "c3", "NEXT"), ("c3", "c0", "NEXT"), ("c3", "c4", "NEXT")
+    ]
+
+
+def test_limit_and_missing_seeds(graphs):
+    sql, _ = graphs
+    result = sql.get_subgraph(["r05"], depth=3, limit=7)
+    assert len(result["nodes"]) == 7
+    assert [n["depth"] for n in result["nodes"]] == sorted(n["depth"] for n in result["nodes"])
+    assert sql.get_subgraph(["finns-inte"], depth=2) == {"nodes": [], "edges": []}
+    assert sql.get_subgraph([], depth=2) == {"nodes": [], "edges": []}
+    ids = [n["id"] for n in sql.get_subgraph(["r02"], depth=1, limit=1000)["nodes"]]
+    assert "saknad-nod" not in ids
+
+
+@pytest.mark.parametrize("seeds, depth, edge_types, fanout, limit", [
+    (["c0"], 4, None, None, 100),
+    (["hub"], 2, None, None, 1000),
+    (["hub"], 3, ["MENTIONS"], 7, 1000),
+    (["r00", "r10"], 3, None, 3, 1000),
+    (["r05"], 4, ["KNOWS", "WORKS_ON"], None, 1000),
+    (["r07", "c5"], 2, ["KNOWS"], 2, 20),
+    (["r02"], 1, None, None, 1000),
+])
+def test_cte_and_adjacency_agree(graphs, seeds, depth, edge_types, fanout, limit):
+    sql, csr = graphs
+    expected = sql.get_subgraph(seeds, depth=depth, edge_types=edge_types, fanout=fanout, limit=limit)
+    actual = csr.get_subgraph(seeds, depth=depth, edge_types=edge_types, fanout=fanout, limit=limit)
+    assert expected["nodes"]
+    assert summary(actual) == summary(expected)
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+test_graph_upsert.py - Bulk-upsert av noder och kanter (upsert_nodes_bulk, upsert_graph_bulk).
+
+Verifierar att upsert_nodes_bulk ger samma noder som upsert_node anropad
+en gång per nod (merge av properties, default-systemfält för nya noder,
+aliases=None behåller existerande), att existerande noder hämtas med EN
+fråga, och att upsert_graph_bulk skriver noder och kanter i en
+transaktion: misslyckas kanterna committas inga noder.
+
+Kör: python tools/test_graph_upsert.py   (eller pytest tools/test_graph_upsert.py)
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.utils.graph_service import GraphService
+
+# Systemfält som nya noder får (samma som upsert_node före bulk-API:t)
+DEFAULT_FIELDS = {
+    "created_at", "last_synced_at", "last_seen_at", "last_retrieved_at",
+    "retrieved_times", "last_refined_at", "status", "confidence",
+}
+TIMESTAMP_FIELDS = {"created_at", "last_synced_at", "last_seen_at", "last_retrieved_at"}
+
+
+class CountingConnection:
+    """Delegerar till en DuckDB-anslutning och sparar SQL för varje execute."""
+
+    def __init__(self, conn):
+        self._conn = conn
+        self.statements = []
+
+    def execute(self, sql, *args, **kwargs):
+        self.statements.append(sql)
+        return self._conn.execute(sql, *args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+# Existerande noder före batchen, sedan batchen (a två gånger: appliceras i ordning)
+SEED = [
+    {"id": "a", "type": "Person", "aliases": ["Anna A"],
+     "properties": {"name": "Anna", "status": "VERIFIED", "confidence": 0.9, "role": "CTO"}},
+    {"id": "b", "type": "Person", "properties": {"name": "Bo"}},
+]
+BATCH = [
+    {"id": "a", "type": "Person", "properties": {"name": "Anna", "confidence": 0.7}},
+    {"id": "c", "type": "Organization", "aliases": ["Acme"], "properties": {"name": "Acme AB"}},
+    {"id": "b", "type": "Person", "aliases": [], "properties": {"email": "bo@example.com"}},
+    {"id": "a", "type": "Person", "properties": {"team": "Plattform"}},
+]
+
+
+def comparable(node: dict) -> dict:
+    """Nod utan tidsstämplar (de sätts till nu vid skrivning)."""
+    props = {k: v for k, v in node["properties"].items() if k not in TIMESTAMP_FIELDS}
+    return {"id": node["id"], "type": node["type"], "aliases": node["aliases"], "properties": props}
+
+
+def seeded(tmp_path, name: str) -> GraphService:
+    graph = GraphService(str(tmp_path / name / "graph.duckdb"))
+    for node in SEED:
+        graph.upsert_node(node["id"], node["type"], node.get("aliases"), node["properties"])
+    return graph
+
+
+def test_bulk_matches_upsert_node(tmp_path):
+    with seeded(tmp_path, "single") as single, seeded(tmp_path, "bulk") as bulk:
+        for node in BATCH:
+            single.upsert_node(node["id"], node["type"], node.get("aliases"), node["properties"])
+        assert bulk.upsert_nodes_bulk(BATCH) == 3
+
+        for node_id in ("a", "b", "c"):
+            assert comparable(bulk.get_node(node_id)) == comparable(single.get_node(node_id))
+
+
+def test_bulk_merge_and_defaults(tmp_path):
+    with seeded(tmp_path, "bulk") as graph:
+        graph.upsert_nodes_bulk(BATCH)
+
+        a = graph.get_node("a")
+        # Existerande properties bevaras, nya nycklar skriver över, i batchordning
+        assert a["properties"]["status"] == "VERIFIED"
+        assert a["properties"]["confidence"] == 0.7
+        assert a["properties"]["role"] == "CTO"
+        assert a["properties"]["team"] == "Plattform"
+        assert a["aliases"] == ["Anna A"]  # aliases=None behåller existerande
+        assert graph.get_node("b")["aliases"] == []  # [] ersätter
+
+        c = graph.get_node("c")
+        assert DEFAULT_FIELDS <= set(c["properties"])
+        assert c["properties"]["status"] == "PROVISIONAL"
+        assert c["properties"]["confidence"] == 0.5
+        assert c["properties"]["retrieved_times"] == 0
+        assert c["properties"]["last_refined_at"] == "never"
+        assert c["properties"]["name"] == "Acme AB"
+
+
+def test_bulk_reads_existing_nodes_in_one_query(tmp_path):
+    with seeded(tmp_path, "bulk") as graph:
+        counting = CountingConnection(graph.conn)
+        graph.conn = counting
+        try:
+            graph.upsert_nodes_bulk(BATCH + [{"id": f"n{i}", "type": "Person"} for i in range(200)])
+        finally:
+            graph.conn = counting._conn
+        node_reads = [sql for sql in counting.statements
+                      if "FROM nodes WHERE id IN" in " ".join(sql.split())]
+        assert len(node_reads) == 1
+
+
+def test_graph_bulk_rolls_back_nodes_when_edges_fail(tmp_path):
+    with GraphService(str(tmp_path / "graph.duckdb")) as graph:
+        nodes = [{"id": "doc", "type": "Document", "properties": {"name": "doc.txt"}},
+                 {"id": "p", "type": "Person", "properties": {"name": "Per"}}]
+        bad_edges = [{"source": "doc", "target": "p", "edge_type": "MENTIONS",
+                      "properties": {"confidence": object()}}]  # Ej JSON-serialiserbar
+        with pytest.raises(TypeError):
+            graph.upsert_graph_bulk(nodes, bad_edges)
+        assert graph.get_node("doc") is None
+        assert graph.get_node("p") is None
+        assert graph.find_node_by_name("Person", "Per", fuzzy=False) is None
+
+        edges = [{"source": "doc", "target": "p", "edge_type": "MENTIONS", "properties": {"confidence": 0.8}}]
+        assert graph.upsert_graph_bulk(nodes, edges) == (2, 1)
+        assert [e["target"] for e in graph.get_edges_from("doc")] == ["p"]
+        assert graph.check_graph_stats() == {}
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+test_index_coverage.py - Punktuppslag på kanter och söktermer går via ART-index.
+
+Profilerar varje SQL-sats som GraphService punktuppslag kör (samma
+operatorträd som EXPLAIN ANALYZE) och kräver att stora tabeller (edges,
+nodes, node_terms, ...) läses med Index Scan, inte Sequential Scan.
+DuckDB väljer indexet bara när scanningen har ETT likhets-/IN-filter på
+den indexerade kolumnen (se GraphService, EDGE OPERATIONS), så ett extra
+filter i en fråga syns här som en sekventiell scanning.
+
+Mätning på större graf: tools/benchmarks/bench_index_coverage.py
+
+Kör: python tools/test_index_coverage.py   (eller pytest tools/test_index_coverage.py)
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.utils.graph_service import GraphService
+from tools.benchmarks.bench_graph_parquet import build_graph
+from tools.benchmarks.bench_index_coverage import LARGE_TABLES, ProfilingConnection, lookups
+
+NODES = 5000
+EDGES = 40000
+# En sekventiell scanning får läsa högst en vektor (små tabeller, enstaka segment)
+MAX_SCANNED_ROWS = 2048
+# Söktermernas postings; korpusstatistik och prefixexpansion är inga punktuppslag
+TERM_TABLES = {"node_terms", "node_context_terms"}
+EDGE_LOOKUPS = {
+    "get_edges_from", "get_edges_to", "get_neighbor_edges", "get_node_degree",
+    "get_related_unit_ids", "get_related_units", "upsert_edge", "delete_edge", "delete_node",
+}
+
+
+def search_lookups(graph: GraphService) -> list:
+    """Sökningar på sällsynta termer (exakt, prefix, kontext, ingen träff)."""
+    return [
+        ("search_nodes", lambda: graph.search_nodes("Zlatan")),
+        ("search_nodes(prefix)", lambda: graph.search_nodes("Ibrahim")),
+        ("search_nodes(context)", lambda: graph.search_nodes("vasaloppet")),
+        ("search_nodes(miss)", lambda: graph.search_nodes("xyzzy")),
+    ]
+
+
+ALL_LOOKUPS = [label for label, _ in lookups(None) + search_lookups(None)]
+
+
+@pytest.fixture(scope="module")
+def profiled(tmp_path_factory):
+    graph = GraphService(str(tmp_path_factory.mktemp("graph") / "graph.duckdb"))
+    build_graph(graph, NODES, EDGES)
+    graph.upsert_node("zlatan", "Person", properties={
+        "name": "Zlatan Ibrahimović",
+        "node_context": [{"text": "Åkte Vasaloppet 2024", "origin": "d1"}],
+    })
+    graph.compute_node_metrics()
+    profiler = ProfilingConnection(graph.conn)
+    graph.conn = profiler
+    calls = dict(lookups(graph) + search_lookups(graph))
+    yield graph, profiler, calls
+    graph.conn = profiler._conn
+    graph.close()
+
+
+@pytest.mark.parametrize("label", ALL_LOOKUPS)
+def test_point_lookup_uses_index(profiled, label):
+    graph, profiler, calls = profiled
+    profiler.statements.clear()
+    calls[label]()
+
+    tables = TERM_TABLES if label.startswith("search_nodes") else LARGE_TABLES
+    scans = [(sql, table, scan_type, rows) for sql, statement_scans in profiler.statements
+             for table, scan_type, rows in statement_scans]
+    full_scans = [(table, rows, sql[:120]) for sql, table, scan_type, rows in scans
+                  if table in tables and scan_type == "Sequential Scan" and rows > MAX_SCANNED_ROWS]
+    assert full_scans == []
+
+    if label in EDGE_LOOKUPS:
+        assert any(table == "edges" and scan_type == "Index Scan" for _, table, scan_type, _ in scans)
+    if label.startswith("search_nodes"):
+        assert any(table in TERM_TABLES and scan_type == "Index Scan" for _, table, scan_type, _ in scans)
+
+
+def test_search_results_unchanged(profiled):
+    graph, _, _ = profiled
+    assert [n["id"] for n in graph.search_nodes("Zlatan")] == ["zlatan"]
+    assert [n["id"] for n in graph.search_nodes("vasaloppet")] == ["zlatan"]
+    assert graph.search_nodes("Person 42", limit=3)[0]["properties"]["name"] == "Person 42"
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
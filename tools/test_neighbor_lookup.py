@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+test_neighbor_lookup.py - Grannuppslag utan N+1-frågor (get_neighbor_network).
+
+Verifierar att kanter + grannarnas namn hämtas med ett konstant antal
+frågor oavsett nodens grad, att resultatet är detsamma som det tidigare
+N+1-mönstret, och att join-frågan är klart snabbare än N+1 för en hubb.
+
+Kör: python tools/test_neighbor_lookup.py   (eller pytest tools/test_neighbor_lookup.py)
+"""
+
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.utils.graph_service import GraphService
+
+
+class CountingConnection:
+    """Delegerar till en DuckDB-anslutning och räknar execute-anrop."""
+
+    def __init__(self, conn):
+        self._conn = conn
+        self.queries = 0
+
+    def execute(self, *args, **kwargs):
+        self.queries += 1
+        return self._conn.execute(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+def build_hub(graph: GraphService, hub_id: str, degree: int):
+    """Hubb med degree utgående MENTIONS och en inkommande kant."""
+    graph.upsert_nodes_bulk(
+        [{"id": hub_id, "type": "Document", "properties": {"name": f"Hubb {hub_id}"}}] +
+        [{"id": f"{hub_id}-p{i}", "type": "Person", "properties": {"name": f"Person {i}"}}
+         for i in range(degree)]
+    )
+    graph.upsert_edges_bulk(
+        [{"source": hub_id, "target": f"{hub_id}-p{i}", "edge_type": "MENTIONS"} for i in range(degree)] +
+        [{"source": f"{hub_id}-p0", "target": hub_id, "edge_type": "CREATED_BY"}]
+    )
+
+
+def n_plus_one(graph: GraphService, node_id: str) -> set:
+    """Tidigare mönster: kanter, sedan get_node per granne."""
+    result = set()
+    for e in graph.get_edges_from(node_id):
+        node = graph.get_node(e["target"])
+        result.add(("out", e["target"], node["properties"].get("name", e["target"]), e["type"]))
+    for e in graph.get_edges_to(node_id):
+        node = graph.get_node(e["source"])
+        result.add(("in", e["source"], node["properties"].get("name", e["source"]), e["type"]))
+    return result
+
+
+@pytest.fixture(scope="module")
+def graph(tmp_path_factory):
+    db_path = str(tmp_path_factory.mktemp("graph") / "graph.duckdb")
+    graph = GraphService(db_path)
+    build_hub(graph, "small", 5)
+    build_hub(graph, "large", 500)
+    yield graph
+    graph.close()
+
+
+def test_query_count_independent_of_degree(graph):
+    counting = CountingConnection(graph.conn)
+    graph.conn = counting
+    try:
+        counts = {}
+        for hub_id in ("small", "large"):
+            counting.queries = 0
+            graph.get_node(hub_id)
+            edges = graph.get_neighbor_edges(hub_id)
+            counts[hub_id] = counting.queries
+            assert len(edges) == (6 if hub_id == "small" else 501)
+    finally:
+        graph.conn = counting._conn
+    assert counts["small"] == counts["large"]
+    assert counts["large"] <= 3
+
+
+def test_same_result_as_n_plus_one(graph):
+    joined = {
+        (e["direction"], e["neighbor"], e["neighbor_name"], e["type"])
+        for e in graph.get_neighbor_edges("large")
+    }
+    assert joined == n_plus_one(graph, "large")
+
+
+def test_get_names_single_query(graph):
+    ids = [f"large-p{i}" for i in range(500)] + ["saknas"]
+    counting = CountingConnection(graph.conn)
+    graph.conn = counting
+    try:
+        names = graph.get_names(ids)
+    finally:
+        graph.conn = counting._conn
+    assert counting.queries == 1
+    assert names["large-p42"] == "Person 42"
+    assert "saknas" not in names
+
+
+def test_join_faster_than_n_plus_one(graph):
+    def best_of(fn, runs=5):
+        timings = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            fn()
+            timings.append(time.perf_counter() - start)
+        return min(timings)
+
+    joined_s = best_of(lambda: graph.get_neighbor_edges("large"))
+    n_plus_one_s = best_of(lambda: n_plus_one(graph, "large"), runs=2)
+    # Uppmätt ~40x (bench_neighbor_lookup.py); 5x ger marginal för långsamma maskiner
+    assert joined_s * 5 < n_plus_one_s
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+test_usage_accumulator.py - Buffrad nodanvändning (UsageAccumulator, spool, register_usage_bulk).
+
+Verifierar att register_usage_bulk adderar träffar och sätter senaste
+tidpunkt i både typade kolumner och properties, att en misslyckad flush
+lägger tillbaka träffarna (sammanslagna med nya), och att spoolen som
+MCP-servern skriver till töms av skrivaren med en batch.
+
+Kör: python tools/test_usage_accumulator.py   (eller pytest tools/test_usage_accumulator.py)
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.utils.graph_service import GraphService
+from services.utils.usage_accumulator import (
+    UsageAccumulator, drain_usage_spool, list_usage_spool, spool_usage, usage_spool_dir,
+)
+
+T1 = "2025-03-01T10:00:00"
+T2 = "2025-03-02T11:30:00"
+
+
+@pytest.fixture
+def graph(tmp_path):
+    graph = GraphService(str(tmp_path / "graph.duckdb"))
+    graph.upsert_nodes_bulk([
+        {"id": "a", "type": "Person", "properties": {"name": "Anna"}},
+        {"id": "b", "type": "Person", "properties": {"name": "Bo", "retrieved_times": 4}},
+    ])
+    yield graph
+    graph.close()
+
+
+def usage_of(graph: GraphService, node_id: str) -> tuple:
+    """(retrieved_times, last_retrieved_at) ur properties, kontrollerat mot de typade kolumnerna."""
+    typed = graph.conn.execute(
+        "SELECT retrieved_times, last_retrieved_at FROM nodes WHERE id = ?", [node_id]
+    ).fetchone()
+    props = graph.get_node(node_id)["properties"]
+    assert typed[0] == props["retrieved_times"]
+    assert typed[1].isoformat() == props["last_retrieved_at"]
+    return props["retrieved_times"], props["last_retrieved_at"]
+
+
+def test_register_usage_bulk(graph):
+    assert graph.register_usage_bulk({"a": (2, T1), "b": (3, T2), "saknas": (1, T1)}) == 3
+    assert usage_of(graph, "a") == (2, T1)
+    assert usage_of(graph, "b") == (7, T2)
+    assert graph.get_node("saknas") is None
+
+    graph.register_usage_bulk({"a": (1, T2)})
+    assert usage_of(graph, "a") == (3, T2)
+    assert graph.get_node("a")["properties"]["name"] == "Anna"
+    assert graph.register_usage_bulk({}) == 0
+
+
+def test_register_usage_bulk_refuses_read_only(graph):
+    graph.close()
+    with GraphService(graph.db_path, read_only=True) as reader:
+        with pytest.raises(RuntimeError, match="HARDFAIL"):
+            reader.register_usage_bulk({"a": (1, T1)})
+
+
+def test_failed_flush_requeues_hits():
+    calls = []
+
+    def flaky(batch):
+        calls.append(dict(batch))
+        if len(calls) == 1:
+            raise TimeoutError("grafen är upptagen")
+
+    usage = UsageAccumulator(flaky, flush_interval=3600)
+    try:
+        usage.record(["a", "a", "b"])
+        with pytest.raises(TimeoutError):
+            usage.flush()
+        assert usage.pending() == 2
+
+        # Nya träffar slås ihop med de tillbakalagda
+        usage.record(["a", "c"])
+        assert usage.flush() == 3
+        assert usage.pending() == 0
+        counts = {node_id: hits for node_id, (hits, _) in calls[1].items()}
+        assert counts == {"a": 3, "b": 1, "c": 1}
+        assert calls[1]["a"][1] >= calls[0]["a"][1]
+        assert usage.flush() == 0
+    finally:
+        usage.close()
+
+
+def test_spool_is_drained_by_writer(graph):
+    usage = UsageAccumulator(lambda batch: spool_usage(graph.db_path, batch), flush_interval=3600)
+    try:
+        usage.record(["a", "b"])
+        usage.flush()
+        usage.record(["a"])
+        usage.flush()
+    finally:
+        usage.close()
+    spool_usage(graph.db_path, {"a": (2, T1)})
+    assert len(list_usage_spool(graph.db_path)) == 3
+    # Läsaren skriver aldrig i grafen
+    assert usage_of(graph, "a")[0] == 0
+
+    assert drain_usage_spool(graph) == 2
+    assert list_usage_spool(graph.db_path) == []
+    assert usage_of(graph, "a")[0] == 4
+    assert usage_of(graph, "b")[0] == 5
+    assert drain_usage_spool(graph) == 0
+
+
+def test_spool_survives_failed_drain_and_skips_broken_files(graph, monkeypatch):
+    spool_usage(graph.db_path, {"a": (1, T1)})
+    broken = os.path.join(usage_spool_dir(graph.db_path), "usage_00000000000000000001_1.json")
+    with open(broken, "w") as f:
+        f.write('{"a": ')
+    # Halvskriven temporär fil från en pågående flush ignoreras
+    with open(os.path.join(usage_spool_dir(graph.db_path), ".usage_2_2.tmp"), "w") as f:
+        f.write("{")
+
+    def failing_write(usage):
+        raise TimeoutError("skrivningen avbröts")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(graph, "register_usage_bulk", failing_write)
+        with pytest.raises(TimeoutError):
+            drain_usage_spool(graph)
+    # Den hela filen ligger kvar till nästa försök, den trasiga är undanlagd
+    assert len(list_usage_spool(graph.db_path)) == 1
+    assert os.path.exists(broken + ".bad")
+
+    assert drain_usage_spool(graph) == 1
+    assert usage_of(graph, "a") == (1, T1)
+    assert list_usage_spool(graph.db_path) == []
+
+    graph.close()
+    with GraphService(graph.db_path, read_only=True) as reader:
+        with pytest.raises(RuntimeError, match="HARDFAIL"):
+            drain_usage_spool(reader)
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+test_vector_service.py - VectorService mot en riktig ChromaDB (hoppas över utan chromadb).
+
+Vektorerna läggs i embedding-cachen i förväg, så att testerna är
+deterministiska och ingen embedding-modell behöver laddas.
+
+Verifierar:
+- att en befintlig knowledge_base, skapad med Chromas
+  SentenceTransformerEmbeddingFunction, går att öppna och söka i
+- att nya collections sparar en känd embedding-config (inte legacy, ingen
+  DeprecationWarning) som både SharedEmbeddingFunction och Chromas
+  SentenceTransformerEmbeddingFunction kan återskapas från
+- upsert_many/search_many i batchar (fler texter än batch_size)
+- att oförändrade dokument (samma content_hash) varken embeddas eller
+  skrivs om
+- att en cache-träff ger exakt samma vektor som den lokala modellen
+  (kräver sentence-transformers och modellen, annars hoppas testet över)
+- att search_documents bara returnerar Lake-dokument även när grafnoder
+  ligger närmare frågan, och att anroparens where kombineras med
+  dokumentfiltret
+
+Kör: python tools/test_vector_service.py   (eller pytest tools/test_vector_service.py)
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+import yaml
+
+pytest.importorskip("chromadb")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import chromadb
+from chromadb.utils.embedding_functions import SentenceTransformerEmbeddingFunction
+
+from services.utils.embedding_cache import EmbeddingCache, text_hash
+from services.utils.vector_service import SharedEmbeddingFunction, VectorService
+
+DIM = 8
+QUERY = "vem arbetar med upphandlingar"
+
+
+def unit(angle: float) -> list:
+    """Normerad vektor i planet (e0, e1) med given vinkel till frågevektorn e0."""
+    vec = np.zeros(DIM, dtype=np.float32)
+    vec[0], vec[1] = np.cos(angle), np.sin(angle)
+    return vec.tolist()
+
+
+def write_config(tmp_path) -> str:
+    config = {
+        "paths": {
+            "chroma_db": str(tmp_path / "chroma"),
+            "embedding_cache": str(tmp_path / "embedding_cache.sqlite"),
+        },
+        "ai_engine": {"models": {"embedding_model": "paraphrase-multilingual-MiniLM-L12-v2"}},
+        "embedding_server": {"enabled": False},
+    }
+    path = tmp_path / "config.yaml"
+    path.write_text(yaml.safe_dump(config))
+    return str(path)
+
+
+def open_service(tmp_path, collection_name: str) -> VectorService:
+    return VectorService(write_config(tmp_path), collection_name=collection_name)
+
+
+def seed_cache(vs: VectorService, vectors: dict):
+    """Lägg text -> vektor i VectorService-cachen (samma nyckel som _embed använder)."""
+    cache = EmbeddingCache(vs.embedding_cache.path, vs.embedding_id)
+    cache.put_many({text_hash(text): vec for text, vec in vectors.items()})
+    cache.close()
+
+
+class PersistedSentenceTransformer(SentenceTransformerEmbeddingFunction):
+    """
+    Chromas SentenceTransformerEmbeddingFunction utan modell: ger samma
+    sparade collection-config som den gamla VectorService (namn, modell,
+    normalize_embeddings=False) utan att ladda sentence-transformers.
+    """
+
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+        self.device = "cpu"
+        self.normalize_embeddings = False
+        self.kwargs = {}
+
+    @staticmethod
+    def build_from_config(config):
+        return PersistedSentenceTransformer(config["model_name"])
+
+
+@pytest.fixture
+def mixed_service(tmp_path):
+    """Tio grafnoder nära frågan, två dokument (ett chunkat) längre bort."""
+    vs = open_service(tmp_path, "test_mixed")
+    nodes = {f"node{i}": (f"Name: Person {i}. Type: Person", unit(0.01 * (i + 1))) for i in range(10)}
+    docs = {
+        "docA#0": ("dokument A stycke 0", unit(0.5), {"parent_unit_id": "docA", "filename": "a.txt"}),
+        "docA#1": ("dokument A stycke 1", unit(0.4), {"parent_unit_id": "docA", "filename": "a.txt"}),
+        "docB": ("dokument B", unit(0.6), {"filename": "b.txt"}),
+    }
+    seed_cache(vs, {QUERY: unit(0.0),
+                    **{text: vec for text, vec in nodes.values()},
+                    **{text: vec for text, vec, _ in docs.values()}})
+    vs.upsert_many(
+        list(nodes) + list(docs),
+        [text for text, _ in nodes.values()] + [text for text, _, _ in docs.values()],
+        [{"type": "Person", "source": "graph_node"}] * len(nodes) + [meta for _, _, meta in docs.values()],
+    )
+    yield vs
+    vs.embedding_cache.close()
+
+
+@pytest.mark.filterwarnings("error::DeprecationWarning")
+def test_opens_existing_sentence_transformer_collection(tmp_path):
+    client = chromadb.PersistentClient(path=str(tmp_path / "chroma"))
+    old = client.create_collection(
+        "knowledge_base", embedding_function=PersistedSentenceTransformer("paraphrase-multilingual-MiniLM-L12-v2")
+    )
+    assert old.configuration_json["embedding_function"]["name"] == "sentence_transformer"
+    old.add(ids=["doc1", "doc2"], embeddings=[unit(0.1), unit(1.0)], documents=["gammal 1", "gammal 2"])
+    del client
+
+    vs = open_service(tmp_path, "knowledge_base")
+    seed_cache(vs, {QUERY: unit(0.0)})
+    try:
+        assert vs.collection.count() == 2
+        assert [hit['id'] for hit in vs.search_many([QUERY], limit=1)[0]] == ["doc1"]
+    finally:
+        vs.embedding_cache.close()
+
+
+@pytest.mark.filterwarnings("error::DeprecationWarning")
+def test_new_collection_persists_known_embedding_config(tmp_path):
+    vs = open_service(tmp_path, "test_config")
+    seed_cache(vs, {"text": unit(0.2)})
+    try:
+        assert not vs.embedding_func.is_legacy()
+        vs.upsert_many(["doc1"], ["text"])
+        stored = vs.collection.configuration_json["embedding_function"]
+        assert stored == {
+            "type": "known", "name": "sentence_transformer",
+            "config": {"model_name": "paraphrase-multilingual-MiniLM-L12-v2", "device": "cpu",
+                       "normalize_embeddings": False, "kwargs": {}},
+        }
+        SentenceTransformerEmbeddingFunction.validate_config(stored["config"])
+
+        rebuilt = SharedEmbeddingFunction.build_from_config(stored["config"])
+        assert rebuilt.get_config() == stored["config"] and rebuilt.client is None
+
+        # Utan VectorService: Chroma återskapar funktionen från den sparade configen
+        reopened = chromadb.PersistentClient(path=vs.db_path).get_collection("test_config")
+        assert reopened.get(ids=["doc1"])["documents"] == ["text"]
+    finally:
+        vs.embedding_cache.close()
+
+    with pytest.raises(RuntimeError, match="HARDFAIL"):
+        SharedEmbeddingFunction.build_from_config({**stored["config"], "normalize_embeddings": True})
+
+
+def test_batched_upsert_and_search(tmp_path):
+    vs = open_service(tmp_path, "test_batches")
+    texts = {f"doc{i}": f"text nummer {i}" for i in range(5)}
+    seed_cache(vs, {text: unit(0.3 * i) for i, text in enumerate(texts.values())})
+    try:
+        assert vs.upsert_many(list(texts), list(texts.values()), batch_size=2) == 5
+        assert vs.collection.count() == 5
+
+        queries = ["text nummer 3", "", "text nummer 0", "text nummer 4"]
+        results = vs.search_many(queries, limit=1, batch_size=2)
+        assert [[hit['id'] for hit in hits] for hits in results] == [["doc3"], [], ["doc0"], ["doc4"]]
+    finally:
+        vs.embedding_cache.close()
+
+
+def test_content_hash_skips_unchanged(tmp_path):
+    vs = open_service(tmp_path, "test_content_hash")
+    ids, texts = ["a", "b", "c"], ["text a", "text b", "text c"]
+    metadatas = [{"filename": f"{doc_id}.txt"} for doc_id in ids]
+    seed_cache(vs, {text: unit(0.1 * i) for i, text in enumerate(texts + ["text b v2"])})
+    embedded = []
+    embed = vs._embed
+    vs._embed = lambda batch: embedded.append(list(batch)) or embed(batch)
+    try:
+        assert vs.upsert_many(ids, texts, metadatas) == 3
+        assert vs.upsert_many(ids, texts, metadatas) == 0
+        assert embedded == [texts]
+
+        # Ändrad text eller metadata skrivs om, bara den
+        assert vs.upsert_many(ids, ["text a", "text b v2", "text c"], metadatas) == 1
+        assert vs.upsert_many(ids[:1], texts[:1], [{"filename": "a_ny.txt"}]) == 1
+        assert embedded[1:] == [["text b v2"], ["text a"]]
+        stored = vs.collection.get(ids=["b"], include=["documents"])
+        assert stored['documents'] == ["text b v2"]
+    finally:
+        vs.embedding_cache.close()
+
+
+def test_cache_hit_identical_to_local_model(tmp_path):
+    pytest.importorskip("sentence_transformers")
+    text = "Anna är ansvarig för upphandlingen av den nya plattformen."
+    vs = open_service(tmp_path, "test_cache_model")
+    try:
+        local = vs.embedding_func._local_function()
+    except RuntimeError as e:
+        vs.embedding_cache.close()
+        pytest.skip(f"Embedding-modellen kunde inte laddas: {e}")
+    try:
+        reference = np.asarray(local([text])[0], dtype=np.float32)
+        first = vs._embed([text])[0]  # Miss: modellen, sparas i cachen
+    finally:
+        vs.embedding_cache.close()
+
+    cached_vs = open_service(tmp_path, "test_cache_model")
+    try:
+        hashes = [text_hash(text)]
+        assert list(cached_vs.embedding_cache.get_many(hashes)) == hashes
+        cached = cached_vs._embed([text])[0]
+    finally:
+        cached_vs.embedding_cache.close()
+    assert cached_vs.embedding_func._local is None  # Cache-träffen laddade ingen modell
+    assert reference.shape == (384,)
+    assert np.array_equal(np.asarray(first, dtype=np.float32), reference)
+    assert np.array_equal(np.asarray(cached, dtype=np.float32), reference)
+
+
+def test_search_documents_skips_graph_nodes(mixed_service):
+    # Utan filter fyller grafnoderna hela överurvalet (limit * search_oversample)
+    unfiltered = mixed_service.search_many([QUERY], limit=2 * mixed_service.chunking['search_oversample'])[0]
+    assert all(hit['metadata'].get('source') == "graph_node" for hit in unfiltered)
+
+    results = mixed_service.search_documents(QUERY, limit=2)
+    assert [r['id'] for r in results] == ["docA", "docB"]
+    assert results[0]['chunk_id'] == "docA#1"
+    assert not any(r['metadata'].get('source') == "graph_node" for r in results)
+
+
+def test_search_documents_merges_caller_where(mixed_service):
+    results = mixed_service.search_documents(QUERY, limit=5, where={"filename": "b.txt"})
+    assert [r['id'] for r in results] == ["docB"]
+
+
+def test_best_chunk_per_parent():
+    hits = [
+        {"id": "a#0", "distance": 0.3, "metadata": {"parent_unit_id": "a"}},
+        {"id": "b", "distance": 0.2, "metadata": {}},
+        {"id": "a#1", "distance": 0.1, "metadata": {"parent_unit_id": "a"}},
+        {"id": "c", "distance": 0.4, "metadata": None},
+    ]
+    best = VectorService._best_chunk_per_parent(hits, limit=2)
+    assert [(r['id'], r['chunk_id']) for r in best] == [("a", "a#1"), ("b", "b")]
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
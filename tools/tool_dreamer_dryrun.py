@@ -313,7 +313,7 @@ class DreamerDryRun:
 
         # Hämta kandidater
         if node_id:
-            node = self.graph_store.get_node(node_id)
+            node = self.graph_store.get_node(node_id, with_context=True)
             if not node:
                 self.log(f"ERROR: Nod {node_id} hittades inte")
                 return
@@ -368,17 +368,15 @@ class DreamerDryRun:
         print(f"[Fas 2/{3}] Samlar merge-kandidater...")
 
         merge_pairs = []  # Lista med (candidate_idx, node, match)
-        for i, node in enumerate(candidates):
-            structural = structural_results[i]
-            action = structural.get("action", "KEEP")
-
-            # Skippa noder som ska DELETE/SPLIT
-            if action in ["DELETE", "SPLIT"]:
-                continue
-
-            matches = self.find_potential_matches(node)
+        # Skippa noder som ska DELETE/SPLIT
+        merge_idx = [
+            i for i, structural in enumerate(structural_results)
+            if structural.get("action", "KEEP") not in ["DELETE", "SPLIT"]
+        ]
+        all_matches = self.find_potential_matches_many([candidates[i] for i in merge_idx])
+        for i, matches in zip(merge_idx, all_matches):
             for match in matches:
-                merge_pairs.append((i, node, match))
+                merge_pairs.append((i, candidates[i], match))
 
         print(f"  Hittade {len(merge_pairs)} merge-par att utvärdera")
 
@@ -983,7 +981,7 @@ class DreamerDryRun:
         self.log(f"  Hittade {len(node_merges)} potentiella matcher")
 
         for j, (match_id, merge_result) in enumerate(node_merges, 1):
-            match_node = self.graph_store.get_node(match_id)
+            match_node = self.graph_store.get_node(match_id, with_context=True)
             match_name = match_node.get("properties", {}).get("name", match_id) if match_node else match_id
 
             self.log("")
@@ -1067,36 +1065,50 @@ class DreamerDryRun:
 
     def find_potential_matches(self, node: Dict) -> List[Dict]:
         """Hitta potentiella dubbletter via semantisk sökning."""
-        self.vector_service.upsert_node(node)
+        return self.find_potential_matches_many([node])[0]
 
-        name = node.get("properties", {}).get("name", "")
-        if not name:
-            return []
+    def find_potential_matches_many(self, nodes: List[Dict]) -> List[List[Dict]]:
+        """Batchad find_potential_matches: en upsert_nodes, en search_many och en get_nodes för alla noder."""
+        self.vector_service.upsert_nodes(nodes)
 
-        search_text = f"{name} {node.get('type')}"
-        keywords = node.get("properties", {}).get("context_keywords", [])
-        if keywords:
-            search_text += " " + " ".join(keywords)
+        queries = []
+        for node in nodes:
+            name = node.get("properties", {}).get("name", "")
+            if not name:
+                queries.append("")
+                continue
+            search_text = f"{name} {node.get('type')}"
+            keywords = node.get("properties", {}).get("context_keywords", [])
+            if keywords:
+                search_text += " " + " ".join(keywords)
+            queries.append(search_text)
 
         vector_limit = self.dreamer_config.get('vector_search_limit', 10)
-        results = self.vector_service.search(search_text, limit=vector_limit)
+        # Bara grafnoder: dokumentchunkar skulle annars fylla top-k
+        results = self.vector_service.search_many(queries, limit=vector_limit, where={"source": "graph_node"})
+        hits = self.graph_store.get_nodes(
+            [res['id'] for node_results in results for res in node_results], with_context=True
+        )
 
-        valid_matches = []
-        for res in results:
-            match_id = res['id']
-            if match_id == node["id"]:
-                continue
+        all_matches = []
+        for node, node_results in zip(nodes, results):
+            valid_matches = []
+            for res in node_results:
+                match_id = res['id']
+                if match_id == node["id"]:
+                    continue
 
-            match_node = self.graph_store.get_node(match_id)
-            if not match_node:
-                continue
+                match_node = hits.get(match_id)
+                if not match_node:
+                    continue
 
-            if match_node["type"] != node["type"]:
-                continue
+                if match_node["type"] != node["type"]:
+                    continue
 
-            valid_matches.append(match_node)
+                valid_matches.append(match_node)
+            all_matches.append(valid_matches)
 
-        return valid_matches
+        return all_matches
 
     def do_merge_evaluation(self, primary: Dict, secondary: Dict) -> Dict:
         """Bedöm om två noder ska slås ihop."""
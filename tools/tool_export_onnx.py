@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+ONNX-export - Skapa int8-kvantiserad ONNX-version av embedding-modellen.
+
+Exporterar ai_engine.models.embedding_model till ONNX, kvantiserar den
+dynamiskt till int8 och mäter cosinus-överensstämmelsen mot torch-vägen
+(se services/utils/embedding_backends.py). Avslutas med kod 1 om lägsta
+cosinus är under ai_engine.models.embedding_onnx_min_cosine; VectorService
+vägrar då att ladda exporten.
+
+Aktivera därefter backenden i my_mem_config.yaml:
+    ai_engine:
+      models:
+        embedding_backend: onnx_int8
+
+Byte av backend ger nya vektornycklar (embedding_id), så dokument embeddas
+om när de indexeras nästa gång.
+
+Kräver (bara för exporten): torch, sentence-transformers, onnx, onnxruntime.
+
+Kör: python tools/tool_export_onnx.py [--output <katalog>]
+"""
+
+import argparse
+import os
+import sys
+
+import yaml
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.utils.embedding_backends import backend_settings, export_onnx
+
+
+def load_config() -> dict:
+    """Ladda my_mem_config.yaml."""
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    config_path = os.path.join(script_dir, '..', 'config', 'my_mem_config.yaml')
+    if not os.path.exists(config_path):
+        print("[FEL] Saknar my_mem_config.yaml")
+        sys.exit(1)
+    with open(config_path, 'r') as f:
+        return yaml.safe_load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exportera embedding-modellen till ONNX (int8)")
+    parser.add_argument("--output", help="Katalog (default: ai_engine.models.embedding_onnx_dir)")
+    args = parser.parse_args()
+
+    settings = backend_settings(load_config())
+    onnx_dir = os.path.expanduser(args.output) if args.output else settings["onnx_dir"]
+    print(f"Exporterar {settings['model_name']} -> {onnx_dir} ...")
+    config = export_onnx(settings["model_name"], onnx_dir)
+
+    print(f"✅ Export klar ({config['pooling']}-pooling, max {config['max_seq_length']} tokens)")
+    print(f"   Cosinus mot torch på {config['agreement_sentences']} meningar: "
+          f"min {config['cosine_min']:.4f}, medel {config['cosine_mean']:.4f}")
+    if config["cosine_min"] < settings["min_cosine"]:
+        print(f"❌ Under gränsen {settings['min_cosine']} - exporten kommer inte att laddas.")
+        sys.exit(1)
+    print(f"   Över gränsen {settings['min_cosine']}. Sätt embedding_backend: onnx_int8 för att använda den.")
+
+
+if __name__ == "__main__":
+    main()
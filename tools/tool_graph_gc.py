@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Graf-GC - Skräpsamling och komprimering av grafen.
+
+Tar bort dinglande kanter, Document-noder utan Lake-fil och föräldralösa
+noder enligt schemats healing_policy (se GraphService.collect_garbage),
+och skriver om databasfilen när tillräckligt många block är lediga
+(GraphService.compact). Dreamer kör samma steg i varje cykel.
+
+Kör:
+    python tools/tool_graph_gc.py              # dry run: visa vad som skulle tas bort
+    python tools/tool_graph_gc.py --confirm    # ta bort + komprimera
+    python tools/tool_graph_gc.py --confirm --compact   # skriv alltid om filen
+"""
+
+import argparse
+import os
+import sys
+import yaml
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.engines.dreamer import healing_policies, lake_document_ids
+from services.utils.graph_service import GraphService
+from services.utils.graph_snapshot import publish_snapshot
+from services.utils.shared_lock import resource_lock
+
+# Max väntan på skrivlås (ingestion/Dreamer kan hålla grafen)
+LOCK_TIMEOUT = 300.0
+# Antal föräldralösa noder som listas
+SHOW_ORPHANS = 20
+
+
+def load_config() -> dict:
+    """Ladda my_mem_config.yaml."""
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    config_path = os.path.join(script_dir, '..', 'config', 'my_mem_config.yaml')
+    if not os.path.exists(config_path):
+        print("[FEL] Saknar my_mem_config.yaml")
+        sys.exit(1)
+    with open(config_path, 'r') as f:
+        return yaml.safe_load(f)
+
+
+def print_report(report: dict):
+    dangling = report["dangling_edges"]
+    print(f"Dinglande kanter:       {sum(dangling.values())}")
+    for edge_type, count in sorted(dangling.items()):
+        print(f"   - {edge_type}: {count}")
+    print(f"Dokument utan Lake-fil: {len(report['documents_without_source'])}")
+    for doc_id in report["documents_without_source"][:SHOW_ORPHANS]:
+        print(f"   - {doc_id}")
+
+    orphans = report["orphans"]
+    removed = [o for o in orphans if o["action"] == "remove"]
+    print(f"Föräldralösa noder:     {len(orphans)} ({len(removed)} tas bort, övriga inom läkningstiden "
+          f"eller ej PROVISIONAL)")
+    for orphan in removed[:SHOW_ORPHANS]:
+        print(f"   - [{orphan['type']}] {orphan['id']}  ({orphan['connections']} kanter, "
+              f"{orphan['mentions']} omnämnanden, {orphan['age_days']} dagar)")
+    if len(removed) > SHOW_ORPHANS:
+        print(f"   ... och {len(removed) - SHOW_ORPHANS} till.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Skräpsamling av grafen")
+    parser.add_argument("--confirm", action="store_true", help="Ta bort (annars dry run)")
+    parser.add_argument("--compact", action="store_true", help="Skriv alltid om databasfilen")
+    args = parser.parse_args()
+
+    config = load_config()
+    graph_path = os.path.expanduser(config['paths']['graph_db'])
+    if not os.path.exists(graph_path):
+        print(f"❌ Graf-databas finns inte: {graph_path}")
+        sys.exit(1)
+
+    document_ids = lake_document_ids(os.path.expanduser(config['paths']['lake_store']))
+    if document_ids is None:
+        print("⚠️  Lake saknas eller är tom - dokumentkontrollen hoppas över.")
+
+    with resource_lock("graph", exclusive=True, timeout=LOCK_TIMEOUT):
+        graph = GraphService(graph_path)
+        try:
+            report = graph.collect_garbage(healing_policies(), document_ids, dry_run=not args.confirm)
+            compacted = None
+            if args.confirm:
+                compacted = graph.compact(force=args.compact)
+                publish_snapshot(graph)
+        finally:
+            graph.close()
+
+    print_report(report)
+    if not args.confirm:
+        print("\n(dry run - kör med --confirm för att ta bort)")
+        return
+    print(f"\n✅ {report['removed_nodes']} noder borttagna.")
+    if compacted["rewritten"]:
+        print(f"🗜️  Filen omskriven: {compacted['bytes_before'] / 1e6:.1f} MB -> "
+              f"{compacted['bytes_after'] / 1e6:.1f} MB")
+    else:
+        print(f"   Ingen omskrivning ({compacted['free_ratio']:.0%} lediga block).")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Graf-mått - Batch-jobb för node_metrics (grad, PageRank, komponenter).
+
+Dreamer räknar om måtten i början av varje cykel. Verktyget kör samma
+beräkning fristående (t.ex. efter en rebuild), publicerar en ny snapshot
+så att MCP-läsarna får de nya värdena, och visar de mest centrala noderna.
+
+Kör: python tools/tool_graph_metrics.py [--top 20]
+"""
+
+import argparse
+import os
+import sys
+import yaml
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.utils.graph_service import GraphService
+from services.utils.graph_snapshot import publish_snapshot
+from services.utils.shared_lock import resource_lock
+
+# Max väntan på skrivlås (ingestion/Dreamer kan hålla grafen)
+LOCK_TIMEOUT = 300.0
+
+
+def load_config() -> dict:
+    """Ladda my_mem_config.yaml."""
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    config_path = os.path.join(script_dir, '..', 'config', 'my_mem_config.yaml')
+    if not os.path.exists(config_path):
+        print("[FEL] Saknar my_mem_config.yaml")
+        sys.exit(1)
+    with open(config_path, 'r') as f:
+        return yaml.safe_load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Beräkna node_metrics för grafen")
+    parser.add_argument("--top", type=int, default=20, help="Visa de N mest centrala noderna")
+    args = parser.parse_args()
+
+    graph_path = os.path.expanduser(load_config()['paths']['graph_db'])
+    if not os.path.exists(graph_path):
+        print(f"❌ Graf-databas finns inte: {graph_path}")
+        sys.exit(1)
+
+    with resource_lock("graph", exclusive=True, timeout=LOCK_TIMEOUT):
+        graph = GraphService(graph_path)
+        try:
+            count = graph.compute_node_metrics()
+            publish_snapshot(graph)
+
+            top = graph.conn.execute("""
+                SELECT m.node_id, n.type, n.name, m.degree, m.pagerank, m.component
+                FROM node_metrics m JOIN nodes n ON n.id = m.node_id
+                ORDER BY m.pagerank DESC
+                LIMIT ?
+            """, [args.top]).fetchall()
+            components = graph.conn.execute("""
+                SELECT component, component_size FROM node_metrics
+                GROUP BY component, component_size
+                ORDER BY component
+                LIMIT 5
+            """).fetchall()
+        finally:
+            graph.close()
+
+    print(f"✅ node_metrics beräknade för {count} noder\n")
+    print("Största komponenter:")
+    for component, size in components:
+        print(f"   #{component}: {size} noder")
+    print(f"\nMest centrala noder (PageRank, top {args.top}):")
+    for node_id, node_type, name, degree, pagerank, component in top:
+        print(f"   {pagerank:.5f}  [{node_type}] {name or node_id}  (grad {degree}, komponent {component})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Graf-export - Parquet-export, återställning och diff av grafen.
+
+Kommandon:
+    python tools/tool_graph_parquet.py export [mapp]          # default: <graph_db>.exports/<tidsstämpel>
+    python tools/tool_graph_parquet.py import <mapp> --confirm # ERSÄTTER grafens innehåll
+    python tools/tool_graph_parquet.py diff <gammal> <ny>      # antal tillagda/borttagna/ändrade per tabell
+
+Se GraphService.export_parquet / import_parquet och graph_export.diff_exports.
+"""
+
+import argparse
+import os
+import sys
+from datetime import datetime
+
+import yaml
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.utils.graph_export import diff_exports
+from services.utils.graph_service import GraphService
+from services.utils.graph_snapshot import publish_snapshot
+from services.utils.shared_lock import resource_lock
+
+# Max väntan på grafens lås (ingestion/Dreamer kan hålla grafen)
+LOCK_TIMEOUT = 300.0
+
+
+def load_config() -> dict:
+    """Ladda my_mem_config.yaml."""
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    config_path = os.path.join(script_dir, '..', 'config', 'my_mem_config.yaml')
+    if not os.path.exists(config_path):
+        print("[FEL] Saknar my_mem_config.yaml")
+        sys.exit(1)
+    with open(config_path, 'r') as f:
+        return yaml.safe_load(f)
+
+
+def cmd_export(graph_path: str, directory: str = None):
+    directory = directory or os.path.join(
+        f"{graph_path}.exports", datetime.now().strftime("%Y%m%d_%H%M%S")
+    )
+    # Delat lås: exporten läser bara, men ska inte se en halvskriven batch
+    with resource_lock("graph", exclusive=False, timeout=LOCK_TIMEOUT):
+        graph = GraphService(graph_path, read_only=True)
+        try:
+            manifest = graph.export_parquet(directory)
+        finally:
+            graph.close()
+    print(f"✅ Exporterad till {directory}")
+    for table, entry in manifest["tables"].items():
+        print(f"   {table:<16} {entry['rows']:>10} rader")
+
+
+def cmd_import(graph_path: str, directory: str):
+    with resource_lock("graph", exclusive=True, timeout=LOCK_TIMEOUT):
+        graph = GraphService(graph_path)
+        try:
+            counts = graph.import_parquet(directory)
+            publish_snapshot(graph)
+        finally:
+            graph.close()
+    print(f"✅ Grafen återställd från {directory}")
+    for table, rows in counts.items():
+        print(f"   {table:<16} {rows:>10} rader")
+
+
+def cmd_diff(old_dir: str, new_dir: str):
+    _, summary = diff_exports(old_dir, new_dir)
+    print(f"Diff {old_dir} -> {new_dir}")
+    for table, counts in summary.items():
+        print(f"   {table:<16} +{counts['added']:<8} -{counts['removed']:<8} ~{counts['changed']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parquet-export/import av grafen")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_export = sub.add_parser("export", help="Exportera grafen")
+    p_export.add_argument("directory", nargs="?")
+    p_import = sub.add_parser("import", help="Ersätt grafens innehåll med en export")
+    p_import.add_argument("directory")
+    p_import.add_argument("--confirm", action="store_true")
+    p_diff = sub.add_parser("diff", help="Jämför två exporter")
+    p_diff.add_argument("old")
+    p_diff.add_argument("new")
+    args = parser.parse_args()
+
+    if args.command == "diff":
+        cmd_diff(args.old, args.new)
+        return
+
+    graph_path = os.path.expanduser(load_config()['paths']['graph_db'])
+    if args.command == "export":
+        cmd_export(graph_path, args.directory)
+    elif not args.confirm:
+        print(f"⚠️  import ersätter hela grafen i {graph_path}. Kör med --confirm.")
+        sys.exit(1)
+    else:
+        cmd_import(graph_path, args.directory)
+
+
+if __name__ == "__main__":
+    main()
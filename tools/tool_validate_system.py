@@ -8,6 +8,8 @@ import logging
 
 # Använd VectorService (SSOT för collection-namn och embedding-modell)
 from services.utils.vector_service import get_vector_service
+from services.utils.graph_service import GraphService
+from services.utils.shared_lock import resource_lock
 
 # Enkel loggning för CLI-verktyg
 logging.basicConfig(level=logging.WARNING, format='%(levelname)s - %(message)s')
@@ -31,6 +33,7 @@ CONFIG = load_yaml('my_mem_config.yaml')
 LAKE_STORE = os.path.expanduser(CONFIG['paths']['lake_store'])
 ASSET_STORE = os.path.expanduser(CONFIG['paths']['asset_store'])
 CHROMA_PATH = os.path.expanduser(CONFIG['paths']['chroma_db'])
+GRAPH_PATH = os.path.expanduser(CONFIG['paths']['graph_db'])
 LOG_FILE = os.path.expanduser(CONFIG['logging']['log_file_path'])
 
 # Hämta extensions
@@ -133,9 +136,10 @@ def validera_chroma(expected_count, lake_ids):
     print_header("2. VEKTOR-AUDIT (CHROMA)")
     try:
         vector_service = get_vector_service("knowledge_base")
-        coll = vector_service.collection
-        count = coll.count()
-        print(f"🧠 Vektorer i minnet: {count} st")
+        # Dokument (inte chunkar eller grafnoder) ska matcha Sjön
+        vector_ids = vector_service.document_ids()
+        count = len(vector_ids)
+        print(f"🧠 Dokument i vektorminnet: {count} st ({vector_service.count()} vektorer)")
         
         if count == expected_count:
             print("✅ SYNKAD: Vektordatabasen matchar Sjön.")
@@ -143,7 +147,6 @@ def validera_chroma(expected_count, lake_ids):
             print(f"❌ OSYNKAD: Diff på {abs(count - expected_count)} dokument.")
             
             # Visa vilka som saknas
-            vector_ids = set(coll.get()['ids'])
             lake_id_set = set(lake_ids.keys())
             
             missing_in_vector = lake_id_set - vector_ids
@@ -163,9 +166,49 @@ def validera_chroma(expected_count, lake_ids):
         LOGGER.error(f"Kunde inte läsa ChromaDB: {e}")
         print(f"❌ KRITISKT FEL: Kunde inte läsa ChromaDB: {e}")
 
+def validera_graf_statistik():
+    """
+    Kontrollera att grafens underhållna räknare (graph_stats) stämmer med
+    nodes/edges. Avvikelse (t.ex. efter skrivning med rå SQL) räknas om.
+    """
+    print_header("3. GRAF-STATISTIK")
+
+    if not os.path.exists(GRAPH_PATH):
+        print(f"⚠️ Graf-databas finns inte: {GRAPH_PATH}")
+        return
+
+    try:
+        with resource_lock("graph", exclusive=False, timeout=60.0):
+            graph = GraphService(GRAPH_PATH, read_only=True)
+            try:
+                drift = graph.check_graph_stats()
+                stats = graph.get_stats()
+            finally:
+                graph.close()
+
+        if not drift:
+            print(f"✅ KONSISTENT: {stats['total_nodes']} noder, {stats['total_edges']} kanter.")
+            return
+
+        print(f"❌ AVVIKELSE i {len(drift)} räknare (lagrat -> faktiskt):")
+        for (kind, name), (stored, actual) in sorted(drift.items()):
+            print(f"   - {kind} {name}: {stored} -> {actual}")
+
+        with resource_lock("graph", exclusive=True, timeout=60.0):
+            graph = GraphService(GRAPH_PATH)
+            try:
+                graph.rebuild_graph_stats()
+            finally:
+                graph.close()
+        print("🔧 graph_stats omräknad.")
+
+    except Exception as e:
+        LOGGER.error(f"Kunde inte validera grafstatistik: {e}")
+        print(f"❌ Fel vid validering av grafstatistik: {e}")
+
 def rensa_gammal_logg():
     """Rensar loggfilen på rader äldre än 24 timmar."""
-    print_header("3. LOGG-RENSNING")
+    print_header("4. LOGG-RENSNING")
     
     if not os.path.exists(LOG_FILE):
         print(f"⚠️ Loggfil finns inte: {LOG_FILE}")
@@ -232,7 +275,7 @@ def run_startup_checks():
         # Chroma (via VectorService för konsistent collection-namn)
         try:
             vector_service = get_vector_service("knowledge_base")
-            vector_count = vector_service.count()
+            vector_count = len(vector_service.document_ids())
             validera_chroma(lake_c, lake_ids)
         except Exception as e:
             LOGGER.error(f"Kunde inte läsa ChromaDB: {e}")
@@ -240,6 +283,9 @@ def run_startup_checks():
     else:
         print("\nIngen data att validera i databaserna.")
 
+    # Grafens räknare (get_stats läser dem)
+    validera_graf_statistik()
+
     # Rensa gammal logg
     rensa_gammal_logg()
 